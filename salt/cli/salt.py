@@ -44,6 +44,9 @@ class SaltCMD(parsers.SaltCMDOptionParser):
             local = salt.client.get_local_client(
                 self.get_config_file_path(),
                 skip_perm_errors=skip_perm_errors)
+            # Only the events of jobs are read, have the master leave out
+            # the others
+            local.event.set_tag_filters(salt.client.JOB_EVENT_TAGS)
         except SaltClientError as exc:
             self.exit(2, '{0}\n'.format(exc))
             return
@@ -27,6 +27,7 @@ import copy
 import errno
 import logging
 import re
+import collections
 from datetime import datetime
 
 # Import 3rd-party libs
@@ -71,6 +72,13 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# How many of the jids it published a LocalClient remembers, the job cache is
+# not asked whether these exist before their returns are collected
+PUB_JIDS_MAX = 64
+
+# The tag prefixes of the events the returns of jobs are collected from
+JOB_EVENT_TAGS = ('salt/job/', '_salt_error', 'syndic/')
+
 
 def get_local_client(
         c_path=os.path.join(syspaths.CONFIG_DIR, 'master'),
@@ -134,6 +142,7 @@ class LocalClient(object):
         self.salt_user = salt.utils.get_specific_user()
         self.skip_perm_errors = skip_perm_errors
         self.key = self.__read_master_key()
+        self._pub_jids = collections.deque(maxlen=PUB_JIDS_MAX)
         self.event = salt.utils.event.get_event(
                 'master',
                 self.opts['sock_dir'],
@@ -271,7 +280,7 @@ class LocalClient(object):
         arg = salt.utils.args.condition_input(arg, kwarg)
 
         # Subscribe to all events and subscribe as early as possible
-        self.event.subscribe(jid)
+        self.event.subscribe()
 
         try:
             pub_data = self.pub(
@@ -292,7 +301,10 @@ class LocalClient(object):
             # Convert to generic client error and pass along mesasge
             raise SaltClientError(general_exception)
 
-        return self._check_pub_data(pub_data)
+        pub_data = self._check_pub_data(pub_data)
+        if pub_data:
+            self._pub_jids.append(pub_data['jid'])
+        return pub_data
 
     def cmd_async(
             self,
@@ -857,6 +869,36 @@ class LocalClient(object):
                 else:
                     yield None
 
+    def _event_poller(self, events):
+        '''
+        Return a poller over the publish sockets of the events, or None if the
+        events can not be polled
+        '''
+        socks = [event.sub for event in events if getattr(event, 'cpub', False)]
+        if not HAS_ZMQ or not socks or \
+                self.opts.get('transport') not in ('zeromq', 'tcp'):
+            return None
+        poller = zmq.Poller()
+        for sock in socks:
+            poller.register(sock, zmq.POLLIN)
+        return poller
+
+    def _wait_events(self, poller, wait):
+        '''
+        Block for up to ``wait`` seconds until one of the polled events has data
+        to read, instead of spinning on the non blocking reads
+        '''
+        if wait <= 0:
+            return
+        if poller is None:
+            time.sleep(min(wait, 0.01))
+            return
+        try:
+            poller.poll(wait * 1000)
+        except zmq.ZMQError as exc:
+            if exc.errno != errno.EINTR:
+                raise
+
     def get_iter_returns(
             self,
             jid,
@@ -881,33 +923,57 @@ class LocalClient(object):
 
         if timeout is None:
             timeout = self.opts['timeout']
-        start = int(time.time())
+        start = time.time()
 
-        # timeouts per minion, id_ -> timeout time
+        # timeouts per minion, id_ -> timeout time, the minions which were
+        # expected from the start time out at minions_timeout_at
         minion_timeouts = {}
+        minions_timeout_at = start + timeout
 
         found = set()
-        # Check to see if the jid is real, if not return the empty dict
-        try:
-            if self.returners['{0}.get_load'.format(self.opts['master_job_cache'])](jid) == {}:
-                log.warning('jid does not exist')
-                yield {}
-                # stop the iteration, since the jid is invalid
-                raise StopIteration()
-        except Exception as exc:
-            log.warning('Returner unavailable: {exc}'.format(exc=exc))
-        # Wait for the hosts to check in
-        last_time = False
+        # number of expected minions which have not returned yet, kept up to
+        # date as returns and minion lists come in
+        outstanding = [len(minions)]
+
+        def _add_minions(ids):
+            for id_ in ids:
+                if id_ not in minions:
+                    minions.add(id_)
+                    minion_timeouts[id_] = time.time() + timeout
+                    if id_ not in found:
+                        outstanding[0] += 1
+
+        def _add_found(id_):
+            if id_ not in found:
+                found.add(id_)
+                if id_ in minions:
+                    outstanding[0] -= 1
+
+        # Check to see if the jid is real, if not return the empty dict. The
+        # jids this client published itself are known to be real, and the
+        # event bus was subscribed to before they were published.
+        if jid not in self._pub_jids:
+            try:
+                if self.returners['{0}.get_load'.format(self.opts['master_job_cache'])](jid) == {}:
+                    log.warning('jid does not exist')
+                    yield {}
+                    # stop the iteration, since the jid is invalid
+                    raise StopIteration()
+            except Exception as exc:
+                log.warning('Returner unavailable: {exc}'.format(exc=exc))
         # iterator for this job's return
         if self.opts['order_masters']:
             # If we are a MoM, we need to gather expected minions from downstreams masters.
             ret_iter = self.get_returns_no_block(jid, gather_errors=gather_errors, tags_regex='^syndic/.*/{0}'.format(jid))
         else:
             ret_iter = self.get_returns_no_block(jid, gather_errors=gather_errors)
-        # iterator for the info of this job
+        # iterator for the info of this job, the event it reads from is kept
+        # for all of the pings
         jinfo_iter = []
-        timeout_at = time.time() + timeout
-        gather_syndic_wait = time.time() + self.opts['syndic_wait']
+        jinfo_event = None
+        poller = self._event_poller([self.event])
+        timeout_at = start + timeout
+        gather_syndic_wait = start + self.opts['syndic_wait']
         # are there still minions running the job out there
         # start as True so that we ping at least once
         minions_running = True
@@ -927,15 +993,14 @@ class LocalClient(object):
                         ret = {raw['data']['id']: raw['data']['data']}
                         yield ret
                 if 'minions' in raw.get('data', {}):
-                    minions.update(raw['data']['minions'])
+                    _add_minions(raw['data']['minions'])
                     continue
                 if 'return' not in raw['data']:
                     continue
+                _add_found(raw['data']['id'])
                 if kwargs.get('raw', False):
-                    found.add(raw['data']['id'])
                     yield raw
                 else:
-                    found.add(raw['data']['id'])
                     ret = {raw['data']['id']: {'ret': raw['data']['return']}}
                     if 'out' in raw['data']:
                         ret[raw['data']['id']]['out'] = raw['data']['out']
@@ -947,11 +1012,11 @@ class LocalClient(object):
                     yield ret
 
             # if we have all of the returns (and we aren't a syndic), no need for anything fancy
-            if len(found.intersection(minions)) >= len(minions) and not self.opts['order_masters']:
+            if outstanding[0] <= 0 and not self.opts['order_masters']:
                 # All minions have returned, break out of the loop
                 log.debug('jid {0} found all minions {1}'.format(jid, found))
                 break
-            elif len(found.intersection(minions)) >= len(minions) and self.opts['order_masters']:
+            elif outstanding[0] <= 0 and self.opts['order_masters']:
                 if len(found) >= len(minions) and len(minions) > 0 and time.time() > gather_syndic_wait:
                     # There were some minions to find and we found them
                     # However, this does not imply that *all* masters have yet responded with expected minion lists.
@@ -962,34 +1027,38 @@ class LocalClient(object):
             # If we get here we may not have gathered the minion list yet. Keep waiting
             # for all lower-level masters to respond with their minion lists
 
-            # let start the timeouts for all remaining minions
-
-            for id_ in minions - found:
-                # if we have a new minion in the list, make sure it has a timeout
-                if id_ not in minion_timeouts:
-                    minion_timeouts[id_] = time.time() + timeout
-
             # if the jinfo has timed out and some minions are still running the job
             # re-do the ping
             if time.time() > timeout_at and minions_running:
-                # need our own event listener, so we don't clobber the class one
-                event = salt.utils.event.get_event(
-                        'master',
-                        self.opts['sock_dir'],
-                        self.opts['transport'],
-                        opts=self.opts,
-                        listen=not self.opts.get('__worker', False))
-                # start listening for new events, before firing off the pings
-                event.connect_pub()
-                # since this is a new ping, no one has responded yet
-                jinfo = self.gather_job_info(jid, tgt, tgt_type)
+                if jinfo_event is None:
+                    # need our own event listener, so we don't clobber the class one
+                    jinfo_event = salt.utils.event.get_event(
+                            'master',
+                            self.opts['sock_dir'],
+                            self.opts['transport'],
+                            opts=self.opts,
+                            listen=not self.opts.get('__worker', False))
+                    # start listening for new events, before firing off the pings
+                    jinfo_event.set_tag_filters(JOB_EVENT_TAGS)
+                    jinfo_event.connect_pub()
+                    poller = self._event_poller([self.event, jinfo_event])
+                # since this is a new ping, no one has responded yet. Once
+                # most of the minions returned only the ones still out there
+                # are asked, a syndic may know of minions we do not.
+                if not self.opts['order_masters'] and \
+                        0 < outstanding[0] * 2 <= len(minions):
+                    jinfo = self.gather_job_info(jid,
+                                                 sorted(minions - found),
+                                                 'list')
+                else:
+                    jinfo = self.gather_job_info(jid, tgt, tgt_type)
                 minions_running = False
                 # if we weren't assigned any jid that means the master thinks
                 # we have nothing to send
                 if 'jid' not in jinfo:
                     jinfo_iter = []
                 else:
-                    jinfo_iter = self.get_returns_no_block(jinfo['jid'], event=event)
+                    jinfo_iter = self.get_returns_no_block(jinfo['jid'], event=jinfo_event)
                 timeout_at = time.time() + self.opts['gather_job_timeout']
                 # if you are a syndic, wait a little longer
                 if self.opts['order_masters']:
@@ -1003,10 +1072,10 @@ class LocalClient(object):
 
                 # TODO: move to a library??
                 if 'minions' in raw.get('data', {}):
-                    minions.update(raw['data']['minions'])
+                    _add_minions(raw['data']['minions'])
                     continue
                 if 'syndic' in raw.get('data', {}):
-                    minions.update(raw['syndic'])
+                    _add_minions(raw['syndic'])
                     continue
                 if 'return' not in raw.get('data', {}):
                     continue
@@ -1016,8 +1085,7 @@ class LocalClient(object):
                     continue
 
                 # if we didn't originally target the minion, lets add it to the list
-                if raw['data']['id'] not in minions:
-                    minions.add(raw['data']['id'])
+                _add_minions([raw['data']['id']])
                 # update this minion's timeout, as long as the job is still running
                 minion_timeouts[raw['data']['id']] = time.time() + timeout
                 # a minion returned, so we know its running somewhere
@@ -1032,15 +1100,24 @@ class LocalClient(object):
             if done:
                 # if all minions have timeod out
                 for id_ in minions - found:
-                    if now < minion_timeouts[id_]:
+                    if now < minion_timeouts.get(id_, minions_timeout_at):
                         done = False
                         break
             if done:
                 break
 
-            # don't spin
+            # don't spin, wait for the next event or until the ping is due
             if block:
-                time.sleep(0.01)
+                if now < timeout_at:
+                    wait = min(timeout_at - now, 1)
+                elif minions_running:
+                    wait = 0
+                else:
+                    # only the minion timeouts are left to wait for
+                    wait = 1
+                if self.opts['order_masters']:
+                    wait = min(wait, max(gather_syndic_wait - now, 0.01))
+                self._wait_events(poller, wait)
             else:
                 yield
         if expect_minions:
@@ -5,6 +5,7 @@ Create ssh executor system
 # Import python libs
 from __future__ import absolute_import, print_function
 import copy
+import distutils.version  # pylint: disable=import-error,no-name-in-module
 import getpass
 import json
 import logging
@@ -46,6 +47,7 @@ from salt.utils import is_windows
 # Import 3rd-party libs
 import salt.ext.six as six
 from salt.ext.six.moves import input  # pylint: disable=import-error,redefined-builtin
+from salt.ext.six.moves import queue  # pylint: disable=import-error
 
 try:
     import zmq
@@ -169,6 +171,15 @@ class SSH(object):
             self.event = None
         self.opts = opts
         self.opts['_ssh_version'] = ssh_version()
+        # Share one connection per host between the ssh and scp commands run
+        # against it, ControlPersist needs OpenSSH 5.6
+        if self.opts.get('ssh_control_persist') \
+                and distutils.version.LooseVersion(self.opts['_ssh_version']) \
+                >= distutils.version.LooseVersion('5.6'):
+            control_path = os.path.join(self.opts['cachedir'], 'ssh_control')
+            if not os.path.isdir(control_path):
+                os.makedirs(control_path, 0o700)
+            self.opts['_ssh_control_path'] = control_path
         self.tgt_type = self.opts['selected_target_option'] \
                 if self.opts['selected_target_option'] else 'glob'
         self.roster = salt.roster.Roster(opts, opts.get('roster', 'flat'))
@@ -239,7 +250,10 @@ class SSH(object):
         self.serial = salt.payload.Serial(opts)
         self.returners = salt.loader.returners(self.opts, {})
         self.fsclient = salt.fileclient.FSClient(self.opts)
-        self.thin = salt.utils.thin.gen_thin(self.opts['cachedir'])
+        self.thin = salt.utils.thin.gen_thin(
+            self.opts['cachedir'],
+            extra_mods=self.opts.get('thin_extra_mods', ''),
+            so_mods=self.opts.get('thin_so_mods', ''))
         self.mods = mod_data(self.fsclient)
 
     def get_pubkey(self):
@@ -326,9 +340,9 @@ class SSH(object):
             return {host: stderr}
         return {host: stdout}
 
-    def handle_routine(self, que, opts, host, target, mine=False):
+    def handle_routine(self, opts, host, target, mine=False):
         '''
-        Run the routine in a "Thread", put a dict on the queue
+        Run the routine for a single target and return its return dict
         '''
         opts = copy.deepcopy(opts)
         single = Single(
@@ -359,83 +373,102 @@ class SSH(object):
                 'stderr': stderr,
                 'retcode': retcode,
             }
-        que.put(ret)
+        return ret
+
+    def handle_routines(self, num, task_que, ret_que, mine=False):
+        '''
+        Run the routines of the targets read from the task queue until a None
+        is read. Put a (worker, host, None) tuple on the return queue when a
+        routine starts and a (worker, host, return) tuple when it is done.
+        '''
+        while True:
+            task = task_que.get()
+            if task is None:
+                break
+            host, target = task
+            ret_que.put((num, host, None))
+            try:
+                ret = self.handle_routine(self.opts, host, target, mine)
+            except Exception as exc:
+                log.error(
+                    'Exception caught running salt-ssh against {0}: {1}'
+                    .format(host, exc),
+                    exc_info_on_loglevel=logging.DEBUG
+                )
+                ret = {'id': host,
+                       'ret': ('Target \'{0}\' did not return any data, '
+                               'probably due to an error.').format(host)}
+            ret_que.put((num, host, ret))
 
     def handle_ssh(self, mine=False):
         '''
-        Spin up the needed threads or processes and execute the subsequent
-        routines
+        Spin up a pool of ``ssh_max_procs`` worker processes, hand the targets
+        out to them and yield the returns as they come in
         '''
-        que = multiprocessing.Queue()
-        running = {}
-        target_iter = self.targets.__iter__()
-        returned = set()
-        rets = set()
-        init = False
         if not self.targets:
             raise salt.exceptions.SaltClientError('No matching targets found in roster.')
-        while True:
-            if len(running) < self.opts.get('ssh_max_procs', 25) and not init:
+        task_que = multiprocessing.Queue()
+        ret_que = multiprocessing.Queue()
+        for host in self.targets:
+            for default in self.defaults:
+                if default not in self.targets[host]:
+                    self.targets[host][default] = self.defaults[default]
+            task_que.put((host, self.targets[host]))
+        num_procs = max(min(int(self.opts.get('ssh_max_procs', 25)),
+                            len(self.targets)), 1)
+
+        def _start_worker(num):
+            worker = multiprocessing.Process(
+                    target=self.handle_routines,
+                    args=(num, task_que, ret_que, mine))
+            worker.start()
+            return worker
+
+        workers = []
+        for num in range(num_procs):
+            task_que.put(None)
+            workers.append(_start_worker(num))
+        pending = set(self.targets)
+        running = {}
+        try:
+            while pending:
                 try:
-                    host = next(target_iter)
-                except StopIteration:
-                    init = True
+                    num, host, ret = ret_que.get(timeout=1)
+                except queue.Empty:
+                    # Every return sent has been read, catch the targets
+                    # whose worker died before finishing them and replace the
+                    # worker, which left its None on the task queue
+                    lost = set()
+                    for num, worker in enumerate(workers):
+                        if worker.is_alive() or worker.exitcode == 0:
+                            continue
+                        if running.get(num) in pending:
+                            lost.add(running.pop(num))
+                        workers[num] = _start_worker(num)
+                    if not any(worker.is_alive() for worker in workers):
+                        lost.update(pending)
+                    for host in lost:
+                        pending.discard(host)
+                        error = ('Target \'{0}\' did not return any data, '
+                                 'probably due to an error.').format(host)
+                        log.error(error)
+                        yield {host: error}
                     continue
-                for default in self.defaults:
-                    if default not in self.targets[host]:
-                        self.targets[host][default] = self.defaults[default]
-                args = (
-                        que,
-                        self.opts,
-                        host,
-                        self.targets[host],
-                        mine,
-                        )
-                routine = multiprocessing.Process(
-                                target=self.handle_routine,
-                                args=args)
-                routine.start()
-                running[host] = {'thread': routine}
-                continue
-            ret = {}
-            try:
-                ret = que.get(False)
-                if 'id' in ret:
-                    returned.add(ret['id'])
+                if ret is None:
+                    running[num] = host
+                    continue
+                running.pop(num, None)
+                if host in pending:
+                    pending.discard(host)
                     yield {ret['id']: ret['ret']}
-            except Exception:
-                pass
-            for host in running:
-                if not running[host]['thread'].is_alive():
-                    if host not in returned:
-                        # Try to get any returns that came through since we
-                        # last checked
-                        try:
-                            while True:
-                                ret = que.get(False)
-                                if 'id' in ret:
-                                    returned.add(ret['id'])
-                                    yield {ret['id']: ret['ret']}
-                        except Exception:
-                            pass
-
-                        if host not in returned:
-                            error = ('Target \'{0}\' did not return any data, '
-                                     'probably due to an error.').format(host)
-                            ret = {'id': host,
-                                   'ret': error}
-                            log.error(error)
-                            yield {ret['id']: ret['ret']}
-                    running[host]['thread'].join()
-                    rets.add(host)
-            for host in rets:
-                if host in running:
-                    running.pop(host)
-            if len(rets) >= len(self.targets):
-                break
-            # Sleep when limit or all threads started
-            if len(running) >= self.opts.get('ssh_max_procs', 25) or len(self.targets) >= len(running):
-                time.sleep(0.1)
+        finally:
+            if pending:
+                # Stopped early, the unread targets are of no use any more
+                task_que.cancel_join_thread()
+            for worker in workers:
+                if pending:
+                    worker.terminate()
+                worker.join()
 
     def run_iter(self, mine=False):
         '''
@@ -656,7 +689,12 @@ class Single(object):
         self.serial = salt.payload.Serial(opts)
         self.wfuncs = salt.loader.ssh_wrapper(opts, None, self.context)
         self.shell = salt.client.ssh.shell.Shell(opts, **args)
-        self.thin = thin if thin else salt.utils.thin.thin_path(opts['cachedir'])
+        self.thin = thin if thin else salt.utils.thin.thin_path(
+            opts.get('_caller_cachedir', opts['cachedir']),
+            opts.get('thin_extra_mods', ''),
+            opts.get('thin_so_mods', ''))
+        # Whether the last deployment only sent the changed thin files
+        self.delta_deployed = False
 
     def __arg_comps(self):
         '''
@@ -678,14 +716,28 @@ class Single(object):
         '''
         return ''.join(['\\' + char if re.match(r'\W', char) else char for char in arg])
 
-    def deploy(self):
+    def deploy(self, manifest=None):
         '''
-        Deploy salt-thin
+        Deploy salt-thin. If the target has a thin with the given manifest id
+        only send it the files which changed since.
         '''
-        self.shell.send(
-            self.thin,
-            os.path.join(self.thin_dir, 'salt-thin.tgz'),
-        )
+        delta = None
+        if manifest:
+            delta = salt.utils.thin.gen_thin_delta(
+                self.opts.get('_caller_cachedir', self.opts['cachedir']),
+                self.thin,
+                manifest)
+        if delta:
+            self.shell.send(
+                delta,
+                os.path.join(self.thin_dir, 'salt-thin-delta.tgz'),
+            )
+        else:
+            self.shell.send(
+                self.thin,
+                os.path.join(self.thin_dir, 'salt-thin.tgz'),
+            )
+        self.delta_deployed = bool(delta)
         self.deploy_ext()
         return True
 
@@ -771,6 +823,11 @@ class Single(object):
             opts_pkg['ext_pillar'] = self.opts['ext_pillar']
             opts_pkg['extension_modules'] = self.opts['extension_modules']
             opts_pkg['_ssh_version'] = self.opts['_ssh_version']
+            if '_ssh_control_path' in self.opts:
+                opts_pkg['_ssh_control_path'] = self.opts['_ssh_control_path']
+            for opt in ('thin_extra_mods', 'thin_so_mods'):
+                if opt in self.opts:
+                    opts_pkg[opt] = self.opts[opt]
             opts_pkg['__master_opts__'] = self.context['master_opts']
             if '_caller_cachedir' in self.opts:
                 opts_pkg['_caller_cachedir'] = self.opts['_caller_cachedir']
@@ -872,7 +929,11 @@ class Single(object):
             cachedir = self.opts['_caller_cachedir']
         else:
             cachedir = self.opts['cachedir']
-        thin_sum = salt.utils.thin.thin_sum(cachedir, 'sha1')
+        thin_sum = salt.utils.thin.thin_sum(
+            cachedir,
+            'sha1',
+            self.opts.get('thin_extra_mods', ''),
+            self.opts.get('thin_so_mods', ''))
         debug = ''
         if not self.opts.get('log_level'):
             self.opts['log_level'] = 'info'
@@ -892,6 +953,7 @@ OPTIONS.version = '{5}'
 OPTIONS.ext_mods = '{6}'
 OPTIONS.wipe = {7}
 OPTIONS.tty = {8}
+OPTIONS.manifest = '{10}'
 ARGS = {9}\n'''.format(self.minion_config,
                          RSTR,
                          self.thin_dir,
@@ -901,7 +963,8 @@ ARGS = {9}\n'''.format(self.minion_config,
                          self.mods.get('version', ''),
                          self.wipe,
                          self.tty,
-                         self.argv)
+                         self.argv,
+                         salt.utils.thin.thin_manifest_id(self.thin))
         py_code = SSH_PY_SHIM.replace('#%%OPTS', arg_str)
         py_code_enc = py_code.encode('base64')
 
@@ -1004,9 +1067,24 @@ ARGS = {9}\n'''.format(self.minion_config,
             # is a SHIM command for the master.
             shim_command = re.split(r'\r?\n', stdout, 1)[0].strip()
             log.debug('SHIM retcode({0}) and command: {1}'.format(retcode, shim_command))
-            if 'deploy' == shim_command and retcode == salt.defaults.exitcodes.EX_THIN_DEPLOY:
-                self.deploy()
+            shim_command, _, manifest = shim_command.partition(' ')
+            if shim_command in ('deploy', 'deploy_delta') \
+                    and retcode == salt.defaults.exitcodes.EX_THIN_DEPLOY:
+                self.deploy(manifest)
                 stdout, stderr, retcode = self.shim_cmd(cmd_str)
+                if self.delta_deployed \
+                        and retcode == salt.defaults.exitcodes.EX_THIN_DEPLOY \
+                        and re.search(RSTR_RE, stdout) \
+                        and not re.search(RSTR_RE, stderr):
+                    # The thin delta did not verify on the target, which
+                    # cleared its thin and asks for the full one
+                    shim_command = re.split(
+                        r'\r?\n', re.split(RSTR_RE, stdout, 1)[1].strip(), 1)[0]
+                    if shim_command.strip() == 'deploy':
+                        log.debug('Thin delta failed on {0}, deploying the '
+                                  'full thin'.format(self.target['host']))
+                        self.deploy()
+                        stdout, stderr, retcode = self.shim_cmd(cmd_str)
                 if not re.search(RSTR_RE, stdout) or not re.search(RSTR_RE, stderr):
                     if not self.tty:
                         # If RSTR is not seen in both stdout and stderr then there
@@ -22,6 +22,8 @@ log = logging.getLogger(__name__)
 
 SSH_PASSWORD_PROMPT_RE = re.compile(r'(?:.*)[Pp]assword(?: for .*)?:', re.M)
 KEY_VALID_RE = re.compile(r'.*\(yes\/no\).*')
+# Longest path a unix socket can be bound to on all platforms
+CONTROL_PATH_MAX = 103
 
 
 class NoPasswdError(Exception):
@@ -112,21 +114,42 @@ class Shell(object):
             options.append('User={0}'.format(self.user))
         if self.identities_only:
             options.append('IdentitiesOnly=yes')
+        options.extend(self._control_opts())
 
         ret = []
         for option in options:
             ret.append('-o {0} '.format(option))
         return ''.join(ret)
 
+    def _control_opts(self):
+        '''
+        Return the options which make the commands run against the host share
+        one connection, kept open for ``ssh_control_persist`` seconds after
+        the last of them exits
+        '''
+        control_path = self.opts.get('_ssh_control_path')
+        if not control_path:
+            return []
+        sock = os.path.join(
+            control_path,
+            '{0}@{1}:{2}'.format(self.user, self.host, self.port)
+        )
+        if len(sock) > CONTROL_PATH_MAX:
+            log.debug(
+                'ControlPath {0} is too long for a socket, not sharing the '
+                'connection to {1}'.format(sock, self.host)
+            )
+            return []
+        return ['ControlMaster=auto',
+                'ControlPath={0}'.format(sock),
+                'ControlPersist={0}'.format(
+                    int(self.opts['ssh_control_persist']))]
+
     def _passwd_opts(self):
         '''
         Return options to pass to ssh
         '''
-        # TODO ControlMaster does not work without ControlPath
-        # user could take advantage of it if they set ControlPath in their
-        # ssh config.  Also, ControlPersist not widely available.
-        options = ['ControlMaster=auto',
-                   'StrictHostKeyChecking=no',
+        options = ['StrictHostKeyChecking=no',
                    ]
         if self.opts['_ssh_version'] > '4.9':
             options.append('GSSAPIAuthentication=no')
@@ -149,6 +172,9 @@ class Shell(object):
             options.append('User={0}'.format(self.user))
         if self.identities_only:
             options.append('IdentitiesOnly=yes')
+        # ControlMaster does not work without ControlPath, which is only set
+        # when the connections are shared
+        options.extend(self._control_opts() or ['ControlMaster=auto'])
 
         ret = []
         for option in options:
@@ -18,6 +18,8 @@ import os
 import stat
 
 THIN_ARCHIVE = 'salt-thin.tgz'
+THIN_DELTA_ARCHIVE = 'salt-thin-delta.tgz'
+THIN_MANIFEST = 'thin_manifest'
 EXT_ARCHIVE = 'salt-ext_mods.tgz'
 
 # Keep these in sync with salt/exitcodes.py
@@ -86,14 +88,78 @@ def get_hash(path, form='sha1', chunk_size=4096):
         return hash_obj.hexdigest()
 
 
+def read_manifest(path):
+    """Return a dict mapping the paths in a thin manifest to their hashes."""
+    ret = {}
+    with open(path, 'r') as mfile:
+        for line in mfile:
+            digest, _, name = line.rstrip('\n').partition(' ')
+            if name:
+                ret[name] = digest
+    return ret
+
+
+def remove_thin_files(names):
+    """Remove files of a previously deployed thin."""
+    for name in names:
+        try:
+            os.unlink(os.path.join(OPTIONS.saltdir, name))
+        except OSError:
+            pass
+
+
+def need_delta(manifest_path):
+    """
+    Salt thin is out of date - emit the delimiter, the command asking for the
+    files which changed since the deployed thin, identified by the hash of its
+    manifest, and the exit code that signals a required deployment.
+    """
+    sys.stdout.write("{0}\ndeploy_delta {1}\n".format(
+        OPTIONS.delimiter, get_hash(manifest_path, 'sha1')))
+    sys.exit(EX_THIN_DEPLOY)
+
+
 def unpack_thin(thin_path):
     """Unpack the Salt thin archive."""
+    # Clear out the files of the thin this one replaces
+    manifest_path = os.path.join(OPTIONS.saltdir, THIN_MANIFEST)
+    if os.path.isfile(manifest_path):
+        remove_thin_files(read_manifest(manifest_path))
     tfile = tarfile.TarFile.gzopen(thin_path)
     tfile.extractall(path=OPTIONS.saltdir)
     tfile.close()
     os.unlink(thin_path)
 
 
+def unpack_thin_delta(delta_path):
+    """
+    Unpack the files which changed since the deployed thin over it and remove
+    those which are gone. Fall back to a full deployment if the result does
+    not match the manifest of the current thin.
+    """
+    manifest_path = os.path.join(OPTIONS.saltdir, THIN_MANIFEST)
+    old_manifest = {}
+    if os.path.isfile(manifest_path):
+        old_manifest = read_manifest(manifest_path)
+    tfile = tarfile.TarFile.gzopen(delta_path)
+    tfile.extractall(path=OPTIONS.saltdir)
+    tfile.close()
+    os.unlink(delta_path)
+    if get_hash(manifest_path, 'sha1') != OPTIONS.manifest:
+        sys.stderr.write('WARNING: thin delta has the wrong manifest\n')
+        need_deployment()
+    manifest = read_manifest(manifest_path)
+    remove_thin_files(set(old_manifest) - set(manifest))
+    for name, digest in manifest.items():
+        path = os.path.join(OPTIONS.saltdir, name)
+        if not os.path.isfile(path) or get_hash(path, 'sha1') != digest:
+            sys.stderr.write(
+                'WARNING: checksum mismatch for "{0}" after applying thin '
+                'delta\n'.format(path)
+            )
+            need_deployment()
+
+
 def need_ext():
     """Signal that external modules need to be deployed."""
     sys.stdout.write("{0}\next_mods\n".format(OPTIONS.delimiter))
@@ -122,6 +188,8 @@ def unpack_ext(ext_path):
 def main(argv):  # pylint: disable=W0613
     """Main program body"""
     thin_path = os.path.join(OPTIONS.saltdir, THIN_ARCHIVE)
+    delta_path = os.path.join(OPTIONS.saltdir, THIN_DELTA_ARCHIVE)
+    manifest_path = os.path.join(OPTIONS.saltdir, THIN_MANIFEST)
     if os.path.isfile(thin_path):
         if OPTIONS.checksum != get_hash(thin_path, OPTIONS.hashfunc):
             sys.stderr.write('{0}\n'.format(OPTIONS.checksum))
@@ -131,6 +199,9 @@ def main(argv):  # pylint: disable=W0613
             sys.exit(EX_THIN_CHECKSUM)
         unpack_thin(thin_path)
         # Salt thin now is available to use
+    elif os.path.isfile(delta_path):
+        unpack_thin_delta(delta_path)
+        # Salt thin now is up-to-date
     else:
         if not os.path.exists(OPTIONS.saltdir):
             need_deployment()
@@ -158,7 +229,13 @@ def main(argv):  # pylint: disable=W0613
                     cur_version, OPTIONS.version
                 )
             )
+            if OPTIONS.manifest and os.path.isfile(manifest_path):
+                need_delta(manifest_path)
             need_deployment()
+        if OPTIONS.manifest and os.path.isfile(manifest_path) \
+                and get_hash(manifest_path, 'sha1') != OPTIONS.manifest:
+            # Same version, but built with other modules
+            need_delta(manifest_path)
         # Salt thin exists and is up-to-date - fall through and use it
 
     salt_call_path = os.path.join(OPTIONS.saltdir, 'salt-call')
@@ -225,6 +225,15 @@ VALID_OPTS = {
     # Whether or not processes should be forked when needed. The altnerative is to use threading.
     'multiprocessing': bool,
 
+    # The number of pre-forked processes running the jobs of a minion, 0 starts a process per job
+    'worker_pool_size': int,
+
+    # The number of jobs a pooled worker runs before it is replaced, 0 never replaces it
+    'worker_pool_max_jobs': int,
+
+    # Kill the jobs running in the worker pool for longer than this many seconds, 0 never kills them
+    'worker_pool_job_timeout': int,
+
     # Schedule a mine update every n number of seconds
     'mine_interval': int,
 
@@ -237,6 +246,18 @@ VALID_OPTS = {
     # The chunk size to use when streaming files with the file server
     'file_buffer_size': int,
 
+    # The largest file, in bytes, whose contents are inlined in the response
+    # to a batched file server request
+    'file_batch_inline_size': int,
+
+    # The largest amount of file contents, in bytes, inlined in the response
+    # to a single batched file server request
+    'file_batch_max_size': int,
+
+    # The number of files the minion requests from the file server at once
+    # when caching several files
+    'file_batch_paths': int,
+
     # The TCP port on which minion events should be published if ipc_mode is TCP
     'tcp_pub_port': int,
 
@@ -289,6 +310,10 @@ VALID_OPTS = {
     # Tell the loader to attempt to import *.pyx cython files if cython is available
     'cython_enable': bool,
 
+    # The number of seconds the loader trusts the manifest it caches of the module dirs and
+    # of the modules whose __virtual__ function declined to load them. 0 disables the manifest
+    'loader_manifest_ttl': int,
+
     # Tell the client to show minions that have timed out
     'show_timeout': bool,
 
@@ -298,6 +323,16 @@ VALID_OPTS = {
     # Tells the highstate outputter to show successful states. False will omit successes.
     'state_verbose': bool,
 
+    # Run the states whose requisites are met in parallel with each other
+    'state_parallel': bool,
+
+    # The number of states run at the same time when state_parallel is enabled
+    'state_parallel_workers': int,
+
+    # Cache the rendered SLS and top files, and reuse them while their sources
+    # and the grains and pillar they are rendered with are unchanged
+    'state_render_cache': bool,
+
     # Specify the format for state outputs. See highstate outputter for additional details.
     'state_output': str,
 
@@ -364,12 +399,25 @@ VALID_OPTS = {
     # specified by 'event_return'
     'event_return_queue': int,
 
+    # The number of bytes of events to queue up before pushing them to the event returner
+    'event_return_queue_bytes': int,
+
+    # The longest time in seconds an event waits in the queue before it is pushed to the event returner
+    'event_return_flush_interval': float,
+
+    # The largest size in bytes of the spool that keeps events the event returner failed to store
+    'event_return_spool_max_size': int,
+
     # Only forward events to an event returner if it matches one of the tags in this list
     'event_return_whitelist': list,
 
     # Events matching a tag in this list should never be sent to an event returner.
     'event_return_blacklist': list,
 
+    # Publish the counters of the master event publisher every this many
+    # seconds, 0 disables it
+    'event_publisher_stats_interval': int,
+
     # The file cache for the win_pkg module
     'win_repo_cachefile': str,
 
@@ -433,6 +481,16 @@ VALID_OPTS = {
     'gitfs_passphrase': str,
     'gitfs_env_whitelist': list,
     'gitfs_env_blacklist': list,
+
+    # The number of gitfs remotes fetched at the same time on a fileserver update
+    'gitfs_update_workers': int,
+
+    # The number of seconds a fileserver update waits for a gitfs fetch
+    'gitfs_update_timeout': float,
+
+    # Wait up to this many seconds, at random, before fetching each gitfs remote
+    'gitfs_update_jitter': float,
+
     'hgfs_remotes': list,
     'hgfs_mountpoint': str,
     'hgfs_root': str,
@@ -465,6 +523,27 @@ VALID_OPTS = {
 
     'pillar_safe_render_error': bool,
     'pillar_source_merging_strategy': str,
+
+    # Keep the compiled pillar data of the minions in memory on the master
+    'pillar_cache': bool,
+
+    # The number of seconds compiled pillar data is kept for
+    'pillar_cache_ttl': int,
+
+    # Per ext_pillar limits, in seconds, of the time pillar data including it
+    # is kept for
+    'pillar_cache_ext_ttl': dict,
+
+    # The ext_pillars returning the same data for every minion, their data is
+    # memoized and shared between the minions
+    'pillar_cache_ext_shared': list,
+
+    # The number of seconds between checks of pillar_roots for changed files
+    'pillar_cache_roots_interval': int,
+
+    # Fire the counters of the pillar cache every this many seconds, 0 disables it
+    'pillar_cache_stats_interval': int,
+
     'ping_on_rotate': bool,
     'peer': dict,
     'preserve_minion_cache': bool,
@@ -511,12 +590,31 @@ VALID_OPTS = {
     # that it receives
     'master_job_cache': str,
 
+    # Write the job cache from a dedicated process instead of from the master workers
+    'job_cache_writer': bool,
+
+    # The number of returns which can wait for the job cache writer before the workers block
+    'job_cache_writer_queue': int,
+
+    # The most returns the job cache writer commits to the job cache at once
+    'job_cache_writer_batch': int,
+
+    # How long a worker waits on a full job cache writer queue before writing the return itself
+    'job_cache_writer_timeout': float,
+
     # The minion data cache is a cache of information about the minions stored on the master.
     # This information is primarily the pillar and grains data. The data is cached in the master
     # cachedir under the name of the minion and used to predetermine what minions are expected to
     # reply from executions.
     'minion_data_cache': bool,
 
+    # Resolve grain and pillar targets against an inverted index of the minion data cache instead
+    # of reading the cached data of every minion
+    'minion_data_index': bool,
+
+    # The size in bytes past which the minion data index journal is compacted into a new snapshot
+    'minion_data_index_journal_size': int,
+
     # The number of seconds between AES key rotations on the master
     'publish_session': int,
 
@@ -555,6 +653,13 @@ VALID_OPTS = {
     # The number of minutes between the minion refreshing its cache of grains
     'grains_refresh_every': int,
 
+    # The number of threads the grain functions are called in
+    'grains_workers': int,
+
+    # The number of seconds to cache the return of each grain function for,
+    # keyed by the grain function
+    'grains_cache_ttls': dict,
+
     # Use lspci to gather system data for grains on a minion
     'enable_lspci': bool,
 
@@ -569,6 +674,10 @@ VALID_OPTS = {
     # If this is set to True the first newline after a Jinja block is removed
     'jinja_trim_blocks': bool,
 
+    # Reuse Jinja environments between renders and keep compiled templates in
+    # a bytecode cache under the cachedir
+    'jinja_env_cache': bool,
+
     # FIXME Appears to be unused
     'minion_id_caching': bool,
 
@@ -620,6 +729,15 @@ VALID_OPTS = {
     'ssh_scan_timeout': float,
     'ssh_identities_only': bool,
 
+    # Comma separated lists of the extra python modules and shared objects
+    # to include in the thin salt-ssh deploys
+    'thin_extra_mods': str,
+    'thin_so_mods': str,
+
+    # The number of seconds salt-ssh keeps the connection to a host open for
+    # later commands to reuse, 0 opens a new connection for every command
+    'ssh_control_persist': int,
+
     # Enable ioflo verbose logging. Warning! Very verbose!
     'ioflo_verbose': int,
 
@@ -657,6 +775,16 @@ VALID_OPTS = {
     # in large setups.
     'max_minions': int,
 
+    # The number of MWorkers which may authenticate minions at the same time, the minions which
+    # authenticate while that many are busy are asked to retry later. 0 means all of them
+    'auth_max_workers': int,
+
+    # The number of parsed minion public keys each MWorker keeps in memory, 0 keeps none
+    'auth_key_cache_size': int,
+
+    # Fire the counters of the minion authentications every this many seconds, 0 disables it
+    'auth_stats_interval': int,
+
 
     'username': str,
     'password': str,
@@ -664,6 +792,14 @@ VALID_OPTS = {
     # Use zmq.SUSCRIBE to limit listening sockets to only process messages bound for them
     'zmq_filtering': bool,
 
+    # Deliver a publish only to the minions the master matched its target to, unless it matched
+    # more minions than this. 0 always broadcasts publishes which don't target a list
+    'targeted_publish_max': int,
+
+    # Also deliver publishes targeting grains, pillar or other minion data only to the minions
+    # matched in the master's cache of that data
+    'targeted_publish_minion_data': bool,
+
     # Connection caching. Can greatly speed up salt performance.
     'con_cache': bool,
     'rotate_aes_key': bool,
@@ -702,6 +838,8 @@ DEFAULT_MINION_OPTS = {
     'cache_jobs': False,
     'grains_cache': False,
     'grains_cache_expiration': 300,
+    'grains_cache_ttls': {},
+    'grains_workers': 1,
     'conf_file': os.path.join(salt.syspaths.CONFIG_DIR, 'minion'),
     'sock_dir': os.path.join(salt.syspaths.SOCK_DIR, 'minion'),
     'backup_mode': '',
@@ -743,6 +881,9 @@ DEFAULT_MINION_OPTS = {
     'gitfs_passphrase': '',
     'gitfs_env_whitelist': [],
     'gitfs_env_blacklist': [],
+    'gitfs_update_workers': 4,
+    'gitfs_update_timeout': 300.0,
+    'gitfs_update_jitter': 0.0,
     'hash_type': 'md5',
     'disable_modules': [],
     'disable_returners': [],
@@ -760,10 +901,14 @@ DEFAULT_MINION_OPTS = {
     'auto_accept': True,
     'autosign_timeout': 120,
     'multiprocessing': _DFLT_MULTIPROCESSING_MODE,
+    'worker_pool_size': 0,
+    'worker_pool_max_jobs': 100,
+    'worker_pool_job_timeout': 0,
     'mine_interval': 60,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipv6': False,
     'file_buffer_size': 262144,
+    'file_batch_paths': 100,
     'tcp_pub_port': 4510,
     'tcp_pull_port': 4511,
     'log_file': os.path.join(salt.syspaths.LOGS_DIR, 'minion'),
@@ -778,11 +923,16 @@ DEFAULT_MINION_OPTS = {
     'test': False,
     'ext_job_cache': '',
     'cython_enable': False,
+    'loader_manifest_ttl': 0,
     'state_verbose': True,
     'state_output': 'full',
     'state_auto_order': True,
     'state_events': False,
     'state_aggregate': False,
+    'state_parallel': False,
+    'state_parallel_workers': 4,
+    'state_render_cache': False,
+    'jinja_env_cache': False,
     'acceptance_wait_time': 10,
     'acceptance_wait_time_max': 0,
     'rejected_retry': False,
@@ -878,6 +1028,9 @@ DEFAULT_MASTER_OPTS = {
     'gitfs_passphrase': '',
     'gitfs_env_whitelist': [],
     'gitfs_env_blacklist': [],
+    'gitfs_update_workers': 4,
+    'gitfs_update_timeout': 300.0,
+    'gitfs_update_jitter': 0.0,
     'hgfs_remotes': [],
     'hgfs_mountpoint': '',
     'hgfs_root': '',
@@ -905,6 +1058,12 @@ DEFAULT_MASTER_OPTS = {
     'pillar_opts': False,
     'pillar_safe_render_error': True,
     'pillar_source_merging_strategy': 'smart',
+    'pillar_cache': False,
+    'pillar_cache_ttl': 3600,
+    'pillar_cache_ext_ttl': {},
+    'pillar_cache_ext_shared': [],
+    'pillar_cache_roots_interval': 10,
+    'pillar_cache_stats_interval': 0,
     'ping_on_rotate': False,
     'peer': {},
     'preserve_minion_cache': False,
@@ -920,6 +1079,8 @@ DEFAULT_MASTER_OPTS = {
     'file_recv': False,
     'file_recv_max_size': 100,
     'file_buffer_size': 1048576,
+    'file_batch_inline_size': 1048576,
+    'file_batch_max_size': 16777216,
     'file_ignore_regex': None,
     'file_ignore_glob': None,
     'fileserver_backend': ['roots'],
@@ -939,7 +1100,13 @@ DEFAULT_MASTER_OPTS = {
     'job_cache': True,
     'ext_job_cache': '',
     'master_job_cache': 'local_cache',
+    'job_cache_writer': False,
+    'job_cache_writer_queue': 10000,
+    'job_cache_writer_batch': 500,
+    'job_cache_writer_timeout': 5.0,
     'minion_data_cache': True,
+    'minion_data_index': True,
+    'minion_data_index_journal_size': 10485760,
     'enforce_mine_cache': False,
     'ipc_mode': _DFLT_IPC_MODE,
     'ipv6': False,
@@ -964,8 +1131,12 @@ DEFAULT_MASTER_OPTS = {
     'reactor_worker_hwm': 10000,
     'event_return': '',
     'event_return_queue': 0,
+    'event_return_queue_bytes': 0,
+    'event_return_flush_interval': 5.0,
+    'event_return_spool_max_size': 104857600,
     'event_return_whitelist': [],
     'event_return_blacklist': [],
+    'event_publisher_stats_interval': 0,
     'serial': 'msgpack',
     'state_verbose': True,
     'state_output': 'full',
@@ -977,6 +1148,7 @@ DEFAULT_MASTER_OPTS = {
     'loop_interval': 60,
     'nodegroups': {},
     'cython_enable': False,
+    'loader_manifest_ttl': 0,
     'enable_gpu_grains': False,
     # XXX: Remove 'key_logfile' support in 2014.1.0
     'key_logfile': os.path.join(salt.syspaths.LOGS_DIR, 'key'),
@@ -990,6 +1162,7 @@ DEFAULT_MASTER_OPTS = {
     'syndic_wait': 5,
     'jinja_lstrip_blocks': False,
     'jinja_trim_blocks': False,
+    'jinja_env_cache': False,
     'sign_pub_messages': False,
     'keysize': 2048,
     'transport': 'zeromq',
@@ -1006,6 +1179,9 @@ DEFAULT_MASTER_OPTS = {
     'ssh_scan_ports': '22',
     'ssh_scan_timeout': 0.01,
     'ssh_identities_only': False,
+    'ssh_control_persist': 0,
+    'thin_extra_mods': '',
+    'thin_so_mods': '',
     'master_floscript': os.path.join(FLO_DIR, 'master.flo'),
     'worker_floscript': os.path.join(FLO_DIR, 'worker.flo'),
     'maintenance_floscript': os.path.join(FLO_DIR, 'maint.flo'),
@@ -1027,11 +1203,16 @@ DEFAULT_MASTER_OPTS = {
     'queue_dirs': [],
     'cli_summary': False,
     'max_minions': 0,
+    'auth_max_workers': 0,
+    'auth_key_cache_size': 10000,
+    'auth_stats_interval': 0,
     'master_sign_key_name': 'master_sign',
     'master_sign_pubkey': False,
     'master_pubkey_signature': 'master_pubkey_signature',
     'master_use_pubkey_signature': False,
     'zmq_filtering': False,
+    'targeted_publish_max': 1000,
+    'targeted_publish_minion_data': False,
     'zmq_monitor': False,
     'con_cache': False,
     'rotate_aes_key': True,
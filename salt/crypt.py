@@ -10,6 +10,7 @@ import os
 import sys
 import time
 import hmac
+import random
 import hashlib
 import logging
 import traceback
@@ -45,6 +46,9 @@ import tornado.gen
 
 log = logging.getLogger(__name__)
 
+# The private keys read by get_rsa_key, path -> (mtime, key)
+RSA_KEYS = {}
+
 
 def dropfile(cachedir, user=None):
     '''
@@ -110,13 +114,27 @@ def gen_keys(keydir, keyname, keysize, user=None):
     return priv
 
 
+def get_rsa_key(path):
+    '''
+    Read a private key off the disk. The key is kept in memory and read
+    again only when the file changes.
+    '''
+    mtime = os.path.getmtime(path)
+    cached = RSA_KEYS.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    log.debug('salt.crypt.get_rsa_key: Loading private key')
+    with salt.utils.fopen(path) as f:
+        key = RSA.importKey(f.read())
+    RSA_KEYS[path] = (mtime, key)
+    return key
+
+
 def sign_message(privkey_path, message):
     '''
     Use Crypto.Signature.PKCS1_v1_5 to sign a message. Returns the signature.
     '''
-    log.debug('salt.crypt.sign_message: Loading private key')
-    with salt.utils.fopen(privkey_path) as f:
-        key = RSA.importKey(f.read())
+    key = get_rsa_key(privkey_path)
     log.debug('salt.crypt.sign_message: Signing message.')
     signer = PKCS1_v1_5.new(key)
     return signer.sign(SHA.new(message))
@@ -292,6 +310,17 @@ class MasterKeys(dict):
         return self.pub_signature
 
 
+def _retry_wait(creds, acceptance_wait_time):
+    '''
+    Return the seconds to wait before signing in again. A master which is
+    busy authenticating other minions gets the retries of its minions spread
+    over the wait, so they do not all come back at once.
+    '''
+    if creds == 'busy':
+        return round(random.uniform(1, max(acceptance_wait_time, 1)), 1)
+    return acceptance_wait_time
+
+
 class AsyncAuth(object):
     '''
     Set up an Async object to maintain authentication with the salt master
@@ -432,14 +461,15 @@ class AsyncAuth(object):
                 creds = yield self.sign_in()
             except SaltClientError:
                 break
-            if creds == 'retry':
-                if self.opts.get('caller'):
+            if creds in ('retry', 'busy'):
+                if creds == 'retry' and self.opts.get('caller'):
                     print('Minion failed to authenticate with the master, '
                           'has the minion key been accepted?')
                     sys.exit(2)
-                if acceptance_wait_time:
-                    log.info('Waiting {0} seconds before retry.'.format(acceptance_wait_time))
-                    yield tornado.gen.sleep(acceptance_wait_time)
+                wait = _retry_wait(creds, acceptance_wait_time)
+                if wait:
+                    log.info('Waiting {0} seconds before retry.'.format(wait))
+                    yield tornado.gen.sleep(wait)
                 if acceptance_wait_time < acceptance_wait_time_max:
                     acceptance_wait_time += acceptance_wait_time
                     log.debug('Authentication wait time is {0}'.format(acceptance_wait_time))
@@ -530,6 +560,11 @@ class AsyncAuth(object):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     raise tornado.gen.Return('full')
+                # is the master busy authenticating other minions?
+                elif payload['load']['ret'] == 'busy':
+                    log.info('The Salt Master is busy authenticating other '
+                             'minions, this minion will try again later')
+                    raise tornado.gen.Return('busy')
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -955,14 +990,15 @@ class SAuth(AsyncAuth):
             acceptance_wait_time_max = acceptance_wait_time
         while True:
             creds = self.sign_in()
-            if creds == 'retry':
-                if self.opts.get('caller'):
+            if creds in ('retry', 'busy'):
+                if creds == 'retry' and self.opts.get('caller'):
                     print('Minion failed to authenticate with the master, '
                           'has the minion key been accepted?')
                     sys.exit(2)
-                if acceptance_wait_time:
-                    log.info('Waiting {0} seconds before retry.'.format(acceptance_wait_time))
-                    time.sleep(acceptance_wait_time)
+                wait = _retry_wait(creds, acceptance_wait_time)
+                if wait:
+                    log.info('Waiting {0} seconds before retry.'.format(wait))
+                    time.sleep(wait)
                 if acceptance_wait_time < acceptance_wait_time_max:
                     acceptance_wait_time += acceptance_wait_time
                     log.debug('Authentication wait time is {0}'.format(acceptance_wait_time))
@@ -1040,6 +1076,11 @@ class SAuth(AsyncAuth):
                 # has the master returned that its maxed out with minions?
                 elif payload['load']['ret'] == 'full':
                     return 'full'
+                # is the master busy authenticating other minions?
+                elif payload['load']['ret'] == 'busy':
+                    log.info('The Salt Master is busy authenticating other '
+                             'minions, this minion will try again later')
+                    return 'busy'
                 else:
                     log.error(
                         'The Salt Master has cached the public key for this '
@@ -32,6 +32,7 @@ import salt.utils.atomicfile
 import salt.utils.event
 import salt.utils.verify
 import salt.utils.minions
+import salt.utils.minion_index
 import salt.utils.gzip_util
 import salt.utils.jid
 from salt.pillar import git_pillar
@@ -177,6 +178,20 @@ def clean_old_jobs(opts):
         mminion.returners[fstr]()
 
 
+def compact_minion_index(opts):
+    '''
+    Fold the minion data index journal into a new snapshot once it grows too
+    large
+    '''
+    if not opts.get('minion_data_cache', False):
+        return
+    try:
+        salt.utils.minion_index.MinionIndex(opts).compact(
+            opts.get('minion_data_index_journal_size', 10485760))
+    except Exception as exc:
+        log.error('Unable to compact the minion data index: {0}'.format(exc))
+
+
 def access_keys(opts):
     '''
     A key needs to be placed in the filesystem with permissions 0400 so
@@ -392,6 +407,7 @@ class RemoteFuncs(object):
                 listen=False)
         self.serial = salt.payload.Serial(opts)
         self.ckminions = salt.utils.minions.CkMinions(opts)
+        self.minion_index = salt.utils.minion_index.MinionIndex(opts)
         # Create the tops dict for loading external top data
         self.tops = salt.loader.tops(self.opts)
         # Make a client
@@ -409,6 +425,7 @@ class RemoteFuncs(object):
         '''
         fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = fs_.serve_file
+        self._serve_files = fs_.serve_files
         self._file_hash = fs_.file_hash
         self._file_list = fs_.file_list
         self._file_list_emptydirs = fs_.file_list_emptydirs
@@ -686,16 +703,17 @@ class RemoteFuncs(object):
         '''
         if any(key not in load for key in ('id', 'grains')):
             return False
-        pillar = salt.pillar.Pillar(
+        pillar_dirs = {}
+        data = salt.pillar.compile_cached_pillar(
                 self.opts,
                 load['grains'],
                 load['id'],
                 load.get('saltenv', load.get('env')),
                 load.get('ext'),
                 self.mminion.functions,
-                pillar=load.get('pillar_override', {}))
-        pillar_dirs = {}
-        data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
+                pillar=load.get('pillar_override', {}),
+                pillar_dirs=pillar_dirs,
+                refresh=load.get('refresh', False))
         if self.opts.get('minion_data_cache', False):
             cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
             if not os.path.isdir(cdir):
@@ -711,6 +729,9 @@ class RemoteFuncs(object):
                             )
             # On Windows, os.rename will fail if the destination file exists.
             salt.utils.atomicfile.atomic_rename(tmpfname, datap)
+            self.minion_index.update(
+                load['id'],
+                {'grains': load['grains'], 'pillar': data})
         return data
 
     def _minion_event(self, load):
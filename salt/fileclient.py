@@ -28,6 +28,9 @@ import salt.utils.gzip_util
 import salt.utils.http
 from salt.utils.openstack.swift import SaltSwift
 
+# Import 3rd-party libs
+import salt.ext.six as six
+
 # pylint: disable=no-name-in-module,import-error
 import salt.ext.six.moves.BaseHTTPServer as BaseHTTPServer
 from salt.ext.six.moves.urllib.error import HTTPError, URLError
@@ -189,10 +192,10 @@ class Client(object):
             # Backwards compatibility
             saltenv = env
 
-        ret = []
-        for path in self.file_list(saltenv):
-            ret.append(self.cache_file(salt.utils.url.create(path), saltenv))
-        return ret
+        return self.cache_files(
+            [salt.utils.url.create(path) for path in self.file_list(saltenv)],
+            saltenv
+        )
 
     def cache_dir(self, path, saltenv='base', include_empty=False,
                   include_pat=None, exclude_pat=None, env=None):
@@ -225,13 +228,15 @@ class Client(object):
         )
         # go through the list of all files finding ones that are in
         # the target directory and caching them
+        urls = []
         for fn_ in self.file_list(saltenv):
             if fn_.strip() and fn_.startswith(path):
                 if salt.utils.check_include_exclude(
                         fn_, include_pat, exclude_pat):
-                    fn_ = self.cache_file(salt.utils.url.create(fn_), saltenv)
-                    if fn_:
-                        ret.append(fn_)
+                    urls.append(salt.utils.url.create(fn_))
+        for fn_ in self.cache_files(urls, saltenv):
+            if fn_:
+                ret.append(fn_)
 
         if include_empty:
             # Break up the path into a list containing the bottom-level
@@ -1106,6 +1111,123 @@ class RemoteClient(Client):
 
         return dest
 
+    def cache_files(self, paths, saltenv='base', env=None):
+        '''
+        Download a list of files stored on the master and put them in the
+        minion file cache
+
+        The files are requested from the master in batches of
+        ``file_batch_paths`` paths. A single request returns the hashes of the
+        whole batch along with the contents of the small files, files already
+        up to date in the cache are not transferred and only the files too
+        large to be inlined are pulled down with ``get_file``.
+        '''
+        if env is not None:
+            salt.utils.warn_until(
+                'Boron',
+                'Passing a salt environment should be done using \'saltenv\' '
+                'not \'env\'. This functionality will be removed in Salt '
+                'Boron.'
+            )
+            # Backwards compatibility
+            saltenv = env
+
+        if isinstance(paths, str):
+            paths = paths.split(',')
+        ret = [None] * len(paths)
+        # Group the salt:// paths by environment, anything else goes through
+        # cache_file
+        batches = {}
+        for idx, url in enumerate(paths):
+            if not url.startswith('salt://'):
+                ret[idx] = self.cache_file(url, saltenv)
+                continue
+            path, senv = salt.utils.url.split_env(url)
+            batches.setdefault(senv or saltenv, []).append(
+                (idx, url, self._check_proto(path))
+            )
+
+        batch_size = max(int(self.opts.get('file_batch_paths', 100)), 1)
+        for senv, items in six.iteritems(batches):
+            for pos in range(0, len(items), batch_size):
+                batch = items[pos:pos + batch_size]
+                for idx, dest in self._cache_batch(batch, senv):
+                    ret[idx] = dest
+        return ret
+
+    def _cache_batch(self, batch, saltenv):
+        '''
+        Cache a batch of files from a single environment with one
+        ``_serve_files`` request, yields the index and the cached location of
+        every file in the batch
+        '''
+        hash_type = self.opts.get('hash_type', 'md5')
+        hashes = {}
+        for _, _, path in batch:
+            with self._cache_loc(path, saltenv) as cache_dest:
+                if os.path.isfile(cache_dest):
+                    hashes[path] = salt.utils.get_hash(cache_dest, hash_type)
+        load = {'paths': [path for _, _, path in batch],
+                'saltenv': saltenv,
+                'hashes': hashes,
+                'hash_type': hash_type,
+                'cmd': '_serve_files'}
+        data = self.channel.send(load)
+        if not isinstance(data, dict):
+            # The master does not know about batched requests, fall back to
+            # fetching the files one by one
+            for idx, url, _ in batch:
+                yield idx, self.cache_file(url, saltenv)
+            return
+
+        for idx, url, path in batch:
+            item = data.get(path)
+            if not isinstance(item, dict):
+                yield idx, self.get_file(url, '', True, saltenv)
+                continue
+            if not item:
+                log.debug(
+                    'Could not find file from saltenv {0!r}, {1!r}'.format(
+                        saltenv, path
+                    )
+                )
+                yield idx, False
+                continue
+            with self._cache_loc(item['dest'], saltenv) as cache_dest:
+                dest = cache_dest
+            if item.get('unchanged'):
+                log.info(
+                    'Fetching file from saltenv {0!r}, ** skipped ** '
+                    'latest already in cache {1!r}'.format(saltenv, path)
+                )
+                yield idx, dest
+                continue
+            if 'data' not in item:
+                # Too large to be inlined, stream it in chunks
+                yield idx, self.get_file(url, '', True, saltenv)
+                continue
+            contents = item['data']
+            if item.get('gzip', None):
+                contents = salt.utils.gzip_util.uncompress(contents)
+            # If a directory was formerly cached at this path, then remove it
+            # to avoid a traceback trying to write the file
+            if os.path.isdir(dest):
+                salt.utils.rm_rf(dest)
+            with salt.utils.fopen(dest, 'wb+') as ofile:
+                ofile.write(contents)
+            if 'hsum' in item and salt.utils.get_hash(
+                    dest, item.get('hash_type', 'md5')) != item['hsum']:
+                log.warn('Bad download of file {0}, fetching it again'.format(
+                    path))
+                yield idx, self.get_file(url, '', True, saltenv)
+                continue
+            log.info(
+                'Fetching file from saltenv {0!r}, ** done ** {1!r}'.format(
+                    saltenv, path
+                )
+            )
+            yield idx, dest
+
     def file_list(self, saltenv='base', prefix='', env=None):
         '''
         List the files on the master
@@ -17,6 +17,7 @@ from salt.ext.six.moves.urllib.parse import urlparse as _urlparse  # pylint: dis
 from salt.ext.six.moves.urllib.parse import parse_qs as _parse_qs  # pylint: disable=import-error,no-name-in-module
 import salt.loader
 import salt.utils
+import salt.utils.gzip_util
 import salt.utils.locales
 
 # Import 3rd-party libs
@@ -503,6 +504,67 @@ class Fileserver(object):
             return self.servers[fstr](load, fnd)
         return ret
 
+    def serve_files(self, load):
+        '''
+        Serve up a batch of files in a single request.
+
+        Returns a dict keyed by the requested paths. Every found file gets its
+        ``hsum`` and ``hash_type``; files whose hash matches the one passed in
+        ``hashes`` are flagged as ``unchanged``, and the content of small
+        files is inlined under ``data`` until the response reaches
+        ``file_batch_max_size``. Files left without ``data`` are to be fetched
+        with ``serve_file``.
+        '''
+        ret = {}
+        if 'env' in load:
+            salt.utils.warn_until(
+                'Boron',
+                'Passing a salt environment should be done using \'saltenv\' '
+                'not \'env\'. This functionality will be removed in Salt '
+                'Boron.'
+            )
+            load['saltenv'] = load.pop('env')
+
+        if 'paths' not in load or 'saltenv' not in load:
+            return ret
+        hashes = load.get('hashes') or {}
+        gzip = load.get('gzip', None)
+        inline_size = self.opts.get('file_batch_inline_size', 1048576)
+        budget = self.opts.get('file_batch_max_size', 16777216)
+        for path in load['paths']:
+            fnd = self.find_file(path, load['saltenv'])
+            if not fnd.get('back'):
+                ret[path] = {}
+                continue
+            item = {'dest': fnd['rel']}
+            fstr = '{0}.file_hash'.format(fnd['back'])
+            if fstr in self.servers:
+                item.update(
+                    self.servers[fstr](
+                        {'path': path, 'saltenv': load['saltenv']}, fnd
+                    ) or {}
+                )
+            ret[path] = item
+            if hashes.get(path) and \
+                    hashes[path] == item.get('hsum') and \
+                    load.get('hash_type') == item.get('hash_type'):
+                item['unchanged'] = True
+                continue
+            try:
+                size = os.path.getsize(fnd['path'])
+                if size > inline_size or size > budget:
+                    continue
+                with salt.utils.fopen(os.path.normpath(fnd['path']), 'rb') as fp_:
+                    data = fp_.read()
+            except (IOError, OSError):
+                continue
+            if gzip and data:
+                data = salt.utils.gzip_util.compress(data, gzip)
+                item['gzip'] = gzip
+            item['data'] = data
+            budget -= len(data)
+        return ret
+
     def file_hash(self, load):
         '''
         Return the hash of a given file
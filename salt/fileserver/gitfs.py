@@ -48,6 +48,7 @@ Walkthrough <tutorial-gitfs>`.
 
 # Import python libs
 from __future__ import absolute_import
+import binascii
 import copy
 import distutils.version  # pylint: disable=import-error,no-name-in-module
 import errno
@@ -55,17 +56,35 @@ import fnmatch
 import glob
 import hashlib
 import logging
+import mmap
 import os
+import random
 import re
 import shutil
 import stat
+import struct
 import subprocess
+import time
 from datetime import datetime
 
 VALID_PROVIDERS = ('gitpython', 'pygit2', 'dulwich')
 PER_REMOTE_PARAMS = ('base', 'mountpoint', 'root')
 SYMLINK_RECURSE_DEPTH = 100
 
+# Threads the remotes are fetched in, started on the first update
+_FETCH_POOL = None
+
+# Tree index files: a header, then a table of record offsets sorted by path,
+# then records of mode, blob/tree SHA1, size, path and symlink target
+INDEX_MAGIC = b'GFSI'
+INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct('>4sHI')
+_INDEX_OFFSET = struct.Struct('>I')
+_INDEX_ENTRY = struct.Struct('>I20sQHH')
+
+# Tree indexes mapped by this process, keyed by remote and environment
+_INDEXES = {}
+
 # Auth support (auth params can be global or per-remote, too)
 AUTH_PROVIDERS = ('pygit2',)
 AUTH_PARAMS = ('user', 'password', 'pubkey', 'privkey', 'passphrase',
@@ -98,12 +117,14 @@ _INVALID_REPO = (
 # Import salt libs
 import salt.utils
 import salt.utils.url
+import salt.utils.process
 import salt.fileserver
 from salt.exceptions import FileserverConfigError
 from salt.utils.event import tagify
 
 # Import third party libs
 import salt.ext.six as six
+from salt.ext.six.moves import queue  # pylint: disable=import-error
 # pylint: disable=import-error
 try:
     import git
@@ -351,27 +372,6 @@ def _dulwich_remote(repo):
     return _dulwich_conf(repo).get(('remote', 'origin'), 'url')
 
 
-def _dulwich_walk_tree(repo, tree, path):
-    '''
-    Dulwich does not provide a means of directly accessing subdirectories. This
-    function will walk down to the directory specified by 'path', and return a
-    Tree object at that path. If path is an empty string, the original tree
-    will be returned, and if there are any issues encountered walking the tree,
-    None will be returned.
-    '''
-    if not path:
-        return tree
-    # Walk down the tree to get to the file
-    for parent in path.split(os.path.sep):
-        try:
-            tree = repo.get_object(tree[parent][1])
-        except (KeyError, TypeError):
-            # Directory not found, or tree passed into function is not a Tree
-            # object. Either way, desired path does not exist.
-            return None
-    return tree
-
-
 _dulwich_env_refs = lambda refs: [x for x in refs
                                   if re.match('refs/(heads|tags)', x)
                                   and not x.endswith('^{}')]
@@ -508,6 +508,290 @@ def _get_tree_dulwich(repo, tgt_env):
     return None
 
 
+def _get_tree(repo, tgt_env):
+    '''
+    Return the tree object for the branch/tag/SHA from the configured
+    provider, or None if it is not found
+    '''
+    provider = _get_provider()
+    if provider == 'gitpython':
+        return _get_tree_gitpython(repo, tgt_env)
+    elif provider == 'pygit2':
+        return _get_tree_pygit2(repo, tgt_env)
+    elif provider == 'dulwich':
+        tree = _get_tree_dulwich(repo, tgt_env)
+        return tree if isinstance(tree, dulwich.objects.Tree) else None
+    return None
+
+
+def _tree_id(tree):
+    '''
+    Return the SHA1 of a tree object from the configured provider
+    '''
+    provider = _get_provider()
+    if provider == 'gitpython':
+        return tree.hexsha
+    elif provider == 'pygit2':
+        return tree.hex
+    return tree.id
+
+
+def _walk_tree_gitpython(repo, tree):
+    '''
+    Yield a (path, mode, sha, size, link target) tuple for each file and
+    directory in a git.Tree object
+    '''
+    for obj in tree.traverse():
+        if isinstance(obj, git.Blob):
+            link_tgt = None
+            if stat.S_ISLNK(obj.mode):
+                stream = six.StringIO()
+                obj.stream_data(stream)
+                link_tgt = stream.getvalue()
+                stream.close()
+            yield obj.path, obj.mode, obj.hexsha, obj.size, link_tgt
+        elif isinstance(obj, git.Tree):
+            yield obj.path, obj.mode, obj.hexsha, 0, None
+
+
+def _walk_tree_pygit2(repo, tree, prefix=''):
+    '''
+    Yield a (path, mode, sha, size, link target) tuple for each file and
+    directory in a pygit2.Tree object
+    '''
+    for entry in iter(tree):
+        obj = repo['repo'][entry.oid]
+        path = os.path.join(prefix, entry.name)
+        if isinstance(obj, pygit2.Blob):
+            link_tgt = obj.data if stat.S_ISLNK(entry.filemode) else None
+            yield path, entry.filemode, obj.hex, obj.size, link_tgt
+        elif isinstance(obj, pygit2.Tree):
+            yield path, entry.filemode, obj.hex, 0, None
+            for item in _walk_tree_pygit2(repo, obj, path):
+                yield item
+
+
+def _walk_tree_dulwich(repo, tree, prefix=''):
+    '''
+    Yield a (path, mode, sha, size, link target) tuple for each file and
+    directory in a dulwich.objects.Tree object
+    '''
+    for item in six.iteritems(tree):
+        obj = repo['repo'].get_object(item.sha)
+        path = os.path.join(prefix, item.path)
+        if isinstance(obj, dulwich.objects.Blob):
+            link_tgt = None
+            if stat.S_ISLNK(item.mode):
+                link_tgt = obj.as_raw_string()
+            yield path, item.mode, item.sha, obj.raw_length(), link_tgt
+        elif isinstance(obj, dulwich.objects.Tree):
+            yield path, item.mode, item.sha, 0, None
+            for entry in _walk_tree_dulwich(repo, obj, path):
+                yield entry
+
+
+def _write_blob(repo, sha, fp_):
+    '''
+    Write the contents of a blob to a file object
+    '''
+    provider = _get_provider()
+    if provider == 'gitpython':
+        git.Blob(repo['repo'], binascii.unhexlify(sha)).stream_data(fp_)
+    elif provider == 'pygit2':
+        fp_.write(repo['repo'][sha].data)
+    elif provider == 'dulwich':
+        fp_.write(repo['repo'].get_object(sha).as_raw_string())
+
+
+class _TreeIndex(object):
+    '''
+    A read-only, memory-mapped view of a tree index file written by
+    _write_index(). The records are sorted by path, so a path is found with a
+    binary search and the entries below a directory are read in one run.
+    '''
+    def __init__(self, path, tree_id=None):
+        self.path = path
+        self.tree_id = tree_id
+        with salt.utils.fopen(path, 'rb') as fp_:
+            self._map = mmap.mmap(fp_.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self._count = \
+                _INDEX_HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic = version = None
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.close()
+            raise ValueError('{0} is not a gitfs tree index'.format(path))
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, num):
+        '''
+        Return the record at position num as a (path, mode, sha, size, link
+        target) tuple
+        '''
+        offset = _INDEX_OFFSET.unpack_from(
+            self._map, _INDEX_HEADER.size + num * _INDEX_OFFSET.size)[0]
+        mode, binsha, size, path_len, link_len = \
+            _INDEX_ENTRY.unpack_from(self._map, offset)
+        start = offset + _INDEX_ENTRY.size
+        path = self._map[start:start + path_len]
+        link_tgt = None
+        if stat.S_ISLNK(mode):
+            start += path_len
+            link_tgt = self._map[start:start + link_len]
+        return path, mode, binascii.hexlify(binsha), size, link_tgt
+
+    def _bisect(self, path):
+        '''
+        Return the position of the first record not sorting before path
+        '''
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self._entry(mid)[0] < path:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def lookup(self, path):
+        '''
+        Return a (mode, sha, size, link target) tuple for a path, or None if
+        the path is not in the tree
+        '''
+        path = salt.utils.to_bytes(path)
+        num = self._bisect(path)
+        if num < self._count:
+            entry = self._entry(num)
+            if entry[0] == path:
+                return entry[1:]
+        return None
+
+    def walk(self, prefix=''):
+        '''
+        Yield the (path, mode, sha, size, link target) tuples of the records
+        whose paths start with prefix, in sorted order
+        '''
+        prefix = salt.utils.to_bytes(prefix)
+        for num in range(self._bisect(prefix), self._count):
+            entry = self._entry(num)
+            if not entry[0].startswith(prefix):
+                break
+            yield (salt.utils.to_str(entry[0]),) + entry[1:]
+
+    def close(self):
+        self._map.close()
+
+
+def _write_index(path, entries):
+    '''
+    Write a tree index from an iterable of (path, mode, sha, size, link
+    target) tuples. The file is a header, a table of record offsets sorted by
+    path and the records themselves, and is moved into place once complete so
+    that readers never see a partial index.
+    '''
+    records = sorted(
+        (salt.utils.to_bytes(entry_path), mode, sha, size, link_tgt or b'')
+        for entry_path, mode, sha, size, link_tgt in entries
+    )
+    offset = _INDEX_HEADER.size + len(records) * _INDEX_OFFSET.size
+    index_dir = os.path.dirname(path)
+    if not os.path.isdir(index_dir):
+        os.makedirs(index_dir)
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with salt.utils.fopen(tmp_path, 'wb') as fp_:
+        fp_.write(_INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(records)))
+        for entry_path, _, _, _, link_tgt in records:
+            fp_.write(_INDEX_OFFSET.pack(offset))
+            offset += _INDEX_ENTRY.size + len(entry_path) + len(link_tgt)
+        for entry_path, mode, sha, size, link_tgt in records:
+            fp_.write(_INDEX_ENTRY.pack(mode,
+                                        binascii.unhexlify(sha),
+                                        size,
+                                        len(entry_path),
+                                        len(link_tgt)))
+            fp_.write(entry_path)
+            fp_.write(link_tgt)
+    os.rename(tmp_path, path)
+
+
+def _get_index(repo, tgt_env):
+    '''
+    Return the tree index for the branch/tag/SHA, building it if the tree has
+    not been indexed yet. Return None if the branch/tag/SHA is not found.
+    '''
+    tree = _get_tree(repo, tgt_env)
+    if tree is None:
+        return None
+    tree_id = _tree_id(tree)
+    # Remotes sharing a URL share the indexes, but not their base
+    key = (repo['hash'], repo['base'], tgt_env)
+    index = _INDEXES.get(key)
+    if index is not None and index.tree_id == tree_id:
+        return index
+    index_path = os.path.join(__opts__['cachedir'],
+                              'gitfs/index',
+                              repo['hash'],
+                              '{0}.idx'.format(tree_id))
+    try:
+        new_index = _TreeIndex(index_path, tree_id)
+    except (IOError, OSError, ValueError):
+        walk_tree = globals()['_walk_tree_{0}'.format(_get_provider())]
+        log.debug('Indexing tree {0} of gitfs remote {1}'
+                  .format(tree_id, repo['url']))
+        _write_index(index_path, walk_tree(repo, tree))
+        new_index = _TreeIndex(index_path, tree_id)
+    if index is not None:
+        index.close()
+    _INDEXES[key] = new_index
+    return new_index
+
+
+def _index_entries(repo, tgt_env):
+    '''
+    Return the (path, mode, sha, size, link target) tuples of the files and
+    directories below the remote's root, with the root replaced by the
+    mountpoint, or None if the branch/tag/SHA or the root is not found.
+    '''
+    index = _get_index(repo, tgt_env)
+    if index is None:
+        return None
+    prefix = ''
+    if repo['root']:
+        root = index.lookup(repo['root'])
+        if root is None or not stat.S_ISDIR(root[0]):
+            return None
+        prefix = repo['root'] + '/'
+    ret = []
+    for path, mode, sha, size, link_tgt in index.walk(prefix):
+        ret.append((os.path.join(repo['mountpoint'], path[len(prefix):]),
+                    mode, sha, size, link_tgt))
+    return ret
+
+
+def _prune_indexes(repo_hash, keep):
+    '''
+    Remove the tree indexes of a remote other than those for the trees in
+    keep
+    '''
+    index_dir = os.path.join(__opts__['cachedir'], 'gitfs/index', repo_hash)
+    try:
+        index_files = os.listdir(index_dir)
+    except OSError:
+        return
+    for index_file in index_files:
+        if os.path.splitext(index_file)[0] in keep:
+            continue
+        try:
+            os.remove(os.path.join(index_dir, index_file))
+        except OSError:
+            pass
+        else:
+            log.debug('Removed gitfs tree index {0}'.format(index_file))
+
+
 def _clean_stale(repo, local_refs=None):
     '''
     Clean stale local refs so they don't appear as fileserver environments
@@ -974,11 +1258,21 @@ def _clear_old_remotes():
             pass
     to_remove = []
     for item in cachedir_ls:
-        if item in ('hash', 'refs'):
+        if item in ('hash', 'refs', 'index'):
             continue
         path = os.path.join(bp_, item)
         if os.path.isdir(path):
             to_remove.append(path)
+    # Tree indexes are kept apart from the remotes' cachedirs
+    index_dir = os.path.join(bp_, 'index')
+    try:
+        index_ls = os.listdir(index_dir)
+    except OSError:
+        index_ls = []
+    active = set(repo['hash'] for repo in repos)
+    for item in index_ls:
+        if item not in active:
+            to_remove.append(os.path.join(index_dir, item))
     failed = []
     if to_remove:
         for rdir in to_remove:
@@ -1116,6 +1410,262 @@ def lock(remote=None):
     return locked, errors
 
 
+def _ref_map(repo, provider):
+    '''
+    Return a dict mapping the refs of a repo to the objects they point to
+    '''
+    if provider == 'gitpython':
+        return dict((ref.path, ref.object.hexsha) for ref in repo['repo'].refs)
+    elif provider == 'pygit2':
+        return dict(
+            (ref, six.text_type(repo['repo'].lookup_reference(ref).target))
+            for ref in repo['repo'].listall_references()
+        )
+    elif provider == 'dulwich':
+        return dict(repo['repo'].get_refs())
+    return {}
+
+
+def _ref_env(repo, ref):
+    '''
+    Return the salt environment a ref maps to, or None if it does not map to
+    one
+    '''
+    try:
+        _, rtype, rspec = ref.split('/', 2)
+    except ValueError:
+        return None
+    if rtype == 'remotes':
+        parted = rspec.partition('/')
+        rspec = parted[2] if parted[2] else parted[0]
+    elif rtype not in ('heads', 'tags'):
+        return None
+    if rtype != 'tags' and rspec == repo['base']:
+        rspec = 'base'
+    return rspec
+
+
+def _fetch(repo, provider):
+    '''
+    Fetch a single remote. Return the set of refs which changed, or None if
+    the remote was not fetched.
+    '''
+    if os.path.exists(repo['lockfile']):
+        log.warning(
+            'Update lockfile is present for gitfs remote {0}, skipping. '
+            'If this warning persists, it is possible that the update '
+            'process was interrupted. Removing {1} or running '
+            '\'salt-run fileserver.clear_lock gitfs\' will allow updates '
+            'to continue for this remote.'
+            .format(repo['url'], repo['lockfile'])
+        )
+        return None
+    _, errors = lock(repo)
+    if errors:
+        log.error('Unable to set update lock for gitfs remote {0}, '
+                  'skipping.'.format(repo['url']))
+        return None
+    log.debug('gitfs is fetching from {0}'.format(repo['url']))
+    try:
+        refs_before = _ref_map(repo, provider)
+        if provider == 'gitpython':
+            origin = repo['repo'].remotes[0]
+            try:
+                origin.fetch()
+            except AssertionError:
+                origin.fetch()
+            _clean_stale(repo)
+        elif provider == 'pygit2':
+            origin = repo['repo'].remotes[0]
+            try:
+                origin.credentials = repo['credentials']
+            except KeyError:
+                # No credentials configured for this repo
+                pass
+            try:
+                fetch = origin.fetch()
+            except pygit2.errors.GitError as exc:
+                # Using exc.__str__() here to avoid deprecation warning
+                # when referencing exc.message
+                if 'unsupported url protocol' in exc.__str__().lower() \
+                        and isinstance(repo.get('credentials'),
+                                       pygit2.Keypair):
+                    log.error(
+                        'Unable to fetch SSH-based gitfs remote {0}. '
+                        'libgit2 must be compiled with libssh2 to support '
+                        'SSH authentication.'.format(repo['url'])
+                    )
+                    return None
+                raise
+            try:
+                # pygit2.Remote.fetch() returns a dict in pygit2 < 0.21.0
+                received_objects = fetch['received_objects']
+            except (AttributeError, TypeError):
+                # pygit2.Remote.fetch() returns a class instance in
+                # pygit2 >= 0.21.0
+                received_objects = fetch.received_objects
+            if received_objects != 0:
+                log.debug(
+                    'gitfs received {0} objects for remote {1}'
+                    .format(received_objects, repo['url'])
+                )
+            else:
+                log.debug(
+                    'gitfs remote {0} is up-to-date'
+                    .format(repo['url'])
+                )
+            # Clean up any stale refs
+            _clean_stale(repo, repo['repo'].listall_references())
+        elif provider == 'dulwich':
+            # origin is just a url here, there is no origin object
+            origin = repo['url']
+            client, path = \
+                dulwich.client.get_transport_and_path_from_url(
+                    origin, thin_packs=True
+                )
+            refs_pre = repo['repo'].get_refs()
+            try:
+                refs_post = client.fetch(path, repo['repo'])
+            except dulwich.errors.NotGitRepository:
+                log.error(
+                    'Dulwich does not recognize remote {0} as a valid '
+                    'remote URL. Perhaps it is missing \'.git\' at the '
+                    'end.'.format(repo['url'])
+                )
+                return None
+            except KeyError:
+                log.error(
+                    'Local repository cachedir {0!r} (corresponding '
+                    'remote: {1}) has been corrupted. Salt will now '
+                    'attempt to remove the local checkout to allow it to '
+                    'be re-initialized in the next fileserver cache '
+                    'update.'
+                    .format(repo['cachedir'], repo['url'])
+                )
+                try:
+                    salt.utils.rm_rf(repo['cachedir'])
+                except OSError as exc:
+                    log.error(
+                        'Unable to remove {0!r}: {1}'
+                        .format(repo['cachedir'], exc)
+                    )
+                return None
+            if refs_post is None:
+                # Empty repository
+                log.warning(
+                    'gitfs remote {0!r} is an empty repository and will '
+                    'be skipped.'.format(origin)
+                )
+                return None
+            if refs_pre != refs_post:
+                # Update local refs
+                for ref in _dulwich_env_refs(refs_post):
+                    repo['repo'][ref] = refs_post[ref]
+                # Prune stale refs
+                for ref in repo['repo'].get_refs():
+                    if ref not in refs_post:
+                        del repo['repo'][ref]
+        refs_after = _ref_map(repo, provider)
+    except Exception as exc:
+        # Do not use {0!r} in the error message, as exc is not a string
+        log.error(
+            'Exception \'{0}\' caught while fetching gitfs remote {1}'
+            .format(exc, repo['url']),
+            exc_info_on_loglevel=logging.DEBUG
+        )
+        return None
+    finally:
+        clear_lock(repo)
+    return set(ref for ref in set(refs_before).union(refs_after)
+               if refs_before.get(ref) != refs_after.get(ref))
+
+
+def _fetch_pool():
+    '''
+    Return the pool of threads the remotes are fetched in
+    '''
+    global _FETCH_POOL
+    if _FETCH_POOL is None:
+        _FETCH_POOL = salt.utils.process.ThreadPool(
+            num_threads=max(int(__opts__.get('gitfs_update_workers', 4)), 1)
+        )
+    return _FETCH_POOL
+
+
+def _fetch_remotes(repos, provider):
+    '''
+    Fetch the remotes in a pool of threads. Each fetch starts after a random
+    delay of up to ``gitfs_update_jitter`` seconds and is given up on after
+    ``gitfs_update_timeout`` seconds, in which case it is left to finish in
+    the background, holding on to its update lock.
+
+    Return a dict mapping the hash of each remote fetched to the set of refs
+    which changed.
+    '''
+    if not repos:
+        return {}
+    timeout = float(__opts__.get('gitfs_update_timeout', 300))
+    jitter = float(__opts__.get('gitfs_update_jitter', 0))
+    pool = _fetch_pool()
+    results = queue.Queue()
+    started = {}
+
+    def _run(repo):
+        if jitter:
+            time.sleep(random.uniform(0, jitter))
+        started[repo['hash']] = time.time()
+        changed = None
+        try:
+            changed = _fetch(repo, provider)
+        finally:
+            results.put((repo['hash'], changed))
+
+    pending = {}
+    for repo in repos:
+        pending[repo['hash']] = repo
+        pool.fire_async(_run, args=(repo,))
+    # A remote still waiting for a thread is given up on once every remote
+    # ahead of it could have timed out
+    rounds = -(-len(repos) // pool.num_threads)
+    give_up = time.time() + rounds * (timeout + jitter)
+    ret = {}
+    while pending:
+        try:
+            repo_hash, changed = results.get(timeout=1)
+        except queue.Empty:
+            now = time.time()
+            for repo_hash in list(pending):
+                if now - started.get(repo_hash, now) > timeout \
+                        or now > give_up:
+                    log.error(
+                        'Timed out fetching gitfs remote {0}, it will keep '
+                        'fetching in the background'
+                        .format(pending.pop(repo_hash)['url'])
+                    )
+            continue
+        if pending.pop(repo_hash, None) is not None and changed is not None:
+            ret[repo_hash] = changed
+    return ret
+
+
+def _clear_file_list_cache(saltenvs):
+    '''
+    Remove the file list caches of the given environments
+    '''
+    list_cachedir = os.path.join(__opts__['cachedir'], 'file_lists/gitfs')
+    for saltenv in saltenvs:
+        list_cache = os.path.join(
+            list_cachedir,
+            '{0}.p'.format(saltenv.replace(os.path.sep, '_|-'))
+        )
+        try:
+            os.remove(list_cache)
+        except OSError:
+            pass
+        else:
+            log.debug('Removed gitfs file list cache {0}'.format(list_cache))
+
+
 def update():
     '''
     Execute a git fetch on all of the repos
@@ -1127,137 +1677,22 @@ def update():
     # _clear_old_remotes runs init(), so use the value from there to avoid a
     # second init()
     data['changed'], repos = _clear_old_remotes()
+    # Remotes with the same URL share a cachedir, and so the objects fetched
+    # into it, fetch each of them once
+    to_fetch = {}
     for repo in repos:
-        if os.path.exists(repo['lockfile']):
-            log.warning(
-                'Update lockfile is present for gitfs remote {0}, skipping. '
-                'If this warning persists, it is possible that the update '
-                'process was interrupted. Removing {1} or running '
-                '\'salt-run fileserver.clear_lock gitfs\' will allow updates '
-                'to continue for this remote.'
-                .format(repo['url'], repo['lockfile'])
-            )
-            continue
-        _, errors = lock(repo)
-        if errors:
-            log.error('Unable to set update lock for gitfs remote {0}, '
-                      'skipping.'.format(repo['url']))
-            continue
-        log.debug('gitfs is fetching from {0}'.format(repo['url']))
-        try:
-            if provider == 'gitpython':
-                origin = repo['repo'].remotes[0]
-                try:
-                    fetch_results = origin.fetch()
-                except AssertionError:
-                    fetch_results = origin.fetch()
-                cleaned = _clean_stale(repo)
-                if fetch_results or cleaned:
-                    data['changed'] = True
-            elif provider == 'pygit2':
-                origin = repo['repo'].remotes[0]
-                refs_pre = repo['repo'].listall_references()
-                try:
-                    origin.credentials = repo['credentials']
-                except KeyError:
-                    # No credentials configured for this repo
-                    pass
-                try:
-                    fetch = origin.fetch()
-                except pygit2.errors.GitError as exc:
-                    # Using exc.__str__() here to avoid deprecation warning
-                    # when referencing exc.message
-                    if 'unsupported url protocol' in exc.__str__().lower() \
-                            and isinstance(repo.get('credentials'),
-                                           pygit2.Keypair):
-                        log.error(
-                            'Unable to fetch SSH-based gitfs remote {0}. '
-                            'libgit2 must be compiled with libssh2 to support '
-                            'SSH authentication.'.format(repo['url'])
-                        )
-                        continue
-                    raise
-                try:
-                    # pygit2.Remote.fetch() returns a dict in pygit2 < 0.21.0
-                    received_objects = fetch['received_objects']
-                except (AttributeError, TypeError):
-                    # pygit2.Remote.fetch() returns a class instance in
-                    # pygit2 >= 0.21.0
-                    received_objects = fetch.received_objects
-                if received_objects != 0:
-                    log.debug(
-                        'gitfs received {0} objects for remote {1}'
-                        .format(received_objects, repo['url'])
-                    )
-                else:
-                    log.debug(
-                        'gitfs remote {0} is up-to-date'
-                        .format(repo['url'])
-                    )
-                # Clean up any stale refs
-                refs_post = repo['repo'].listall_references()
-                cleaned = _clean_stale(repo, refs_post)
-                if received_objects or refs_pre != refs_post or cleaned:
-                    data['changed'] = True
-            elif provider == 'dulwich':
-                # origin is just a url here, there is no origin object
-                origin = repo['url']
-                client, path = \
-                    dulwich.client.get_transport_and_path_from_url(
-                        origin, thin_packs=True
-                    )
-                refs_pre = repo['repo'].get_refs()
-                try:
-                    refs_post = client.fetch(path, repo['repo'])
-                except dulwich.errors.NotGitRepository:
-                    log.error(
-                        'Dulwich does not recognize remote {0} as a valid '
-                        'remote URL. Perhaps it is missing \'.git\' at the '
-                        'end.'.format(repo['url'])
-                    )
-                    continue
-                except KeyError:
-                    log.error(
-                        'Local repository cachedir {0!r} (corresponding '
-                        'remote: {1}) has been corrupted. Salt will now '
-                        'attempt to remove the local checkout to allow it to '
-                        'be re-initialized in the next fileserver cache '
-                        'update.'
-                        .format(repo['cachedir'], repo['url'])
-                    )
-                    try:
-                        salt.utils.rm_rf(repo['cachedir'])
-                    except OSError as exc:
-                        log.error(
-                            'Unable to remove {0!r}: {1}'
-                            .format(repo['cachedir'], exc)
-                        )
-                    continue
-                if refs_post is None:
-                    # Empty repository
-                    log.warning(
-                        'gitfs remote {0!r} is an empty repository and will '
-                        'be skipped.'.format(origin)
-                    )
-                    continue
-                if refs_pre != refs_post:
-                    data['changed'] = True
-                    # Update local refs
-                    for ref in _dulwich_env_refs(refs_post):
-                        repo['repo'][ref] = refs_post[ref]
-                    # Prune stale refs
-                    for ref in repo['repo'].get_refs():
-                        if ref not in refs_post:
-                            del repo['repo'][ref]
-        except Exception as exc:
-            # Do not use {0!r} in the error message, as exc is not a string
-            log.error(
-                'Exception \'{0}\' caught while fetching gitfs remote {1}'
-                .format(exc, repo['url']),
-                exc_info_on_loglevel=logging.DEBUG
-            )
-        finally:
-            clear_lock(repo)
+        to_fetch.setdefault(repo['hash'], repo)
+    fetched = _fetch_remotes(list(to_fetch.values()), provider)
+    changed_envs = set()
+    for repo in repos:
+        for ref in fetched.get(repo['hash'], ()):
+            saltenv = _ref_env(repo, ref)
+            if saltenv is not None:
+                changed_envs.add(saltenv)
+    if any(fetched.values()):
+        data['changed'] = True
+    # Leave the file lists of the environments which did not move alone
+    _clear_file_list_cache(changed_envs)
 
     env_cache = os.path.join(__opts__['cachedir'], 'gitfs/envs.p')
     if data.get('changed', False) is True or not os.path.isfile(env_cache):
@@ -1270,6 +1705,30 @@ def update():
             fp_.write(serial.dumps(new_envs))
             log.trace('Wrote env cache data to {0}'.format(env_cache))
 
+    # Index the trees of the remotes which moved now, rather than when a file
+    # is first requested from them, and drop the indexes of the old trees
+    keep = {}
+    for repo in repos:
+        if not fetched.get(repo['hash']):
+            continue
+        trees = keep.setdefault(repo['hash'], set())
+        try:
+            for saltenv in envs():
+                index = _get_index(repo, saltenv)
+                if index is not None:
+                    trees.add(index.tree_id)
+        except Exception as exc:
+            log.error(
+                'Exception caught while indexing gitfs remote {0}: {1}'
+                .format(repo['url'], exc),
+                exc_info_on_loglevel=logging.DEBUG
+            )
+            # Do not prune what could not be checked
+            trees.add(None)
+    for repo_hash, trees in six.iteritems(keep):
+        if None not in trees:
+            _prune_indexes(repo_hash, trees)
+
     # if there is a change, fire an event
     if __opts__.get('fileserver_events', False):
         event = salt.utils.event.get_event(
@@ -1399,7 +1858,6 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
     if os.path.isabs(path) or tgt_env not in envs():
         return fnd
 
-    provider = _get_provider()
     dest = os.path.join(__opts__['cachedir'], 'gitfs/refs', tgt_env, path)
     hashes_glob = os.path.join(__opts__['cachedir'],
                                'gitfs/hash',
@@ -1438,103 +1896,32 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
         if repo['root']:
             repo_path = os.path.join(repo['root'], repo_path)
 
-        blob = None
-        depth = 0
-        if provider == 'gitpython':
-            tree = _get_tree_gitpython(repo, tgt_env)
-            if not tree:
-                # Branch/tag/SHA not found in repo, try the next
-                continue
-            while True:
-                depth += 1
-                if depth > SYMLINK_RECURSE_DEPTH:
-                    break
-                try:
-                    file_blob = tree / repo_path
-                    if stat.S_ISLNK(file_blob.mode):
-                        # Path is a symlink. The blob data corresponding to
-                        # this path's object ID will be the target of the
-                        # symlink. Follow the symlink and set repo_path to the
-                        # location indicated in the blob data.
-                        stream = six.StringIO()
-                        file_blob.stream_data(stream)
-                        stream.seek(0)
-                        link_tgt = stream.read()
-                        stream.close()
-                        repo_path = os.path.normpath(
-                            os.path.join(os.path.dirname(repo_path), link_tgt)
-                        )
-                    else:
-                        blob = file_blob
-                        break
-                except KeyError:
-                    # File not found or repo_path points to a directory
-                    break
-            if blob is None:
-                continue
-            blob_hexsha = blob.hexsha
-
-        elif provider == 'pygit2':
-            tree = _get_tree_pygit2(repo, tgt_env)
-            if not tree:
-                # Branch/tag/SHA not found in repo, try the next
-                continue
-            while True:
-                depth += 1
-                if depth > SYMLINK_RECURSE_DEPTH:
-                    break
-                try:
-                    if stat.S_ISLNK(tree[repo_path].filemode):
-                        # Path is a symlink. The blob data corresponding to this
-                        # path's object ID will be the target of the symlink. Follow
-                        # the symlink and set repo_path to the location indicated
-                        # in the blob data.
-                        link_tgt = repo['repo'][tree[repo_path].oid].data
-                        repo_path = os.path.normpath(
-                            os.path.join(os.path.dirname(repo_path), link_tgt)
-                        )
-                    else:
-                        oid = tree[repo_path].oid
-                        blob = repo['repo'][oid]
-                except KeyError:
-                    break
-            if blob is None:
-                continue
-            blob_hexsha = blob.hex
-
-        elif provider == 'dulwich':
-            while True:
-                depth += 1
-                if depth > SYMLINK_RECURSE_DEPTH:
-                    break
-                prefix_dirs, _, filename = repo_path.rpartition(os.path.sep)
-                tree = _get_tree_dulwich(repo, tgt_env)
-                tree = _dulwich_walk_tree(repo['repo'], tree, prefix_dirs)
-                if not isinstance(tree, dulwich.objects.Tree):
-                    # Branch/tag/SHA not found in repo
-                    break
-                try:
-                    mode, oid = tree[filename]
-                    if stat.S_ISLNK(mode):
-                        # Path is a symlink. The blob data corresponding to
-                        # this path's object ID will be the target of the
-                        # symlink. Follow the symlink and set repo_path to the
-                        # location indicated in the blob data.
-                        link_tgt = repo['repo'].get_object(oid).as_raw_string()
-                        repo_path = os.path.normpath(
-                            os.path.join(os.path.dirname(repo_path), link_tgt)
-                        )
-                    else:
-                        blob = repo['repo'].get_object(oid)
-                        break
-                except KeyError:
-                    break
-            if blob is None:
-                continue
-            blob_hexsha = blob.sha().hexdigest()
+        index = _get_index(repo, tgt_env)
+        if index is None:
+            # Branch/tag/SHA not found in repo, try the next
+            continue
+        for _ in range(SYMLINK_RECURSE_DEPTH):
+            entry = index.lookup(repo_path)
+            if entry is None or not stat.S_ISLNK(entry[0]):
+                break
+            # Path is a symlink. The blob data corresponding to this path's
+            # object ID is the target of the symlink, which the index holds.
+            # Follow the symlink and set repo_path to the location indicated
+            # in the blob data.
+            repo_path = os.path.normpath(
+                os.path.join(os.path.dirname(repo_path), entry[3])
+            )
+        else:
+            # Too many levels of symbolic links
+            entry = None
+        if entry is None or stat.S_ISDIR(entry[0]):
+            # File not found or repo_path points to a directory
+            continue
+        _, blob_hexsha, blob_size, _ = entry
 
         salt.fileserver.wait_lock(lk_fn, dest)
-        if os.path.isfile(blobshadest) and os.path.isfile(dest):
+        if os.path.isfile(blobshadest) and os.path.isfile(dest) \
+                and os.path.getsize(dest) == blob_size:
             with salt.utils.fopen(blobshadest, 'r') as fp_:
                 sha = fp_.read()
                 if sha == blob_hexsha:
@@ -1549,12 +1936,7 @@ def find_file(path, tgt_env='base', **kwargs):  # pylint: disable=W0613
             except Exception:
                 pass
         with salt.utils.fopen(dest, 'w+') as fp_:
-            if provider == 'gitpython':
-                blob.stream_data(fp_)
-            elif provider == 'pygit2':
-                fp_.write(blob.data)
-            elif provider == 'dulwich':
-                fp_.write(blob.as_raw_string())
+            _write_blob(repo, blob_hexsha, fp_)
         with salt.utils.fopen(blobshadest, 'w+') as fp_:
             fp_.write(blob_hexsha)
         try:
@@ -1709,165 +2091,21 @@ def _get_file_list(load):
         )
         load['saltenv'] = load.pop('env')
 
-    provider = _get_provider()
     if 'saltenv' not in load or load['saltenv'] not in envs():
         return [], {}
     files = set()
     symlinks = {}
     for repo in init():
-        fl_func = None
-        if provider == 'gitpython':
-            fl_func = _file_list_gitpython
-        elif provider == 'pygit2':
-            fl_func = _file_list_pygit2
-        elif provider == 'dulwich':
-            fl_func = _file_list_dulwich
-        try:
-            repo_files, repo_symlinks = fl_func(repo, load['saltenv'])
-        except TypeError:
-            # We should never get here unless the gitfs_provider is not
-            # accounted for in tbe above if/elif block.
-            continue
-        else:
-            files.update(repo_files)
-            symlinks.update(repo_symlinks)
+        for path, mode, _, _, link_tgt in \
+                _index_entries(repo, load['saltenv']) or ():
+            if stat.S_ISDIR(mode):
+                continue
+            files.add(path)
+            if stat.S_ISLNK(mode):
+                symlinks[path] = link_tgt
     return sorted(files), symlinks
 
 
-def _file_list_gitpython(repo, tgt_env):
-    '''
-    Get file list using GitPython
-    '''
-    files = set()
-    symlinks = {}
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_gitpython(repo, tgt_env)
-    if not tree:
-        return files, symlinks
-    if repo['root']:
-        try:
-            tree = tree / repo['root']
-        except KeyError:
-            return files, symlinks
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for file_blob in tree.traverse():
-        if not isinstance(file_blob, git.Blob):
-            continue
-        file_path = add_mountpoint(relpath(file_blob.path))
-        files.add(file_path)
-        if stat.S_ISLNK(file_blob.mode):
-            stream = six.StringIO()
-            file_blob.stream_data(stream)
-            stream.seek(0)
-            link_tgt = stream.read()
-            stream.close()
-            symlinks[file_path] = link_tgt
-    return files, symlinks
-
-
-def _file_list_pygit2(repo, tgt_env):
-    '''
-    Get file list using pygit2
-    '''
-    def _traverse(tree, repo_obj, blobs, prefix):
-        '''
-        Traverse through a pygit2 Tree object recursively, accumulating all the
-        file paths and symlink info in the "blobs" dict
-        '''
-        for entry in iter(tree):
-            obj = repo_obj[entry.oid]
-            if isinstance(obj, pygit2.Blob):
-                repo_path = os.path.join(prefix, entry.name)
-                blobs.setdefault('files', []).append(repo_path)
-                if stat.S_ISLNK(tree[entry.name].filemode):
-                    link_tgt = repo_obj[tree[entry.name].oid].data
-                    blobs.setdefault('symlinks', {})[repo_path] = link_tgt
-            elif isinstance(obj, pygit2.Tree):
-                _traverse(obj,
-                          repo_obj,
-                          blobs,
-                          os.path.join(prefix, entry.name))
-    files = set()
-    symlinks = {}
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_pygit2(repo, tgt_env)
-    if not tree:
-        return files, symlinks
-    if repo['root']:
-        try:
-            # This might need to be changed to account for a root that
-            # spans more than one directory
-            oid = tree[repo['root']].oid
-            tree = repo['repo'][oid]
-        except KeyError:
-            return files, symlinks
-        if not isinstance(tree, pygit2.Tree):
-            return files, symlinks
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    blobs = {}
-    if len(tree):
-        _traverse(tree, repo['repo'], blobs, repo['root'])
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for repo_path in blobs.get('files', []):
-        files.add(add_mountpoint(relpath(repo_path)))
-    for repo_path, link_tgt in six.iteritems(blobs.get('symlinks', {})):
-        symlinks[add_mountpoint(relpath(repo_path))] = link_tgt
-    return files, symlinks
-
-
-def _file_list_dulwich(repo, tgt_env):
-    '''
-    Get file list using dulwich
-    '''
-    def _traverse(tree, repo_obj, blobs, prefix):
-        '''
-        Traverse through a dulwich Tree object recursively, accumulating all the
-        file paths and symlink info in the "blobs" dict
-        '''
-        for item in six.iteritems(tree):
-            obj = repo_obj.get_object(item.sha)
-            if isinstance(obj, dulwich.objects.Blob):
-                repo_path = os.path.join(prefix, item.path)
-                blobs.setdefault('files', []).append(repo_path)
-                mode, oid = tree[item.path]
-                if stat.S_ISLNK(mode):
-                    link_tgt = repo_obj.get_object(oid).as_raw_string()
-                    blobs.setdefault('symlinks', {})[repo_path] = link_tgt
-            elif isinstance(obj, dulwich.objects.Tree):
-                _traverse(obj,
-                          repo_obj,
-                          blobs,
-                          os.path.join(prefix, item.path))
-    files = set()
-    symlinks = {}
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_dulwich(repo, tgt_env)
-    tree = _dulwich_walk_tree(repo['repo'], tree, repo['root'])
-    if not isinstance(tree, dulwich.objects.Tree):
-        return files, symlinks
-    blobs = {}
-    if len(tree):
-        _traverse(tree, repo['repo'], blobs, repo['root'])
-    if repo['root']:
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for repo_path in blobs.get('files', []):
-        files.add(add_mountpoint(relpath(repo_path)))
-    for repo_path, link_tgt in six.iteritems(blobs.get('symlinks', {})):
-        symlinks[add_mountpoint(relpath(repo_path))] = link_tgt
-    return files, symlinks
-
-
 def file_list_emptydirs(load):  # pylint: disable=W0613
     '''
     Return a list of all empty directories on the master
@@ -1895,141 +2133,20 @@ def _get_dir_list(load):
         )
         load['saltenv'] = load.pop('env')
 
-    provider = _get_provider()
     if 'saltenv' not in load or load['saltenv'] not in envs():
         return []
     ret = set()
     for repo in init():
-        if provider == 'gitpython':
-            ret.update(
-                _dir_list_gitpython(repo, load['saltenv'])
-            )
-        elif provider == 'pygit2':
-            ret.update(
-                _dir_list_pygit2(repo, load['saltenv'])
-            )
-        elif provider == 'dulwich':
-            ret.update(
-                _dir_list_dulwich(repo, load['saltenv'])
-            )
+        entries = _index_entries(repo, load['saltenv'])
+        if entries is None:
+            continue
+        ret.update(path for path, mode, _, _, _ in entries
+                   if stat.S_ISDIR(mode))
+        if repo['mountpoint']:
+            ret.add(repo['mountpoint'])
     return sorted(ret)
 
 
-def _dir_list_gitpython(repo, tgt_env):
-    '''
-    Get list of directories using GitPython
-    '''
-    ret = set()
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_gitpython(repo, tgt_env)
-    if not tree:
-        return ret
-    if repo['root']:
-        try:
-            tree = tree / repo['root']
-        except KeyError:
-            return ret
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for blob in tree.traverse():
-        if isinstance(blob, git.Tree):
-            ret.add(add_mountpoint(relpath(blob.path)))
-    if repo['mountpoint']:
-        ret.add(repo['mountpoint'])
-    return ret
-
-
-def _dir_list_pygit2(repo, tgt_env):
-    '''
-    Get a list of directories using pygit2
-    '''
-    def _traverse(tree, repo_obj, blobs, prefix):
-        '''
-        Traverse through a pygit2 Tree object recursively, accumulating all the
-        empty directories within it in the "blobs" list
-        '''
-        for entry in iter(tree):
-            blob = repo_obj[entry.oid]
-            if not isinstance(blob, pygit2.Tree):
-                continue
-            blobs.append(os.path.join(prefix, entry.name))
-            if len(blob):
-                _traverse(blob,
-                          repo_obj,
-                          blobs,
-                          os.path.join(prefix, entry.name))
-    ret = set()
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_pygit2(repo, tgt_env)
-    if not tree:
-        return ret
-    if repo['root']:
-        try:
-            oid = tree[repo['root']].oid
-            tree = repo['repo'][oid]
-        except KeyError:
-            return ret
-        if not isinstance(tree, pygit2.Tree):
-            return ret
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    blobs = []
-    if len(tree):
-        _traverse(tree, repo['repo'], blobs, repo['root'])
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for blob in blobs:
-        ret.add(add_mountpoint(relpath(blob)))
-    if repo['mountpoint']:
-        ret.add(repo['mountpoint'])
-    return ret
-
-
-def _dir_list_dulwich(repo, tgt_env):
-    '''
-    Get a list of directories using pygit2
-    '''
-    def _traverse(tree, repo_obj, blobs, prefix):
-        '''
-        Traverse through a dulwich Tree object recursively, accumulating all
-        the empty directories within it in the "blobs" list
-        '''
-        for item in six.iteritems(tree):
-            obj = repo_obj.get_object(item.sha)
-            if not isinstance(obj, dulwich.objects.Tree):
-                continue
-            blobs.append(os.path.join(prefix, item.path))
-            if len(repo_obj.get_object(item.sha)):
-                _traverse(obj,
-                          repo_obj,
-                          blobs,
-                          os.path.join(prefix, item.path))
-    ret = set()
-    if tgt_env == 'base':
-        tgt_env = repo['base']
-    tree = _get_tree_dulwich(repo, tgt_env)
-    tree = _dulwich_walk_tree(repo['repo'], tree, repo['root'])
-    if not isinstance(tree, dulwich.objects.Tree):
-        return ret
-    blobs = []
-    if len(tree):
-        _traverse(tree, repo['repo'], blobs, repo['root'])
-    if repo['root']:
-        relpath = lambda path: os.path.relpath(path, repo['root'])
-    else:
-        relpath = lambda path: path
-    add_mountpoint = lambda path: os.path.join(repo['mountpoint'], path)
-    for blob in blobs:
-        ret.add(add_mountpoint(relpath(blob)))
-    if repo['mountpoint']:
-        ret.add(repo['mountpoint'])
-    return ret
-
-
 def symlink_list(load):
     '''
     Return a dict of all symlinks based on a given path in the repo
@@ -19,16 +19,28 @@ from __future__ import absolute_import
 
 # Import python libs
 import os
+import stat
+import time
 import logging
 
 # Import salt libs
 import salt.fileserver
+import salt.payload
 import salt.utils
 from salt.utils.event import tagify
 import salt.ext.six as six
 
 log = logging.getLogger(__name__)
 
+# Hashes of the served files, kept for the life of the worker process and
+# checked against the size and mtime of the file. Keyed by the path the file
+# resolved to, a file in an earlier root can shadow the same rel path,
+# {(path, hash_type): (hsum, mtime, size)}
+_HASHES = {}
+
+# File lists, {saltenv: (mtime, file lists)}
+_FILE_LISTS = {}
+
 
 def find_file(path, saltenv='base', env=None, **kwargs):
     '''
@@ -185,14 +197,27 @@ def file_hash(load, fnd):
     ret = {}
 
     # if the file doesn't exist, we can't get a hash
-    if not path or not os.path.isfile(path):
+    if not path:
+        return ret
+    try:
+        fstat = os.stat(path)
+    except OSError:
+        return ret
+    if not stat.S_ISREG(fstat.st_mode):
         return ret
 
     # set the hash_type as it is determined by config-- so mechanism won't change that
     ret['hash_type'] = __opts__['hash_type']
 
-    # check if the hash is cached
-    # cache file's contents should be "hash:mtime"
+    # serve the hash from memory if the file hasn't changed since it was hashed
+    key = (path, ret['hash_type'])
+    cached = _HASHES.get(key)
+    if cached is not None and cached[1:] == (fstat.st_mtime, fstat.st_size):
+        ret['hsum'] = cached[0]
+        return ret
+
+    # check if the hash is cached on disk
+    # cache file's contents should be "hash:mtime:path"
     cache_path = os.path.join(__opts__['cachedir'],
                               'roots/hash',
                               load['saltenv'],
@@ -203,7 +228,8 @@ def file_hash(load, fnd):
         try:
             with salt.utils.fopen(cache_path, 'r') as fp_:
                 try:
-                    hsum, mtime = fp_.read().split(':')
+                    hsum, mtime, cpath = fp_.read().split(':', 2)
+                    mtime = float(mtime)
                 except ValueError:
                     log.debug('Fileserver attempted to read incomplete cache file. Retrying.')
                     # Delete the file since its incomplete (either corrupted or incomplete)
@@ -212,9 +238,10 @@ def file_hash(load, fnd):
                     except OSError:
                         pass
                     return file_hash(load, fnd)
-                if os.path.getmtime(path) == mtime:
+                if fstat.st_mtime == mtime and cpath == path:
                     # check if mtime changed
                     ret['hsum'] = hsum
+                    _HASHES[key] = (hsum, fstat.st_mtime, fstat.st_size)
                     return ret
         except (os.error, IOError):  # Can't use Python select() because we need Windows support
             log.debug("Fileserver encountered lock when reading cache file. Retrying.")
@@ -227,12 +254,14 @@ def file_hash(load, fnd):
 
     # if we don't have a cache entry-- lets make one
     ret['hsum'] = salt.utils.get_hash(path, __opts__['hash_type'])
+    _HASHES[key] = (ret['hsum'], fstat.st_mtime, fstat.st_size)
     cache_dir = os.path.dirname(cache_path)
     # make cache directory if it doesn't exist
     if not os.path.exists(cache_dir):
         os.makedirs(cache_dir)
-    # save the cache object "hash:mtime"
-    cache_object = '{0}:{1}'.format(ret['hsum'], os.path.getmtime(path))
+    # save the cache object "hash:mtime:path", repr keeps the full precision
+    # of the mtime so that it compares equal when read back
+    cache_object = '{0}:{1!r}:{2}'.format(ret['hsum'], fstat.st_mtime, path)
     with salt.utils.flopen(cache_path, 'w') as fp_:
         fp_.write(cache_object)
     return ret
@@ -261,11 +290,26 @@ def _file_lists(load, form):
             return []
     list_cache = os.path.join(list_cachedir, '{0}.p'.format(load['saltenv']))
     w_lock = os.path.join(list_cachedir, '.{0}.w'.format(load['saltenv']))
+    # Serve the file lists from memory as long as the on-disk list cache
+    # would be considered young enough
+    cached = _FILE_LISTS.get(load['saltenv'])
+    if cached is not None and \
+            time.time() - cached[0] < __opts__.get('fileserver_list_cache_time', 30):
+        return cached[1].get(form, [])
     cache_match, refresh_cache, save_cache = \
         salt.fileserver.check_file_list_cache(
             __opts__, form, list_cache, w_lock
         )
     if cache_match is not None:
+        try:
+            mtime = os.path.getmtime(list_cache)
+            with salt.utils.fopen(list_cache, 'rb') as fp_:
+                _FILE_LISTS[load['saltenv']] = (
+                    mtime, salt.payload.Serial(__opts__).load(fp_)
+                )
+        except (IOError, OSError, NameError):
+            # NameError is a msgpack error in salt-ssh
+            pass
         return cache_match
     if refresh_cache:
         ret = {
@@ -299,6 +343,7 @@ def _file_lists(load, form):
                         if __opts__.get('file_client', 'remote') == 'local' and os.path.sep == "\\":
                             rel_fn = rel_fn.replace('\\', '/')
                         ret['files'].append(rel_fn)
+        _FILE_LISTS[load['saltenv']] = (time.time(), ret)
         if save_cache:
             try:
                 salt.fileserver.write_file_list_cache(
@@ -19,6 +19,7 @@ import re
 import platform
 import logging
 import locale
+import threading
 import salt.exceptions
 
 # Extend the default list of supported distros. This will be used for the
@@ -64,6 +65,8 @@ if salt.utils.is_windows():
         )
 
 _INTERFACES = {}
+# The grain functions may be called in several threads at once
+_INTERFACES_LOCK = threading.Lock()
 
 
 def _windows_cpudata():
@@ -996,8 +999,9 @@ def _get_interfaces():
     '''
 
     global _INTERFACES
-    if not _INTERFACES:
-        _INTERFACES = salt.utils.network.interfaces()
+    with _INTERFACES_LOCK:
+        if not _INTERFACES:
+            _INTERFACES = salt.utils.network.interfaces()
     return _INTERFACES
 
 
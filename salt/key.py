@@ -20,6 +20,7 @@ import salt.crypt
 import salt.utils
 import salt.exceptions
 import salt.utils.event
+import salt.utils.minion_index
 import salt.daemons.masterapi
 from salt.utils import kinds
 from salt.utils.event import tagify
@@ -569,9 +570,11 @@ class Key(object):
         for key, val in six.iteritems(keys):
             minions.extend(val)
         if not self.opts.get('preserve_minion_cache', False) or not preserve_minions:
+            index = salt.utils.minion_index.MinionIndex(self.opts)
             for minion in os.listdir(m_cache):
                 if minion not in minions and minion not in preserve_minions:
                     shutil.rmtree(os.path.join(m_cache, minion))
+                    index.forget(minion)
 
     def check_master(self):
         '''
@@ -982,9 +985,11 @@ class RaetKey(Key):
 
         m_cache = os.path.join(self.opts['cachedir'], 'minions')
         if os.path.isdir(m_cache):
+            index = salt.utils.minion_index.MinionIndex(self.opts)
             for minion in os.listdir(m_cache):
                 if minion not in minions:
                     shutil.rmtree(os.path.join(m_cache, minion))
+                    index.forget(minion)
 
         kind = self.opts.get('__role', '')  # application kind
         if kind not in kinds.APPL_KINDS:
@@ -13,9 +13,11 @@ import imp
 import sys
 import salt
 import time
+import hashlib
 import logging
 import inspect
 import tempfile
+import threading
 from collections import MutableMapping
 
 # Import salt libs
@@ -26,6 +28,8 @@ import salt.utils.lazy
 import salt.utils.odict
 import salt.utils.event
 import salt.utils.odict
+import salt.utils.atomicfile
+import salt.payload
 
 # Solve the Chicken and egg problem where grains need to run before any
 # of the modules are loaded and are generally available for any usage.
@@ -33,6 +37,7 @@ import salt.modules.cmdmod
 
 # Import 3rd-party libs
 import salt.ext.six as six
+from salt.ext.six.moves import queue  # pylint: disable=import-error
 
 __salt__ = {
     'cmd.run': salt.modules.cmdmod._run_quiet
@@ -41,6 +46,24 @@ log = logging.getLogger(__name__)
 
 SALT_BASE_PATH = os.path.abspath(os.path.dirname(salt.__file__))
 LOADED_BASE_NAME = 'salt.loaded'
+# Bump when the layout of the loader manifests changes
+MANIFEST_VERSION = 1
+# Options which change while a daemon runs or between runs of the same command
+# line tool, and which __virtual__ functions do not depend on, changing them
+# does not invalidate a loader manifest
+MANIFEST_OPTS_SKIP = ('pillar', 'schedule',
+                      # set from the command line for every run
+                      'fun', 'arg', 'kwarg', 'jid', 'tgt', 'tgt_type',
+                      'expr_form', 'src', 'dest', 'argv', 'names', 'doc',
+                      'grains_run', 'return', 'metadata', 'timeout',
+                      'auth_timeout', 'retcode_passthrough', 'log_level',
+                      'selected_output_option', 'selected_target_option',
+                      'selected_query_option', 'output', 'output_file',
+                      'output_indent', 'state_output', 'state_output_diff',
+                      'no_color', 'force_color', 'verbose', 'quiet')
+# The seconds each grain function took the last time the grains were loaded
+# in this process, reported by grains.timings
+GRAINS_TIMINGS = {}
 
 # Because on the cloud drivers we do `from salt.cloud.libcloudfuncs import *`
 # which simplifies code readability, it adds some unsupported functions into
@@ -523,6 +546,100 @@ def grain_funcs(opts):
                       )
 
 
+def _call_grain_funcs(funcs, workers=1):
+    '''
+    Call the (key, function) grain functions, in up to ``workers`` threads at
+    a time, and return a (return, exc_info, seconds) for each of them, in
+    their order
+    '''
+    results = [None] * len(funcs)
+
+    def call(index):
+        key, fun = funcs[index]
+        log.trace('Loading {0} grain'.format(key))
+        start = time.time()
+        try:
+            result = (fun(), None)
+        except Exception:
+            result = (None, sys.exc_info())
+        results[index] = result + (time.time() - start,)
+
+    workers = min(int(workers or 1), len(funcs))
+    if workers <= 1:
+        for index in range(len(funcs)):
+            call(index)
+        return results
+
+    indexes = queue.Queue()
+    for index in range(len(funcs)):
+        indexes.put(index)
+
+    def work():
+        while True:
+            try:
+                index = indexes.get_nowait()
+            except queue.Empty:
+                return
+            call(index)
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _grains_func_cache_file(opts):
+    return os.path.join(opts['cachedir'], 'grains.funcs.cache.p')
+
+
+def _read_grains_func_cache(opts):
+    '''
+    Return the cached (time, return) of each grain function which has a
+    :conf_minion:`grains_cache_ttls` entry and was called less than that many
+    seconds ago
+    '''
+    ttls = opts.get('grains_cache_ttls') or {}
+    if not ttls or opts.get('refresh_grains_cache', False):
+        return {}
+    try:
+        serial = salt.payload.Serial(opts)
+        with salt.utils.fopen(_grains_func_cache_file(opts), 'rb') as fp_:
+            cache = serial.load(fp_)
+    except Exception:
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    now = time.time()
+    ret = {}
+    for key, entry in six.iteritems(cache):
+        try:
+            if now - entry[0] < ttls[key]:
+                ret[key] = (entry[0], entry[1])
+        except (KeyError, IndexError, TypeError):
+            continue
+    return ret
+
+
+def _write_grains_func_cache(opts, cache):
+    '''
+    Write the (time, return) of the grain functions to the cachedir
+    '''
+    cfn = _grains_func_cache_file(opts)
+    cumask = os.umask(0o77)
+    try:
+        serial = salt.payload.Serial(opts)
+        with salt.utils.atomicfile.atomic_open(cfn, 'wb') as fp_:
+            fp_.write(serial.dumps(cache))
+    except Exception as exc:
+        # The cache only saves calls, never fail loading the grains on it
+        log.debug('Unable to write the grains cache file {0}: {1}'.format(cfn, exc))
+    finally:
+        os.umask(cumask)
+
+
 def grains(opts, force_refresh=False):
     '''
     Return the functions for the dynamic grains and the values for the static
@@ -598,37 +715,43 @@ def grains(opts, force_refresh=False):
     funcs = grain_funcs(opts)
     if force_refresh:  # if we refresh, lets reload grain modules
         funcs.clear()
-    # Run core grains
-    for key, fun in six.iteritems(funcs):
-        if not key.startswith('core.'):
-            continue
-        log.trace('Loading {0} grain'.format(key))
-        ret = fun()
-        if not isinstance(ret, dict):
-            continue
-        grains_data.update(ret)
-
-    # Run the rest of the grains
-    for key, fun in six.iteritems(funcs):
-        if key.startswith('core.') or key == '_errors':
-            continue
-        try:
-            ret = fun()
-        except Exception:
+    # Run the core grains first, so the rest of the grains override them
+    funcs = sorted(six.iteritems(funcs), key=lambda item: not item[0].startswith('core.'))
+    funcs = [(key, fun) for key, fun in funcs if key != '_errors']
+    func_cache = _read_grains_func_cache(opts)
+    rets = dict((key, entry[1]) for key, entry in six.iteritems(func_cache))
+    pending = [(key, fun) for key, fun in funcs if key not in func_cache]
+    ttls = opts.get('grains_cache_ttls') or {}
+    now = time.time()
+    GRAINS_TIMINGS.clear()
+    results = _call_grain_funcs(pending, opts.get('grains_workers', 1))
+    for (key, fun), (ret, exc_info, seconds) in zip(pending, results):
+        GRAINS_TIMINGS[key] = seconds
+        if exc_info is not None:
+            if key.startswith('core.'):
+                six.reraise(*exc_info)
             log.critical(
                 'Failed to load grains defined in grain file {0} in '
                 'function {1}, error:\n'.format(
                     key, fun
                 ),
-                exc_info=True
+                exc_info=exc_info
             )
             continue
+        rets[key] = ret
+        if key in ttls and isinstance(ret, dict):
+            func_cache[key] = (now, ret)
+    if ttls and pending:
+        _write_grains_func_cache(opts, func_cache)
+    for key, fun in funcs:
+        ret = rets.get(key)
         if not isinstance(ret, dict):
             continue
         grains_data.update(ret)
 
     # Write cache if enabled
     if opts.get('grains_cache', False):
+        cfn = os.path.join(opts['cachedir'], 'grains.cache.p')
         cumask = os.umask(0o77)
         try:
             if salt.utils.is_windows():
@@ -827,6 +950,12 @@ class LazyLoader(salt.utils.lazy.LazyDict):
 
         self.disabled = set(self.opts.get('disable_{0}s'.format(self.tag), []))
 
+        # what an earlier loader of these dirs found, see _read_manifest
+        self._serial = salt.payload.Serial(self.opts)
+        self._manifest_file = None
+        self._manifest = self._read_manifest()
+        self._manifest_dirty = False
+
         self.refresh_file_mapping()
 
         super(LazyLoader, self).__init__()  # late init the lazy loader
@@ -903,8 +1032,20 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         # allow for module dirs
         self.suffix_map[''] = ('', '', imp.PKG_DIRECTORY)
 
+        # reuse the mapping of the manifest if none of the dirs changed
+        if self._manifest is not None:
+            dirs = self._manifest['dirs']
+            if dirs and self._dir_mtimes(set(self.module_dirs) | set(dirs)) == dirs:
+                self.file_mapping = dict(
+                    (name, tuple(entry))
+                    for name, entry in six.iteritems(self._manifest['file_mapping'])
+                )
+                return
+
         # create mapping of filename (without suffix) to (path, suffix)
         self.file_mapping = {}
+        # the dirs listed, to tell when the mapping has to be redone
+        scanned = list(self.module_dirs)
 
         for mod_dir in self.module_dirs:
             files = []
@@ -940,6 +1081,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                             if init_file in subfiles:
                                 sub_path = os.path.join(fpath, init_file)
                                 break
+                        scanned.append(fpath)
                         if sub_path is not None:
                             self.file_mapping[f_noext] = (fpath, ext)
 
@@ -954,6 +1096,121 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 except OSError:
                     continue
 
+        if self._manifest is not None:
+            self._manifest['dirs'] = self._dir_mtimes(scanned)
+            self._manifest['file_mapping'] = self.file_mapping
+            self._manifest_dirty = True
+
+    def _dir_mtimes(self, paths):
+        '''
+        Return a dict of the mtimes of the paths which exist
+        '''
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                continue
+        return mtimes
+
+    def _manifest_key(self):
+        '''
+        Return a hash of what __virtual__ functions commonly depend on: the
+        opts, including the grains, and the dirs binaries and python
+        libraries get installed to. A manifest made with another key is not
+        used.
+        '''
+        opts = sorted(
+            (key, val) for key, val in six.iteritems(self.opts)
+            if key not in MANIFEST_OPTS_SKIP
+        )
+        env_dirs = sys.path + os.environ.get('PATH', '').split(os.pathsep)
+        env = sorted(six.iteritems(self._dir_mtimes([path for path in env_dirs if path])))
+        return hashlib.sha1(self._serial.dumps([opts, env])).hexdigest()
+
+    def _read_manifest(self):
+        '''
+        Read the manifest an earlier loader of the same module dirs wrote to
+        the cachedir. The manifest holds the file mapping and the modules
+        whose __virtual__ function declined to load them, so neither the
+        dirs have to be listed again nor those modules imported while they
+        are unchanged.
+
+        Return a new manifest if the one on disk is missing, older than
+        ``loader_manifest_ttl`` or made with other opts, None if manifests
+        are disabled.
+        '''
+        ttl = self.opts.get('loader_manifest_ttl', 0)
+        if not ttl or not self.opts.get('cachedir'):
+            return None
+        try:
+            dirs_hash = hashlib.sha1(
+                self._serial.dumps([self.tag, self.module_dirs])).hexdigest()
+            key = self._manifest_key()
+        except Exception as exc:
+            log.trace('Not using a manifest for the {0} loader: {1}'.format(
+                self.tag, exc))
+            return None
+        self._manifest_file = os.path.join(
+            self.opts['cachedir'],
+            'loader',
+            '{0}-{1}.p'.format(self.tag, dirs_hash[:16]))
+        try:
+            with salt.utils.fopen(self._manifest_file, 'rb') as fp_:
+                manifest = self._serial.load(fp_)
+            if manifest.get('version') == MANIFEST_VERSION \
+                    and manifest.get('key') == key \
+                    and 0 <= time.time() - manifest['time'] < ttl:
+                return manifest
+        except (IOError, OSError):
+            pass
+        except Exception as exc:
+            log.debug('Discarding the {0} loader manifest {1}: {2}'.format(
+                self.tag, self._manifest_file, exc))
+        return {'version': MANIFEST_VERSION,
+                'key': key,
+                'time': time.time(),
+                'dirs': {},
+                'file_mapping': {},
+                'virtual': {},
+                'providers': {}}
+
+    def _write_manifest(self):
+        '''
+        Write the manifest back to the cachedir if it changed
+        '''
+        if self._manifest is None or not self._manifest_dirty:
+            return
+        self._manifest_dirty = False
+        try:
+            cache_dir = os.path.dirname(self._manifest_file)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with salt.utils.atomicfile.atomic_open(self._manifest_file, 'wb') as fp_:
+                fp_.write(self._serial.dumps(self._manifest))
+        except Exception as exc:
+            # The manifest is only a cache, never fail a load on writing it
+            log.debug('Unable to write the {0} loader manifest {1}: {2}'.format(
+                self.tag, self._manifest_file, exc))
+
+    def _manifest_declined(self, name, fpath):
+        '''
+        Return the (module_name, error) the __virtual__ function of a module
+        returned when it declined to load, if the manifest recorded that and
+        the module did not change since, None otherwise
+        '''
+        if self._manifest is None or not self.virtual_enable:
+            return None
+        entry = self._manifest['virtual'].get(name)
+        if entry is None or entry[0] != fpath:
+            return None
+        try:
+            if os.stat(fpath).st_mtime != entry[1]:
+                return None
+        except OSError:
+            return None
+        return entry[2], entry[3]
+
     def clear(self):
         '''
         Clear the dict
@@ -992,6 +1249,12 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         '''
         Iterate over all file_mapping files in order of closeness to mod_name
         '''
+        # the file which provided the module last time
+        if self._manifest is not None:
+            provider = self._manifest['providers'].get(mod_name)
+            if provider in self.file_mapping:
+                yield provider
+
         # do we have an exact match?
         if mod_name in self.file_mapping:
             yield mod_name
@@ -1023,6 +1286,12 @@ class LazyLoader(salt.utils.lazy.LazyDict):
         mod = None
         fpath, suffix = self.file_mapping[name]
         self.loaded_files.add(name)
+        declined = self._manifest_declined(name, fpath)
+        if declined is not None:
+            module_name, virtual_err = declined
+            self.missing_modules[module_name] = virtual_err
+            self.missing_modules[name] = virtual_err
+            return False
         try:
             sys.path.append(os.path.dirname(fpath))
             if suffix == '.pyx':
@@ -1133,6 +1402,15 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 # If a module has information about why it could not be loaded, record it
                 self.missing_modules[module_name] = virtual_err
                 self.missing_modules[name] = virtual_err
+                if self._manifest is not None:
+                    try:
+                        mtime = os.stat(fpath).st_mtime
+                    except OSError:
+                        pass
+                    else:
+                        self._manifest['virtual'][name] = [
+                            fpath, mtime, module_name, virtual_err]
+                        self._manifest_dirty = True
                 return False
 
         # If this is a proxy minion then MOST modules cannot work. Therefore, require that
@@ -1185,6 +1463,10 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                      'for reasons: {0}'.format(e))
 
         self.loaded_modules[module_name] = mod_dict
+        if self._manifest is not None \
+                and self._manifest['providers'].get(module_name) != name:
+            self._manifest['providers'][module_name] = name
+            self._manifest_dirty = True
         return True
 
     def _load(self, key):
@@ -1229,6 +1511,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                     reloaded = True
                 continue
 
+        self._write_manifest()
         return ret
 
     def _load_all(self):
@@ -1240,6 +1523,7 @@ class LazyLoader(salt.utils.lazy.LazyDict):
                 continue
             self._load_module(name)
 
+        self._write_manifest()
         self.loaded = True
 
     def _apply_outputter(self, func, mod):
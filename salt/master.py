@@ -54,6 +54,7 @@ import salt.utils.job
 import salt.utils.reactor
 import salt.utils.verify
 import salt.utils.minions
+import salt.utils.minion_index
 import salt.utils.gzip_util
 import salt.utils.process
 import salt.utils.zeromq
@@ -197,6 +198,7 @@ class Maintenance(multiprocessing.Process):
             if (now - last) >= self.loop_interval:
                 salt.daemons.masterapi.clean_old_jobs(self.opts)
                 salt.daemons.masterapi.clean_expired_tokens(self.opts)
+                salt.daemons.masterapi.compact_minion_index(self.opts)
             self.handle_search(now, last)
             self.handle_pillargit()
             self.handle_schedule()
@@ -422,11 +424,12 @@ class Master(SMaster):
 
     # run_reqserver cannot be defined within a class method in order for it
     # to be picklable.
-    def run_reqserver(self):
+    def run_reqserver(self, job_queue=None):
         reqserv = ReqServer(
             self.opts,
             self.key,
-            self.master_key)
+            self.master_key,
+            job_queue)
         reqserv.run()
 
     def start(self):
@@ -467,6 +470,13 @@ class Master(SMaster):
             log.info('Creating master event return process')
             process_manager.add_process(salt.utils.event.EventReturn, args=(self.opts,))
 
+        job_queue = None
+        if self.opts.get('job_cache_writer'):
+            log.info('Creating master job cache writer process')
+            job_queue = multiprocessing.Queue(self.opts['job_cache_writer_queue'])
+            process_manager.add_process(salt.utils.job.JobCacheWriter,
+                                        args=(self.opts, job_queue))
+
         ext_procs = self.opts.get('ext_processes', [])
         for proc in ext_procs:
             log.info('Creating ext_processes process: {0}'.format(proc))
@@ -493,7 +503,7 @@ class Master(SMaster):
             time.sleep(2)
 
         log.info('Creating master request server process')
-        process_manager.add_process(self.run_reqserver)
+        process_manager.add_process(self.run_reqserver, args=(job_queue,))
         try:
             process_manager.run()
         except KeyboardInterrupt:
@@ -547,13 +557,14 @@ class ReqServer(object):
     Starts up the master request server, minions send results to this
     interface.
     '''
-    def __init__(self, opts, key, mkey):
+    def __init__(self, opts, key, mkey, job_queue=None):
         '''
         Create a request server
 
         :param dict opts: The salt options dictionary
         :key dict: The user starting the server and the AES key
         :mkey dict: The user starting the server and the RSA key
+        :job_queue: The queue of the job cache writer process, if any
 
         :rtype: ReqServer
         :returns: Request server
@@ -562,6 +573,7 @@ class ReqServer(object):
         self.master_key = mkey
         # Prepare the AES key
         self.key = key
+        self.job_queue = job_queue
 
     def __bind(self):
         '''
@@ -587,6 +599,7 @@ class ReqServer(object):
                                                    self.master_key,
                                                    self.key,
                                                    req_channels,
+                                                   self.job_queue,
                                                    ),
                                              )
         self.process_manager.run()
@@ -627,13 +640,15 @@ class MWorker(multiprocessing.Process):
                  opts,
                  mkey,
                  key,
-                 req_channels):
+                 req_channels,
+                 job_queue=None):
         '''
         Create a salt master worker process
 
         :param dict opts: The salt options
         :param dict mkey: The user running the salt master and the AES key
         :param dict key: The user running the salt master and the RSA key
+        :param job_queue: The queue of the job cache writer process, if any
 
         :rtype: MWorker
         :return: Master worker
@@ -641,6 +656,7 @@ class MWorker(multiprocessing.Process):
         multiprocessing.Process.__init__(self)
         self.opts = opts
         self.req_channels = req_channels
+        self.job_queue = job_queue
 
         self.mkey = mkey
         self.key = key
@@ -655,6 +671,7 @@ class MWorker(multiprocessing.Process):
         multiprocessing.Process.__init__(self)
         self.opts = state['opts']
         self.req_channels = state['req_channels']
+        self.job_queue = state['job_queue']
         self.mkey = state['mkey']
         self.key = state['key']
         self.k_mtime = state['k_mtime']
@@ -663,6 +680,7 @@ class MWorker(multiprocessing.Process):
     def __getstate__(self):
         return {'opts': self.opts,
                 'req_channels': self.req_channels,
+                'job_queue': self.job_queue,
                 'mkey': self.mkey,
                 'key': self.key,
                 'k_mtime': self.k_mtime,
@@ -745,7 +763,7 @@ class MWorker(multiprocessing.Process):
             self.opts,
             self.key,
             )
-        self.aes_funcs = AESFuncs(self.opts)
+        self.aes_funcs = AESFuncs(self.opts, self.job_queue)
         salt.utils.reinit_crypto()
         self.__bind()
 
@@ -757,19 +775,22 @@ class AESFuncs(object):
     '''
     # The AES Functions:
     #
-    def __init__(self, opts):
+    def __init__(self, opts, job_queue=None):
         '''
         Create a new AESFuncs
 
         :param dict opts: The salt options
+        :param job_queue: The queue of the job cache writer process, if any
 
         :rtype: AESFuncs
         :returns: Instance for handling AES operations
         '''
         self.opts = opts
+        self.job_queue = job_queue
         self.event = salt.utils.event.get_master_event(self.opts, self.opts['sock_dir'])
         self.serial = salt.payload.Serial(opts)
         self.ckminions = salt.utils.minions.CkMinions(opts)
+        self.minion_index = salt.utils.minion_index.MinionIndex(opts)
         # Make a client
         self.local = salt.client.get_local_client(self.opts['conf_file'])
         # Create the master minion to access the external job cache
@@ -786,6 +807,7 @@ class AESFuncs(object):
         '''
         self.fs_ = salt.fileserver.Fileserver(self.opts)
         self._serve_file = self.fs_.serve_file
+        self._serve_files = self.fs_.serve_files
         self._file_hash = self.fs_.file_hash
         self._file_list = self.fs_.file_list
         self._file_list_emptydirs = self.fs_.file_list_emptydirs
@@ -1108,15 +1130,20 @@ class AESFuncs(object):
         load['grains']['id'] = load['id']
 
         pillar_dirs = {}
-        pillar = salt.pillar.Pillar(
+        data = salt.pillar.compile_cached_pillar(
             self.opts,
             load['grains'],
             load['id'],
             load.get('saltenv', load.get('env')),
             ext=load.get('ext'),
             pillar=load.get('pillar_override', {}),
-            pillarenv=load.get('pillarenv'))
-        data = pillar.compile_pillar(pillar_dirs=pillar_dirs)
+            pillarenv=load.get('pillarenv'),
+            pillar_dirs=pillar_dirs,
+            refresh=load.get('refresh', False))
+        stats = salt.pillar.pop_pillar_cache_stats(
+            self.opts.get('pillar_cache_stats_interval', 0))
+        if stats is not None:
+            self.event.fire_event(stats, salt.pillar.CACHE_STATS_TAG)
         self.fs_.update_opts()
         if self.opts.get('minion_data_cache', False):
             cdir = os.path.join(self.opts['cachedir'], 'minions', load['id'])
@@ -1133,6 +1160,9 @@ class AESFuncs(object):
                     )
             # On Windows, os.rename will fail if the destination file exists.
             salt.utils.atomicfile.atomic_rename(tmpfname, datap)
+            self.minion_index.update(
+                load['id'],
+                {'grains': load['grains'], 'pillar': data})
         return data
 
     def _minion_event(self, load):
@@ -1170,7 +1200,8 @@ class AESFuncs(object):
         :param dict load: The minion payload
         '''
         salt.utils.job.store_job(
-            self.opts, load, event=self.event, mminion=self.mminion)
+            self.opts, load, event=self.event, mminion=self.mminion,
+            job_queue=self.job_queue)
 
     def _syndic_return(self, load):
         '''
@@ -1417,6 +1448,9 @@ class ClearFuncs(object):
         self.wheel_ = salt.wheel.Wheel(opts)
         # Make a masterapi object
         self.masterapi = salt.daemons.masterapi.LocalFuncs(opts, key)
+        # The publish channels, kept connected to the publisher after the
+        # first publish
+        self.pub_channels = []
 
     def process_token(self, tok, fun, auth_type):
         '''
@@ -1978,7 +2012,7 @@ class ClearFuncs(object):
         payload = self._prep_pub(minions, jid, clear_load, extra)
 
         # Send it!
-        self._send_pub(payload)
+        self._send_pub(payload, minions)
 
         return {
             'enc': 'clear',
@@ -2013,13 +2047,17 @@ class ClearFuncs(object):
             return {'error': msg}
         return jid
 
-    def _send_pub(self, load):
+    def _send_pub(self, load, minions=None):
         '''
-        Take a load and send it across the network to connected minions
+        Take a load and send it across the network to connected minions, or
+        only to the given minions the target matched if the transport can
         '''
-        for transport, opts in iter_transport_opts(self.opts):
-            chan = salt.transport.server.PubServerChannel.factory(opts)
-            chan.publish(load)
+        if not self.pub_channels:
+            for transport, opts in iter_transport_opts(self.opts):
+                self.pub_channels.append(
+                    salt.transport.server.PubServerChannel.factory(opts))
+        for chan in self.pub_channels:
+            chan.publish(load, minions=minions)
 
     def _prep_pub(self, minions, jid, clear_load, extra):
         '''
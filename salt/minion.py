@@ -64,6 +64,13 @@ try:
 except ImportError:
     pass
 
+HAS_SETPROCTITLE = False
+try:
+    import setproctitle
+    HAS_SETPROCTITLE = True
+except ImportError:
+    pass
+
 try:
     import zmq.utils.monitor
     HAS_ZMQ_MONITOR = True
@@ -85,6 +92,7 @@ import salt.pillar
 import salt.utils.args
 import salt.utils.event
 import salt.utils.minions
+import salt.utils.process
 import salt.utils.schedule
 import salt.utils.error
 import salt.utils.zeromq
@@ -528,6 +536,258 @@ class MultiMinion(MinionBase):
         self.io_loop.start()
 
 
+class MinionWorkerPool(object):
+    '''
+    A pool of pre-forked processes executing the jobs of a minion.
+
+    The workers are forked from the minion once the execution modules are
+    loaded and receive the jobs over a pipe, saving the minion from forking
+    and daemonizing a new process for every publication and scheduled job.
+    A job is only handed to an idle worker, when all of the workers are busy
+    the caller falls back to starting a process for the job.
+
+    Workers are replaced after running ``worker_pool_max_jobs`` jobs, after
+    the minion reloaded its modules, and when a job runs for longer than
+    ``worker_pool_job_timeout`` seconds.
+    '''
+    def __init__(self, minion, io_loop=None):
+        self.minion = minion
+        self.opts = minion.opts
+        self.io_loop = io_loop
+        self.size = int(self.opts.get('worker_pool_size', 0))
+        self.max_jobs = int(self.opts.get('worker_pool_max_jobs', 0))
+        self.job_timeout = self.opts.get('worker_pool_job_timeout', 0)
+        self.generation = 0
+        # fd -> worker, a worker is a dict holding its process, its end of
+        # the pipe, the job it runs and the number of jobs it ran
+        self.workers = {}
+        self.fill()
+
+    def fill(self):
+        '''
+        Start workers until the pool is full
+        '''
+        while len(self.workers) < self.size:
+            self._spawn()
+
+    def _spawn(self):
+        conn, child_conn = multiprocessing.Pipe()
+        proc = multiprocessing.Process(target=self._worker, args=(child_conn,))
+        proc.start()
+        child_conn.close()
+        worker = {'proc': proc,
+                  'conn': conn,
+                  'job': None,
+                  'start': None,
+                  'jobs': 0,
+                  'generation': self.generation}
+        self.workers[conn.fileno()] = worker
+        if self.io_loop is not None:
+            self.io_loop.add_handler(
+                conn.fileno(),
+                lambda fd, events: self.reap(fd),
+                self.io_loop.READ
+            )
+        log.debug('Started minion worker with PID {0}'.format(proc.pid))
+        return worker
+
+    def _worker(self, conn):
+        '''
+        The main loop of a worker process
+        '''
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        salt.utils.appendproctitle('MinionWorker')
+        # Every job appends its jid to the title of the process, it is put
+        # back before the next one
+        if HAS_SETPROCTITLE:
+            title = setproctitle.getproctitle()
+        # The jobs are already running in their own process
+        opts = dict(self.minion.opts, multiprocessing=False)
+        # Every job starts from the __context__ the worker was forked with, so
+        # nothing an earlier job cached there, like the installed packages,
+        # goes stale in a later one
+        contexts = self._contexts()
+        while True:
+            try:
+                kind, data = conn.recv()
+            except (EOFError, IOError, KeyboardInterrupt):
+                break
+            if kind is None:
+                break
+            for context, initial in contexts:
+                context.clear()
+                context.update(initial)
+            if HAS_SETPROCTITLE:
+                setproctitle.setproctitle(title)
+            try:
+                if kind == 'schedule':
+                    self.minion.schedule.handle_func(
+                        data[0], data[1], daemonize=False
+                    )
+                else:
+                    getattr(Minion, kind)(self.minion, opts, data)
+            except Exception:
+                log.error('Minion worker failed to run a job', exc_info=True)
+            finally:
+                if kind != 'schedule':
+                    self._remove_proc_file(data['jid'])
+            try:
+                conn.send(kind)
+            except (IOError, OSError):
+                break
+
+    def _contexts(self):
+        '''
+        Return the __context__ dicts of the loaders of the minion, each with
+        a copy of what it holds now
+        '''
+        contexts = {}
+        for loader in (getattr(self.minion, 'functions', None),
+                       getattr(self.minion, 'returners', None)):
+            context = getattr(loader, 'pack', {}).get('__context__')
+            if isinstance(context, dict):
+                contexts[id(context)] = (context, dict(context))
+        return list(contexts.values())
+
+    def _remove_proc_file(self, jid):
+        try:
+            os.remove(os.path.join(self.minion.proc_dir, str(jid)))
+        except (IOError, OSError):
+            pass
+
+    def dispatch(self, kind, data):
+        '''
+        Hand a job to an idle worker, returns False if all of the workers
+        are busy. ``kind`` is the name of the Minion method running
+        publications, or ``schedule`` for a scheduled job.
+        '''
+        self.check()
+        for worker in six.itervalues(self.workers):
+            if worker['job'] is None:
+                break
+        else:
+            return False
+        try:
+            worker['conn'].send((kind, data))
+        except (IOError, OSError):
+            self._remove(worker)
+            return False
+        worker['job'] = (kind, data)
+        worker['start'] = time.time()
+        worker['jobs'] += 1
+        return True
+
+    def reap(self, fd_):
+        '''
+        Collect the notification of a worker that finished its job
+        '''
+        worker = self.workers.get(fd_)
+        if worker is None:
+            return
+        try:
+            worker['conn'].recv()
+        except (EOFError, IOError, OSError):
+            # The worker died, most likely killed with saltutil.kill_job
+            log.debug('Minion worker with PID {0} exited'.format(
+                worker['proc'].pid))
+            self._remove(worker)
+            return
+        worker['job'] = None
+        worker['start'] = None
+        if worker['generation'] != self.generation or \
+                (self.max_jobs and worker['jobs'] >= self.max_jobs):
+            self._stop(worker)
+
+    def check(self):
+        '''
+        Collect the finished jobs, kill the jobs running for too long and
+        replace the workers which exited
+        '''
+        for fd_, worker in list(self.workers.items()):
+            if fd_ not in self.workers:
+                continue
+            if worker['conn'].poll():
+                self.reap(fd_)
+            elif not worker['proc'].is_alive():
+                self._remove(worker)
+            elif worker['job'] is not None and self.job_timeout and \
+                    time.time() - worker['start'] > self.job_timeout:
+                self._timeout(worker)
+            elif worker['job'] is None and \
+                    worker['generation'] != self.generation:
+                self._stop(worker)
+        self.fill()
+
+    def recycle(self):
+        '''
+        Replace all of the workers, the busy ones once their job is done.
+        Called when the minion reloaded its modules.
+        '''
+        self.generation += 1
+        self.check()
+
+    def _timeout(self, worker):
+        kind, data = worker['job']
+        log.error(
+            'Job {0} did not finish within {1} seconds, killing minion '
+            'worker with PID {2}'.format(
+                data[1]['name'] if kind == 'schedule' else data['jid'],
+                self.job_timeout,
+                worker['proc'].pid
+            )
+        )
+        salt.utils.process.clean_proc(worker['proc'], wait_for_kill=1)
+        if kind != 'schedule':
+            ret = {'success': False,
+                   'return': 'The job was killed after running for more '
+                             'than {0} seconds'.format(self.job_timeout),
+                   'retcode': 1,
+                   'out': 'nested',
+                   'jid': data['jid'],
+                   'fun': data['fun'],
+                   'fun_args': data['arg']}
+            thread = threading.Thread(target=self.minion._return_pub, args=(ret,))
+            thread.daemon = True
+            thread.start()
+        self._remove(worker)
+
+    def _stop(self, worker):
+        '''
+        Ask an idle worker to exit
+        '''
+        try:
+            worker['conn'].send((None, None))
+        except (IOError, OSError):
+            pass
+        worker['proc'].join(1)
+        if worker['proc'].is_alive():
+            salt.utils.process.clean_proc(worker['proc'], wait_for_kill=1)
+        self._remove(worker)
+
+    def _remove(self, worker):
+        fd_ = worker['conn'].fileno()
+        if self.io_loop is not None:
+            self.io_loop.remove_handler(fd_)
+        self.workers.pop(fd_, None)
+        worker['conn'].close()
+        worker['proc'].join(0)
+        if worker['job'] is not None and worker['job'][0] != 'schedule':
+            self._remove_proc_file(worker['job'][1]['jid'])
+
+    def stop(self):
+        '''
+        Stop all of the workers
+        '''
+        self.size = 0
+        for worker in list(self.workers.values()):
+            if worker['job'] is None:
+                self._stop(worker)
+            else:
+                salt.utils.process.clean_proc(worker['proc'], wait_for_kill=1)
+                self._remove(worker)
+
+
 class Minion(MinionBase):
     '''
     This class instantiates a minion, runs connections for a minion,
@@ -545,6 +805,7 @@ class Minion(MinionBase):
 
         self._running = None
         self.win_proc = []
+        self.worker_pool = None
         self.loaded_base_name = loaded_base_name
 
         self.io_loop = io_loop or zmq.eventloop.ioloop.ZMQIOLoop()
@@ -930,10 +1191,15 @@ class Minion(MinionBase):
                 self.functions, self.returners, self.function_errors = self._load_modules()
                 self.schedule.functions = self.functions
                 self.schedule.returners = self.returners
+                if self.worker_pool is not None:
+                    self.worker_pool.recycle()
         if isinstance(data['fun'], tuple) or isinstance(data['fun'], list):
             target = Minion._thread_multi_return
         else:
             target = Minion._thread_return
+        if self.worker_pool is not None and \
+                self.worker_pool.dispatch(target.__name__, data):
+            return
         # We stash an instance references to allow for the socket
         # communication in Windows. You can't pickle functions, and thus
         # python needs to be able to reconstruct the reference on the other
@@ -1308,12 +1574,15 @@ class Minion(MinionBase):
         self.functions, self.returners, _ = self._load_modules(force_refresh, notify=notify)
         self.schedule.functions = self.functions
         self.schedule.returners = self.returners
+        if self.worker_pool is not None:
+            self.worker_pool.recycle()
 
     # TODO: only allow one future in flight at a time?
     @tornado.gen.coroutine
-    def pillar_refresh(self, force_refresh=False):
+    def pillar_refresh(self, force_refresh=False, clear_cache=False):
         '''
-        Refresh the pillar
+        Refresh the pillar, with ``clear_cache`` the master compiles it again
+        instead of returning it from its pillar cache
         '''
         log.debug('Refreshing pillar')
         try:
@@ -1322,7 +1591,8 @@ class Minion(MinionBase):
                 self.opts['grains'],
                 self.opts['id'],
                 self.opts['environment'],
-                pillarenv=self.opts.get('pillarenv')
+                pillarenv=self.opts.get('pillarenv'),
+                refresh=clear_cache
             ).compile_pillar()
         except SaltClientError:
             # Do not exit if a pillar refresh fails.
@@ -1402,7 +1672,11 @@ class Minion(MinionBase):
         false_unsets = data.get('false_unsets', False)
         clear_all = data.get('clear_all', False)
         import salt.modules.environ as mod_environ
-        return mod_environ.setenv(environ, false_unsets, clear_all)
+        ret = mod_environ.setenv(environ, false_unsets, clear_all)
+        if self.worker_pool is not None:
+            # The workers were forked with the former environment
+            self.worker_pool.recycle()
+        return ret
 
     def clean_die(self, signum, frame):
         '''
@@ -1470,7 +1744,9 @@ class Minion(MinionBase):
             tag, data = salt.utils.event.MinionEvent.unpack(package)
             self.module_refresh(notify=data.get('notify', False))
         elif package.startswith('pillar_refresh'):
-            yield self.pillar_refresh()
+            tag, data = salt.utils.event.MinionEvent.unpack(package)
+            yield self.pillar_refresh(
+                clear_cache=data.get('clear_cache', False))
         elif package.startswith('manage_schedule'):
             self.manage_schedule(package)
         elif package.startswith('manage_beacons'):
@@ -1647,6 +1923,18 @@ class Minion(MinionBase):
 
         self.periodic_callbacks['cleanup'] = tornado.ioloop.PeriodicCallback(self._fallback_cleanups, loop_interval * 1000, io_loop=self.io_loop)
 
+        if self.opts.get('worker_pool_size', 0) > 0:
+            if self.opts['multiprocessing'] and not salt.utils.is_windows():
+                self.worker_pool = MinionWorkerPool(self, io_loop=self.io_loop)
+                self.schedule.worker_pool = self.worker_pool
+                self.periodic_callbacks['worker_pool'] = tornado.ioloop.PeriodicCallback(self.worker_pool.check, loop_interval * 1000, io_loop=self.io_loop)
+            else:
+                log.warning(
+                    'worker_pool_size is only supported with multiprocessing '
+                    'enabled and on platforms other than Windows, jobs are '
+                    'run without a worker pool'
+                )
+
         def handle_beacons():
             # Process Beacons
             try:
@@ -1717,6 +2005,9 @@ class Minion(MinionBase):
         if hasattr(self, 'periodic_callbacks'):
             for cb in six.itervalues(self.periodic_callbacks):
                 cb.stop()
+        if getattr(self, 'worker_pool', None) is not None:
+            self.worker_pool.stop()
+            self.worker_pool = None
 
     def __del__(self):
         self.destroy()
@@ -1807,7 +2098,7 @@ class Syndic(Minion):
 
         # Instantiate the local client
         self.local = salt.client.get_local_client(self.opts['_minion_conf_file'])
-        self.local.event.subscribe('')
+        self.local.event.subscribe()
         self.local.opts['interface'] = self._syndic_interface
 
         # add handler to subscriber
@@ -2064,7 +2355,7 @@ class MultiSyndic(MinionBase):
         self._spawn_syndics()
         # Instantiate the local client
         self.local = salt.client.get_local_client(self.opts['_minion_conf_file'])
-        self.local.event.subscribe('')
+        self.local.event.subscribe()
 
         log.debug('MultiSyndic {0!r} trying to tune in'.format(self.opts['id']))
 
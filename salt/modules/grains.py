@@ -20,6 +20,7 @@ import salt.ext.six as six
 from salt.ext.six.moves import range  # pylint: disable=import-error,no-name-in-module,redefined-builtin
 
 # Import salt libs
+import salt.loader
 import salt.utils
 import salt.utils.dictupdate
 from salt.defaults import DEFAULT_TARGET_DELIM
@@ -35,6 +36,7 @@ __outputter__ = {
     'items': 'nested',
     'item': 'nested',
     'setval': 'nested',
+    'timings': 'nested',
 }
 
 # http://stackoverflow.com/a/12414913/127816
@@ -381,6 +383,25 @@ def ls():  # pylint: disable=C0103
     return sorted(__grains__)
 
 
+def timings():
+    '''
+    .. versionadded:: Boron
+
+    Return the number of seconds each grain function took the last time the
+    grains were loaded. The grain functions whose grains came from the
+    :conf_minion:`grains_cache_ttls` cache are left out, and nothing is
+    returned when all of the grains came from the :conf_minion:`grains_cache`.
+
+    CLI Example:
+
+    .. code-block:: bash
+
+        salt '*' grains.timings
+    '''
+    return dict((key, round(seconds, 4))
+                for key, seconds in six.iteritems(salt.loader.GRAINS_TIMINGS))
+
+
 def filter_by(lookup_dict, grain='os_family', merge=None, default='default', base=None):
     '''
     .. versionadded:: 0.17.0
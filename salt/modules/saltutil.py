@@ -507,18 +507,26 @@ def refresh_beacons():
     return ret
 
 
-def refresh_pillar():
+def refresh_pillar(clear_cache=False):
     '''
     Signal the minion to refresh the pillar data.
 
+    clear_cache : False
+        Have the master compile the pillar data again instead of returning it
+        from its pillar cache, when :conf_master:`pillar_cache` is enabled
+
+        .. versionadded:: Boron
+
     CLI Example:
 
     .. code-block:: bash
 
         salt '*' saltutil.refresh_pillar
+        salt '*' saltutil.refresh_pillar clear_cache=True
     '''
+    data = {'clear_cache': True} if clear_cache else {}
     try:
-        ret = __salt__['event.fire']({}, 'pillar_refresh')
+        ret = __salt__['event.fire'](data, 'pillar_refresh')
     except KeyError:
         log.error('Event module not available. Module refresh failed.')
         ret = False  # Effectively a no-op, since we can't really return without an event system
@@ -264,6 +264,8 @@ class EventListener(object):
 
         # tag -> list of futures
         self.tag_map = defaultdict(list)
+        # the tags of tag_map, to find those an event tag starts with
+        self.tag_index = salt.utils.event.TagSubscriptions()
 
         # request_obj -> list of (tag, future)
         self.request_map = defaultdict(list)
@@ -298,6 +300,8 @@ class EventListener(object):
                 tornado.ioloop.IOLoop.current().add_callback(callback, future)
             future.add_done_callback(handle_future)
         # add this tag and future to the callbacks
+        if tag not in self.tag_map:
+            self.tag_index.add(tag)
         self.tag_map[tag].append(future)
         self.request_map[request].append((tag, future))
 
@@ -318,6 +322,7 @@ class EventListener(object):
             self.tag_map[tag].remove(future)
         if len(self.tag_map[tag]) == 0:
             del self.tag_map[tag]
+            self.tag_index.remove(tag)
 
     def _handle_event_socket_recv(self, raw):
         '''
@@ -325,16 +330,15 @@ class EventListener(object):
         '''
         mtag, data = self.event.unpack(raw[0], self.event.serial)
         # see if we have any futures that need this info:
-        for tag_prefix, futures in six.iteritems(self.tag_map):
-            if mtag.startswith(tag_prefix):
-                for future in futures:
-                    if future.done():
-                        continue
-                    future.set_result({'data': data, 'tag': mtag})
-                    self.tag_map[tag_prefix].remove(future)
-                    if future in self.timeout_map:
-                        tornado.ioloop.IOLoop.current().remove_timeout(self.timeout_map[future])
-                        del self.timeout_map[future]
+        for tag_prefix in list(self.tag_index.iter_prefixes(mtag)):
+            for future in list(self.tag_map[tag_prefix]):
+                if future.done():
+                    continue
+                future.set_result({'data': data, 'tag': mtag})
+                self.tag_map[tag_prefix].remove(future)
+                if future in self.timeout_map:
+                    tornado.ioloop.IOLoop.current().remove_timeout(self.timeout_map[future])
+                    del self.timeout_map[future]
 
 
 # TODO: move to a utils function within salt-- the batching stuff is a bit tied together
@@ -11,10 +11,12 @@ from __future__ import absolute_import
 import logging
 import gc
 import datetime
+import collections
 
 # Import salt libs
 import salt.log
 import salt.crypt
+import salt.utils
 from salt.exceptions import SaltReqTimeoutError
 
 # Import third party libs
@@ -49,6 +51,82 @@ except ImportError:
         #sys.exit(salt.defaults.exitcodes.EX_GENERIC)
 
 
+# Messages smaller than this are decoded without disabling the garbage
+# collector, toggling it costs more than it saves for small messages
+GC_DISABLE_SIZE = 65536
+
+# msgpack extended type used for datetime.datetime objects
+DATETIME_EXT_TYPE = 78
+DATETIME_FORMAT = '%Y%m%dT%H:%M:%S.%f'
+
+_LONG_MAX = pow(2, 64)
+
+
+def _datetime(obj):
+    '''
+    Return the msgpack representation of a datetime object
+    '''
+    datetime_str = obj.strftime(DATETIME_FORMAT)
+    if hasattr(msgpack, 'ExtType'):
+        return msgpack.ExtType(DATETIME_EXT_TYPE,
+                               salt.utils.to_bytes(datetime_str))
+    return datetime_str
+
+
+def _default(obj):
+    '''
+    Convert the types msgpack doesn't know how to pack, called by msgpack
+    while packing a message
+    '''
+    if isinstance(obj, datetime.datetime):
+        return _datetime(obj)
+    if isinstance(obj, collections.Mapping):
+        return dict(obj)
+    if isinstance(obj, collections.Sequence):
+        return list(obj)
+    raise TypeError('{0!r} is not msgpack serializable'.format(obj))
+
+
+def _encode(obj):
+    '''
+    Walk the data and convert the types msgpack doesn't know how to pack,
+    used when msgpack is too old to call the default hook itself
+    '''
+    if isinstance(obj, dict):
+        return dict((key, _encode(value)) for key, value in six.iteritems(obj))
+    elif isinstance(obj, (list, tuple)):
+        return [_encode(entry) for entry in obj]
+    elif isinstance(obj, datetime.datetime):
+        return _datetime(obj)
+    elif isinstance(obj, six.integer_types) and not isinstance(obj, bool) \
+            and not -_LONG_MAX < obj < _LONG_MAX:
+        return str(obj)
+    return obj
+
+
+def _ext_hook(code, data):
+    '''
+    Decode the msgpack extended types packed by Serial.dumps
+    '''
+    if code == DATETIME_EXT_TYPE:
+        # Datetimes are returned in their string form so the data can still
+        # be handed to any outputter or returner
+        return salt.utils.to_str(data)
+    return msgpack.ExtType(code, data)
+
+
+def _unpackb(msg):
+    '''
+    Decode a message, accepting strings and buffers
+    '''
+    if six.PY2 and isinstance(msg, memoryview):
+        # msgpack only reads the old style buffer interface on Python 2
+        msg = msg.tobytes()
+    if hasattr(msgpack, 'ExtType'):
+        return msgpack.loads(msg, use_list=True, ext_hook=_ext_hook)
+    return msgpack.loads(msg, use_list=True)
+
+
 def package(payload):
     '''
     This method for now just wraps msgpack.dumps, but it is here so that
@@ -93,17 +171,25 @@ class Serial(object):
     def loads(self, msg):
         '''
         Run the correct loads serialization format
+
+        ``msg`` may be a string, a ``bytearray`` or a ``memoryview``, buffers
+        are decoded in place without being copied first
         '''
+        gc_enabled = gc.isenabled() and len(msg) >= GC_DISABLE_SIZE
         try:
-            gc.disable()  # performance optimization for msgpack
-            return msgpack.loads(msg, use_list=True)
+            if gc_enabled:
+                # Decoding large messages creates many containers at once,
+                # don't let the garbage collector walk them while doing so
+                gc.disable()
+            return _unpackb(msg)
         except Exception as exc:
             log.critical('Could not deserialize msgpack message: {0}'
                          'This often happens when trying to read a file not in binary mode.'
                          'Please open an issue and include the following error: {1}'.format(msg, exc))
             raise
         finally:
-            gc.enable()
+            if gc_enabled:
+                gc.enable()
 
     def load(self, fn_):
         '''
@@ -119,84 +205,18 @@ class Serial(object):
         Run the correct dumps serialization format
         '''
         try:
-            return msgpack.dumps(msg)
-        except OverflowError:
-            # msgpack can't handle the very long Python longs for jids
-            # Convert any very long longs to strings
-            # We borrow the technique used by TypeError below
-            def verylong_encoder(obj):
-                if isinstance(obj, dict):
-                    for key, value in six.iteritems(obj.copy()):
-                        obj[key] = verylong_encoder(value)
-                    return dict(obj)
-                elif isinstance(obj, (list, tuple)):
-                    obj = list(obj)
-                    for idx, entry in enumerate(obj):
-                        obj[idx] = verylong_encoder(entry)
-                    return obj
-                if six.PY2 and isinstance(obj, long) and long > pow(2, 64):  # pylint: disable=incompatible-py3-code
-                    return str(obj)
-                elif six.PY3 and isinstance(obj, int) and int > pow(2, 64):
-                    return str(obj)
-                else:
-                    return obj
-            return msgpack.dumps(verylong_encoder(msg))
-        except TypeError as e:
-            # msgpack doesn't support datetime.datetime datatype
-            # So here we have converted datetime.datetime to custom datatype
-            # This is msgpack Extended types numbered 78
-            def default(obj):
-                return msgpack.ExtType(78, obj)
-
-            def dt_encode(obj):
-                datetime_str = obj.strftime("%Y%m%dT%H:%M:%S.%f")
-                return msgpack.packb(datetime_str, default=default)
-
-            def datetime_encoder(obj):
-                if isinstance(obj, dict):
-                    for key, value in six.iteritems(obj.copy()):
-                        obj[key] = datetime_encoder(value)
-                    return dict(obj)
-                elif isinstance(obj, (list, tuple)):
-                    obj = list(obj)
-                    for idx, entry in enumerate(obj):
-                        obj[idx] = datetime_encoder(entry)
-                    return obj
-                if isinstance(obj, datetime.datetime):
-                    return dt_encode(obj)
-                else:
-                    return obj
-
-            if "datetime.datetime" in str(e):
-                return msgpack.dumps(datetime_encoder(msg))
-
-            if msgpack.version >= (0, 2, 0):
-                # Should support OrderedDict serialization, so, let's
-                # raise the exception
-                raise
-
-            # msgpack is < 0.2.0, let's make its life easier
-            # Since OrderedDict is identified as a dictionary, we can't
-            # make use of msgpack custom types, we will need to convert by
-            # hand.
-            # This means iterating through all elements of a dictionary or
-            # list/tuple
-            def odict_encoder(obj):
-                if isinstance(obj, dict):
-                    for key, value in six.iteritems(obj.copy()):
-                        obj[key] = odict_encoder(value)
-                    return dict(obj)
-                elif isinstance(obj, (list, tuple)):
-                    obj = list(obj)
-                    for idx, entry in enumerate(obj):
-                        obj[idx] = odict_encoder(entry)
-                    return obj
-                return obj
-            return msgpack.dumps(odict_encoder(msg))
+            return msgpack.dumps(msg, default=_default)
+        except (OverflowError, TypeError):
+            # msgpack raises OverflowError for the very long Python longs of
+            # jids without calling the default hook, and older releases don't
+            # call it for every type or don't support OrderedDict at all,
+            # convert everything by hand in a single walk of the data and try
+            # again
+            return msgpack.dumps(_encode(msg))
         except SystemError as exc:
             log.critical('Unable to serialize message! Consider upgrading msgpack. '
-                         'Message which failed was {failed_message} '
-                         'with exception {exception_message}').format(msg, exc)
+                         'Message which failed was {0} '
+                         'with exception {1}'.format(msg, exc))
 
     def dump(self, msg, fn_):
         '''
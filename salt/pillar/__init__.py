@@ -7,6 +7,9 @@ Render the pillar data
 from __future__ import absolute_import
 import copy
 import os
+import json
+import time
+import hashlib
 import collections
 import logging
 
@@ -16,6 +19,7 @@ import salt.fileclient
 import salt.minion
 import salt.crypt
 import salt.transport
+import salt.utils.event
 import salt.utils.url
 from salt.exceptions import SaltClientError
 from salt.template import compile_template
@@ -30,6 +34,27 @@ import tornado.gen
 
 log = logging.getLogger(__name__)
 
+# Compiled pillar data kept by compile_cached_pillar,
+# {cache key: (expire time, pillar_roots fingerprint, compile time, pillar)}
+_PILLAR_CACHE = {}
+
+# Fingerprints of the pillar_roots, kept for pillar_cache_roots_interval,
+# {pillar_roots digest: (expire time, fingerprint)}
+_ROOTS_FINGERPRINTS = {}
+
+# Memoized data of the ext_pillars listed in pillar_cache_ext_shared,
+# {(ext_pillar, args): (expire time, fetch time, data)}
+_EXT_PILLAR_CACHE = {}
+
+# Counters of the pillar caches of this process
+_CACHE_STATS = {'hits': 0, 'misses': 0, 'ext_hits': 0, 'ext_misses': 0}
+
+# The time the counters of the pillar caches were last fired
+_CACHE_STATS_SINCE = [time.time()]
+
+# The tag of the counters of the pillar caches
+CACHE_STATS_TAG = salt.utils.event.tagify(['cache', 'stats'], 'pillar')
+
 
 def get_pillar(opts, grains, id_, saltenv=None, ext=None, env=None, funcs=None,
                pillar=None, pillarenv=None):
@@ -52,11 +77,200 @@ def get_pillar(opts, grains, id_, saltenv=None, ext=None, env=None, funcs=None,
                  pillar=pillar, pillarenv=pillarenv)
 
 
+def _digest(data):
+    '''
+    Return a digest of a data structure
+    '''
+    return hashlib.md5(salt.utils.to_bytes(
+        json.dumps(data, sort_keys=True, default=repr)
+    )).hexdigest()
+
+
+def _roots_fingerprint(opts):
+    '''
+    Return a digest of the names, sizes and modification times of the files
+    under pillar_roots. Walking a large tree on every pillar request would
+    cost most of what the cache saves, the digest is reused for
+    pillar_cache_roots_interval seconds.
+    '''
+    interval = opts.get('pillar_cache_roots_interval', 10)
+    roots_key = _digest(opts.get('pillar_roots', {}))
+    now = time.time()
+    cached = _ROOTS_FINGERPRINTS.get(roots_key)
+    if interval > 0 and cached is not None and cached[0] > now:
+        return cached[1]
+    stats = []
+    for saltenv, roots in sorted(six.iteritems(opts.get('pillar_roots', {}))):
+        for root in roots:
+            for path, dirs, files in os.walk(root, followlinks=True):
+                dirs.sort()
+                for name in sorted(files):
+                    fn_ = os.path.join(path, name)
+                    try:
+                        fstat = os.stat(fn_)
+                    except OSError:
+                        continue
+                    stats.append((fn_, fstat.st_mtime, fstat.st_size))
+    fingerprint = _digest(stats)
+    if interval > 0:
+        _ROOTS_FINGERPRINTS[roots_key] = (now + interval, fingerprint)
+    return fingerprint
+
+
+def _pillar_cache_ttl(opts):
+    '''
+    Return the time compiled pillar data is kept for, the shortest of
+    pillar_cache_ttl and the pillar_cache_ext_ttl of the configured
+    ext_pillars
+    '''
+    ttl = opts.get('pillar_cache_ttl', 3600)
+    ext_ttl = opts.get('pillar_cache_ext_ttl') or {}
+    for run in opts.get('ext_pillar') or []:
+        if not isinstance(run, dict):
+            continue
+        for key in run:
+            if key in ext_ttl:
+                ttl = min(ttl, ext_ttl[key])
+    return ttl
+
+
+def _refresh_path(opts, id_):
+    '''
+    Return the path of the file whose modification time is the time the
+    minion last asked the master to clear its pillar cache. Every master worker keeps its own
+    cache, the file tells all of them to drop the compiled data of the minion.
+    '''
+    return os.path.join(opts['cachedir'], 'pillar_cache', id_)
+
+
+def _refreshed(opts, id_):
+    '''
+    Return the time the minion last asked the master to clear its pillar
+    cache
+    '''
+    try:
+        return os.stat(_refresh_path(opts, id_)).st_mtime
+    except OSError:
+        return 0
+
+
+def _mark_refresh(opts, id_):
+    '''
+    Record that the minion asked the master to clear its pillar cache
+    '''
+    path = _refresh_path(opts, id_)
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with salt.utils.fopen(path, 'a'):
+            pass
+        now = time.time()
+        os.utime(path, (now, now))
+    except (IOError, OSError) as exc:
+        log.error('Failed to mark the pillar refresh of {0}: {1}'.format(
+            id_, exc))
+    clear_pillar_cache(id_)
+
+
+def pillar_cache_stats():
+    '''
+    Return the hit and miss counters of the pillar caches of this process
+    '''
+    return dict(_CACHE_STATS)
+
+
+def pop_pillar_cache_stats(interval):
+    '''
+    Return the hit and miss counters of the pillar caches of this process,
+    along with the ``interval`` in seconds they were counted over, and reset
+    them once ``interval`` seconds passed since they were last returned.
+    Return None before that, or when ``interval`` is 0.
+    '''
+    now = time.time()
+    elapsed = now - _CACHE_STATS_SINCE[0]
+    if not interval or elapsed < interval:
+        return None
+    data = dict(_CACHE_STATS)
+    data['interval'] = elapsed
+    for key in _CACHE_STATS:
+        _CACHE_STATS[key] = 0
+    _CACHE_STATS_SINCE[0] = now
+    return data
+
+
+def clear_pillar_cache(minion_id=None):
+    '''
+    Drop the compiled pillar data of a minion, or of every minion along with
+    the memoized ext_pillar data when no minion id is passed
+    '''
+    if minion_id is None:
+        _PILLAR_CACHE.clear()
+        _EXT_PILLAR_CACHE.clear()
+        _ROOTS_FINGERPRINTS.clear()
+        return
+    for key in list(_PILLAR_CACHE):
+        if key[0] == minion_id:
+            _PILLAR_CACHE.pop(key, None)
+
+
+def compile_cached_pillar(opts, grains, id_, saltenv=None, ext=None,
+                          funcs=None, pillar=None, pillarenv=None,
+                          pillar_dirs=None, refresh=False):
+    '''
+    Compile the pillar data of a minion on the master.
+
+    When ``pillar_cache`` is enabled the compiled data is kept in memory,
+    keyed on the minion id and a digest of its grains and of the rest of the
+    request, and returned again until it expires after ``pillar_cache_ttl``
+    seconds (or the ``pillar_cache_ext_ttl`` of one of the ext_pillars) or a
+    file under pillar_roots changes, which is checked every
+    ``pillar_cache_roots_interval`` seconds. A ``refresh``, asked for by the
+    minion with ``saltutil.refresh_pillar clear_cache=True``, is always
+    compiled and drops the data every master worker keeps for it, including
+    the shared ext_pillar data it is compiled from.
+    '''
+    if not opts.get('pillar_cache', False):
+        return Pillar(opts, grains, id_, saltenv, ext, funcs,
+                      pillar=pillar,
+                      pillarenv=pillarenv).compile_pillar(pillar_dirs=pillar_dirs)
+    key = (id_, _digest([grains, saltenv, ext, pillar, pillarenv]))
+    fingerprint = _roots_fingerprint(opts)
+    if refresh:
+        _mark_refresh(opts, id_)
+    now = time.time()
+    cached = _PILLAR_CACHE.get(key)
+    if cached is not None and cached[0] > now and cached[1] == fingerprint \
+            and cached[2] > _refreshed(opts, id_):
+        _CACHE_STATS['hits'] += 1
+        log.debug('Pillar cache hit for {0}, cache stats: {1}'.format(
+            id_, _CACHE_STATS))
+        return copy.deepcopy(cached[3])
+    _CACHE_STATS['misses'] += 1
+    log.debug('Pillar cache miss for {0}, cache stats: {1}'.format(
+        id_, _CACHE_STATS))
+    data = Pillar(opts, grains, id_, saltenv, ext, funcs,
+                  pillar=pillar,
+                  pillarenv=pillarenv).compile_pillar(pillar_dirs=pillar_dirs)
+    # Expired entries of other minions are dropped as they are found
+    for old_key, old in list(_PILLAR_CACHE.items()):
+        if old[0] <= now:
+            _PILLAR_CACHE.pop(old_key, None)
+    ttl = _pillar_cache_ttl(opts)
+    if ttl > 0 and not data.get('_errors'):
+        _PILLAR_CACHE[key] = (now + ttl,
+                              fingerprint,
+                              now,
+                              copy.deepcopy(data))
+    return data
+
+
 # TODO: migrate everyone to this one!
 def get_async_pillar(opts, grains, id_, saltenv=None, ext=None, env=None, funcs=None,
-               pillar=None, pillarenv=None):
+               pillar=None, pillarenv=None, refresh=False):
     '''
-    Return the correct pillar driver based on the file_client option
+    Return the correct pillar driver based on the file_client option. Pass
+    ``refresh`` to have the master compile the pillar instead of returning it
+    from its pillar cache.
     '''
     if env is not None:
         salt.utils.warn_until(
@@ -70,6 +284,9 @@ def get_async_pillar(opts, grains, id_, saltenv=None, ext=None, env=None, funcs=
         'remote': AsyncRemotePillar,
         #'local': AsyncPillar  # TODO: implement
     }.get(opts['file_client'], Pillar)
+    if ptype is AsyncRemotePillar:
+        return ptype(opts, grains, id_, saltenv, ext, functions=funcs,
+                     pillar=pillar, pillarenv=pillarenv, refresh=refresh)
     return ptype(opts, grains, id_, saltenv, ext, functions=funcs,
                  pillar=pillar, pillarenv=pillarenv)
 
@@ -79,12 +296,13 @@ class AsyncRemotePillar(object):
     Get the pillar from the master
     '''
     def __init__(self, opts, grains, id_, saltenv, ext=None, functions=None,
-                 pillar=None, pillarenv=None):
+                 pillar=None, pillarenv=None, refresh=False):
         self.opts = opts
         self.opts['environment'] = saltenv
         self.ext = ext
         self.grains = grains
         self.id_ = id_
+        self.refresh = refresh
         self.channel = salt.transport.client.AsyncReqChannel.factory(opts)
         self.opts['pillarenv'] = pillarenv
         self.pillar_override = {}
@@ -108,6 +326,8 @@ class AsyncRemotePillar(object):
                 'cmd': '_pillar'}
         if self.ext:
             load['ext'] = self.ext
+        if self.refresh:
+            load['refresh'] = True
         ret_pillar = yield self.channel.crypted_transfer_decode_dictentry(
             load,
             dictkey='pillar',
@@ -580,6 +800,32 @@ class Pillar(object):
 
         ext = None
 
+        if self.opts.get('pillar_cache', False) and \
+                key in (self.opts.get('pillar_cache_ext_shared') or []):
+            # The data of this ext_pillar is the same for every minion
+            memo_key = (key, _digest(val))
+            cached = _EXT_PILLAR_CACHE.get(memo_key)
+            now = time.time()
+            # Data fetched before the minion cleared its pillar cache is
+            # fetched again
+            if cached is not None and cached[0] > now \
+                    and cached[1] > _refreshed(self.opts, self.opts['id']):
+                _CACHE_STATS['ext_hits'] += 1
+                return copy.deepcopy(cached[2])
+            _CACHE_STATS['ext_misses'] += 1
+            ttl = (self.opts.get('pillar_cache_ext_ttl') or {}).get(
+                key, self.opts.get('pillar_cache_ttl', 3600))
+            ext = self._call_external_pillar(pillar, val, pillar_dirs, key)
+            _EXT_PILLAR_CACHE[memo_key] = (now + ttl, now, copy.deepcopy(ext))
+            return ext
+        return self._call_external_pillar(pillar, val, pillar_dirs, key)
+
+    def _call_external_pillar(self, pillar, val, pillar_dirs, key):
+        '''
+        Call an external pillar
+        '''
+        ext = None
+
         # try the new interface, which includes the minion ID
         # as first argument
         if isinstance(val, dict):
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+'''
+Return data to a segmented local job cache
+
+This is a drop-in alternative to the :mod:`local_cache
+<salt.returners.local_cache>` master job cache. Instead of a directory tree
+per job id, jobs are appended to time sharded segment files under
+``<cachedir>/job_segments``. Every segment is made up of two files:
+
+``<start>.seg``
+    The serialized loads, minion lists and minion returns, appended as they
+    arrive.
+
+``<start>.idx``
+    A small append-only index of the records in the segment, mapping each job
+    id to the offsets of its records along with a summary of the job.
+
+A job lands in the segment covering the time encoded in its job id, so
+finding a job never requires walking the cache, listing jobs reads the
+indexes only, and time range queries only open the segments in the range.
+Expiring old jobs removes whole segments.
+
+To use it as the master job cache set the following in the master config:
+
+.. code-block:: yaml
+
+    master_job_cache: local_segments
+
+The length of a segment in hours can be changed with:
+
+.. code-block:: yaml
+
+    local_segments_hours: 1
+'''
+from __future__ import absolute_import
+
+# Import python libs
+import os
+import time
+import struct
+import logging
+import datetime
+import contextlib
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.jid
+import salt.utils.minions
+
+# Import 3rd-party libs
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # fcntl is not available on windows
+    HAS_FCNTL = False
+
+log = logging.getLogger(__name__)
+
+# Define the module's virtual name
+__virtualname__ = 'local_segments'
+
+_LEN = struct.Struct('>I')
+
+# Parsed segment indexes, {segment start: {'offset': int, 'jids': {}}}
+_INDEXES = {}
+
+
+def __virtual__():
+    return __virtualname__
+
+
+def _segment_dir():
+    '''
+    Return the root of the segmented job cache
+    '''
+    return os.path.join(__opts__['cachedir'], 'job_segments')
+
+
+def _segment_span():
+    '''
+    Return the length of a segment in seconds
+    '''
+    return int(float(__opts__.get('local_segments_hours', 1)) * 3600) or 3600
+
+
+def _jid_time(jid):
+    '''
+    Return the epoch time encoded in a job id, or None if the job id does not
+    encode a time
+    '''
+    jid = str(jid)
+    if not salt.utils.jid.is_jid(jid):
+        return None
+    try:
+        return time.mktime(
+            datetime.datetime.strptime(jid[:14], '%Y%m%d%H%M%S').timetuple()
+        )
+    except ValueError:
+        return None
+
+
+def _segment_start(stamp):
+    span = _segment_span()
+    return int(stamp // span) * span
+
+
+def _paths(start):
+    base = os.path.join(_segment_dir(), str(start))
+    return '{0}.seg'.format(base), '{0}.idx'.format(base)
+
+
+def _segments():
+    '''
+    Return the start times of the segments on disk, oldest first
+    '''
+    try:
+        names = os.listdir(_segment_dir())
+    except OSError:
+        return []
+    ret = set()
+    for name in names:
+        if name.endswith('.idx'):
+            try:
+                ret.add(int(name[:-4]))
+            except ValueError:
+                continue
+    return sorted(ret)
+
+
+@contextlib.contextmanager
+def _locked():
+    '''
+    Serialize writers to the segmented job cache
+    '''
+    sdir = _segment_dir()
+    if not os.path.isdir(sdir):
+        try:
+            os.makedirs(sdir)
+        except OSError:
+            pass
+    if not salt.utils.is_fcntl_available(check_sunos=True):
+        yield
+        return
+    with salt.utils.fopen(os.path.join(sdir, '.lock'), 'a') as fh_:
+        fcntl.flock(fh_.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh_.fileno(), fcntl.LOCK_UN)
+
+
+def _pack(serial, data):
+    data = serial.dumps(data)
+    return _LEN.pack(len(data)) + data
+
+
+def _apply(jids, entry):
+    '''
+    Apply an index entry to the parsed index of a segment
+    '''
+    kind, jid = entry[0], entry[1]
+    job = jids.setdefault(jid, {'returns': {}})
+    if kind == 'jid':
+        job['nocache'] = entry[2]
+    elif kind == 'load':
+        job['load'] = (entry[2], entry[3])
+        job['summary'] = entry[4]
+    elif kind == 'minions':
+        job['minions'] = (entry[2], entry[3])
+    elif kind == 'ret':
+        job['returns'][entry[4]] = (entry[2], entry[3])
+
+
+def _index(start):
+    '''
+    Return the parsed index of a segment, reading only the entries appended
+    since the last call
+    '''
+    _, idx_path = _paths(start)
+    cached = _INDEXES.setdefault(start, {'offset': 0, 'ino': None, 'jids': {}})
+    try:
+        stat = os.stat(idx_path)
+    except OSError:
+        _INDEXES.pop(start, None)
+        return {}
+    if stat.st_ino != cached['ino'] or stat.st_size < cached['offset']:
+        # New segment, or the segment was removed and started over
+        cached['offset'] = 0
+        cached['ino'] = stat.st_ino
+        cached['jids'] = {}
+    if stat.st_size == cached['offset']:
+        return cached['jids']
+    serial = salt.payload.Serial(__opts__)
+    with salt.utils.fopen(idx_path, 'rb') as fp_:
+        fp_.seek(cached['offset'])
+        while True:
+            head = fp_.read(_LEN.size)
+            if len(head) < _LEN.size:
+                break
+            length = _LEN.unpack(head)[0]
+            data = fp_.read(length)
+            if len(data) < length:
+                # Partially written entry, pick it up on the next read
+                break
+            _apply(cached['jids'], serial.loads(data))
+            cached['offset'] += _LEN.size + length
+    return cached['jids']
+
+
+def _find(jid):
+    '''
+    Return the segment start and the index data of a job id
+    '''
+    jid = str(jid)
+    stamp = _jid_time(jid)
+    if stamp is not None:
+        start = _segment_start(stamp)
+        return start, _index(start).get(jid)
+    # Job ids that do not encode a time are filed under the time they were
+    # prepared, look for them in every segment
+    for start in reversed(_segments()):
+        job = _index(start).get(jid)
+        if job is not None:
+            return start, job
+    return None, None
+
+
+def _append(start, kind, jid, data=None, extra=None):
+    '''
+    Append a record to a segment and index it, the caller must hold the lock
+    '''
+    serial = salt.payload.Serial(__opts__)
+    seg_path, idx_path = _paths(start)
+    if kind == 'jid':
+        entry = [kind, jid, data]
+    else:
+        record = _pack(serial, data)
+        with salt.utils.fopen(seg_path, 'ab') as fp_:
+            fp_.seek(0, os.SEEK_END)
+            offset = fp_.tell()
+            fp_.write(record)
+        entry = [kind, jid, offset, len(record)]
+        if extra is not None:
+            entry.append(extra)
+    with salt.utils.fopen(idx_path, 'ab') as fp_:
+        fp_.write(_pack(serial, entry))
+
+
+def _read(start, loc):
+    '''
+    Read a record from a segment
+    '''
+    seg_path, _ = _paths(start)
+    offset, length = loc
+    with salt.utils.fopen(seg_path, 'rb') as fp_:
+        fp_.seek(offset + _LEN.size)
+        data = fp_.read(length - _LEN.size)
+    return salt.payload.Serial(__opts__).loads(data)
+
+
+def prep_jid(nocache=False, passed_jid=None):
+    '''
+    Return a job id and register it in its segment
+    This is the function responsible for making sure jids don't collide (unless its passed a jid)
+    '''
+    with _locked():
+        while True:
+            if passed_jid is None:  # this can be a None of an empty string
+                jid = salt.utils.jid.gen_jid()
+            else:
+                jid = str(passed_jid)
+            start, job = _find(jid)
+            if job is None or 'nocache' not in job:
+                break
+            if passed_jid is not None:
+                return jid
+            # Someone else is using this jid, get a new one
+        if start is None:
+            start = _segment_start(time.time())
+        _append(start, 'jid', jid, bool(nocache))
+    return jid
+
+
+def _store_return(load):
+    '''
+    Append a minion return to its segment, the caller must hold the lock
+    '''
+    start, job = _find(load['jid'])
+    if job is None or 'nocache' not in job:
+        log.error(
+            'An inconsistency occurred, a job was received with a job id '
+            'that is not present in the local cache: {jid}'.format(**load)
+        )
+        return False
+    if job['nocache']:
+        return
+    if load['id'] in job['returns']:
+        # Minion has already returned this jid and it should be dropped
+        log.error(
+            'An extra return was detected from minion {0}, please verify '
+            'the minion, this could be a replay attack'.format(
+                load['id']
+            )
+        )
+        return False
+    data = {'return': load['return']}
+    if 'out' in load:
+        data['out'] = load['out']
+    _append(start, 'ret', str(load['jid']), data, load['id'])
+
+
+def returner(load):
+    '''
+    Return data to the segmented job cache
+    '''
+    # if a minion is returning a standalone job, get a jobid
+    if load['jid'] == 'req':
+        load['jid'] = prep_jid(nocache=load.get('nocache', False))
+
+    with _locked():
+        return _store_return(load)
+
+
+def returner_batch(loads):
+    '''
+    Return a batch of returns to the segmented job cache, taking the lock
+    once for all of them
+    '''
+    for load in loads:
+        if load['jid'] == 'req':
+            load['jid'] = prep_jid(nocache=load.get('nocache', False))
+
+    with _locked():
+        for load in loads:
+            _store_return(load)
+
+
+def save_load(jid, clear_load):
+    '''
+    Save the load to the specified jid
+    '''
+    jid = str(jid)
+    minions = None
+    # if you have a tgt, save that for the UI etc
+    if 'tgt' in clear_load:
+        ckminions = salt.utils.minions.CkMinions(__opts__)
+        # Retrieve the minions list
+        minions = ckminions.check_minions(
+                clear_load['tgt'],
+                clear_load.get('tgt_type', 'glob')
+                )
+
+    try:
+        with _locked():
+            start, job = _find(jid)
+            if start is None:
+                start = _segment_start(time.time())
+            if job is None or 'nocache' not in job:
+                _append(start, 'jid', jid, False)
+            if minions is not None:
+                _append(start, 'minions', jid, minions)
+            _append(start,
+                    'load',
+                    jid,
+                    clear_load,
+                    salt.utils.jid.format_job_instance(clear_load))
+    except (IOError, OSError) as exc:
+        log.warning('Could not write job invocation cache file: {0}'.format(exc))
+
+
+def get_load(jid):
+    '''
+    Return the load data that marks a specified jid
+    '''
+    start, job = _find(jid)
+    if job is None or 'load' not in job:
+        return {}
+    ret = _read(start, job['load'])
+    if 'minions' in job:
+        ret['Minions'] = _read(start, job['minions'])
+    return ret
+
+
+def get_jid(jid):
+    '''
+    Return the information returned when the specified job id was executed
+    '''
+    start, job = _find(jid)
+    ret = {}
+    if job is None:
+        return ret
+    for minion_id, loc in job['returns'].items():
+        ret[minion_id] = _read(start, loc)
+    return ret
+
+
+def _jids(segments, lower=None, upper=None):
+    ret = {}
+    for start in segments:
+        for jid, job in _index(start).items():
+            if 'summary' not in job:
+                continue
+            if lower is not None or upper is not None:
+                stamp = _jid_time(jid)
+                if stamp is None:
+                    stamp = start
+                if lower is not None and stamp < lower:
+                    continue
+                if upper is not None and stamp > upper:
+                    continue
+            summary = dict(job['summary'])
+            summary['StartTime'] = salt.utils.jid.jid_to_time(jid)
+            ret[jid] = summary
+    return ret
+
+
+def get_jids():
+    '''
+    Return a dict mapping all job ids to job information
+    '''
+    return _jids(_segments())
+
+
+def get_jids_range(start_time=None, end_time=None):
+    '''
+    Return a dict mapping the job ids started between ``start_time`` and
+    ``end_time`` (epoch times, both inclusive and optional) to job
+    information. Only the segments covering the range are read.
+    '''
+    span = _segment_span()
+    segments = [
+        start for start in _segments()
+        if (start_time is None or start + span > start_time) and
+        (end_time is None or start <= end_time)
+    ]
+    return _jids(segments, start_time, end_time)
+
+
+def clean_old_jobs():
+    '''
+    Drop the segments holding only jobs older than ``keep_jobs`` hours
+    '''
+    if __opts__['keep_jobs'] == 0:
+        return
+    cutoff = time.time() - __opts__['keep_jobs'] * 3600
+    span = _segment_span()
+    with _locked():
+        for start in _segments():
+            if start + span > cutoff:
+                break
+            for path in _paths(start):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            _INDEXES.pop(start, None)
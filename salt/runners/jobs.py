@@ -8,6 +8,7 @@ from __future__ import absolute_import, print_function
 import fnmatch
 import logging
 import os
+import time
 
 # Import salt libs
 import salt.client
@@ -254,7 +255,14 @@ def list_jobs(ext_source=None,
         __jid_event__.fire_event({'message': 'Querying returner {0} for jobs.'.format(returner)}, 'progress')
     mminion = salt.minion.MasterMinion(__opts__)
 
-    ret = mminion.returners['{0}.get_jids'.format(returner)]()
+    range_fstr = '{0}.get_jids_range'.format(returner)
+    if (start_time or end_time) and DATEUTIL_SUPPORT and range_fstr in mminion.returners:
+        # Let the returner narrow down the jobs to the time range
+        ret = mminion.returners[range_fstr](
+            time.mktime(dateutil_parser.parse(start_time).timetuple()) if start_time else None,
+            time.mktime(dateutil_parser.parse(end_time).timetuple()) if end_time else None)
+    else:
+        ret = mminion.returners['{0}.get_jids'.format(returner)]()
 
     mret = {}
     for item in ret:
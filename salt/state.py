@@ -17,11 +17,16 @@ from __future__ import absolute_import
 import os
 import sys
 import copy
+import json
 import site
+import pickle
+import hashlib
+import select
 import fnmatch
 import logging
 import datetime
 import traceback
+import multiprocessing
 
 # Import salt libs
 import salt.utils
@@ -29,11 +34,17 @@ import salt.loader
 import salt.minion
 import salt.pillar
 import salt.fileclient
+import salt.utils.atomicfile
 import salt.utils.event
+import salt.utils.jinja
 import salt.utils.url
 import salt.syspaths as syspaths
 from salt.utils import context, immutabletypes
-from salt.template import compile_template, compile_template_str
+from salt.template import (
+    compile_template,
+    compile_template_str,
+    template_pipe_names
+)
 from salt.exceptions import SaltRenderError, SaltReqTimeoutError, SaltException
 from salt.utils.odict import OrderedDict, DefaultOrderedDict
 
@@ -73,6 +84,7 @@ STATE_RUNTIME_KEYWORDS = frozenset([
     'onlyif',
     'unless',
     'order',
+    'parallel',
     'prereq',
     'prereq_in',
     'prerequired',
@@ -99,6 +111,20 @@ STATE_RUNTIME_KEYWORDS = frozenset([
 
 STATE_INTERNAL_KEYWORDS = STATE_REQUISITE_KEYWORDS.union(STATE_REQUISITE_IN_KEYWORDS).union(STATE_RUNTIME_KEYWORDS)
 
+# State modules which are never executed in parallel with other states when
+# state_parallel is enabled, they hold system wide locks (package managers)
+# and trigger a refresh of the execution modules when they make changes
+STATE_PARALLEL_SERIAL = frozenset([
+    'pkg',
+    'pkgrepo',
+    'ports',
+    ])
+
+# The renderers whose output only depends on the template, the templates it
+# imports, the grains and the pillar. Only templates rendered entirely with
+# these are kept in the render cache.
+STATE_RENDER_CACHE_RENDERERS = frozenset(['jinja', 'yaml', 'yamlex', 'json'])
+
 
 def _odict_hashable(self):
     return id(self)
@@ -1638,6 +1664,14 @@ class State(object):
         '''
         Iterate over a list of chunks and call them, checking for requires.
         '''
+        if self.opts.get('state_parallel', False):
+            if salt.utils.is_windows():
+                log.warning(
+                    'state_parallel is not supported on Windows, running '
+                    'the states in sequence'
+                )
+            else:
+                return self.call_chunks_parallel(chunks)
         running = {}
         for low in chunks:
             if '__FAILHARD__' in running:
@@ -1651,6 +1685,182 @@ class State(object):
             self.active = set()
         return running
 
+    def call_chunks_parallel(self, chunks):
+        '''
+        Iterate over a list of chunks and call them, running the chunks whose
+        requisites have already been run in parallel with each other.
+
+        The chunks are dispatched in order. A chunk is handed to a separate
+        process as soon as the chunks it requires have returned, at most
+        ``state_parallel_workers`` chunks run at the same time. Chunks which
+        cannot run in parallel wait for all of the running chunks to return
+        and are called in sequence with ``call_chunk``.
+        '''
+        running = {}
+        pending = {}
+        workers = max(int(self.opts.get('state_parallel_workers', 4)), 1)
+        for low in chunks:
+            if '__FAILHARD__' in running:
+                break
+            tag = _gen_tag(low)
+            if tag in running:
+                continue
+            if not self._parallel_ok(low):
+                self._reap_parallel(pending, running, chunks)
+                if '__FAILHARD__' in running:
+                    break
+                running = self.call_chunk(low, running, chunks)
+                if self.check_failhard(low, running):
+                    running['__FAILHARD__'] = True
+                self.active = set()
+                continue
+            low = self._mod_aggregate(low, running, chunks)
+            while True:
+                status, reqs = self.check_requisite(low, running, chunks)
+                if status != 'unmet':
+                    break
+                # Wait for the required chunks still running, if the
+                # requisites cannot be met by them fall back to call_chunk
+                req_tags = set()
+                for req_lows in six.itervalues(reqs or {}):
+                    req_tags.update(_gen_tag(req_low) for req_low in req_lows)
+                if not req_tags.intersection(pending):
+                    break
+                self._reap_parallel(pending, running, chunks, req_tags)
+            if '__FAILHARD__' in running:
+                break
+            if status not in ('met', 'change'):
+                if status == 'unmet':
+                    self._reap_parallel(pending, running, chunks)
+                    if '__FAILHARD__' in running:
+                        break
+                running = self.call_chunk(low, running, chunks)
+                if self.check_failhard(low, running):
+                    running['__FAILHARD__'] = True
+                self.active = set()
+                continue
+            while len(pending) >= workers:
+                self._reap_parallel(pending, running, chunks, count=1)
+            if '__FAILHARD__' in running:
+                break
+            self._mod_init(low)
+            pending[tag] = self._call_parallel(low, chunks, running, status, reqs)
+        self._reap_parallel(pending, running, chunks)
+        running.pop('__FAILHARD__', None)
+        return running
+
+    def _parallel_ok(self, low):
+        '''
+        Return whether a chunk can be run in parallel with other chunks
+        '''
+        if not low.get('parallel', True):
+            return False
+        if low['state'] in STATE_PARALLEL_SERIAL:
+            return False
+        for key in ('prereq', 'prerequired', '__prereq__', 'provider',
+                    'reload_modules', 'reload_grains', 'reload_pillar'):
+            if low.get(key):
+                return False
+        return True
+
+    def _call_met(self, low, chunks, running, status, reqs):
+        '''
+        Call a chunk whose requisites are met, if a watched requisite changed
+        and the chunk made no changes call its mod_watch function
+        '''
+        ret = self.call(low, chunks, running)
+        if status == 'change' and \
+                not ret['changes'] and not ret.get('skip_watch', False):
+            low = low.copy()
+            low['sfun'] = low['fun']
+            low['fun'] = 'mod_watch'
+            low['__reqs__'] = reqs
+            ret = self.call(low, chunks, running)
+        return ret
+
+    def _call_parallel(self, low, chunks, running, status, reqs):
+        '''
+        Call a chunk in a separate process, returns the process, the end of
+        the pipe its return will be sent on and the chunk
+        '''
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        proc = multiprocessing.Process(
+            target=self._parallel_target,
+            args=(writer, low, chunks, running, status, reqs)
+        )
+        proc.start()
+        writer.close()
+        return proc, reader, low
+
+    def _parallel_target(self, writer, low, chunks, running, status, reqs):
+        '''
+        Run a chunk in the forked process and send its return to the parent,
+        the parent process takes care of refreshing the modules
+        '''
+        self.check_refresh = lambda data, ret: None
+        try:
+            ret = self._call_met(low, chunks, running, status, reqs)
+            writer.send(ret)
+        except Exception:
+            writer.send({
+                'result': False,
+                'name': low['name'],
+                'changes': {},
+                'comment': 'An exception occurred in this state: {0}'.format(
+                    traceback.format_exc())
+            })
+        finally:
+            writer.close()
+
+    def _reap_parallel(self, pending, running, chunks, tags=None, count=None):
+        '''
+        Collect the returns of the chunks running in parallel.
+
+        Waits until none of ``tags`` are running anymore, or until ``count``
+        chunks returned. When neither is passed wait for all of the chunks.
+        '''
+        reaped = 0
+        while pending:
+            if count is not None and reaped >= count:
+                break
+            if count is None and tags is not None and \
+                    not tags.intersection(pending):
+                break
+            fds = dict(
+                (item[1].fileno(), tag) for tag, item in six.iteritems(pending)
+            )
+            try:
+                ready = select.select(list(fds), [], [])[0]
+            except select.error:
+                continue
+            for fd_ in ready:
+                tag = fds[fd_]
+                proc, reader, low = pending.pop(tag)
+                try:
+                    ret = reader.recv()
+                except (EOFError, IOError):
+                    ret = {
+                        'result': False,
+                        'name': low['name'],
+                        'changes': {},
+                        'comment': 'The process running this state exited '
+                                   'without returning',
+                    }
+                reader.close()
+                proc.join()
+                ret['__run_num__'] = self.__run_num
+                self.__run_num += 1
+                running[tag] = ret
+                reaped += 1
+                self.check_refresh(low, ret)
+                self.event(running[tag], len(chunks), fire_event=low.get('fire_event'))
+                if self.check_failhard(low, running):
+                    running['__FAILHARD__'] = True
+                    # The chunks already running are left to finish, but
+                    # nothing else is started
+                    count = None
+                    tags = None
+
     def check_failhard(self, low, running):
         '''
         Check if the low data chunk should send a failhard signal
@@ -1962,14 +2172,7 @@ class State(object):
                 }
             self.__run_num += 1
         elif status == 'change' and not low.get('__prereq__'):
-            ret = self.call(low, chunks, running)
-            if not ret['changes'] and not ret.get('skip_watch', False):
-                low = low.copy()
-                low['sfun'] = low['fun']
-                low['fun'] = 'mod_watch'
-                low['__reqs__'] = reqs
-                ret = self.call(low, chunks, running)
-            running[tag] = ret
+            running[tag] = self._call_met(low, chunks, running, status, reqs)
         elif status == 'pre':
             pre_ret = {'changes': {},
                        'result': True,
@@ -2254,6 +2457,7 @@ class BaseHighState(object):
         self.avail = self.__gather_avail()
         self.serial = salt.payload.Serial(self.opts)
         self.building_highstate = {}
+        self._render_digest = None
 
     def __gather_avail(self):
         '''
@@ -2330,11 +2534,9 @@ class BaseHighState(object):
             if contents:
                 found = 1
             tops[self.opts['environment']] = [
-                compile_template(
+                self._compile_template(
                     contents,
-                    self.state.rend,
-                    self.state.opts['renderer'],
-                    saltenv=self.opts['environment']
+                    self.opts['environment']
                 )
             ]
         else:
@@ -2350,11 +2552,9 @@ class BaseHighState(object):
                     log.debug('No contents loaded for env: {0}'.format(saltenv))
 
                 tops[saltenv].append(
-                    compile_template(
+                    self._compile_template(
                         contents,
-                        self.state.rend,
-                        self.state.opts['renderer'],
-                        saltenv=saltenv
+                        saltenv
                     )
                 )
 
@@ -2381,14 +2581,12 @@ class BaseHighState(object):
                         if sls in done[saltenv]:
                             continue
                         tops[saltenv].append(
-                            compile_template(
+                            self._compile_template(
                                 self.client.get_state(
                                     sls,
                                     saltenv
                                 ).get('dest', False),
-                                self.state.rend,
-                                self.state.opts['renderer'],
-                                saltenv=saltenv
+                                saltenv
                             )
                         )
                         done[saltenv].append(sls)
@@ -2542,8 +2740,142 @@ class BaseHighState(object):
         if syncd['grains']:
             self.opts['grains'] = salt.loader.grains(self.opts)
             self.state.opts['pillar'] = self.state._gather_pillar()
+            self._render_digest = None
         self.state.module_refresh()
 
+    def _render_context(self):
+        '''
+        Return a digest of the data, other than the template files, that the
+        templates are rendered with
+        '''
+        grains = self.state.opts.get('grains', {})
+        pillar = self.state.opts.get('pillar', {})
+        # The digest is only reused while the grains and pillar it was made
+        # of are the ones rendered with, they are replaced on every refresh
+        if self._render_digest is not None \
+                and self._render_digest[0] is grains \
+                and self._render_digest[1] is pillar:
+            return self._render_digest[2]
+        context = [self.state.opts.get('id'),
+                   self.state.opts['renderer'],
+                   grains,
+                   pillar,
+                   self.opts.get('jinja_lstrip_blocks', False),
+                   self.opts.get('jinja_trim_blocks', False)]
+        hash_type = getattr(hashlib, self.opts.get('hash_type', 'md5'))
+        digest = hash_type(salt.utils.to_bytes(
+            json.dumps(context, sort_keys=True, default=repr)
+        )).hexdigest()
+        self._render_digest = (grains, pillar, digest)
+        return digest
+
+    def _render_cache_path(self, saltenv, name):
+        '''
+        Return the path of the render cache entry of a template
+        '''
+        hash_type = getattr(hashlib, self.opts.get('hash_type', 'md5'))
+        return os.path.join(
+            self.opts['cachedir'],
+            'state_render',
+            '{0}.p'.format(hash_type(salt.utils.to_bytes(
+                '{0}:{1}'.format(saltenv, name))).hexdigest())
+        )
+
+    def _load_render(self, path, key):
+        '''
+        Return the high data of a render cache entry, or None if the entry is
+        missing or any of its inputs changed
+        '''
+        try:
+            with salt.utils.fopen(path, 'rb') as fp_:
+                cached = pickle.load(fp_)
+        except (IOError, OSError, pickle.UnpicklingError, AttributeError,
+                EOFError, ImportError, IndexError, KeyError, ValueError):
+            return None
+        if not isinstance(cached, dict) or cached.get('key') != key:
+            return None
+        # Bring the imported templates up to date the same way rendering
+        # would, before checking them
+        imports = DefaultOrderedDict(list)
+        for saltenv, template, _, _ in cached['imports']:
+            imports[saltenv].append(salt.utils.url.create(template))
+        for saltenv, templates in six.iteritems(imports):
+            self.client.cache_files(templates, saltenv)
+        hash_type = self.opts.get('hash_type', 'md5')
+        for _, template, fn_, hsum in cached['imports']:
+            try:
+                if salt.utils.get_hash(fn_, hash_type) != hsum:
+                    return None
+            except (IOError, OSError):
+                return None
+        return cached['high']
+
+    def _store_render(self, path, key, imports, high):
+        '''
+        Write a render cache entry
+        '''
+        hash_type = self.opts.get('hash_type', 'md5')
+        try:
+            cached = {
+                'key': key,
+                'imports': [
+                    (saltenv, template, fn_, salt.utils.get_hash(fn_, hash_type))
+                    for saltenv, template, fn_ in imports
+                ],
+                'high': high,
+            }
+            cache_dir = os.path.dirname(path)
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with salt.utils.atomicfile.atomic_open(path, 'wb') as fp_:
+                pickle.dump(cached, fp_, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError, pickle.PicklingError, TypeError) as exc:
+            log.debug(
+                'Unable to write the render cache of {0}: {1}'.format(path, exc)
+            )
+
+    def _compile_template(self, template, saltenv, sls='', **kwargs):
+        '''
+        Compile a template file into high data.
+
+        When ``state_render_cache`` is enabled the rendered data is cached,
+        keyed on the template source, its render pipe and the grains and
+        pillar it is rendered with, and reused for as long as none of these
+        nor the templates it imports change.
+        '''
+        if not self.opts.get('state_render_cache') \
+                or not isinstance(template, six.string_types) \
+                or not os.path.isfile(template):
+            return compile_template(
+                template, self.state.rend, self.state.opts['renderer'],
+                saltenv, sls, **kwargs
+            )
+        names = template_pipe_names(template, self.state.opts['renderer'])
+        if not STATE_RENDER_CACHE_RENDERERS.issuperset(names):
+            return compile_template(
+                template, self.state.rend, self.state.opts['renderer'],
+                saltenv, sls, **kwargs
+            )
+        key = [salt.utils.get_hash(template, self.opts.get('hash_type', 'md5')),
+               names,
+               saltenv,
+               sls,
+               sorted(kwargs.get('rendered_sls') or []),
+               self._render_context()]
+        path = self._render_cache_path(saltenv, sls or template)
+        high = self._load_render(path, key)
+        if high is not None:
+            log.debug('Using the cached render of {0}'.format(template))
+            return high
+        with salt.utils.jinja.track_templates() as imports:
+            high = compile_template(
+                template, self.state.rend, self.state.opts['renderer'],
+                saltenv, sls, **kwargs
+            )
+        if isinstance(high, dict):
+            self._store_render(path, key, imports, high)
+        return high
+
     def render_state(self, sls, saltenv, mods, matches, local=False):
         '''
         Render a state file and retrieve all of the include states
@@ -2567,9 +2899,8 @@ class BaseHighState(object):
             )
         state = None
         try:
-            state = compile_template(
-                fn_, self.state.rend, self.state.opts['renderer'], saltenv,
-                sls, rendered_sls=mods
+            state = self._compile_template(
+                fn_, saltenv, sls, rendered_sls=mods
             )
         except SaltRenderError as exc:
             msg = 'Rendering SLS \'{0}:{1}\' failed: {2}'.format(
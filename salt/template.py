@@ -159,6 +159,22 @@ def template_shebang(template, renderers, default, input_data):
     return render_pipe
 
 
+def template_pipe_names(template, default):
+    '''
+    Return the names of the renderers a template file is rendered with, taken
+    from its shebang line or from the default render pipe
+    '''
+    with salt.utils.fopen(template, 'r') as ifile:
+        line = ifile.readline()
+    if line.startswith('#!') and not line.startswith('#!/'):
+        pipestr = line.strip()[2:]
+    else:
+        pipestr = default
+    if pipestr in OLD_STYLE_RENDERERS:
+        pipestr = OLD_STYLE_RENDERERS[pipestr]
+    return [part.strip().split(' ', 1)[0] for part in pipestr.split('|')]
+
+
 # A dict of combined renderer (i.e., rend1_rend2_...) to
 # render-pipe (i.e., rend1|rend2|...)
 #
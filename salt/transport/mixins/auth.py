@@ -6,6 +6,7 @@ import multiprocessing
 import ctypes
 import logging
 import os
+import time
 import hashlib
 import shutil
 import binascii
@@ -15,7 +16,9 @@ import salt.crypt
 import salt.payload
 import salt.master
 import salt.utils.event
+import salt.utils.process
 from salt.utils.cache import CacheCli
+from salt.utils.odict import OrderedDict
 
 # Import Third Party Libs
 import tornado.gen
@@ -25,6 +28,18 @@ from Crypto.PublicKey import RSA
 
 log = logging.getLogger(__name__)
 
+# The results of an auth the MWorkers count, the counters are followed by the
+# seconds spent authenticating and the time the counting started
+AUTH_RESULTS = ('accepted', 'pending', 'rejected', 'full', 'busy')
+AUTH_SECONDS = len(AUTH_RESULTS)
+AUTH_SINCE = AUTH_SECONDS + 1
+
+# The tag of the auth counters the MWorkers publish
+AUTH_STATS_TAG = salt.utils.event.tagify('stats', 'auth')
+
+# Seconds an MWorker reuses the connected minions it found for max_minions
+CONNECTED_IDS_TTL = 10
+
 
 # TODO: rename
 class AESPubClientMixin(object):
@@ -63,8 +78,19 @@ class AESReqServerMixin(object):
                                                             salt.crypt.Crypticle.generate_key_string()),
                                               'reload': salt.crypt.Crypticle.generate_key_string,
                                               }
+        # The pids of the MWorkers authenticating minions right now, 0 for a
+        # free slot, and the counters of the auths, shared by all of the
+        # MWorkers. A slot is kept per pid so the slot of an MWorker which died
+        # while authenticating can be taken over.
+        self.auth_workers = multiprocessing.Array(
+            ctypes.c_int, max(self.opts.get('worker_threads', 1), 1))
+        self.auth_stats = multiprocessing.Array(ctypes.c_double, AUTH_SINCE + 1)
+        self.auth_stats[AUTH_SINCE] = time.time()
 
     def post_fork(self, _, __):
+        # a restarted MWorker may have been given the pid of one which died
+        # while authenticating
+        self._release_auth_slot(os.getpid())
         self.serial = salt.payload.Serial(self.opts)
         self.crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
 
@@ -83,6 +109,61 @@ class AESReqServerMixin(object):
 
         self.master_key = salt.crypt.MasterKeys(self.opts)
 
+        # minion id -> (public key string, RSA key) of the minions which
+        # authenticated, the least recently used are dropped first
+        self.pub_keys = OrderedDict()
+        # The AES key string and its signature, the same for all of the
+        # minions unless auth_mode makes one per minion
+        self.aes_sig = (None, None)
+        self.pub_sig = None
+        # When the connected minions were looked up and the minions
+        self.connected_ids = (0, set())
+
+    def _get_pub_key(self, id_, pubfn):
+        '''
+        Return the RSA key of the public key of a minion. The keys parsed are
+        kept in memory, a key is parsed again when the key file of the minion
+        changes.
+        '''
+        with salt.utils.fopen(pubfn) as f:
+            pub_str = f.read()
+        cached = self.pub_keys.pop(id_, None)
+        if cached is None or cached[0] != pub_str:
+            cached = (pub_str, RSA.importKey(pub_str))
+        cache_size = self.opts.get('auth_key_cache_size', 0)
+        if cache_size > 0:
+            while len(self.pub_keys) >= cache_size:
+                self.pub_keys.popitem(last=False)
+            self.pub_keys[id_] = cached
+        return cached[1]
+
+    def _sign_aes(self, aes):
+        '''
+        Return the signature of the digest of the AES key string sent to a
+        minion, signing only when the string changes
+        '''
+        if self.aes_sig[0] != aes:
+            digest = hashlib.sha256(aes).hexdigest()
+            self.aes_sig = (aes, salt.crypt.private_encrypt(self.master_key.key, digest))
+        return self.aes_sig[1]
+
+    def _get_connected_ids(self):
+        '''
+        Return the connected minions, looking them up again only every
+        CONNECTED_IDS_TTL seconds
+        '''
+        # use the ConCache if enabled, else use the minion utils
+        if self.cache_cli:
+            return self.cache_cli.get_cached()
+        if time.time() - self.connected_ids[0] > CONNECTED_IDS_TTL:
+            minions = self.ckminions.connected_ids()
+            if len(minions) > 1000:
+                log.info('With large numbers of minions it is advised '
+                         'to enable the ConCache with \'con_cache: True\' '
+                         'in the masters configuration file.')
+            self.connected_ids = (time.time(), minions)
+        return self.connected_ids[1]
+
     def _encrypt_private(self, ret, dictkey, target):
         '''
         The server equivalent of ReqChannel.crypted_transfer_decode_dictentry
@@ -96,8 +177,7 @@ class AESReqServerMixin(object):
             self.opts,
             key)
         try:
-            with salt.utils.fopen(pubfn) as f:
-                pub = RSA.importKey(f.read())
+            pub = self._get_pub_key(target, pubfn)
         except (ValueError, IndexError, TypeError):
             return self.crypticle.dumps({})
 
@@ -131,6 +211,97 @@ class AESReqServerMixin(object):
         return payload
 
     def _auth(self, load):
+        '''
+        Authenticate the client, unless auth_max_workers MWorkers are busy
+        authenticating other clients already. Then the client is told to try
+        again later.
+
+        The auths are counted, every auth_stats_interval seconds the counters
+        are fired as an event tagged "salt/auth/stats".
+        '''
+        max_workers = self.opts.get('auth_max_workers', 0)
+        if max_workers > 0 and not self._claim_auth_slot(max_workers):
+            log.debug(
+                'Too many authentications in progress, asking {0} to retry '
+                'later'.format(load.get('id'))
+            )
+            self._count_auth('busy', 0)
+            return {'enc': 'clear',
+                    'load': {'ret': 'busy'}}
+        start = time.time()
+        try:
+            ret = self._authenticate(load)
+        finally:
+            if max_workers > 0:
+                self._release_auth_slot(os.getpid())
+        if ret.get('enc') == 'pub':
+            result = 'accepted'
+        elif ret['load']['ret'] == 'full':
+            result = 'full'
+        elif ret['load']['ret']:
+            result = 'pending'
+        else:
+            result = 'rejected'
+        self._count_auth(result, time.time() - start)
+        return ret
+
+    def _claim_auth_slot(self, max_workers):
+        '''
+        Take a free auth slot for this MWorker, unless max_workers MWorkers
+        are authenticating already. The slots of MWorkers which are gone are
+        free.
+        '''
+        pid = os.getpid()
+        with self.auth_workers.get_lock():
+            slots = self.auth_workers.get_obj()
+            free = None
+            busy = 0
+            for index, slot_pid in enumerate(slots):
+                if slot_pid and slot_pid != pid \
+                        and salt.utils.process.os_is_running(slot_pid):
+                    busy += 1
+                elif free is None:
+                    free = index
+            if free is None or busy >= max_workers:
+                return False
+            slots[free] = pid
+        return True
+
+    def _release_auth_slot(self, pid):
+        '''
+        Free the auth slots taken by the MWorker with the given pid
+        '''
+        with self.auth_workers.get_lock():
+            slots = self.auth_workers.get_obj()
+            for index, slot_pid in enumerate(slots):
+                if slot_pid == pid:
+                    slots[index] = 0
+
+    def _count_auth(self, result, seconds):
+        '''
+        Count an auth, and fire the counters when auth_stats_interval seconds
+        passed since they were last fired
+        '''
+        interval = self.opts.get('auth_stats_interval', 0)
+        data = None
+        with self.auth_stats.get_lock():
+            self.auth_stats[AUTH_RESULTS.index(result)] += 1
+            self.auth_stats[AUTH_SECONDS] += seconds
+            now = time.time()
+            elapsed = now - self.auth_stats[AUTH_SINCE]
+            if interval and elapsed >= interval:
+                data = dict(zip(AUTH_RESULTS, self.auth_stats[:AUTH_SECONDS]))
+                data['seconds'] = self.auth_stats[AUTH_SECONDS]
+                data['interval'] = elapsed
+                for index in range(AUTH_SINCE):
+                    self.auth_stats[index] = 0
+                self.auth_stats[AUTH_SINCE] = now
+        if data is not None:
+            data['auths_per_second'] = sum(
+                data[name] for name in AUTH_RESULTS) / data['interval']
+            self.event.fire_event(data, AUTH_STATS_TAG)
+
+    def _authenticate(self, load):
         '''
         Authenticate the client, use the sent public key to encrypt the AES key
         which was generated at start up.
@@ -156,15 +327,7 @@ class AESReqServerMixin(object):
 
         # 0 is default which should be 'unlimited'
         if self.opts['max_minions'] > 0:
-            # use the ConCache if enabled, else use the minion utils
-            if self.cache_cli:
-                minions = self.cache_cli.get_cached()
-            else:
-                minions = self.ckminions.connected_ids()
-                if len(minions) > 1000:
-                    log.info('With large numbers of minions it is advised '
-                             'to enable the ConCache with \'con_cache: True\' '
-                             'in the masters configuration file.')
+            minions = self._get_connected_ids()
 
             if not len(minions) <= self.opts['max_minions']:
                 # we reject new minions, minions that are already
@@ -391,8 +554,7 @@ class AESReqServerMixin(object):
         # The key payload may sometimes be corrupt when using auto-accept
         # and an empty request comes in
         try:
-            with salt.utils.fopen(pubfn) as f:
-                pub = RSA.importKey(f.read())
+            pub = self._get_pub_key(load['id'], pubfn)
         except (ValueError, IndexError, TypeError) as err:
             log.error('Corrupt public key "{0}": {1}'.format(pubfn, err))
             return {'enc': 'clear',
@@ -414,10 +576,12 @@ class AESReqServerMixin(object):
             else:
                 # the master has its own signing-keypair, compute the master.pub's
                 # signature and append that to the auth-reply
-                log.debug("Signing master public key before sending")
-                pub_sign = salt.crypt.sign_message(self.master_key.get_sign_paths()[1],
-                                                   ret['pub_key'])
-                ret.update({'pub_sig': binascii.b2a_base64(pub_sign)})
+                if self.pub_sig is None:
+                    log.debug("Signing master public key before sending")
+                    pub_sign = salt.crypt.sign_message(self.master_key.get_sign_paths()[1],
+                                                       ret['pub_key'])
+                    self.pub_sig = binascii.b2a_base64(pub_sign)
+                ret.update({'pub_sig': self.pub_sig})
 
         mcipher = PKCS1_OAEP.new(self.master_key.key)
         if self.opts['auth_mode'] >= 2:
@@ -446,8 +610,7 @@ class AESReqServerMixin(object):
             aes = salt.master.SMaster.secrets['aes']['secret'].value
             ret['aes'] = cipher.encrypt(salt.master.SMaster.secrets['aes']['secret'].value)
         # Be aggressive about the signature
-        digest = hashlib.sha256(aes).hexdigest()
-        ret['sig'] = salt.crypt.private_encrypt(self.master_key.key, digest)
+        ret['sig'] = self._sign_aes(aes)
         eload = {'result': True,
                  'act': 'accept',
                  'id': load['id'],
@@ -7,6 +7,11 @@ This includes server side transport, for the ReqServer and the Publisher
 
 # Import Python Libs
 from __future__ import absolute_import
+import os
+
+# Import Salt Libs
+import salt.utils.minions
+import salt.ext.six as six
 
 
 class ReqServerChannel(object):
@@ -100,10 +105,98 @@ class PubServerChannel(object):
         '''
         pass
 
-    def publish(self, load):
+    def _get_crypticle(self):
+        '''
+        Return a Crypticle of the current AES key, made again only when the
+        key gets rotated
+        '''
+        import salt.crypt
+        import salt.master
+        key = salt.master.SMaster.secrets['aes']['secret'].value
+        if self.crypticle is None or self.crypticle.key_string != key:
+            self.crypticle = salt.crypt.Crypticle(self.opts, key)
+        return self.crypticle
+
+    def _pub_pull_uri(self):
+        '''
+        Return the URI of the socket the publisher process pulls the publishes
+        from
+        '''
+        raise NotImplementedError()
+
+    def _get_pub_sock(self):
+        '''
+        Return the socket connected to the publisher process. The socket is
+        kept open for the publishes which follow in this process.
+        '''
+        if self.pub_sock is None or self.pub_sock_pid != os.getpid():
+            # a socket inherited through a fork can't be used
+            import zmq
+            self.context = zmq.Context(1)
+            self.pub_sock = self.context.socket(zmq.PUSH)
+            self.pub_sock.connect(self._pub_pull_uri())
+            self.pub_sock_pid = os.getpid()
+        return self.pub_sock
+
+    def publish(self, load, minions=None):
         '''
         Publish "load" to minions
+
+        :param dict load: A load to be sent across the wire to minions
+        :param list minions: The minions the master matched the target to, if
+                             known
         '''
         raise NotImplementedError()
 
-# EOF
+    def pub_topics(self, load, minions=None):
+        '''
+        Return the ids of the minions a publish only has to be delivered to,
+        or None to broadcast it to every minion
+
+        A list target is always delivered to the listed minions. A target
+        which only matches on minion ids is delivered to the minions the
+        master matched it to, unless there are more than
+        ``targeted_publish_max`` of them or the master publishes to syndics,
+        whose minions it does not know about. Targets on grains, pillar or
+        other minion data are matched against the master's cache of that
+        data, which can be stale, so these are broadcast unless
+        ``targeted_publish_minion_data`` is set.
+        '''
+        if load['tgt_type'] == 'list':
+            return load['tgt']
+        if minions is None or self.opts.get('order_masters'):
+            return None
+        if not self.opts.get('targeted_publish_minion_data') \
+                and not self._id_target(load['tgt'], load['tgt_type']):
+            return None
+        if 0 < len(minions) <= self.opts.get('targeted_publish_max', 0):
+            return list(minions)
+        return None
+
+    def _id_target(self, tgt, tgt_type):
+        '''
+        Return True if the target only matches on minion ids, so the master
+        resolves it without relying on its cache of the minions' data
+        '''
+        if tgt_type in ('glob', 'pcre', 'list'):
+            return True
+        if tgt_type not in ('compound', 'nodegroup'):
+            return False
+        if tgt_type == 'nodegroup':
+            words = salt.utils.minions.nodegroup_comp(
+                tgt, self.opts.get('nodegroups', {}))
+        elif isinstance(tgt, six.string_types):
+            words = tgt.split()
+        else:
+            words = tgt
+        if not words:
+            return False
+        for word in words:
+            if word in ('and', 'or', 'not', '(', ')'):
+                continue
+            if len(word) >= 3 and word.startswith('N@'):
+                if not self._id_target(word[2:], 'nodegroup'):
+                    return False
+            elif word[1:2] == '@' and word[0] not in 'LE':
+                return False
+        return True
@@ -263,7 +263,8 @@ class AsyncTCPPubChannel(salt.transport.mixins.auth.AESPubClientMixin, salt.tran
                 yield self.auth.authenticate()
             self.message_client = SaltMessageClient(self.opts['master_ip'],
                                                     int(self.auth.creds['publish_port']),
-                                                    io_loop=self.io_loop)
+                                                    io_loop=self.io_loop,
+                                                    connect_msg={'id': self.opts['id']})
             yield self.message_client.connect()  # wait for the client to be connected
             self.connected = True
         # TODO: better exception handling...
@@ -427,9 +428,12 @@ class SaltMessageClient(object):
     '''
     Low-level message sending client
     '''
-    def __init__(self, host, port, io_loop=None, resolver=None):
+    def __init__(self, host, port, io_loop=None, resolver=None, connect_msg=None):
         self.host = host
         self.port = port
+        # sent every time the stream is (re)connected, without expecting a
+        # reply. The pub channel tells the publisher the minion id with it
+        self.connect_msg = connect_msg
 
         self.io_loop = io_loop or tornado.ioloop.IOLoop.current()
 
@@ -493,6 +497,12 @@ class SaltMessageClient(object):
             except Exception as e:
                 yield tornado.gen.sleep(1)  # TODO: backoff
                 #self._connecting_future.set_exception(e)
+        if self.connect_msg is not None and self._connecting_future.done():
+            try:
+                self._stream.write(frame_msg(self.connect_msg))
+            except tornado.iostream.StreamClosedError:
+                # _stream_return reconnects
+                pass
 
     @tornado.gen.coroutine
     def _stream_return(self):
@@ -620,18 +630,77 @@ class PubServer(tornado.tcpserver.TCPServer, object):
     def __init__(self, *args, **kwargs):
         super(PubServer, self).__init__(*args, **kwargs)
         self.clients = []
+        # subscribers which told us their minion id, id -> [(stream, address)]
+        self.present = {}
+        # subscribers which did not, minions older than the master
+        self.anonymous = set()
+        self.ids = {}
 
     def handle_stream(self, stream, address):
         log.trace('Subscriber at {0} connected'.format(address))
-        self.clients.append((stream, address))
+        item = (stream, address)
+        self.clients.append(item)
+        self.anonymous.add(item)
+        self.io_loop.spawn_callback(self._stream_read, item)
+
+    @tornado.gen.coroutine
+    def _stream_read(self, item):
+        '''
+        Read the id the subscriber sends after connecting
+        '''
+        client, address = item
+        try:
+            while True:
+                framed_msg_len = yield client.read_until(' ')
+                framed_msg_raw = yield client.read_bytes(int(framed_msg_len.strip()))
+                framed_msg = msgpack.loads(framed_msg_raw)
+                body = msgpack.loads(framed_msg['body'])
+                if isinstance(body, dict) and 'id' in body:
+                    self._add_id(item, body['id'])
+        except tornado.iostream.StreamClosedError:
+            log.debug('Subscriber at {0} has disconnected from publisher'.format(address))
+        except Exception:
+            log.debug('Bad message from subscriber at {0}'.format(address),
+                      exc_info=True)
+            client.close()
+        self._remove_client(item)
+
+    def _add_id(self, item, id_):
+        '''
+        Deliver the publishes targeted at the minion id to the subscriber
+        '''
+        if item not in self.ids and item in self.anonymous:
+            self.anonymous.discard(item)
+            self.ids[item] = id_
+            self.present.setdefault(id_, []).append(item)
+
+    def _remove_client(self, item):
+        if item not in self.clients:
+            return
+        self.clients.remove(item)
+        self.anonymous.discard(item)
+        id_ = self.ids.pop(item, None)
+        if id_ is not None:
+            self.present[id_].remove(item)
+            if not self.present[id_]:
+                del self.present[id_]
 
     @tornado.gen.coroutine
     def publish_payload(self, package):
         log.trace('TCP PubServer starting to publish payload')
         package = package[0]  # ZMQ (The IPC calling us) ism :/
-        payload = frame_msg(salt.payload.unpackage(package)['payload'], raw_body=True)
+        package = salt.payload.unpackage(package)
+        payload = frame_msg(package['payload'], raw_body=True)
+        if 'topic_lst' in package:
+            # only the targeted minions, and those which can't tell us who
+            # they are
+            clients = list(self.anonymous)
+            for topic in package['topic_lst']:
+                clients.extend(self.present.get(topic, ()))
+        else:
+            clients = list(self.clients)
         to_remove = []
-        for item in self.clients:
+        for item in clients:
             client, address = item
             try:
                 f = client.write(payload)
@@ -642,7 +711,7 @@ class PubServer(tornado.tcpserver.TCPServer, object):
             client, address = item
             log.debug('Subscriber at {0} has disconnected from publisher'.format(address))
             client.close()
-            self.clients.remove(item)
+            self._remove_client(item)
         log.trace('TCP PubServer finished publishing payload')
 
 
@@ -650,6 +719,20 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
     def __init__(self, opts):
         self.opts = opts
         self.serial = salt.payload.Serial(self.opts)  # TODO: in init?
+        # kept for the publishes which follow, see _get_pub_sock
+        self.crypticle = None
+        self.context = None
+        self.pub_sock = None
+        self.pub_sock_pid = None
+
+    def _pub_pull_uri(self):
+        '''
+        Return the URI of the socket the publisher process pulls the publishes
+        from
+        '''
+        return 'ipc://{0}'.format(
+            os.path.join(self.opts['sock_dir'], 'publish_pull_tcp.ipc')
+            )
 
     def _publish_daemon(self):
         '''
@@ -661,9 +744,7 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         context = zmq.Context(1)
         # Prepare minion pull socket
         pull_sock = context.socket(zmq.PULL)
-        pull_uri = 'ipc://{0}'.format(
-            os.path.join(self.opts['sock_dir'], 'publish_pull_tcp.ipc')
-        )
+        pull_uri = self._pub_pull_uri()
         salt.utils.zeromq.check_ipc_path_max_len(pull_uri)
 
         # Securely create socket
@@ -695,29 +776,27 @@ class TCPPubServerChannel(salt.transport.server.PubServerChannel):
         '''
         process_manager.add_process(self._publish_daemon)
 
-    def publish(self, load):
+    def publish(self, load, minions=None):
         '''
         Publish "load" to minions
+
+        :param dict load: A load to be sent across the wire to minions
+        :param list minions: The minions the master matched the target to, if
+                             known
         '''
         payload = {'enc': 'aes'}
 
-        crypticle = salt.crypt.Crypticle(self.opts, salt.master.SMaster.secrets['aes']['secret'].value)
-        payload['load'] = crypticle.dumps(load)
+        payload['load'] = self._get_crypticle().dumps(load)
         if self.opts['sign_pub_messages']:
             master_pem_path = os.path.join(self.opts['pki_dir'], 'master.pem')
             log.debug("Signing data packet")
             payload['sig'] = salt.crypt.sign_message(master_pem_path, payload['load'])
         # Send 0MQ to the publisher
-        context = zmq.Context(1)
-        pub_sock = context.socket(zmq.PUSH)
-        pull_uri = 'ipc://{0}'.format(
-            os.path.join(self.opts['sock_dir'], 'publish_pull_tcp.ipc')
-            )
-        pub_sock.connect(pull_uri)
+        pub_sock = self._get_pub_sock()
         int_payload = {'payload': self.serial.dumps(payload)}
 
-        # add some targeting stuff for lists only (for now)
-        if load['tgt_type'] == 'list':
-            int_payload['topic_lst'] = load['tgt']
+        topic_lst = self.pub_topics(load, minions)
+        if topic_lst is not None:
+            int_payload['topic_lst'] = topic_lst
 
         pub_sock.send(self.serial.dumps(int_payload))
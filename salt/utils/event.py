@@ -54,9 +54,11 @@ from __future__ import absolute_import
 
 # Import python libs
 import os
+import re
 import time
 import errno
 import signal
+import struct
 import hashlib
 import logging
 import datetime
@@ -80,6 +82,7 @@ except ImportError:
 import salt.payload
 import salt.loader
 import salt.utils
+import salt.utils.atomicfile
 import salt.utils.cache
 import salt.utils.dicttrim
 import salt.utils.process
@@ -94,6 +97,18 @@ SUB_EVENT = set([
     'state.sls',
 ])
 
+# Spooled event return batches are length prefixed
+SPOOL_LEN = struct.Struct('>I')
+# Start a new spool segment once the current one is this large
+SPOOL_SEGMENT_SIZE = 1048576
+# Seconds to wait before returning spooled events again, doubled after every
+# failed attempt
+SPOOL_RETRY_MIN = 1
+SPOOL_RETRY_MAX = 300
+
+# Regular expressions which can not be one alternative of many
+_UNCOMBINABLE_RE = re.compile(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]')
+
 TAGEND = '\n\n'  # long tag delimiter
 TAGPARTER = '/'  # name spaced tag delimiter
 SALT = 'salt'  # base prefix for all salt/ events
@@ -166,6 +181,191 @@ def tagify(suffix='', prefix='', base=SALT):
     return TAGPARTER.join([part for part in parts if part])
 
 
+# The tag of the counters the master event publisher publishes
+STATS_TAG = tagify(['publisher', 'stats'], 'event')
+
+
+class _TagTrie(object):
+    '''
+    A character trie of tags, finds which of its tags an event tag starts
+    with in time proportional to the length of the event tag
+    '''
+    def __init__(self):
+        self.root = {}
+
+    def add(self, tag):
+        node = self.root
+        for char in tag:
+            node = node.setdefault(char, {})
+        # None never collides with the single characters of the tags
+        node[None] = tag
+
+    def remove(self, tag):
+        path = [self.root]
+        for char in tag:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].pop(None, None)
+        # Prune the branches no tag ends in anymore
+        for idx in range(len(tag), 0, -1):
+            if path[idx]:
+                break
+            del path[idx - 1][tag[idx - 1]]
+
+    def iter_prefixes(self, tag):
+        '''
+        Yield the tags in the trie the passed tag starts with
+        '''
+        node = self.root
+        if None in node:
+            yield node[None]
+        for char in tag:
+            node = node.get(char)
+            if node is None:
+                return
+            if None in node:
+                yield node[None]
+
+
+class TagSubscriptions(object):
+    '''
+    An index of the tags subscribed to, matching an event tag against it costs
+    about the same for one subscription as for thousands.
+
+    The match types are those of ``SaltEvent.get_event``, ``startswith`` and
+    ``endswith`` subscriptions are kept in character tries, ``find`` and
+    ``regex`` subscriptions are compiled into one alternation each.
+    '''
+    MATCH_TYPES = ('startswith', 'endswith', 'find', 'regex')
+
+    def __init__(self):
+        # (match_type, tag) -> times subscribed
+        self._refs = {}
+        self._prefixes = _TagTrie()
+        # endswith subscriptions are kept reversed
+        self._suffixes = _TagTrie()
+        self._finds = set()
+        # regex -> the regex compiled on its own
+        self._regexes = {}
+        self._compiled = None
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __contains__(self, sub):
+        return sub in self._refs
+
+    def add(self, tag, match_type='startswith'):
+        '''
+        Subscribe to the tag, a tag subscribed to more than once needs to be
+        removed as many times
+        '''
+        if match_type not in self.MATCH_TYPES:
+            raise ValueError('Invalid match type {0!r}'.format(match_type))
+        key = (match_type, tag)
+        if key in self._refs:
+            self._refs[key] += 1
+            return
+        self._refs[key] = 1
+        if match_type == 'startswith':
+            self._prefixes.add(tag)
+        elif match_type == 'endswith':
+            self._suffixes.add(tag[::-1])
+        elif match_type == 'find':
+            self._finds.add(tag)
+            self._compiled = None
+        else:
+            self._regexes[tag] = re.compile('^' + tag)
+            self._compiled = None
+
+    def remove(self, tag, match_type='startswith'):
+        '''
+        Drop a subscription to the tag, return False if there was none
+        '''
+        key = (match_type, tag)
+        if key not in self._refs:
+            return False
+        self._refs[key] -= 1
+        if self._refs[key]:
+            return True
+        del self._refs[key]
+        if match_type == 'startswith':
+            self._prefixes.remove(tag)
+        elif match_type == 'endswith':
+            self._suffixes.remove(tag[::-1])
+        elif match_type == 'find':
+            self._finds.discard(tag)
+            self._compiled = None
+        else:
+            del self._regexes[tag]
+            self._compiled = None
+        return True
+
+    def _compile(self):
+        '''
+        Compile the find and regex subscriptions, return the combined pattern
+        and the regexes which can not be combined with others
+        '''
+        alts = ['(?:{0})'.format(re.escape(tag)) for tag in self._finds]
+        apart = []
+        for tag, regex in six.iteritems(self._regexes):
+            if _UNCOMBINABLE_RE.search(tag):
+                # Back references and inline flags change meaning when the
+                # pattern is one of many alternatives
+                apart.append(regex)
+            else:
+                alts.append('^(?:{0})'.format(tag))
+        combined = None
+        if alts:
+            try:
+                combined = re.compile('|'.join(alts))
+            except re.error:
+                # Group names used by more than one pattern
+                apart.extend(re.compile(alt) for alt in alts)
+        self._compiled = (combined, apart)
+        return self._compiled
+
+    def match(self, tag):
+        '''
+        Return True if the tag matches any of the subscriptions
+        '''
+        for _ in self._prefixes.iter_prefixes(tag):
+            return True
+        for _ in self._suffixes.iter_prefixes(tag[::-1]):
+            return True
+        if not self._finds and not self._regexes:
+            return False
+        combined, apart = self._compiled or self._compile()
+        if combined is not None and combined.search(tag):
+            return True
+        return any(regex.search(tag) for regex in apart)
+
+    def iter_prefixes(self, tag):
+        '''
+        Yield the startswith subscriptions the tag starts with
+        '''
+        return self._prefixes.iter_prefixes(tag)
+
+    def matches(self, tag):
+        '''
+        Return the (tag, match_type) of every subscription the tag matches
+        '''
+        ret = [(sub, 'startswith') for sub in self._prefixes.iter_prefixes(tag)]
+        ret.extend((sub[::-1], 'endswith')
+                   for sub in self._suffixes.iter_prefixes(tag[::-1]))
+        if not self._finds and not self._regexes:
+            return ret
+        combined, apart = self._compiled or self._compile()
+        if apart or (combined is not None and combined.search(tag)):
+            ret.extend((sub, 'find') for sub in self._finds if sub in tag)
+            ret.extend((sub, 'regex')
+                       for sub, regex in six.iteritems(self._regexes)
+                       if regex.search(tag))
+        return ret
+
+
 class SaltEvent(object):
     '''
     Warning! Use the get_event function or the code will not be
@@ -186,6 +386,11 @@ class SaltEvent(object):
         if salt.utils.is_windows() and not hasattr(opts, 'ipc_mode'):
             opts['ipc_mode'] = 'tcp'
         self.puburi, self.pulluri = self.__load_uri(sock_dir, node)
+        self.subscriptions = TagSubscriptions()
+        # The tag prefixes the event publisher sends this listener events for
+        self.tag_filters = ['']
+        # The index of the last pending_tags passed to get_event
+        self._pending_index = (None, None)
         self.subscribe()
         self.pending_events = []
         self.__load_cache_regex()
@@ -257,18 +462,42 @@ class SaltEvent(object):
         )
         return puburi, pulluri
 
-    def subscribe(self, tag=None):
+    def subscribe(self, tag=None, match_type=None):
         '''
         Subscribe to events matching the passed tag.
+
+        The events matching a subscribed tag which are read while waiting for
+        another tag in get_event are kept in the pending events, until a
+        get_event for them returns them or the tag is unsubscribed. With no
+        tag only the connection to the publisher is made.
+
+        match_type
+            How the tag is matched, see get_event. Default is
+            opts['event_match_type'] or 'startswith'
         '''
         if not self.cpub:
             self.connect_pub()
+        if tag is not None:
+            if match_type is None:
+                match_type = self.opts.get('event_match_type', 'startswith')
+            self.subscriptions.add(tag, match_type)
 
-    def unsubscribe(self, tag=None):
+    def unsubscribe(self, tag=None, match_type=None):
         '''
         Un-subscribe to events matching the passed tag.
         '''
-        return
+        if tag is None:
+            return
+        if match_type is None:
+            match_type = self.opts.get('event_match_type', 'startswith')
+        if self.subscriptions.remove(tag, match_type) and \
+                (match_type, tag) not in self.subscriptions:
+            # Drop the pending events nothing else subscribed to
+            match_func = self._get_match_func(match_type)
+            self.pending_events = [
+                evt for evt in self.pending_events
+                if not match_func(evt['tag'], tag) or
+                self.subscriptions.match(evt['tag'])]
 
     def connect_pub(self):
         '''
@@ -277,10 +506,26 @@ class SaltEvent(object):
         self.sub = self.context.socket(zmq.SUB)
         self.sub.connect(self.puburi)
         self.poller.register(self.sub, zmq.POLLIN)
-        self.sub.setsockopt_string(zmq.SUBSCRIBE, u'')
+        for prefix in self.tag_filters:
+            self.sub.setsockopt(zmq.SUBSCRIBE, salt.utils.to_bytes(prefix))
         self.sub.setsockopt(zmq.LINGER, 5000)
         self.cpub = True
 
+    def set_tag_filters(self, prefixes=None):
+        '''
+        Only receive the events whose tag starts with one of the prefixes, the
+        event publisher leaves the others out. With no prefixes all events are
+        received.
+        '''
+        prefixes = list(prefixes) if prefixes else ['']
+        if self.cpub:
+            # Subscribe to the new prefixes first, not to miss events
+            for prefix in prefixes:
+                self.sub.setsockopt(zmq.SUBSCRIBE, salt.utils.to_bytes(prefix))
+            for prefix in self.tag_filters:
+                self.sub.setsockopt(zmq.UNSUBSCRIBE, salt.utils.to_bytes(prefix))
+        self.tag_filters = prefixes
+
     def connect_pull(self, timeout=1000):
         '''
         Establish a connection with the event pull socket
@@ -307,13 +552,35 @@ class SaltEvent(object):
             match_type = self.opts.get('event_match_type', 'startswith')
         return getattr(self, '_match_tag_{0}'.format(match_type), None)
 
-    def _check_pending(self, tag, pending_tags, match_func=None):
+    def _get_keep_func(self, pending_tags, match_type=None):
+        '''
+        Return a function telling whether an event which is not the one asked
+        for is kept in the pending events, or None if none are kept
+        '''
+        if pending_tags:
+            if match_type is None:
+                match_type = self.opts.get('event_match_type', 'startswith')
+            key = (match_type, tuple(pending_tags))
+            if self._pending_index[0] != key:
+                index = TagSubscriptions()
+                for ptag in pending_tags:
+                    index.add(ptag, match_type)
+                self._pending_index = (key, index)
+            index = self._pending_index[1]
+            if not self.subscriptions:
+                return index.match
+            return lambda tag: index.match(tag) or self.subscriptions.match(tag)
+        if self.subscriptions:
+            return self.subscriptions.match
+        return None
+
+    def _check_pending(self, tag, keep=None, match_func=None):
         """Check the pending_events list for events that match the tag
 
         :param tag: The tag to search for
         :type tag: str
-        :param pending_tags: List of tags to preserve
-        :type pending_tags: list[str]
+        :param keep: Tells which of the other events to preserve
+        :type keep: function
         :return:
         """
         if match_func is None:
@@ -327,7 +594,7 @@ class SaltEvent(object):
                     ret = evt
                 else:
                     self.pending_events.append(evt)
-            elif any(match_func(evt['tag'], ptag) for ptag in pending_tags):
+            elif keep is not None and keep(evt['tag']):
                 self.pending_events.append(evt)
         return ret
 
@@ -363,7 +630,7 @@ class SaltEvent(object):
         '''
         return self.cache_regex.get(search_tag).search(event_tag) is not None
 
-    def _get_event(self, wait, tag, pending_tags, match_func=None):
+    def _get_event(self, wait, tag, keep=None, match_func=None):
         if match_func is None:
             match_func = self._get_match_func()
         start = time.time()
@@ -385,7 +652,7 @@ class SaltEvent(object):
                     raise
 
             if not match_func(ret['tag'], tag):     # tag not match
-                if any(match_func(ret['tag'], ptag) for ptag in pending_tags):
+                if keep is not None and keep(ret['tag']):
                     self.pending_events.append(ret)
                 if wait:  # only update the wait timeout if we had one
                     wait = timeout_at - time.time()
@@ -417,7 +684,8 @@ class SaltEvent(object):
         pending_tags
             Add any events matching the listed tags to the pending queue.
             Still MAY CAUSE MEMORY LEAKS but less likely than use_pending
-            assuming you later get_event for the tags you've listed here
+            assuming you later get_event for the tags you've listed here.
+            The events matching the tags passed to subscribe are always kept.
 
             New in Boron
 
@@ -434,13 +702,13 @@ class SaltEvent(object):
 
         match_func = self._get_match_func(match_type)
         if use_pending:
-            pending_tags = ['']
-        elif pending_tags is None:
-            pending_tags = []
+            keep = lambda tag: True
+        else:
+            keep = self._get_keep_func(pending_tags, match_type)
 
-        ret = self._check_pending(tag, pending_tags, match_func)
+        ret = self._check_pending(tag, keep, match_func)
         if ret is None:
-            ret = self._get_event(wait, tag, pending_tags, match_func)
+            ret = self._get_event(wait, tag, keep, match_func)
 
         if ret is None or full:
             return ret
@@ -785,10 +1053,86 @@ class EventPublisher(multiprocessing.Process):
     '''
     The interface that takes master events and republishes them out to anyone
     who wants to listen
+
+    Listeners subscribe to the tag prefixes of the events they want, and zmq
+    only sends them those. The publisher keeps count of the events sent for
+    every prefix subscribed to, and of the events dropped because a listener
+    fell too far behind.
     '''
     def __init__(self, opts):
         super(EventPublisher, self).__init__()
         self.opts = opts
+        self.serial = salt.payload.Serial({'serial': 'msgpack'})
+        # The tag prefixes the listeners subscribed to
+        self.subscriptions = TagSubscriptions()
+        # prefix -> events sent to its subscribers
+        self.prefix_stats = {}
+        self.stats = {'received': 0, 'sent': 0, 'filtered': 0, 'dropped': 0}
+        self.nodrop = False
+
+    def handle_subscription(self, msg):
+        '''
+        Track the tag prefixes subscribed to. The XPUB socket passes on the
+        first subscription to a prefix and the last unsubscription from it.
+        '''
+        if not msg:
+            return
+        prefix = msg[1:]
+        if msg[0:1] == b'\x01':
+            self.subscriptions.add(prefix)
+            self.prefix_stats.setdefault(prefix, 0)
+        elif msg[0:1] == b'\x00':
+            self.subscriptions.remove(prefix)
+            self.prefix_stats.pop(prefix, None)
+
+    def publish(self, package):
+        '''
+        Send an event on to the listeners which subscribed to a prefix of its
+        tag
+        '''
+        self.stats['received'] += 1
+        # zmq matches the prefixes against the whole message the same way
+        matched = list(self.subscriptions.iter_prefixes(package))
+        if not matched:
+            self.stats['filtered'] += 1
+            return
+        for prefix in matched:
+            self.prefix_stats[prefix] += 1
+        self.stats['sent'] += 1
+        if not self.nodrop:
+            self.epub_sock.send(package)
+            return
+        try:
+            self.epub_sock.send(package, zmq.NOBLOCK)
+        except zmq.ZMQError as exc:
+            if exc.errno != errno.EAGAIN:
+                raise
+            # A listener fell behind, only it misses the event
+            self.stats['dropped'] += 1
+            self.epub_sock.setsockopt(zmq.XPUB_NODROP, 0)
+            try:
+                self.epub_sock.send(package)
+            finally:
+                self.epub_sock.setsockopt(zmq.XPUB_NODROP, 1)
+
+    def get_stats(self):
+        '''
+        Return the counters of the publisher
+        '''
+        ret = dict(self.stats)
+        ret['subscriptions'] = dict(
+            (salt.utils.to_str(prefix), sent)
+            for prefix, sent in six.iteritems(self.prefix_stats))
+        return ret
+
+    def publish_stats(self):
+        '''
+        Publish the counters of the publisher as an event
+        '''
+        data = self.get_stats()
+        data['_stamp'] = datetime.datetime.utcnow().isoformat()
+        self.publish(salt.utils.to_bytes(STATS_TAG + TAGEND) +
+                     self.serial.dumps(data))
 
     def run(self):
         '''
@@ -798,8 +1142,17 @@ class EventPublisher(multiprocessing.Process):
         linger = 5000
         # Set up the context
         self.context = zmq.Context(1)
-        # Prepare the master event publisher
-        self.epub_sock = self.context.socket(zmq.PUB)
+        # Prepare the master event publisher, XPUB passes on the
+        # subscriptions of the listeners
+        self.epub_sock = self.context.socket(zmq.XPUB)
+        try:
+            # Fail to send to a listener which fell behind instead of
+            # silently dropping the event, so the drops are counted
+            self.epub_sock.setsockopt(zmq.XPUB_NODROP, 1)
+            self.nodrop = True
+        except (AttributeError, zmq.ZMQError):
+            # libzmq older than 4.1
+            pass
         # Prepare master event pull socket
         self.epull_sock = self.context.socket(zmq.PULL)
         if self.opts.get('ipc_mode', '') == 'tcp':
@@ -831,13 +1184,29 @@ class EventPublisher(multiprocessing.Process):
                     self.opts['sock_dir'], 'master_event_pub.ipc'), 0o666)
         finally:
             os.umask(old_umask)
+        poller = zmq.Poller()
+        poller.register(self.epull_sock, zmq.POLLIN)
+        poller.register(self.epub_sock, zmq.POLLIN)
+        interval = self.opts.get('event_publisher_stats_interval', 0)
+        stats_at = time.time() + interval
         try:
             while True:
                 # Catch and handle EINTR from when this process is sent
                 # SIGUSR1 gracefully so we don't choke and die horribly
                 try:
-                    package = self.epull_sock.recv()
-                    self.epub_sock.send(package)
+                    if interval:
+                        socks = dict(poller.poll(
+                            max(stats_at - time.time(), 0) * 1000))
+                    else:
+                        socks = dict(poller.poll())
+                    # Take in the subscriptions before the events they are for
+                    while self.epub_sock.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                        self.handle_subscription(self.epub_sock.recv())
+                    if socks.get(self.epull_sock) == zmq.POLLIN:
+                        self.publish(self.epull_sock.recv())
+                    if interval and time.time() >= stats_at:
+                        self.publish_stats()
+                        stats_at = time.time() + interval
                 except zmq.ZMQError as exc:
                     if exc.errno == errno.EINTR:
                         continue
@@ -857,6 +1226,13 @@ class EventReturn(multiprocessing.Process):
     '''
     A dedicated process which listens to the master event bus and queues
     and forwards events to the specified returner.
+
+    The queued events are flushed once ``event_return_queue`` events or
+    ``event_return_queue_bytes`` bytes are waiting, or when the oldest of them
+    has waited for ``event_return_flush_interval`` seconds. Batches the
+    returner fails to store are appended to a spool on disk and handed to
+    the returner again later, backing off exponentially while it keeps
+    failing.
     '''
     def __init__(self, opts):
         '''
@@ -868,10 +1244,26 @@ class EventReturn(multiprocessing.Process):
 
         self.opts = opts
         self.event_return_queue = self.opts['event_return_queue']
+        self.event_return_queue_bytes = self.opts.get('event_return_queue_bytes', 0)
+        self.flush_interval = self.opts.get('event_return_flush_interval', 5)
+        self.spool_max_size = self.opts.get('event_return_spool_max_size', 0)
+        self.spool_dir = os.path.join(self.opts['cachedir'], 'event_return_spool')
         local_minion_opts = self.opts.copy()
         local_minion_opts['file_client'] = 'local'
         self.minion = salt.minion.MasterMinion(local_minion_opts)
+        self.serial = salt.payload.Serial(self.opts)
         self.event_queue = []
+        self.event_queue_size = 0
+        self.queued_at = None
+        # When to return the spooled events again, 0 if there are none
+        self.retry_at = 0
+        self.retry_wait = SPOOL_RETRY_MIN
+        # How far into the oldest spool segment the returner got, kept in
+        # the spool as well so a restart does not return the events again
+        self.spool_offset_file = os.path.join(self.spool_dir, 'offset')
+        self.spool_offset = self._read_spool_offset()
+        self.whitelist = frozenset(self.opts['event_return_whitelist'])
+        self.blacklist = frozenset(self.opts['event_return_blacklist'])
         self.stop = False
 
     def sig_stop(self, signum, frame):
@@ -882,19 +1274,180 @@ class EventReturn(multiprocessing.Process):
             self.opts['event_return']
         )
         if event_return in self.minion.returners:
-            try:
-                self.minion.returners[event_return](self.event_queue)
-            except Exception as exc:
-                log.error('Could not store events {0}. '
-                          'Returner raised exception: {1}'.format(
-                    self.event_queue, exc))
-            del self.event_queue[:]
+            if self.retry_at:
+                # Keep the events in order behind the ones already spooled
+                self._spool(self.event_queue)
+            else:
+                try:
+                    self.minion.returners[event_return](self.event_queue)
+                except Exception as exc:
+                    log.error('Could not store events {0}. '
+                              'Returner raised exception: {1}'.format(
+                        self.event_queue, exc))
+                    self._spool(self.event_queue)
         else:
             log.error(
                 'Could not store return for event(s) {0}. Returner '
                 '\'{1}\' not found.'
                     .format(self.event_queue, self.opts['event_return'])
             )
+        del self.event_queue[:]
+        self.event_queue_size = 0
+        self.queued_at = None
+
+    def _flush_due(self):
+        '''
+        Return True if the queued events should be flushed
+        '''
+        if not self.event_queue:
+            return False
+        if len(self.event_queue) >= self.event_return_queue:
+            return True
+        if self.event_return_queue_bytes and \
+                self.event_queue_size >= self.event_return_queue_bytes:
+            return True
+        return time.time() - self.queued_at >= self.flush_interval
+
+    def _wait(self):
+        '''
+        Return how long to wait for the next event before something is due
+        '''
+        now = time.time()
+        deadlines = [now + 1]
+        if self.event_queue:
+            deadlines.append(self.queued_at + self.flush_interval)
+        if self.retry_at:
+            deadlines.append(self.retry_at)
+        return max(min(deadlines) - now, 0.01)
+
+    def _spool_segments(self):
+        '''
+        Return the names of the spool segments, oldest first
+        '''
+        try:
+            return sorted(name for name in os.listdir(self.spool_dir)
+                          if name.endswith('.spool'))
+        except OSError:
+            return []
+
+    def _read_spool_offset(self):
+        '''
+        Return how far into the oldest spool segment the returner got
+        '''
+        segments = self._spool_segments()
+        try:
+            with salt.utils.fopen(self.spool_offset_file, 'r') as fp_:
+                name, offset = fp_.read().split()
+            if segments and name == segments[0]:
+                return int(offset)
+        except (IOError, OSError, ValueError):
+            pass
+        return 0
+
+    def _write_spool_offset(self, name):
+        '''
+        Record how far into the spool segment the returner got
+        '''
+        try:
+            with salt.utils.atomicfile.atomic_open(self.spool_offset_file, 'w') as fp_:
+                fp_.write('{0} {1}'.format(name, self.spool_offset))
+        except (IOError, OSError) as exc:
+            log.warning('Unable to record the event return spool offset, '
+                        'the events returned from {0} are returned again '
+                        'after a restart: {1}'.format(name, exc))
+
+    def _spool(self, events):
+        '''
+        Append a batch of events to the spool to be returned later
+        '''
+        if not self.spool_max_size:
+            log.error('Dropping {0} event(s), event_return_spool_max_size '
+                      'is 0'.format(len(events)))
+            return
+        try:
+            self._write_spool(self.serial.dumps(events))
+        except (IOError, OSError) as exc:
+            log.error('Dropping {0} event(s), unable to write the event '
+                      'return spool: {1}'.format(len(events), exc))
+
+    def _write_spool(self, data):
+        '''
+        Append a serialized batch of events to the spool
+        '''
+        if not os.path.isdir(self.spool_dir):
+            os.makedirs(self.spool_dir)
+        segments = self._spool_segments()
+        if segments and os.path.getsize(
+                os.path.join(self.spool_dir, segments[-1])) < SPOOL_SEGMENT_SIZE:
+            name = segments[-1]
+        else:
+            name = '{0:020d}.spool'.format(
+                int(segments[-1][:-6]) + 1 if segments else 0)
+            segments.append(name)
+        path = os.path.join(self.spool_dir, name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        try:
+            with salt.utils.fopen(path, 'ab') as fp_:
+                fp_.write(SPOOL_LEN.pack(len(data)) + data)
+        except (IOError, OSError):
+            # Do not leave a partial batch for the following ones to land
+            # behind
+            try:
+                with salt.utils.fopen(path, 'r+b') as fp_:
+                    fp_.truncate(size)
+            except (IOError, OSError):
+                pass
+            raise
+        # Make room by dropping the oldest segments
+        sizes = [os.path.getsize(os.path.join(self.spool_dir, seg))
+                 for seg in segments]
+        while len(segments) > 1 and sum(sizes) > self.spool_max_size:
+            log.warning('The event return spool is over {0} bytes, dropping '
+                        'the events in {1}'.format(self.spool_max_size,
+                                                   segments[0]))
+            os.remove(os.path.join(self.spool_dir, segments.pop(0)))
+            sizes.pop(0)
+            self.spool_offset = 0
+        if not self.retry_at:
+            self.retry_at = time.time() + self.retry_wait
+
+    def _return_spool(self):
+        '''
+        Hand the spooled events to the returner, oldest first
+        '''
+        event_return = '{0}.event_return'.format(self.opts['event_return'])
+        for name in self._spool_segments():
+            path = os.path.join(self.spool_dir, name)
+            with salt.utils.fopen(path, 'rb') as fp_:
+                fp_.seek(self.spool_offset)
+                while True:
+                    head = fp_.read(SPOOL_LEN.size)
+                    if len(head) < SPOOL_LEN.size:
+                        break
+                    length = SPOOL_LEN.unpack(head)[0]
+                    data = fp_.read(length)
+                    if len(data) < length:
+                        log.warning('Dropping the truncated end of event '
+                                    'return spool segment {0}'.format(name))
+                        break
+                    try:
+                        self.minion.returners[event_return](
+                            self.serial.loads(data))
+                    except Exception as exc:
+                        self.retry_wait = min(self.retry_wait * 2,
+                                              SPOOL_RETRY_MAX)
+                        self.retry_at = time.time() + self.retry_wait
+                        log.error('Could not store spooled events, retrying '
+                                  'in {0} seconds. Returner raised '
+                                  'exception: {1}'.format(self.retry_wait,
+                                                          exc))
+                        return
+                    self.spool_offset += SPOOL_LEN.size + length
+                    self._write_spool_offset(name)
+            os.remove(path)
+            self.spool_offset = 0
+        self.retry_at = 0
+        self.retry_wait = SPOOL_RETRY_MIN
 
     def run(self):
         '''
@@ -905,16 +1458,23 @@ class EventReturn(multiprocessing.Process):
 
         salt.utils.appendproctitle(self.__class__.__name__)
         self.event = get_event('master', opts=self.opts)
-        events = self.event.iter_events(full=True)
         self.event.fire_event({}, 'salt/event_listen/start')
+        if self._spool_segments():
+            # Events left over from the last run
+            self.retry_at = time.time()
         try:
-            for event in events:
-                if self._filter(event):
+            while not self.stop:
+                event = self.event.get_event(wait=self._wait(), full=True)
+                if event is not None and self._filter(event):
+                    if not self.event_queue:
+                        self.queued_at = time.time()
                     self.event_queue.append(event)
-                if len(self.event_queue) >= self.event_return_queue:
+                    if self.event_return_queue_bytes:
+                        self.event_queue_size += len(self.serial.dumps(event))
+                if self._flush_due():
                     self.flush_events()
-                if self.stop:
-                    break
+                if self.retry_at and time.time() >= self.retry_at:
+                    self._return_spool()
         except zmq.error.ZMQError as exc:
             if exc.errno != errno.EINTR:  # Outside interrupt is a normal shutdown case
                 raise
@@ -929,12 +1489,12 @@ class EventReturn(multiprocessing.Process):
         Returns True if event should be stored, else False
         '''
         tag = event['tag']
-        if tag in self.opts['event_return_whitelist']:
-            if tag not in self.opts['event_return_blacklist']:
+        if tag in self.whitelist:
+            if tag not in self.blacklist:
                 return True
             else:
                 return False  # Event was whitelisted and blacklisted
-        elif tag in self.opts['event_return_blacklist']:
+        elif tag in self.blacklist:
             return False
         return True
 
@@ -8,6 +8,7 @@ from __future__ import absolute_import
 import json
 import pprint
 import logging
+import contextlib
 from os import path
 from functools import wraps
 
@@ -29,12 +30,29 @@ from salt.utils.odict import OrderedDict
 
 log = logging.getLogger(__name__)
 
+# Sets collecting the templates loaded by SaltCacheLoader, see track_templates
+_TRACKERS = []
+
 __all__ = [
     'SaltCacheLoader',
     'SerializerExtension'
 ]
 
 
+@contextlib.contextmanager
+def track_templates():
+    '''
+    Collect the templates imported or included through SaltCacheLoader inside
+    the block, as (saltenv, template, path) tuples
+    '''
+    loaded = set()
+    _TRACKERS.append(loaded)
+    try:
+        yield loaded
+    finally:
+        _TRACKERS.remove(loaded)
+
+
 # To dump OrderedDict objects as regular dicts. Used by the yaml
 # template filter.
 class OrderedDictDumper(yaml.Dumper):  # pylint: disable=W0232
@@ -101,6 +119,29 @@ class SaltCacheLoader(BaseLoader):
             self.cache_file(template)
             self.cached.append(template)
 
+    def reset_cache(self):
+        '''
+        Forget the files cached so far, so they are fetched again the next
+        time they are used. Called before every render by a loader shared
+        between renders.
+        '''
+        self.cached = []
+
+    def _loaded(self, environment, template, filepath):
+        '''
+        Record a template being used by the current render
+        '''
+        if environment and template:
+            tpldir = path.dirname(template).replace('\\', '/')
+            tpldata = {
+                'tplfile': template,
+                'tpldir': tpldir,
+                'tpldot': tpldir.replace('/', '.'),
+            }
+            environment.globals.update(tpldata)
+        for loaded in _TRACKERS:
+            loaded.add((self.saltenv, template, filepath))
+
     def get_source(self, environment, template):
         # checks for relative '..' paths
         if '..' in template:
@@ -112,15 +153,6 @@ class SaltCacheLoader(BaseLoader):
 
         self.check_cache(template)
 
-        if environment and template:
-            tpldir = path.dirname(template).replace('\\', '/')
-            tpldata = {
-                'tplfile': template,
-                'tpldir': tpldir,
-                'tpldot': tpldir.replace('/', '.'),
-            }
-            environment.globals.update(tpldata)
-
         # pylint: disable=cell-var-from-loop
         for spath in self.searchpath:
             filepath = path.join(spath, template)
@@ -130,10 +162,17 @@ class SaltCacheLoader(BaseLoader):
                     mtime = path.getmtime(filepath)
 
                     def uptodate():
+                        # Called when the environment already compiled the
+                        # template, make sure the file is the latest one
+                        self.check_cache(template)
                         try:
-                            return path.getmtime(filepath) == mtime
+                            if path.getmtime(filepath) != mtime:
+                                return False
                         except OSError:
                             return False
+                        self._loaded(environment, template, filepath)
+                        return True
+                    self._loaded(environment, template, filepath)
                     return contents, filepath, uptodate
             except IOError:
                 # there is no file under current path
@@ -2,21 +2,33 @@
 
 # Import Python libs
 from __future__ import absolute_import
+import errno
+import signal
 import logging
+import multiprocessing
 
 # Import Salt libs
 import salt.minion
+import salt.utils
 import salt.utils.verify
 import salt.utils.jid
 from salt.utils.event import tagify
 
+# Import 3rd-party libs
+from salt.ext.six.moves import queue  # pylint: disable=import-error
+
 
 log = logging.getLogger(__name__)
 
 
-def store_job(opts, load, event=None, mminion=None):
+def store_job(opts, load, event=None, mminion=None, job_queue=None):
     '''
     Store job information using the configured master_job_cache
+
+    If a ``job_queue`` is passed the job cache writes are handed over to the
+    :class:`JobCacheWriter` process reading from it, the return event is
+    still fired right away. When the queue stays full for
+    ``job_cache_writer_timeout`` seconds the job is written here instead.
     '''
     # If the return data is invalid, just ignore it
     if any(key not in load for key in ('return', 'jid', 'id')):
@@ -27,6 +39,7 @@ def store_job(opts, load, event=None, mminion=None):
         mminion = salt.minion.MasterMinion(opts, states=False, rend=False)
 
     job_cache = opts['master_job_cache']
+    prep = False
     if load['jid'] == 'req':
         # The minion is returning a standalone job, request a jobid
         load['arg'] = load.get('arg', load.get('fun_args', []))
@@ -50,14 +63,9 @@ def store_job(opts, load, event=None, mminion=None):
             log.error(emsg)
             raise KeyError(emsg)
     elif salt.utils.jid.is_jid(load['jid']):
-        # Store the jid
-        jidstore_fstr = '{0}.prep_jid'.format(job_cache)
-        try:
-            mminion.returners[jidstore_fstr](False, passed_jid=load['jid'])
-        except KeyError:
-            emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
-            log.error(emsg)
-            raise KeyError(emsg)
+        prep = True
+        if job_queue is None:
+            _prep_jid(opts, load['jid'], mminion)
 
     if event:
         # If the return data is invalid, just ignore it
@@ -65,31 +73,172 @@ def store_job(opts, load, event=None, mminion=None):
         event.fire_event(load, tagify([load['jid'], 'ret', load['id']], 'job'))
         event.fire_ret_load(load)
 
+    if job_queue is not None:
+        try:
+            job_queue.put((load, prep),
+                          timeout=opts.get('job_cache_writer_timeout', 5))
+            return
+        except queue.Full:
+            log.warning(
+                'The job cache writer queue is full, storing the return '
+                'from {id} for job {jid} directly'.format(**load)
+            )
+        if prep:
+            _prep_jid(opts, load['jid'], mminion)
+
+    _write_returns(opts, [load], mminion)
+
+
+def _prep_jid(opts, jid, mminion):
+    '''
+    Store the jid in the master_job_cache
+    '''
+    job_cache = opts['master_job_cache']
+    jidstore_fstr = '{0}.prep_jid'.format(job_cache)
+    try:
+        mminion.returners[jidstore_fstr](False, passed_jid=jid)
+    except KeyError:
+        emsg = "Returner '{0}' does not support function prep_jid".format(job_cache)
+        log.error(emsg)
+        raise KeyError(emsg)
+
+
+def _write_returns(opts, loads, mminion):
+    '''
+    Write returns to the master_job_cache. Returners which provide a
+    ``returner_batch`` function get all of the returns in a single call.
+    '''
     # if you have a job_cache, or an ext_job_cache, don't write to
     # the regular master cache
     if not opts['job_cache'] or opts.get('ext_job_cache'):
         return
 
     # otherwise, write to the master cache
+    job_cache = opts['master_job_cache']
     savefstr = '{0}.save_load'.format(job_cache)
     getfstr = '{0}.get_load'.format(job_cache)
     fstr = '{0}.returner'.format(job_cache)
-    if 'fun' not in load and load.get('return', {}):
-        ret_ = load.get('return', {})
-        if 'fun' in ret_:
-            load.update({'fun': ret_['fun']})
-        if 'user' in ret_:
-            load.update({'user': ret_['user']})
+    batchfstr = '{0}.returner_batch'.format(job_cache)
+    saved = set()
     try:
-        if 'jid' in load and 'get_load' in mminion.returners and not mminion.returners[getfstr](load.get('jid', '')):
-            mminion.returners[savefstr](load['jid'], load)
-        mminion.returners[fstr](load)
+        for load in loads:
+            if 'fun' not in load and load.get('return', {}):
+                ret_ = load.get('return', {})
+                if 'fun' in ret_:
+                    load.update({'fun': ret_['fun']})
+                if 'user' in ret_:
+                    load.update({'user': ret_['user']})
+            # Only look the load of a jid up once per batch
+            if 'jid' not in load or load['jid'] in saved:
+                continue
+            saved.add(load['jid'])
+            if 'get_load' in mminion.returners and not mminion.returners[getfstr](load.get('jid', '')):
+                mminion.returners[savefstr](load['jid'], load)
+        if len(loads) > 1 and batchfstr in mminion.returners:
+            mminion.returners[batchfstr](loads)
+        else:
+            for load in loads:
+                mminion.returners[fstr](load)
     except KeyError:
         emsg = "Returner '{0}' does not support function returner".format(job_cache)
         log.error(emsg)
         raise KeyError(emsg)
 
 
+class JobCacheWriter(multiprocessing.Process):
+    '''
+    A dedicated process which writes minion returns to the master job cache
+
+    The master workers put the returns on a bounded queue and go back to
+    serving requests, this process takes everything that is waiting on the
+    queue, up to ``job_cache_writer_batch`` returns, and commits it to the
+    job cache in one go.
+    '''
+    def __init__(self, opts, job_queue):
+        '''
+        Create a job cache writer
+
+        :param dict opts: The salt options
+        :param job_queue: The ``multiprocessing.Queue`` the master workers
+                          put the returns on
+        '''
+        multiprocessing.Process.__init__(self)
+        self.opts = opts
+        self.job_queue = job_queue
+        self.batch_size = max(int(self.opts.get('job_cache_writer_batch', 500)), 1)
+        self.stop = False
+
+    def sig_stop(self, signum, frame):
+        self.stop = True  # tell it to stop
+
+    def _get(self, timeout=None):
+        '''
+        Take a return off the queue, return None if there is nothing to take
+        '''
+        try:
+            if timeout is None:
+                return self.job_queue.get_nowait()
+            return self.job_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        except (IOError, OSError) as exc:
+            # Interrupted by SIGTERM
+            if exc.errno != errno.EINTR:
+                raise
+            return None
+
+    def flush(self, batch):
+        '''
+        Commit a batch of returns to the job cache
+        '''
+        try:
+            prepped = set()
+            for load, prep in batch:
+                if prep and load['jid'] not in prepped:
+                    prepped.add(load['jid'])
+                    _prep_jid(self.opts, load['jid'], self.mminion)
+            _write_returns(self.opts, [load for load, _ in batch], self.mminion)
+        except Exception as exc:
+            log.error(
+                'Could not store {0} return(s) in the job cache: {1}'.format(
+                    len(batch), exc),
+                exc_info_on_loglevel=logging.DEBUG
+            )
+        del batch[:]
+
+    def run(self):
+        '''
+        Drain the queue until the master shuts down
+        '''
+        # Properly exit if a SIGTERM is signalled
+        signal.signal(signal.SIGTERM, self.sig_stop)
+
+        salt.utils.appendproctitle(self.__class__.__name__)
+        self.mminion = salt.minion.MasterMinion(
+            self.opts,
+            states=False,
+            rend=False)
+        batch = []
+        while not self.stop:
+            item = self._get(timeout=1)
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                item = self._get()
+            if batch:
+                self.flush(batch)
+        # Write out whatever the workers queued up before going away
+        item = self._get(timeout=1)
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+            item = self._get(timeout=1)
+        if batch:
+            self.flush(batch)
+
+
 def get_retcode(ret):
     '''
     Determine a retcode for a given return
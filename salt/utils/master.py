@@ -23,6 +23,7 @@ import salt.pillar
 import salt.utils
 import salt.utils.atomicfile
 import salt.utils.minions
+import salt.utils.minion_index
 import salt.payload
 from salt.exceptions import SaltException
 import salt.config
@@ -362,6 +363,7 @@ class MasterPillarUtil(object):
             # to read in the pillar/grains data since they are both stored
             # in the same file, 'data.p'
             grains, pillars = self._get_cached_minion_data(*minion_ids)
+        index = salt.utils.minion_index.MinionIndex(self.opts)
         try:
             for minion_id in minion_ids:
                 if not salt.utils.verify.valid_id(self.opts, minion_id):
@@ -379,18 +381,21 @@ class MasterPillarUtil(object):
                     (clear_grains and not minion_pillar)):
                     # Not saving pillar or grains, so just delete the cache file
                     os.remove(os.path.join(data_file))
+                    index.forget(minion_id)
                 elif clear_pillar and minion_grains:
                     tmpfh, tmpfname = tempfile.mkstemp(dir=cdir)
                     os.close(tmpfh)
                     with salt.utils.fopen(tmpfname, 'w+b') as fp_:
                         fp_.write(self.serial.dumps({'grains': minion_grains}))
                     salt.utils.atomicfile.atomic_rename(tmpfname, data_file)
+                    index.update(minion_id, {'grains': minion_grains})
                 elif clear_grains and minion_pillar:
                     tmpfh, tmpfname = tempfile.mkstemp(dir=cdir)
                     os.close(tmpfh)
                     with salt.utils.fopen(tmpfname, 'w+b') as fp_:
                         fp_.write(self.serial.dumps({'pillar': minion_pillar}))
                     salt.utils.atomicfile.atomic_rename(tmpfname, data_file)
+                    index.update(minion_id, {'pillar': minion_pillar})
                 if clear_mine:
                     # Delete the whole mine file
                     os.remove(os.path.join(mine_file))
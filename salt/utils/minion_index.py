@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+'''
+An inverted index over the master's minion data cache.
+
+Grain and pillar targeting used to unpickle the ``data.p`` file of every
+minion for every publish. This index maps a key path in the grains or pillar
+of a minion to the values found there, and each value to the set of minion
+ids carrying it, so that ``G@``, ``P@``, ``I@`` and ``J@`` matches resolve
+with dictionary lookups and set algebra.
+
+The index lives in ``<cachedir>/minion_index`` and is made up of two files:
+
+``snapshot.p``
+    The complete index at a given generation, written by the Maintenance
+    process when it compacts the journal.
+
+``journal.p``
+    An append-only log of per-minion updates, starting with a header that
+    names the generation of the snapshot it applies to. The MWorkers append
+    a record every time they write a minion's ``data.p``.
+
+Readers load the snapshot once and then only replay the journal records
+they have not seen yet.
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import re
+import struct
+import fnmatch
+import logging
+import contextlib
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.atomicfile
+
+# Import 3rd-party libs
+import salt.ext.six as six
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    # fcntl is not available on windows
+    HAS_FCNTL = False
+
+log = logging.getLogger(__name__)
+
+SEARCH_TYPES = ('grains', 'pillar')
+
+# Entry kinds stored for a key path
+# 'v': a scalar (or a scalar list member) found at the path
+# 't': a token found beneath a dict found at the path (key, list item or
+#      value), used to narrow down which minions need to be verified
+# 'x': the data at or above the path cannot be resolved by the index
+#      (a list holding dicts), the minions need to be verified
+VALUE = 'v'
+TOKEN = 't'
+COMPLEX = 'x'
+
+_LEN = struct.Struct('>I')
+
+
+def _to_str(obj):
+    '''
+    Mirror the ``str(target).lower()`` done by ``salt.utils.subdict_match``
+    '''
+    try:
+        return str(obj).lower()
+    except UnicodeError:
+        return six.text_type(obj).lower()
+
+
+def _list_entries(data, path, entries):
+    '''
+    Add the entries for a list found at ``path``
+    '''
+    for idx, member in enumerate(data):
+        if isinstance(member, dict):
+            entries.add((COMPLEX, path, ''))
+            continue
+        entries.add((VALUE, path, _to_str(member)))
+        if isinstance(member, list):
+            _list_entries(member, path + (str(idx),), entries)
+        else:
+            entries.add((VALUE, path + (str(idx),), _to_str(member)))
+
+
+def _tokens(data, tokens):
+    '''
+    Collect every key, list item and value beneath a dict or list
+    '''
+    if isinstance(data, dict):
+        for key, value in six.iteritems(data):
+            tokens.add(_to_str(key))
+            _tokens(value, tokens)
+    elif isinstance(data, list):
+        for item in data:
+            if not isinstance(item, dict):
+                tokens.add(_to_str(item))
+            _tokens(item, tokens)
+    else:
+        tokens.add(_to_str(data))
+    return tokens
+
+
+def _dict_entries(data, path, entries):
+    '''
+    Add the entries for a dict found at ``path``
+    '''
+    for key, value in six.iteritems(data):
+        if not isinstance(key, six.string_types):
+            # Not reachable when traversing a target expression
+            continue
+        sub = path + (key,)
+        if isinstance(value, dict):
+            if value:
+                for token in _tokens(value, set()):
+                    entries.add((TOKEN, sub, token))
+                _dict_entries(value, sub, entries)
+        elif isinstance(value, list):
+            _list_entries(value, sub, entries)
+        else:
+            entries.add((VALUE, sub, _to_str(value)))
+
+
+def flatten(data):
+    '''
+    Return the index entries for a grains or pillar dict as a list of
+    ``[kind, path, value]`` lists
+    '''
+    entries = set()
+    if isinstance(data, dict):
+        _dict_entries(data, (), entries)
+    return [[kind, list(path), value] for kind, path, value in entries]
+
+
+def _match(token, pattern, regex_match=False, exact_match=False):
+    '''
+    Match a lowercased token the way ``salt.utils.subdict_match`` does
+    '''
+    if regex_match:
+        try:
+            return re.match(pattern.lower(), token)
+        except Exception:
+            log.error('Invalid regex {0!r} in match'.format(pattern))
+            return False
+    elif exact_match:
+        return token == pattern.lower()
+    return fnmatch.fnmatch(token, pattern.lower())
+
+
+@contextlib.contextmanager
+def _locked(path, exclusive=False):
+    '''
+    Hold a shared or exclusive lock on the index lock file
+    '''
+    if not salt.utils.is_fcntl_available(check_sunos=True):
+        yield
+        return
+    with salt.utils.fopen(path, 'a') as fh_:
+        fcntl.flock(fh_.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh_.fileno(), fcntl.LOCK_UN)
+
+
+class MinionIndex(object):
+    '''
+    Inverted index of the grains and pillar stored in the minion data cache
+    '''
+    def __init__(self, opts):
+        self.opts = opts
+        self.serial = salt.payload.Serial(opts)
+        self.cdir = os.path.join(opts['cachedir'], 'minions')
+        self.idir = os.path.join(opts['cachedir'], 'minion_index')
+        self.snapshot_path = os.path.join(self.idir, 'snapshot.p')
+        self.journal_path = os.path.join(self.idir, 'journal.p')
+        self.lock_path = os.path.join(self.idir, '.lock')
+        self.generation = None
+        self.offset = 0
+        self._clear()
+
+    def _clear(self):
+        # {search_type: {path: {kind: {value: set(ids)}}}}
+        self.index = dict((stype, {}) for stype in SEARCH_TYPES)
+        # {id: {search_type: entries}}, used to drop stale entries
+        self.minions = {}
+
+    # Writer side
+
+    def _ensure_dir(self):
+        if not os.path.isdir(self.idir):
+            try:
+                os.makedirs(self.idir)
+            except OSError:
+                pass
+
+    def _pack(self, record):
+        data = self.serial.dumps(record)
+        return _LEN.pack(len(data)) + data
+
+    def _append(self, record):
+        self._ensure_dir()
+        with _locked(self.lock_path, exclusive=True):
+            if not os.path.isfile(self.journal_path):
+                # The index has not been built yet, the first reader will
+                # build it from the data.p files
+                return
+            with salt.utils.fopen(self.journal_path, 'ab') as fp_:
+                fp_.write(self._pack(record))
+
+    def _write_journal_header(self, generation):
+        tmpfname = '{0}.tmp'.format(self.journal_path)
+        with salt.utils.fopen(tmpfname, 'w+b') as fp_:
+            fp_.write(self._pack({'generation': generation}))
+        salt.utils.atomicfile.atomic_rename(tmpfname, self.journal_path)
+
+    def update(self, minion_id, data):
+        '''
+        Record the grains and pillar written to a minion's ``data.p``
+        '''
+        record = {'id': minion_id}
+        for stype in SEARCH_TYPES:
+            record[stype] = flatten(data.get(stype))
+        try:
+            self._append(record)
+        except (IOError, OSError) as exc:
+            log.error(
+                'Unable to update the minion data index for {0}: {1}'.format(
+                    minion_id, exc
+                )
+            )
+
+    def forget(self, minion_id):
+        '''
+        Drop a minion from the index, used when its cached data is removed
+        '''
+        try:
+            self._append({'id': minion_id, 'forget': True})
+        except (IOError, OSError) as exc:
+            log.error(
+                'Unable to remove {0} from the minion data index: {1}'.format(
+                    minion_id, exc
+                )
+            )
+
+    def compact(self, max_size=0):
+        '''
+        Fold the journal into a new snapshot if it grew past ``max_size``
+        bytes
+        '''
+        try:
+            if os.path.getsize(self.journal_path) <= max_size:
+                return False
+        except OSError:
+            return False
+        with _locked(self.lock_path, exclusive=True):
+            if not self._read():
+                return False
+            generation = self.generation + 1
+            tmpfname = '{0}.tmp'.format(self.snapshot_path)
+            with salt.utils.fopen(tmpfname, 'w+b') as fp_:
+                fp_.write(
+                    self.serial.dumps(
+                        {'generation': generation, 'minions': self.minions}
+                    )
+                )
+            salt.utils.atomicfile.atomic_rename(tmpfname, self.snapshot_path)
+            self._write_journal_header(generation)
+            self.generation = generation
+            self.offset = len(self._pack({'generation': generation}))
+        log.debug('Compacted the minion data index to generation {0}'.format(
+            generation))
+        return True
+
+    def _build(self):
+        '''
+        Build the index from the data.p files of the minion data cache, this
+        is only needed once when the index does not exist yet
+        '''
+        minions = {}
+        if os.path.isdir(self.cdir):
+            for id_ in os.listdir(self.cdir):
+                datap = os.path.join(self.cdir, id_, 'data.p')
+                try:
+                    with salt.utils.fopen(datap, 'rb') as fp_:
+                        data = self.serial.load(fp_)
+                except (IOError, OSError):
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                minions[id_] = dict(
+                    (stype, flatten(data.get(stype)))
+                    for stype in SEARCH_TYPES
+                )
+        tmpfname = '{0}.tmp'.format(self.snapshot_path)
+        with salt.utils.fopen(tmpfname, 'w+b') as fp_:
+            fp_.write(self.serial.dumps({'generation': 0, 'minions': minions}))
+        salt.utils.atomicfile.atomic_rename(tmpfname, self.snapshot_path)
+        self._write_journal_header(0)
+        log.info('Built the minion data index for {0} minions'.format(
+            len(minions)))
+
+    # Reader side
+
+    def _add(self, minion_id, stype, entries):
+        index = self.index[stype]
+        for kind, path, value in entries:
+            index.setdefault(tuple(path), {}).setdefault(
+                kind, {}).setdefault(value, set()).add(minion_id)
+
+    def _remove(self, minion_id):
+        old = self.minions.pop(minion_id, None)
+        if not old:
+            return
+        for stype, entries in six.iteritems(old):
+            index = self.index[stype]
+            for kind, path, value in entries:
+                path = tuple(path)
+                try:
+                    ids = index[path][kind][value]
+                except KeyError:
+                    continue
+                ids.discard(minion_id)
+                if not ids:
+                    del index[path][kind][value]
+                    if not index[path][kind]:
+                        del index[path][kind]
+                        if not index[path]:
+                            del index[path]
+
+    def _apply(self, record):
+        minion_id = record.get('id')
+        if minion_id is None:
+            return
+        self._remove(minion_id)
+        if record.get('forget'):
+            return
+        entries = dict((stype, record.get(stype) or []) for stype in SEARCH_TYPES)
+        self.minions[minion_id] = entries
+        for stype in SEARCH_TYPES:
+            self._add(minion_id, stype, entries[stype])
+
+    def _records(self, fp_):
+        '''
+        Yield the complete records from the current position of the journal
+        along with the offset at which they end
+        '''
+        while True:
+            pos = fp_.tell()
+            head = fp_.read(_LEN.size)
+            if len(head) < _LEN.size:
+                break
+            length = _LEN.unpack(head)[0]
+            data = fp_.read(length)
+            if len(data) < length:
+                # Partially written record, pick it up on the next read
+                break
+            yield self.serial.loads(data), pos + _LEN.size + length
+
+    def _read(self):
+        '''
+        Bring the in-memory index up to date with the files on disk, the
+        caller must hold the index lock
+        '''
+        try:
+            fp_ = salt.utils.fopen(self.journal_path, 'rb')
+        except (IOError, OSError):
+            return False
+        with fp_:
+            header = next(self._records(fp_), None)
+            if header is None:
+                return False
+            generation, offset = header[0].get('generation'), header[1]
+            if generation != self.generation:
+                self._clear()
+                try:
+                    with salt.utils.fopen(self.snapshot_path, 'rb') as sfp_:
+                        snapshot = self.serial.load(sfp_) or {}
+                except (IOError, OSError):
+                    snapshot = {}
+                for minion_id, entries in six.iteritems(
+                        snapshot.get('minions', {})):
+                    entries['id'] = minion_id
+                    self._apply(entries)
+                self.generation = generation
+                self.offset = offset
+            fp_.seek(self.offset)
+            for record, end in self._records(fp_):
+                self._apply(record)
+                self.offset = end
+        return True
+
+    def refresh(self):
+        '''
+        Load the index, or the journal records appended since the last
+        refresh. Returns False if the index could not be loaded.
+        '''
+        self._ensure_dir()
+        try:
+            with _locked(self.lock_path):
+                if self._read():
+                    return True
+            with _locked(self.lock_path, exclusive=True):
+                if not os.path.isfile(self.journal_path):
+                    self._build()
+                return self._read()
+        except (IOError, OSError) as exc:
+            log.error('Unable to load the minion data index: {0}'.format(exc))
+        return False
+
+    def ids(self):
+        '''
+        Return the set of minions present in the index
+        '''
+        return set(self.minions)
+
+    def _lookup(self, stype, path, kind, pattern, regex_match, exact_match):
+        try:
+            values = self.index[stype][path][kind]
+        except KeyError:
+            return set()
+        # An exact hit always counts, a dict matches on its keys verbatim
+        ret = set(values.get(pattern.lower(), ()))
+        if exact_match or (not regex_match and
+                           not any(char in pattern for char in '*?[')):
+            return ret
+        for value, ids in six.iteritems(values):
+            if _match(value, pattern, regex_match, exact_match):
+                ret.update(ids)
+        return ret
+
+    def match(self,
+              stype,
+              expr,
+              delimiter,
+              regex_match=False,
+              exact_match=False):
+        '''
+        Resolve a grain or pillar expression against the index.
+
+        Returns a tuple of the set of minions known to match and the set of
+        minions which hold data the index cannot resolve on its own (dicts
+        or lists of dicts at the target path). The latter need to be
+        checked against their cached data with ``salt.utils.subdict_match``.
+        '''
+        matched = set()
+        verify = set()
+        index = self.index[stype]
+        splits = expr.split(delimiter)
+        for idx in range(1, len(splits)):
+            path = tuple(splits[:idx])
+            matchstr = delimiter.join(splits[idx:])
+            matched.update(self._lookup(
+                stype, path, VALUE, matchstr, regex_match, exact_match))
+            # Dicts found at the path: any match has to end up comparing
+            # one of the tokens beneath it to a ':' separated suffix of the
+            # match string
+            if path in index and TOKEN in index[path]:
+                suffixes = matchstr.split(':')
+                if '*' in suffixes:
+                    for ids in six.itervalues(index[path][TOKEN]):
+                        verify.update(ids)
+                else:
+                    for num in range(len(suffixes)):
+                        verify.update(self._lookup(
+                            stype,
+                            path,
+                            TOKEN,
+                            ':'.join(suffixes[num:]),
+                            regex_match,
+                            exact_match))
+            # Lists holding dicts at or above the path
+            for num in range(1, idx + 1):
+                sub = path[:num]
+                if sub in index and COMPLEX in index[sub]:
+                    for ids in six.itervalues(index[sub][COMPLEX]):
+                        verify.update(ids)
+        return matched, verify - matched
@@ -14,6 +14,7 @@ import logging
 # Import salt libs
 import salt.payload
 import salt.utils
+import salt.utils.minion_index
 from salt.defaults import DEFAULT_TARGET_DELIM
 from salt.exceptions import CommandExecutionError
 
@@ -165,6 +166,20 @@ class CkMinions(object):
             self.acc = 'minions'
         else:
             self.acc = 'accepted'
+        self._index = None
+
+    def _get_index(self):
+        '''
+        Return the minion data index brought up to date, or None if the index
+        is disabled or cannot be loaded
+        '''
+        if not self.opts.get('minion_data_index', True):
+            return None
+        if self._index is None:
+            self._index = salt.utils.minion_index.MinionIndex(self.opts)
+        if not self._index.refresh():
+            return None
+        return self._index
 
     def _check_glob_minions(self, expr, greedy):  # pylint: disable=unused-argument
         '''
@@ -225,6 +240,16 @@ class CkMinions(object):
             cdir = os.path.join(self.opts['cachedir'], 'minions')
             if not os.path.isdir(cdir):
                 return list(minions)
+            index = self._get_index()
+            if index is not None:
+                return self._check_index_minions(index,
+                                                 minions,
+                                                 expr,
+                                                 delimiter,
+                                                 greedy,
+                                                 search_type,
+                                                 regex_match=regex_match,
+                                                 exact_match=exact_match)
             for id_ in os.listdir(cdir):
                 if not greedy and id_ not in minions:
                     continue
@@ -244,6 +269,44 @@ class CkMinions(object):
                     minions.remove(id_)
         return list(minions)
 
+    def _check_index_minions(self,
+                             index,
+                             minions,
+                             expr,
+                             delimiter,
+                             greedy,
+                             search_type,
+                             regex_match=False,
+                             exact_match=False):
+        '''
+        Resolve a grain or pillar match with the minion data index, only the
+        minions holding data the index cannot resolve are read from the cache
+        '''
+        matched, verify = index.match(search_type,
+                                      expr,
+                                      delimiter,
+                                      regex_match=regex_match,
+                                      exact_match=exact_match)
+        cdir = os.path.join(self.opts['cachedir'], 'minions')
+        for id_ in verify:
+            datap = os.path.join(cdir, id_, 'data.p')
+            try:
+                with salt.utils.fopen(datap, 'rb') as fp_:
+                    search_results = (self.serial.load(fp_) or {}).get(search_type)
+            except (IOError, OSError):
+                continue
+            if salt.utils.subdict_match(search_results,
+                                        expr,
+                                        delimiter=delimiter,
+                                        regex_match=regex_match,
+                                        exact_match=exact_match):
+                matched.add(id_)
+        minions = set(minions)
+        if greedy:
+            # Minions without cached data are kept, as in the cache walk
+            return list(minions.difference(index.ids().difference(matched)))
+        return list(minions.intersection(matched))
+
     def _check_grain_minions(self, expr, delimiter, greedy):
         '''
         Return the minions found by looking via grains
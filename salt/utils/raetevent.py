@@ -108,13 +108,19 @@ class RAETEvent(object):
                                    dirpath=self.sock_dir))
         return stack
 
-    def subscribe(self, tag=None):
+    def subscribe(self, tag=None, match_type=None):
         '''
         Included for compat with zeromq events, not required
         '''
         return
 
-    def unsubscribe(self, tag=None):
+    def unsubscribe(self, tag=None, match_type=None):
+        '''
+        Included for compat with zeromq events, not required
+        '''
+        return
+
+    def set_tag_filters(self, prefixes=None):
         '''
         Included for compat with zeromq events, not required
         '''
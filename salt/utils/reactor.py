@@ -2,6 +2,7 @@
 from __future__ import absolute_import
 
 # Import python libs
+import re
 import fnmatch
 import glob
 import logging
@@ -102,6 +103,21 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
                     reactors.extend(val)
         return reactors
 
+    def tag_filters(self):
+        '''
+        Return the tag prefixes of the events the reactor map can react to,
+        or None when the map is read from a file which may change
+        '''
+        if isinstance(self.opts['reactor'], string_types):
+            return None
+        prefixes = set()
+        for ropt in self.opts['reactor']:
+            if not isinstance(ropt, dict) or len(ropt) != 1:
+                continue
+            # The glob matches nothing but tags starting with its literal part
+            prefixes.add(re.split(r'[*?[]', str(next(iterkeys(ropt))), 1)[0])
+        return sorted(prefixes)
+
     def reactions(self, tag, data, reactors):
         '''
         Render a list of reactor files and returns a reaction struct
@@ -144,6 +160,10 @@ class Reactor(multiprocessing.Process, salt.state.Compiler):
                 self.opts['transport'],
                 opts=self.opts,
                 listen=True)
+        # Have the event publisher leave out the events nothing reacts to
+        filters = self.tag_filters()
+        if filters:
+            self.event.set_tag_filters(filters)
         self.wrap = ReactWrap(self.opts)
 
         for data in self.event.iter_events(full=True):
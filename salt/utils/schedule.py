@@ -259,6 +259,7 @@ dictionary, othewise it will be ignored.
 from __future__ import absolute_import
 import os
 import time
+import heapq
 import datetime
 import itertools
 import multiprocessing
@@ -308,6 +309,14 @@ class Schedule(object):
     '''
     def __init__(self, opts, functions, returners=None, intervals=None):
         self.opts = opts
+        # The jobs to evaluate on the next eval, and a heap of (time, job) with
+        # the time each of the other jobs needs to be evaluated again at.
+        # _eval_at holds the current time of every job in the heap.
+        self._due = set()
+        self._eval_heap = []
+        self._eval_at = {}
+        # The (id, len) of the schedule dict last evaluated
+        self._schedule_key = None
         self.functions = functions
         if isinstance(intervals, dict):
             self.intervals = intervals
@@ -321,8 +330,155 @@ class Schedule(object):
         self.schedule_returner = self.option('schedule_returner')
         # Keep track of the lowest loop interval needed in this variable
         self.loop_interval = six.MAXSIZE
+        # A salt.minion.MinionWorkerPool to run the jobs in, set by the minion
+        self.worker_pool = None
         clean_proc_dir(opts)
 
+    @property
+    def functions(self):
+        return self._functions
+
+    @functions.setter
+    def functions(self, functions):
+        # A job of the schedule may use a function which was not loaded before
+        self._functions = functions
+        self._reschedule()
+
+    def _reschedule(self, name=None):
+        '''
+        Evaluate the named job, or all of the jobs, on the next eval
+        '''
+        if name is None:
+            self._due = set()
+            self._eval_heap = []
+            self._eval_at = {}
+            self._schedule_key = None
+        else:
+            self._eval_at.pop(name, None)
+            self._due.add(name)
+
+    def _due_jobs(self, schedule, now):
+        '''
+        Return the names of the jobs of the schedule to evaluate at now. All
+        of the jobs are due when the schedule changed other than through the
+        methods of this class.
+        '''
+        key = (id(schedule), len(schedule))
+        if key != self._schedule_key:
+            self._schedule_key = key
+            self._due.update(schedule)
+        while self._eval_heap and self._eval_heap[0][0] <= now:
+            eval_at, job = heapq.heappop(self._eval_heap)
+            if self._eval_at.get(job) == eval_at:
+                del self._eval_at[job]
+                self._due.add(job)
+        self._due.intersection_update(schedule)
+        return sorted(self._due)
+
+    def _next_eval(self, job, data, now):
+        '''
+        Return the time the job, evaluated at now, needs to be evaluated
+        again at. Evaluating it any earlier would not run it. None means that
+        only a change to the job can make it run.
+        '''
+        if job == 'enabled' or not data or not isinstance(data, dict):
+            return None
+        if 'enabled' in data and not data['enabled']:
+            return None
+        if 'function' in data:
+            func = data['function']
+        elif 'func' in data:
+            func = data['func']
+        elif 'fun' in data:
+            func = data['fun']
+        else:
+            func = None
+        if func not in self.functions:
+            return None
+
+        def _timestamp(date_str):
+            return int(time.mktime(dateutil_parser.parse(date_str).timetuple()))
+
+        if _WHEN_SUPPORTED:
+            if 'until' in data and _timestamp(data['until']) <= now:
+                return None
+            if 'after' in data:
+                after = _timestamp(data['after'])
+                if after >= now:
+                    return after + 1
+
+        # The combinations of options eval refuses to run
+        scheduling = len([item for item in ('when', 'cron', 'once') if item in data])
+        if scheduling > 1:
+            return None
+        if any(item in data for item in ('seconds', 'minutes', 'hours', 'days')):
+            if job not in self.intervals:
+                return now + 1
+            seconds = int(data.get('seconds', 0))
+            seconds += int(data.get('minutes', 0)) * 60
+            seconds += int(data.get('hours', 0)) * 3600
+            seconds += int(data.get('days', 0)) * 86400
+            return max(self.intervals[job] + seconds, now + 1)
+        elif 'once' in data:
+            once_fmt = data.get('once_fmt', '%Y-%m-%dT%H:%M:%S')
+            try:
+                once = datetime.datetime.strptime(data['once'], once_fmt)
+            except (TypeError, ValueError):
+                return None
+            once = int(time.mktime(once.timetuple()))
+            return once if once > now else None
+        elif 'when' in data:
+            if not _WHEN_SUPPORTED:
+                return None
+            if isinstance(data['when'], list):
+                whens = data['when']
+            else:
+                whens = [data['when']]
+            upcoming = []
+            for when in whens:
+                for source in (self.opts['pillar'], self.opts['grains']):
+                    if 'whens' in source and when in source['whens']:
+                        if not isinstance(source['whens'], dict):
+                            when = None
+                        else:
+                            when = source['whens'][when]
+                        break
+                if when is None:
+                    continue
+                try:
+                    when = _timestamp(when)
+                except ValueError:
+                    continue
+                if when > now:
+                    upcoming.append(when)
+            return min(upcoming) if upcoming else None
+        elif 'cron' in data:
+            if not _CRON_SUPPORTED:
+                return None
+            try:
+                # A cron job runs the second before its cron time
+                return int(croniter.croniter(data['cron'], now + 1).get_next()) - 1
+            except (ValueError, KeyError):
+                return None
+        return None
+
+    def _schedule_jobs(self, schedule, jobs, now):
+        '''
+        Find the time each of the jobs evaluated at now needs to be evaluated
+        again at
+        '''
+        for job in jobs:
+            self._due.discard(job)
+            try:
+                eval_at = self._next_eval(job, schedule.get(job), now)
+            except Exception as exc:
+                log.debug('Unable to find when to evaluate scheduled job {0} '
+                          'again, evaluating it every time: {1}'.format(job, exc))
+                eval_at = now + 1
+            if eval_at is not None:
+                self._eval_at[job] = eval_at
+                heapq.heappush(self._eval_heap, (eval_at, job))
+
     def option(self, opt):
         '''
         Return the schedule data structure
@@ -370,6 +526,7 @@ class Schedule(object):
         # remove from self.intervals
         if name in self.intervals:
             del self.intervals[name]
+        self._reschedule(name)
 
         if persist:
             self.persist()
@@ -397,6 +554,7 @@ class Schedule(object):
             log.info('Added new job {0} to scheduler'.format(new_job))
 
         self.opts['schedule'].update(data)
+        self._reschedule(new_job)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts)
@@ -416,6 +574,7 @@ class Schedule(object):
         else:
             self.opts['schedule'][name]['enabled'] = True
             schedule = self.opts['schedule']
+        self._reschedule(name)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts)
@@ -437,6 +596,7 @@ class Schedule(object):
         else:
             self.opts['schedule'][name]['enabled'] = False
             schedule = self.opts['schedule']
+        self._reschedule(name)
 
         # Fire the complete event back along with updated list of schedule
         evt = salt.utils.event.get_event('minion', opts=self.opts)
@@ -460,6 +620,7 @@ class Schedule(object):
             if name in self.opts['schedule']:
                 self.delete_job(name, persist, where=where)
             self.opts['schedule'][name] = schedule
+        self._reschedule(name)
 
         if persist:
             self.persist()
@@ -493,6 +654,9 @@ class Schedule(object):
             log.info(
                 'Running Job: {0}.'.format(name)
             )
+            if self.worker_pool is not None and \
+                    self.worker_pool.dispatch('schedule', (func, data)):
+                return
             if self.opts.get('multiprocessing', True):
                 thread_cls = multiprocessing.Process
             else:
@@ -531,6 +695,7 @@ class Schedule(object):
 
         # Remove all jobs from self.intervals
         self.intervals = {}
+        self._reschedule()
 
         if 'schedule' in self.opts:
             if 'schedule' in schedule:
@@ -571,7 +736,7 @@ class Schedule(object):
         evt.fire_event({'complete': True},
                        tag='/salt/minion/minion_schedule_saved')
 
-    def handle_func(self, func, data):
+    def handle_func(self, func, data, daemonize=True):
         '''
         Execute this method in a multiprocess or thread
         '''
@@ -643,7 +808,8 @@ class Schedule(object):
                         except OSError:
                             log.info('Unable to remove file: {0}.'.format(fn_))
 
-        salt.utils.daemonize_if(self.opts)
+        if daemonize:
+            salt.utils.daemonize_if(self.opts)
 
         ret['pid'] = os.getpid()
 
@@ -734,7 +900,11 @@ class Schedule(object):
             raise ValueError('Schedule must be of type dict.')
         if 'enabled' in schedule and not schedule['enabled']:
             return
-        for job, data in six.iteritems(schedule):
+        # Only the jobs which may run now are evaluated
+        eval_now = int(time.time())
+        jobs = self._due_jobs(schedule, eval_now)
+        for job in jobs:
+            data = schedule[job]
             if job == 'enabled' or not data:
                 continue
             if not isinstance(data, dict):
@@ -1121,25 +1291,28 @@ class Schedule(object):
                 # Temporarily stash our function references.
                 # You can't pickle function references, and pickling is
                 # required when spawning new processes on Windows.
-                functions = self.functions
-                self.functions = {}
+                functions = self._functions
+                self._functions = {}
                 returners = self.returners
                 self.returners = {}
             try:
-                if self.opts.get('multiprocessing', True):
-                    thread_cls = multiprocessing.Process
-                else:
-                    thread_cls = threading.Thread
-                proc = thread_cls(target=self.handle_func, args=(func, data))
-                proc.start()
-                if self.opts.get('multiprocessing', True):
-                    proc.join()
+                if self.worker_pool is None or \
+                        not self.worker_pool.dispatch('schedule', (func, data)):
+                    if self.opts.get('multiprocessing', True):
+                        thread_cls = multiprocessing.Process
+                    else:
+                        thread_cls = threading.Thread
+                    proc = thread_cls(target=self.handle_func, args=(func, data))
+                    proc.start()
+                    if self.opts.get('multiprocessing', True):
+                        proc.join()
             finally:
                 self.intervals[job] = now
             if salt.utils.is_windows():
                 # Restore our function references.
-                self.functions = functions
+                self._functions = functions
                 self.returners = returners
+        self._schedule_jobs(schedule, jobs, eval_now)
 
 
 def clean_proc_dir(opts):
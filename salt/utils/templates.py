@@ -9,6 +9,7 @@ from __future__ import absolute_import
 import codecs
 import os
 import imp
+import hashlib
 import logging
 import tempfile
 import traceback
@@ -42,6 +43,14 @@ TEMPLATE_DIRNAME = os.path.join(saltpath[0], 'templates')
 SLS_ENCODING = 'utf-8'  # this one has no BOM.
 SLS_ENCODER = codecs.getencoder(SLS_ENCODING)
 
+# Idle Jinja environments shared between the renders of this process, see
+# _get_jinja_env, an environment is taken out of the pool while it renders
+_JINJA_ENVS = OrderedDict()
+JINJA_ENV_POOL_SIZE = 32
+
+# The number of compiled templates each pooled Jinja environment keeps
+JINJA_CODE_CACHE_SIZE = 256
+
 
 def wrap_tmpl_func(render_str):
 
@@ -232,32 +241,10 @@ def _get_jinja_error(trace, context=None):
     return line, out
 
 
-def render_jinja_tmpl(tmplstr, context, tmplpath=None):
-    opts = context['opts']
-    saltenv = context['saltenv']
-    loader = None
-    newline = False
-
-    if tmplstr and not isinstance(tmplstr, six.text_type):
-        # http://jinja.pocoo.org/docs/api/#unicode
-        tmplstr = tmplstr.decode(SLS_ENCODING)
-
-    if tmplstr.endswith('\n'):
-        newline = True
-
-    if not saltenv:
-        if tmplpath:
-            # i.e., the template is from a file outside the state tree
-            #
-            # XXX: FileSystemLoader is not being properly instantiated here is
-            # it? At least it ain't according to:
-            #
-            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
-            loader = jinja2.FileSystemLoader(
-                context, os.path.dirname(tmplpath))
-    else:
-        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
-
+def _new_jinja_env(opts, loader, bytecode_cache=None):
+    '''
+    Create a Jinja environment set up for salt templates
+    '''
     env_args = {'extensions': [], 'loader': loader}
 
     if hasattr(jinja2.ext, 'with_'):
@@ -279,6 +266,9 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         log.debug('Jinja2 lstrip_blocks is enabled')
         env_args['lstrip_blocks'] = True
 
+    if bytecode_cache is not None:
+        env_args['bytecode_cache'] = bytecode_cache
+
     if opts.get('allow_undefined', False):
         jinja_env = jinja2.Environment(**env_args)
     else:
@@ -293,6 +283,121 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
 
     jinja_env.globals['odict'] = OrderedDict
     jinja_env.globals['show_full_context'] = show_full_context
+    return jinja_env
+
+
+def _get_jinja_env(opts, saltenv, pillar_rend=False):
+    '''
+    Return a Jinja environment loading templates from a salt environment,
+    taken out of the pool of the environments of this process using the same
+    options. Hand it back with _put_jinja_env once the render is done.
+
+    Only the compiled code is shared between renders: the code of the
+    rendered strings, and the code of the templates they import and include
+    through a bytecode cache under the cachedir, which the other processes
+    use as well. The imported templates themselves and the globals are
+    reset for every render, they hold the data of the render they were made
+    in.
+    '''
+    key = (saltenv,
+           pillar_rend,
+           opts.get('file_client'),
+           opts.get('master'),
+           opts.get('cachedir'),
+           repr(opts.get('file_roots')),
+           repr(opts.get('pillar_roots')),
+           opts.get('jinja_trim_blocks', False),
+           opts.get('jinja_lstrip_blocks', False),
+           opts.get('allow_undefined', False))
+    jinja_env = _JINJA_ENVS.pop(key, None)
+    if jinja_env is None:
+        bytecode_cache = None
+        if opts.get('cachedir'):
+            bytecode_dir = os.path.join(opts['cachedir'], 'jinja')
+            try:
+                if not os.path.isdir(bytecode_dir):
+                    os.makedirs(bytecode_dir)
+                bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_dir)
+            except OSError as exc:
+                log.debug(
+                    'Unable to use the Jinja bytecode cache in {0}: {1}'.format(
+                        bytecode_dir, exc)
+                )
+        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=pillar_rend)
+        jinja_env = _new_jinja_env(opts, loader, bytecode_cache)
+        jinja_env.salt_code_cache = OrderedDict()
+        jinja_env.salt_globals = dict(jinja_env.globals)
+        jinja_env.salt_pool_key = key
+    # Fetch the templates from the master again on this render
+    jinja_env.loader.reset_cache()
+    jinja_env.cache.clear()
+    return jinja_env
+
+
+def _put_jinja_env(jinja_env):
+    '''
+    Return a Jinja environment taken with _get_jinja_env to the pool
+    '''
+    # Drop the data of the render, the globals are where the templates it
+    # imported looked the context up
+    jinja_env.cache.clear()
+    jinja_env.globals.clear()
+    jinja_env.globals.update(jinja_env.salt_globals)
+    _JINJA_ENVS.pop(jinja_env.salt_pool_key, None)
+    while len(_JINJA_ENVS) >= JINJA_ENV_POOL_SIZE:
+        _JINJA_ENVS.popitem(last=False)
+    _JINJA_ENVS[jinja_env.salt_pool_key] = jinja_env
+
+
+def _from_string(jinja_env, tmplstr):
+    '''
+    Return a template compiled from a string, reusing the code compiled for
+    the same string when the environment keeps compiled templates
+    '''
+    code_cache = getattr(jinja_env, 'salt_code_cache', None)
+    if code_cache is None:
+        return jinja_env.from_string(tmplstr)
+    key = hashlib.sha1(tmplstr.encode(SLS_ENCODING)).hexdigest()
+    code = code_cache.pop(key, None)
+    if code is None:
+        code = jinja_env.compile(tmplstr)
+        while len(code_cache) >= JINJA_CODE_CACHE_SIZE:
+            code_cache.popitem(last=False)
+    code_cache[key] = code
+    return jinja_env.template_class.from_code(
+        jinja_env, code, jinja_env.make_globals(None), None)
+
+
+def render_jinja_tmpl(tmplstr, context, tmplpath=None):
+    opts = context['opts']
+    saltenv = context['saltenv']
+    loader = None
+    newline = False
+
+    if tmplstr and not isinstance(tmplstr, six.text_type):
+        # http://jinja.pocoo.org/docs/api/#unicode
+        tmplstr = tmplstr.decode(SLS_ENCODING)
+
+    if tmplstr.endswith('\n'):
+        newline = True
+
+    if not saltenv:
+        if tmplpath:
+            # i.e., the template is from a file outside the state tree
+            #
+            # XXX: FileSystemLoader is not being properly instantiated here is
+            # it? At least it ain't according to:
+            #
+            #   http://jinja.pocoo.org/docs/api/#jinja2.FileSystemLoader
+            loader = jinja2.FileSystemLoader(
+                context, os.path.dirname(tmplpath))
+        jinja_env = _new_jinja_env(opts, loader)
+    elif opts.get('jinja_env_cache', False):
+        jinja_env = _get_jinja_env(
+            opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
+    else:
+        loader = JinjaSaltCacheLoader(opts, saltenv, pillar_rend=context.get('_pillar_rend', False))
+        jinja_env = _new_jinja_env(opts, loader)
 
     decoded_context = {}
     for key, value in six.iteritems(context):
@@ -303,7 +408,7 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
         decoded_context[key] = salt.utils.locales.sdecode(value)
 
     try:
-        template = jinja_env.from_string(tmplstr)
+        template = _from_string(jinja_env, tmplstr)
         template.globals.update(decoded_context)
         output = template.render(**decoded_context)
     except jinja2.exceptions.TemplateSyntaxError as exc:
@@ -353,6 +458,9 @@ def render_jinja_tmpl(tmplstr, context, tmplpath=None):
                               line,
                               tmplstr,
                               trace=tracestr)
+    finally:
+        if getattr(jinja_env, 'salt_pool_key', None) is not None:
+            _put_jinja_env(jinja_env)
 
     # Workaround a bug in Jinja that removes the final newline
     # (https://github.com/mitsuhiko/jinja2/issues/75)
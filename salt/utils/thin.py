@@ -7,7 +7,10 @@ Generate the salt thin tarball from the installed python files
 from __future__ import absolute_import
 
 import os
+import re
+import sys
 import shutil
+import hashlib
 import tarfile
 import zipfile
 import tempfile
@@ -61,12 +64,58 @@ if __name__ == '__main__':
     salt_call()
 '''
 
+# Lists the SHA1 and path of every other file in the thin, one per line
+THIN_MANIFEST = 'thin_manifest'
 
-def thin_path(cachedir):
+# Checksums of the thin tarballs, keyed by path, mtime and hash type
+_THIN_SUMS = {}
+
+
+def _thin_dir(cachedir, extra_mods='', so_mods=''):
+    '''
+    Return the directory the thin for the running python and the given extra
+    modules is built in
+    '''
+    key = '{0}.{1}'.format(*sys.version_info[:2])
+    if extra_mods or so_mods:
+        key += '-' + hashlib.sha1(
+            '{0}|{1}'.format(extra_mods, so_mods).encode('utf-8')
+        ).hexdigest()[:12]
+    return os.path.join(cachedir, 'thin', key)
+
+
+def thin_path(cachedir, extra_mods='', so_mods=''):
     '''
     Return the path to the thin tarball
     '''
-    return os.path.join(cachedir, 'thin', 'thin.tgz')
+    return os.path.join(_thin_dir(cachedir, extra_mods, so_mods), 'thin.tgz')
+
+
+def _read_manifest(path):
+    '''
+    Return a dict mapping the paths in a thin manifest to their SHA1
+    '''
+    ret = {}
+    with salt.utils.fopen(path, 'r') as fp_:
+        for line in fp_:
+            digest, _, name = line.rstrip('\n').partition(' ')
+            if name:
+                ret[name] = digest
+    return ret
+
+
+def thin_manifest_id(thintar):
+    '''
+    Return the SHA1 of the manifest of a thin tarball, which identifies its
+    contents, or an empty string if it was built without one
+    '''
+    try:
+        return salt.utils.get_hash(
+            os.path.join(os.path.dirname(thintar), THIN_MANIFEST),
+            'sha1'
+        )
+    except (IOError, OSError):
+        return ''
 
 
 def gen_thin(cachedir, extra_mods='', overwrite=False, so_mods=''):
@@ -84,14 +133,12 @@ def gen_thin(cachedir, extra_mods='', overwrite=False, so_mods=''):
         salt-run thin.generate mako,wempy 1
         salt-run thin.generate overwrite=1
     '''
-    thindir = os.path.join(cachedir, 'thin')
+    thindir = _thin_dir(cachedir, extra_mods, so_mods)
     if not os.path.isdir(thindir):
         os.makedirs(thindir)
     thintar = os.path.join(thindir, 'thin.tgz')
     thinver = os.path.join(thindir, 'version')
     salt_call = os.path.join(thindir, 'salt-call')
-    with salt.utils.fopen(salt_call, 'w+') as fp_:
-        fp_.write(SALTCALL)
     if os.path.isfile(thintar):
         if not overwrite:
             if os.path.isfile(thinver):
@@ -153,6 +200,12 @@ def gen_thin(cachedir, extra_mods='', overwrite=False, so_mods=''):
     if HAS_MARKUPSAFE:
         tops.append(os.path.dirname(markupsafe.__file__))
     tfp = tarfile.open(thintar, 'w:gz', dereference=True)
+    manifest = {}
+
+    def _add(name):
+        tfp.add(name)
+        manifest[name] = salt.utils.get_hash(name, 'sha1')
+
     start_dir = os.getcwd()
     tempdir = None
     for top in tops:
@@ -169,29 +222,84 @@ def gen_thin(cachedir, extra_mods='', overwrite=False, so_mods=''):
             os.chdir(tempdir)
         if not os.path.isdir(top):
             # top is a single file module
-            tfp.add(base)
+            _add(base)
             continue
         for root, dirs, files in os.walk(base, followlinks=True):
             for name in files:
                 if not name.endswith(('.pyc', '.pyo')):
-                    tfp.add(os.path.join(root, name))
+                    _add(os.path.join(root, name))
         if tempdir is not None:
             shutil.rmtree(tempdir)
             tempdir = None
     os.chdir(thindir)
-    tfp.add('salt-call')
+    with salt.utils.fopen(salt_call, 'w+') as fp_:
+        fp_.write(SALTCALL)
+    _add('salt-call')
     with salt.utils.fopen(thinver, 'w+') as fp_:
         fp_.write(salt.version.__version__)
-    os.chdir(os.path.dirname(thinver))
-    tfp.add('version')
+    _add('version')
+    # The manifest lets a target which has an older thin be sent only the
+    # files which changed since, see gen_thin_delta()
+    with salt.utils.fopen(THIN_MANIFEST, 'w+') as fp_:
+        for name in sorted(manifest):
+            fp_.write('{0} {1}\n'.format(manifest[name], name))
+    tfp.add(THIN_MANIFEST)
     os.chdir(start_dir)
     tfp.close()
+    manifests = os.path.join(cachedir, 'thin', 'manifests')
+    if not os.path.isdir(manifests):
+        os.makedirs(manifests)
+    manifest_id = thin_manifest_id(thintar)
+    shutil.copyfile(os.path.join(thindir, THIN_MANIFEST),
+                    os.path.join(manifests, manifest_id))
     return thintar
 
 
-def thin_sum(cachedir, form='sha1'):
+def gen_thin_delta(cachedir, thintar, manifest_id):
+    '''
+    Return the path to a tarball holding the files of the thin tarball which
+    differ from those of the thin with the given manifest id, along with the
+    new manifest. Return None if the manifest id is not one of a thin built
+    here, in which case the whole thin needs to be deployed.
+    '''
+    if not re.match(r'^[0-9a-f]{40}$', manifest_id or ''):
+        return None
+    old_manifest = os.path.join(cachedir, 'thin', 'manifests', manifest_id)
+    new_id = thin_manifest_id(thintar)
+    if not new_id or not os.path.isfile(old_manifest):
+        return None
+    deltadir = os.path.join(cachedir, 'thin', 'deltas')
+    delta = os.path.join(deltadir, '{0}-{1}.tgz'.format(manifest_id, new_id))
+    if os.path.isfile(delta):
+        return delta
+    if not os.path.isdir(deltadir):
+        os.makedirs(deltadir)
+    new_manifest = os.path.join(os.path.dirname(thintar), THIN_MANIFEST)
+    old = _read_manifest(old_manifest)
+    changed = set(
+        name for name, digest in six.iteritems(_read_manifest(new_manifest))
+        if old.get(name) != digest
+    )
+    fd_, tmp_delta = tempfile.mkstemp(dir=deltadir)
+    os.close(fd_)
+    src = tarfile.open(thintar, 'r:gz')
+    dst = tarfile.open(tmp_delta, 'w:gz')
+    for member in src:
+        if member.name in changed:
+            dst.addfile(member, src.extractfile(member))
+    dst.add(new_manifest, arcname=THIN_MANIFEST)
+    dst.close()
+    src.close()
+    os.rename(tmp_delta, delta)
+    return delta
+
+
+def thin_sum(cachedir, form='sha1', extra_mods='', so_mods=''):
     '''
     Return the checksum of the current thin tarball
     '''
-    thintar = gen_thin(cachedir)
-    return salt.utils.get_hash(thintar, form)
+    thintar = gen_thin(cachedir, extra_mods, so_mods=so_mods)
+    key = (thintar, os.path.getmtime(thintar), form)
+    if key not in _THIN_SUMS:
+        _THIN_SUMS[key] = salt.utils.get_hash(thintar, form)
+    return _THIN_SUMS[key]
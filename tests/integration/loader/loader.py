@@ -12,11 +12,13 @@ import inspect
 import tempfile
 import shutil
 import os
+import time
 import collections
 
 # Import Salt Testing libs
 from salttesting import TestCase
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch
 
 ensure_in_syspath('../../')
 
@@ -29,6 +31,7 @@ from salt.ext.six.moves import range
 from salt.config import minion_config
 # pylint: enable=no-name-in-module,redefined-builtin
 
+import salt.loader
 from salt.loader import LazyLoader, _module_dirs
 
 
@@ -153,6 +156,200 @@ class LazyLoaderWhitelistTest(TestCase):
         self.assertNotIn('grains.get', self.loader)
 
 
+manifest_template = '''
+__virtualname__ = {virtualname!r}
+
+def __virtual__():
+    return {virtual}
+
+def test():
+    return True
+'''
+
+
+class LazyLoaderManifestTest(TestCase):
+    '''
+    Test the loader reusing the manifest of an earlier loader
+    '''
+    def setUp(self):
+        self.opts = minion_config(None)
+        self.opts['cachedir'] = tempfile.mkdtemp(dir=tests.integration.TMP)
+        self.opts['loader_manifest_ttl'] = 3600
+        self.tmp_dir = tempfile.mkdtemp(dir=tests.integration.TMP)
+        self.write_module('declined', '(False, "not today")')
+        self.write_module('accepted', '__virtualname__', 'provided')
+
+    def tearDown(self):
+        shutil.rmtree(self.opts['cachedir'])
+        shutil.rmtree(self.tmp_dir)
+
+    def write_module(self, name, virtual, virtualname=None):
+        path = os.path.join(self.tmp_dir, '{0}.py'.format(name))
+        with open(path, 'wb') as fh:
+            fh.write(manifest_template.format(virtual=virtual,
+                                              virtualname=virtualname or name))
+        try:
+            os.unlink(path + 'c')
+        except OSError:
+            pass
+
+    def loader(self):
+        return LazyLoader([self.tmp_dir], self.opts, tag='module')
+
+    def test_manifest(self):
+        loader = self.loader()
+        self.assertNotIn('declined.test', loader)
+        self.assertIn('provided.test', loader)
+        self.assertTrue(os.listdir(os.path.join(self.opts['cachedir'], 'loader')))
+
+        # the module which declined is not imported again
+        checked = []
+        process_virtual = LazyLoader.process_virtual
+
+        def _process_virtual(loader, mod, module_name):
+            checked.append(module_name)
+            return process_virtual(loader, mod, module_name)
+
+        loader = self.loader()
+        with patch.object(LazyLoader, 'process_virtual', _process_virtual):
+            self.assertNotIn('declined.test', loader)
+        self.assertNotIn('declined', checked)
+        self.assertEqual(loader.missing_fun_string('declined.test'),
+                         '\'declined\' __virtual__ returned False: not today')
+        self.assertEqual(list(loader._iter_files('provided'))[0], 'accepted')
+        self.assertIn('provided.test', loader)
+
+        # until it changes
+        self.write_module('declined', 'True')
+        os.utime(os.path.join(self.tmp_dir, 'declined.py'), (1, 1))
+        self.assertIn('declined.test', self.loader())
+
+    def test_manifest_file_mapping(self):
+        self.loader()
+        loader = self.loader()
+        with patch('os.listdir') as listdir:
+            loader.clear()
+            self.assertFalse(listdir.called)
+        self.assertEqual(sorted(loader.file_mapping), ['accepted', 'declined'])
+
+        self.write_module('added', 'True')
+        self.assertIn('added.test', loader)
+
+    def test_manifest_opts_changed(self):
+        self.assertNotIn('declined.test', self.loader())
+        # Another salt-call command keeps the manifest
+        self.opts.update({'fun': 'test.ping', 'arg': ['foo']})
+        checked = []
+        process_virtual = LazyLoader.process_virtual
+
+        def _process_virtual(loader, mod, module_name):
+            checked.append(module_name)
+            return process_virtual(loader, mod, module_name)
+
+        loader = self.loader()
+        with patch.object(LazyLoader, 'process_virtual', _process_virtual):
+            self.assertNotIn('declined.test', loader)
+        self.assertNotIn('declined', checked)
+
+        self.opts['grains'] = {'os': 'Changed'}
+        loader = self.loader()
+        with patch.object(LazyLoader, 'process_virtual',
+                          return_value=(False, 'declined', None)) as process_virtual:
+            self.assertNotIn('declined.test', loader)
+            self.assertTrue(process_virtual.called)
+
+    def test_manifest_disabled(self):
+        self.opts['loader_manifest_ttl'] = 0
+        self.assertNotIn('declined.test', self.loader())
+        self.assertFalse(os.path.exists(os.path.join(self.opts['cachedir'], 'loader')))
+
+
+class FakeGrainFuncs(collections.OrderedDict):
+    '''
+    Stands in for the loader of the grain functions, clearing which reloads
+    the grain modules
+    '''
+    def clear(self):
+        pass
+
+
+class LoaderGrainsTest(TestCase):
+    '''
+    Test calling the grain functions
+    '''
+    def setUp(self):
+        self.opts = minion_config(None)
+        self.opts.pop('conf_file', None)
+        self.opts['cachedir'] = tempfile.mkdtemp(dir=tests.integration.TMP)
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.opts['cachedir'])
+
+    def grain_func(self, key, ret, seconds=0):
+        def func():
+            self.calls.append(key)
+            time.sleep(seconds)
+            if isinstance(ret, Exception):
+                raise ret
+            return ret
+        return func
+
+    def grains(self, funcs, force_refresh=False):
+        del self.calls[:]
+        funcs = [(key, self.grain_func(key, *args)) for key, args in funcs]
+        with patch('salt.loader.grain_funcs',
+                   side_effect=lambda opts: FakeGrainFuncs(funcs)):
+            return salt.loader.grains(self.opts, force_refresh=force_refresh)
+
+    def test_grains_workers(self):
+        funcs = [('core.slow', ({'slow': True, 'os': 'core'}, 0.5)),
+                 ('core.slower', ({'slower': True}, 0.5)),
+                 ('custom.os', ({'os': 'custom'},)),
+                 ('custom.broken', (ValueError('broken'),)),
+                 ('custom.none', (None,))]
+        expected = {'slow': True, 'slower': True, 'os': 'custom'}
+        start = time.time()
+        self.assertEqual(self.grains(funcs), expected)
+        self.assertGreaterEqual(time.time() - start, 1)
+
+        self.opts['grains_workers'] = 4
+        start = time.time()
+        self.assertEqual(self.grains(funcs), expected)
+        self.assertLess(time.time() - start, 0.9)
+        self.assertEqual(sorted(salt.loader.GRAINS_TIMINGS),
+                         sorted(key for key, args in funcs))
+        self.assertGreaterEqual(salt.loader.GRAINS_TIMINGS['core.slow'], 0.5)
+
+        # a core grain function failing fails loading the grains
+        funcs.append(('core.broken', (ValueError('broken'),)))
+        self.assertRaises(ValueError, self.grains, funcs)
+
+    def test_grains_cache_ttls(self):
+        self.opts['grains_cache_ttls'] = {'core.hw': 3600, 'core.unset': 3600}
+        funcs = [('core.hw', ({'hw': 1},)),
+                 ('core.net', ({'net': 1},)),
+                 ('core.unset', (None,))]
+        self.assertEqual(self.grains(funcs), {'hw': 1, 'net': 1})
+        self.assertEqual(sorted(self.calls), ['core.hw', 'core.net', 'core.unset'])
+
+        funcs[0] = ('core.hw', ({'hw': 2},))
+        funcs[1] = ('core.net', ({'net': 2},))
+        self.assertEqual(self.grains(funcs, force_refresh=True), {'hw': 1, 'net': 2})
+        self.assertEqual(sorted(self.calls), ['core.net', 'core.unset'])
+        self.assertNotIn('core.hw', salt.loader.GRAINS_TIMINGS)
+
+        self.opts['refresh_grains_cache'] = True
+        self.assertEqual(self.grains(funcs), {'hw': 2, 'net': 2})
+        self.opts['refresh_grains_cache'] = False
+        self.assertEqual(self.grains(funcs), {'hw': 2, 'net': 2})
+        self.assertEqual(sorted(self.calls), ['core.net', 'core.unset'])
+
+        self.opts['grains_cache_ttls'] = {}
+        funcs[0] = ('core.hw', ({'hw': 3},))
+        self.assertEqual(self.grains(funcs), {'hw': 3, 'net': 2})
+
+
 module_template = '''
 __load__ = ['test', 'test_alias']
 __func_alias__ = dict(test_alias='working_alias')
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark authenticating minions in a master worker
+
+Sets up the master side of the minion authentication on a scratch pki_dir
+with ``minions`` accepted minion keys, and times the sign ins of all of them,
+``rounds`` times over, the way the minions sign in again after the master
+restarts. With ``max_workers`` set, that many other auths are made to look in
+progress, so every sign in is turned away as busy. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/auth_bench.py [minions] [rounds] [max_workers]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Import salt libs
+import salt.config
+import salt.crypt
+import salt.utils
+import salt.utils.event
+import salt.transport.zeromq
+
+# Import third party libs
+from Crypto.Cipher import PKCS1_OAEP
+from Crypto.PublicKey import RSA
+
+
+def make_opts(root_dir, max_workers):
+    '''
+    Write a master config to the root_dir, return the opts
+    '''
+    conf = os.path.join(root_dir, 'master')
+    with salt.utils.fopen(conf, 'w') as fp_:
+        fp_.write('root_dir: {0}\n'
+                  'auth_max_workers: {1}\n'.format(root_dir, max_workers))
+    opts = salt.config.master_config(conf)
+    for name in ('sock_dir', 'cachedir'):
+        os.makedirs(opts[name])
+    for name in ('minions', 'minions_pre', 'minions_rejected', 'minions_denied'):
+        os.makedirs(os.path.join(opts['pki_dir'], name))
+    return opts
+
+
+def make_loads(opts, minions):
+    '''
+    Accept the keys of the minions, return their sign in loads
+    '''
+    master_pub = RSA.importKey(salt.crypt.MasterKeys(opts).get_pub_str())
+    key = RSA.generate(opts['keysize'])
+    pub = key.publickey().exportKey()
+    loads = []
+    for num in range(minions):
+        id_ = 'minion{0}'.format(num)
+        with salt.utils.fopen(os.path.join(opts['pki_dir'], 'minions', id_), 'w') as fp_:
+            fp_.write(pub)
+        loads.append({'cmd': '_auth',
+                      'id': id_,
+                      'pub': pub,
+                      'token': PKCS1_OAEP.new(master_pub).encrypt('salty bacon')})
+    return loads
+
+
+def run(minions=200, rounds=3, max_workers=0):
+    root_dir = tempfile.mkdtemp()
+    try:
+        opts = make_opts(root_dir, max_workers)
+        loads = make_loads(opts, minions)
+        publisher = salt.utils.event.EventPublisher(opts)
+        publisher.start()
+        time.sleep(1)
+        chan = salt.transport.zeromq.ZeroMQReqServerChannel(opts)
+        salt.transport.mixins.auth.AESReqServerMixin.pre_fork(chan, None)
+        salt.transport.mixins.auth.AESReqServerMixin.post_fork(chan, None, None)
+        if max_workers:
+            # every slot is taken by another running process
+            for index in range(len(chan.auth_workers)):
+                chan.auth_workers[index] = os.getppid()
+        for num in range(rounds):
+            start = time.time()
+            for load in loads:
+                chan._auth(load)
+            elapsed = time.time() - start
+            print('round {0}  {1:>6} auths in {2:>6.2f}s  {3:>8.1f} auths/s  '
+                  '{4:>7.3f}ms each'.format(num,
+                                             minions,
+                                             elapsed,
+                                             minions / elapsed,
+                                             1000 * elapsed / minions))
+        publisher.terminate()
+        publisher.join()
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark loading the grains of a minion
+
+Loads the grains of this machine ``rounds`` times over, the way a minion
+refreshing its grains does, with the grain functions called in ``workers``
+threads, and prints the time each load took and the slowest grain functions.
+With ``ttl`` set, every core grain function but the network ones is cached for
+that many seconds. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/grains_bench.py [workers] [rounds] [ttl]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import time
+import shutil
+import tempfile
+
+# Import salt libs
+import salt.config
+import salt.loader
+
+NETWORK_FUNCS = ('core.hostname', 'core.append_domain', 'core.fqdn_ip4',
+                 'core.fqdn_ip6', 'core.ip4', 'core.ip6', 'core.ip_interfaces',
+                 'core.ip4_interfaces', 'core.ip6_interfaces',
+                 'core.hwaddr_interfaces')
+
+
+def run(workers=1, rounds=3, ttl=0):
+    opts = salt.config.minion_config(None)
+    opts.pop('conf_file', None)
+    opts['cachedir'] = tempfile.mkdtemp()
+    opts['grains_workers'] = workers
+    if ttl:
+        opts['grains_cache_ttls'] = dict(
+            (key, ttl) for key in salt.loader.grain_funcs(opts)
+            if key.startswith('core.') and key not in NETWORK_FUNCS)
+    try:
+        for num in range(rounds):
+            start = time.time()
+            grains = salt.loader.grains(opts, force_refresh=True)
+            elapsed = time.time() - start
+            print('round {0}  {1:>4} grains  {2:>3} functions called  '
+                  '{3:>8.1f}ms'.format(num,
+                                       len(grains),
+                                       len(salt.loader.GRAINS_TIMINGS),
+                                       1000 * elapsed))
+        slowest = sorted(salt.loader.GRAINS_TIMINGS.items(),
+                         key=lambda item: -item[1])[:5]
+        for key, seconds in slowest:
+            print('    {0:<28} {1:>8.1f}ms'.format(key, 1000 * seconds))
+    finally:
+        shutil.rmtree(opts['cachedir'], ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
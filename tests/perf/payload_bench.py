@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+'''
+Micro benchmarks for salt.payload.Serial
+
+Times dumps and loads of message shapes salt moves around all the time:
+highstate returns, grains and file chunks. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/payload_bench.py [iterations]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import timeit
+import datetime
+
+# Import salt libs
+import salt.payload
+from salt.utils.odict import OrderedDict
+
+
+def highstate_return(states=500):
+    '''
+    A highstate return with ``states`` state results
+    '''
+    ret = OrderedDict()
+    for num in range(states):
+        tag = 'file_|-/etc/app/{0}.conf_|-/etc/app/{0}.conf_|-managed'.format(num)
+        ret[tag] = {'name': '/etc/app/{0}.conf'.format(num),
+                    'result': True,
+                    'comment': 'File /etc/app/{0}.conf is in the correct state'.format(num),
+                    'changes': {},
+                    'duration': 2.345,
+                    'start_time': '12:30:01.000042',
+                    '__run_num__': num}
+    return {'fun': 'state.highstate',
+            'jid': '20151017123001000042',
+            'id': 'minion',
+            'return': ret,
+            'stamp': datetime.datetime.utcnow()}
+
+
+def grains():
+    '''
+    A typical grains dictionary
+    '''
+    return {'id': 'minion',
+            'os': 'Ubuntu',
+            'os_family': 'Debian',
+            'osrelease': '14.04',
+            'kernelrelease': '3.13.0-65-generic',
+            'cpu_flags': ['fpu', 'vme', 'de', 'pse', 'tsc', 'msr', 'pae'] * 10,
+            'ipv4': ['127.0.0.1', '10.0.0.12'],
+            'ip_interfaces': dict(('eth{0}'.format(num), ['10.0.0.{0}'.format(num)])
+                                  for num in range(8)),
+            'mem_total': 16040,
+            'num_cpus': 8,
+            'pythonversion': [2, 7, 6, 'final', 0]}
+
+
+def file_chunk(size=65536):
+    '''
+    A chunk of a file served by the master
+    '''
+    return {'data': 'x' * size,
+            'dest': 'foo/files/large.txt',
+            'gzip': None,
+            'hsum': 'd41d8cd98f00b204e9800998ecf8427e',
+            'hash_type': 'md5'}
+
+
+def run(iterations=1000):
+    serial = salt.payload.Serial('msgpack')
+    for name, func in (('highstate return', highstate_return),
+                       ('grains', grains),
+                       ('file chunk', file_chunk)):
+        msg = func()
+        packed = serial.dumps(msg)
+        dumps = timeit.timeit(lambda: serial.dumps(msg), number=iterations)
+        loads = timeit.timeit(lambda: serial.loads(packed), number=iterations)
+        view = memoryview(packed)
+        loads_view = timeit.timeit(lambda: serial.loads(view),
+                                   number=iterations)
+        print('{0:<18} {1:>9} bytes  dumps {2:>10.1f}/s  loads {3:>10.1f}/s  '
+              'loads(memoryview) {4:>10.1f}/s'.format(
+                  name,
+                  len(packed),
+                  iterations / dumps,
+                  iterations / loads,
+                  iterations / loads_view))
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
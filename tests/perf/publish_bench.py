@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark publishing jobs from a master worker
+
+Starts the ZeroMQ publisher of a scratch master and times ``publishes`` calls
+of ``ZeroMQPubServerChannel.publish``, once with a new channel for every
+publish and once with a channel kept for all of them, the way the master
+workers publish now. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/publish_bench.py [publishes] [sign_pub_messages]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import os
+import sys
+import time
+import ctypes
+import shutil
+import socket
+import tempfile
+import multiprocessing
+
+# Import salt libs
+import salt.config
+import salt.crypt
+import salt.master
+import salt.utils.process
+import salt.transport.zeromq
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def make_opts(root_dir, sign):
+    '''
+    Write a master config and keys to the root_dir, return the opts
+    '''
+    conf = os.path.join(root_dir, 'master')
+    with open(conf, 'w') as fp_:
+        fp_.write('root_dir: {0}\n'
+                  'interface: 127.0.0.1\n'
+                  'publish_port: {1}\n'
+                  'sign_pub_messages: {2}\n'.format(root_dir, free_port(), sign))
+    opts = salt.config.master_config(conf)
+    for name in ('pki_dir', 'sock_dir'):
+        os.makedirs(opts[name])
+    salt.crypt.gen_keys(opts['pki_dir'], 'master', 2048)
+    return opts
+
+
+def time_publishes(opts, publishes, keep):
+    '''
+    Return the seconds each publish took, sorted
+    '''
+    load = {'fun': 'test.ping',
+            'arg': [],
+            'tgt': 'web*',
+            'tgt_type': 'glob',
+            'ret': '',
+            'user': 'root'}
+    chan = salt.transport.zeromq.ZeroMQPubServerChannel(opts)
+    times = []
+    for num in range(publishes):
+        load['jid'] = '201510171230010{0:05d}'.format(num)
+        start = time.time()
+        if not keep:
+            # a channel for each publish, the way the workers used to publish
+            chan = salt.transport.zeromq.ZeroMQPubServerChannel(opts)
+            salt.crypt.RSA_KEYS.clear()
+        chan.publish(load)
+        times.append(time.time() - start)
+    return sorted(times)
+
+
+def run(publishes=5000, sign=0):
+    root_dir = tempfile.mkdtemp()
+    process_manager = salt.utils.process.ProcessManager()
+    try:
+        opts = make_opts(root_dir, bool(sign))
+        salt.master.SMaster.secrets['aes'] = {
+            'secret': multiprocessing.Array(
+                ctypes.c_char, salt.crypt.Crypticle.generate_key_string()),
+            'reload': salt.crypt.Crypticle.generate_key_string}
+        salt.transport.zeromq.ZeroMQPubServerChannel(opts).pre_fork(process_manager)
+        time.sleep(1)
+        for name, keep in (('new', False), ('kept', True)):
+            times = time_publishes(opts, publishes, keep)
+            print('{0:<5} {1:>6} publishes  mean {2:>7.3f}ms  p99 {3:>7.3f}ms  '
+                  '{4:>8.1f} publishes/s'.format(
+                      name,
+                      publishes,
+                      1000 * sum(times) / len(times),
+                      1000 * times[int(len(times) * 0.99)],
+                      len(times) / sum(times)))
+    finally:
+        process_manager.kill_children()
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
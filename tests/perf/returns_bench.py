@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark collecting job returns in the LocalClient
+
+Starts a master event publisher on a scratch socket directory, fires the
+returns of ``minions`` fake minions for a job from another process and prints
+how many returns a second ``LocalClient.get_iter_returns`` consumes, together
+with the CPU time it used. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/returns_bench.py [minions] [noise] [rate]
+
+``noise`` is the number of events of other jobs fired for each return, the
+way a busy master's event bus carries them. ``rate`` limits the returns fired
+a second, minions returning over a while is where polling costs the most CPU.
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import time
+import shutil
+import tempfile
+import multiprocessing
+
+# Import salt libs
+import salt.client
+import salt.utils.event
+
+JID = '20151017123001000042'
+
+
+def fire_returns(opts, minions, noise, rate):
+    '''
+    Fire the return of every minion, and ``noise`` other events before each
+    '''
+    start = time.time()
+    event = salt.utils.event.get_event('master',
+                                       opts['sock_dir'],
+                                       opts['transport'],
+                                       opts=opts,
+                                       listen=False)
+    for num in range(minions):
+        if rate:
+            time.sleep(max(start + float(num) / rate - time.time(), 0))
+        for _ in range(noise):
+            event.fire_event({'id': 'other{0}'.format(num), 'return': True},
+                             'salt/job/20151017000000000000/ret/other')
+        id_ = 'minion{0}'.format(num)
+        event.fire_event({'id': id_, 'jid': JID, 'return': True, 'retcode': 0},
+                         salt.utils.event.tagify([JID, 'ret', id_], 'job'))
+    event.destroy()
+
+
+def run(minions=10000, noise=1, rate=0):
+    sock_dir = tempfile.mkdtemp()
+    opts = {'sock_dir': sock_dir,
+            'transport': 'zeromq',
+            'ipc_mode': 'ipc',
+            'timeout': 60,
+            'gather_job_timeout': 10,
+            'syndic_wait': 1,
+            'order_masters': False,
+            'master_job_cache': 'local_cache'}
+    publisher = salt.utils.event.EventPublisher(opts)
+    publisher.start()
+    try:
+        time.sleep(1)
+        local = salt.client.LocalClient.__new__(salt.client.LocalClient)
+        local.opts = opts
+        local.returners = {'local_cache.get_load': lambda jid: {'jid': jid}}
+        local._pub_jids = [JID]
+        local.event = salt.utils.event.get_event('master',
+                                                 sock_dir,
+                                                 'zeromq',
+                                                 opts=opts)
+        local.event.subscribe()
+        time.sleep(0.5)
+        expected = ['minion{0}'.format(num) for num in range(minions)]
+        firer = multiprocessing.Process(target=fire_returns,
+                                        args=(opts, minions, noise, rate))
+        start = time.time()
+        cpu_start = time.clock()
+        firer.start()
+        returned = 0
+        for ret in local.get_iter_returns(JID, expected):
+            if ret:
+                returned += 1
+        elapsed = time.time() - start
+        cpu = time.clock() - cpu_start
+        firer.join()
+        print('{0:>6} returns in {1:>6.2f}s  {2:>8.1f} returns/s  '
+              '{3:>6.2f}s cpu'.format(returned,
+                                      elapsed,
+                                      returned / elapsed,
+                                      cpu))
+    finally:
+        publisher.terminate()
+        publisher.join()
+        shutil.rmtree(sock_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark evaluating the schedule of a minion
+
+Builds a schedule of ``jobs`` interval and ``once`` jobs, none of them due
+yet, and times ``ticks`` calls of ``Schedule.eval``, the call the minion makes
+every second. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/schedule_bench.py [jobs] [ticks]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import sys
+import time
+
+# Import salt libs
+import salt.utils.schedule
+
+
+def run(jobs=500, ticks=1000):
+    once = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(time.time() + 86400))
+    schedule = {}
+    for num in range(jobs):
+        name = 'job{0}'.format(num)
+        if num % 2:
+            schedule[name] = {'function': 'test.ping',
+                              'minutes': 10 + num % 50,
+                              'run_on_start': False}
+        else:
+            schedule[name] = {'function': 'test.ping', 'once': once}
+    opts = {'schedule': schedule,
+            'pillar': {},
+            'grains': {},
+            'cachedir': '/nonexistent'}
+    sched = salt.utils.schedule.Schedule(opts,
+                                         {'test.ping': lambda: True},
+                                         returners={})
+    start = time.time()
+    for _ in range(ticks):
+        sched.eval()
+    elapsed = time.time() - start
+    print('{0:>6} jobs  {1:>6} ticks in {2:>6.2f}s  {3:>8.3f}ms each'.format(
+        jobs, ticks, elapsed, 1000 * elapsed / ticks))
+
+
+if __name__ == '__main__':
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+'''
+Benchmark the salt-ssh fan out
+
+Runs a raw shell command against a roster of fake hosts and prints how many
+hosts a second salt-ssh gets through, twice without sharing connections and
+twice with ``ssh_control_persist`` set. The ``ssh`` binary is replaced by a
+stand-in which takes ``connect`` seconds to open a connection and ``command``
+seconds to run a command, and which reuses a connection if its ControlPath
+socket is present, so runs are comparable without a real sshd. Run it with:
+
+.. code-block:: bash
+
+    python tests/perf/ssh_bench.py [hosts] [max_procs] [connect] [command]
+'''
+
+# Import python libs
+from __future__ import absolute_import, print_function
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# Import salt libs
+import salt.config
+import salt.client.ssh
+
+FAKE_SSH = '''#!/bin/sh
+if [ "$1" = "-V" ]; then
+    echo "OpenSSH_6.6.1p1, stand-in" >&2
+    exit 0
+fi
+sock=
+for arg in "$@"; do
+    case "$arg" in
+        ControlPath=*) sock="${{arg#ControlPath=}}" ;;
+    esac
+done
+if [ -z "$sock" ] || [ ! -e "$sock" ]; then
+    sleep {connect}
+    [ -n "$sock" ] && touch "$sock"
+fi
+sleep {command}
+echo '{{"local": {{"return": true, "retcode": 0}}}}'
+'''
+
+
+def make_env(root_dir, hosts, connect, command):
+    '''
+    Write the stand-in ssh, a roster and a master config, return the config
+    path
+    '''
+    bin_dir = os.path.join(root_dir, 'bin')
+    os.makedirs(bin_dir)
+    with open(os.path.join(bin_dir, 'ssh'), 'w') as fp_:
+        fp_.write(FAKE_SSH.format(connect=connect, command=command))
+    os.chmod(os.path.join(bin_dir, 'ssh'), 0o755)
+    os.environ['PATH'] = os.pathsep.join((bin_dir, os.environ['PATH']))
+    roster = os.path.join(root_dir, 'roster')
+    with open(roster, 'w') as fp_:
+        for num in range(hosts):
+            fp_.write('host{0}:\n  host: 10.0.{1}.{2}\n'.format(
+                num, num // 250, num % 250 + 1))
+    conf = os.path.join(root_dir, 'master')
+    with open(conf, 'w') as fp_:
+        fp_.write('root_dir: {0}\nroster_file: {1}\n'.format(root_dir, roster))
+    return conf
+
+
+def run(hosts=200, max_procs=25, connect=0.2, command=0.05):
+    root_dir = tempfile.mkdtemp()
+    try:
+        opts = salt.config.master_config(
+            make_env(root_dir, hosts, connect, command))
+        opts.update({'tgt': '*',
+                     'selected_target_option': 'glob',
+                     'argv': ['true'],
+                     'raw_shell': True,
+                     'ssh_priv': 'agent-forwarding',
+                     'ssh_max_procs': max_procs})
+        for persist in (0, 60):
+            ssh = salt.client.ssh.SSH(dict(opts, ssh_control_persist=persist))
+            for name in ('cold', 'warm'):
+                start = time.time()
+                returned = sum(1 for _ in ssh.handle_ssh())
+                elapsed = time.time() - start
+                print('ssh_control_persist={0:<3} {1:<5} {2:>6} hosts in '
+                      '{3:>7.2f}s  {4:>8.1f} hosts/s'.format(
+                          persist, name, returned, elapsed,
+                          returned / elapsed))
+    finally:
+        shutil.rmtree(root_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    run(*[float(arg) if '.' in arg else int(arg) for arg in sys.argv[1:]])
@@ -5,11 +5,13 @@
 
 # Import python libs
 from __future__ import absolute_import
+import errno
+import collections
 
 # Import Salt Testing libs
 from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
-from salttesting.mock import patch, NO_MOCK, NO_MOCK_REASON
+from salttesting.mock import patch, NO_MOCK, NO_MOCK_REASON, MagicMock
 ensure_in_syspath('../')
 
 # Import Salt libs
@@ -17,6 +19,9 @@ import integration
 from salt import client
 from salt.exceptions import EauthAuthenticationError, SaltInvocationError, SaltClientError
 
+# Import third party libs
+import zmq
+
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
 class LocalClientTestCase(TestCase,
@@ -76,6 +81,85 @@ class LocalClientTestCase(TestCase,
                                   'non_existent_group', 'test.ping', expr_form='nodegroup')
 
 
+class FakeEvent(object):
+    '''
+    Hand out the queued events the way SaltEvent.get_event_noblock does
+    '''
+    cpub = False
+
+    def __init__(self, events=()):
+        self.events = collections.deque(events)
+
+    def connect_pub(self):
+        pass
+
+    def set_tag_filters(self, prefixes=None):
+        pass
+
+    def get_event_noblock(self):
+        if not self.events:
+            raise zmq.ZMQError(errno.EAGAIN)
+        return self.events.popleft()
+
+
+def _ret(jid, id_):
+    return {'tag': 'salt/job/{0}/ret/{1}'.format(jid, id_),
+            'data': {'id': id_, 'jid': jid, 'return': True, 'retcode': 0}}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GetIterReturnsTestCase(TestCase):
+    '''
+    Test collecting the returns of a job from the event bus
+    '''
+    def setUp(self):
+        self.client = client.LocalClient.__new__(client.LocalClient)
+        self.client.opts = {'timeout': 5,
+                            'gather_job_timeout': 0.1,
+                            'syndic_wait': 1,
+                            'order_masters': False,
+                            'transport': 'zeromq',
+                            'master_job_cache': 'local_cache',
+                            'sock_dir': '/nonexistent'}
+        self.client._pub_jids = collections.deque(['1234'])
+        self.get_load = MagicMock(return_value={})
+        self.client.returners = {'local_cache.get_load': self.get_load}
+
+    def test_published_jid(self):
+        self.client.event = FakeEvent([
+            _ret('1234', 'm1'),
+            {'tag': 'salt/auth', 'data': {'id': 'm3'}},
+            _ret('5678', 'm2'),
+            _ret('1234', 'm1'),
+            _ret('1234', 'm2')])
+        rets = list(self.client.get_iter_returns('1234', ['m1', 'm2']))
+        self.assertEqual(rets, [{'m1': {'ret': True, 'retcode': 0}},
+                                {'m1': {'ret': True, 'retcode': 0}},
+                                {'m2': {'ret': True, 'retcode': 0}}])
+        # The job cache is not asked about the jids the client published
+        self.assertFalse(self.get_load.called)
+
+    def test_unknown_jid(self):
+        self.client.event = FakeEvent([_ret('5678', 'm1')])
+        self.assertEqual(next(self.client.get_iter_returns('5678', ['m1'])),
+                         {})
+        self.get_load.assert_called_once_with('5678')
+
+    def test_find_job_stragglers(self):
+        minions = ['m1', 'm2', 'm3', 'm4']
+        self.client.event = FakeEvent(_ret('1234', id_) for id_ in minions[:3])
+        gather_job_info = MagicMock(return_value={})
+        with patch.object(self.client, 'gather_job_info', gather_job_info), \
+                patch('salt.utils.event.get_event', MagicMock(return_value=FakeEvent())):
+            rets = list(self.client.get_iter_returns('1234',
+                                                     minions,
+                                                     timeout=0,
+                                                     expect_minions=True))
+        self.assertEqual(rets[-1], {'m4': {'failed': True}})
+        # Only the minion which did not return is asked about the job
+        gather_job_info.assert_called_once_with('1234', ['m4'], 'list')
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(LocalClientTestCase, needs_daemon=False)
+    run_tests(LocalClientTestCase, GetIterReturnsTestCase, needs_daemon=False)
@@ -99,14 +99,35 @@ class CryptTestCase(TestCase):
                     crypt.gen_keys('/keydir', 'keyname', 2048)
                     salt.utils.fopen.assert_has_calls([open_priv_wb, open_pub_wb], any_order=True)
 
+    @patch('os.path.getmtime', MagicMock(return_value=1))
     def test_sign_message(self):
+        crypt.RSA_KEYS.clear()
         with patch('salt.utils.fopen', mock_open(read_data=PRIVKEY_DATA)):
             self.assertEqual(SIG, crypt.sign_message('/keydir/keyname.pem', MSG))
 
+    def test_sign_message_cached_key(self):
+        crypt.RSA_KEYS.clear()
+        with patch('os.path.getmtime', MagicMock(return_value=1)) as getmtime:
+            with patch('salt.utils.fopen', mock_open(read_data=PRIVKEY_DATA)):
+                crypt.sign_message('/keydir/keyname.pem', MSG)
+                self.assertEqual(SIG, crypt.sign_message('/keydir/keyname.pem', MSG))
+                self.assertEqual(salt.utils.fopen.call_count, 1)
+            # the key is read again once the file changed
+            getmtime.return_value = 2
+            with patch('salt.utils.fopen', mock_open(read_data=PRIVKEY_DATA)):
+                crypt.sign_message('/keydir/keyname.pem', MSG)
+                self.assertEqual(salt.utils.fopen.call_count, 1)
+
     def test_verify_signature(self):
         with patch('salt.utils.fopen', mock_open(read_data=PUBKEY_DATA)):
             self.assertTrue(crypt.verify_signature('/keydir/keyname.pub', MSG, SIG))
 
+    def test_retry_wait(self):
+        self.assertEqual(crypt._retry_wait('retry', 10), 10)
+        for _ in range(20):
+            self.assertTrue(1 <= crypt._retry_wait('busy', 10) <= 10)
+        self.assertEqual(crypt._retry_wait('busy', 0), 1)
+
 
 if __name__ == '__main__':
     from integration import run_tests
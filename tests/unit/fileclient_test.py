@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileclient_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the batched file transfers between the file client and the file server
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import copy
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.config
+import salt.fileclient
+import salt.utils
+
+FILES = {
+    'top.sls': 'base:\n  \'*\':\n    - foo\n',
+    'foo/init.sls': 'foo:\n  test.succeed_without_changes\n',
+    'foo/files/small.txt': 'small\n',
+    'foo/files/large.txt': 'x' * 4096,
+}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class BatchedFileClientTestCase(TestCase):
+    '''
+    Cache files through the batched ``_serve_files`` request
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        root = os.path.join(self.tmp_dir, 'root')
+        for path, contents in FILES.items():
+            full = os.path.join(root, path)
+            if not os.path.isdir(os.path.dirname(full)):
+                os.makedirs(os.path.dirname(full))
+            with salt.utils.fopen(full, 'w') as fp_:
+                fp_.write(contents)
+        self.opts = copy.deepcopy(salt.config.DEFAULT_MASTER_OPTS)
+        self.opts.update({'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                          'file_roots': {'base': [root]},
+                          'fileserver_backend': ['roots'],
+                          'file_client': 'local',
+                          'file_batch_inline_size': 1024,
+                          'file_batch_paths': 2})
+        self.client = salt.fileclient.FSClient(self.opts)
+        self.send = MagicMock(side_effect=self.client.channel.send)
+        self.client.channel.send = self.send
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _cmds(self):
+        return [call[0][0]['cmd'] for call in self.send.call_args_list]
+
+    def _cached(self, path):
+        return os.path.join(self.opts['cachedir'], 'files', 'base', path)
+
+    def test_serve_files(self):
+        ret = self.client.channel.fs.serve_files(
+            {'paths': ['foo/files/small.txt', 'foo/files/large.txt',
+                       'missing.txt'],
+             'saltenv': 'base'})
+        self.assertEqual(ret['missing.txt'], {})
+        self.assertEqual(ret['foo/files/small.txt']['data'], 'small\n')
+        self.assertNotIn('data', ret['foo/files/large.txt'])
+        self.assertIn('hsum', ret['foo/files/large.txt'])
+
+        hsum = ret['foo/files/small.txt']['hsum']
+        ret = self.client.channel.fs.serve_files(
+            {'paths': ['foo/files/small.txt'],
+             'saltenv': 'base',
+             'hashes': {'foo/files/small.txt': hsum},
+             'hash_type': self.opts['hash_type']})
+        self.assertTrue(ret['foo/files/small.txt']['unchanged'])
+        self.assertNotIn('data', ret['foo/files/small.txt'])
+
+    def test_cache_dir(self):
+        ret = self.client.cache_dir('salt://foo')
+        self.assertEqual(
+            sorted(ret),
+            [self._cached('foo/files/large.txt'),
+             self._cached('foo/files/small.txt'),
+             self._cached('foo/init.sls')])
+        for path in ('foo/files/large.txt', 'foo/files/small.txt',
+                     'foo/init.sls'):
+            with salt.utils.fopen(self._cached(path)) as fp_:
+                self.assertEqual(fp_.read(), FILES[path])
+        # Two batches, only the large file is streamed
+        self.assertEqual(self._cmds().count('_serve_files'), 2)
+        self.assertEqual(self._cmds().count('_file_hash'), 1)
+
+        # Nothing changed, nothing is transferred again
+        self.send.reset_mock()
+        self.client.cache_dir('salt://foo')
+        self.assertEqual(self._cmds(), ['_file_list', '_serve_files',
+                                        '_serve_files'])
+
+    def test_cache_files_missing(self):
+        self.assertEqual(
+            self.client.cache_files(['salt://top.sls', 'salt://missing.txt']),
+            [self._cached('top.sls'), False])
+
+    def test_cache_files_old_master(self):
+        self.send.side_effect = None
+        self.send.return_value = False
+        with patch.object(self.client, 'cache_file',
+                          MagicMock(return_value='cached')) as cache_file:
+            self.assertEqual(self.client.cache_files(['salt://top.sls']),
+                             ['cached'])
+            cache_file.assert_called_once_with('salt://top.sls', 'base')
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(BatchedFileClientTestCase, needs_daemon=False)
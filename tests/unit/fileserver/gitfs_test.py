@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileserver.gitfs_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import shutil
+import tempfile
+import threading
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.fileserver import gitfs
+
+gitfs.__opts__ = {}
+
+
+def _remote(url, base='master', root='', mountpoint=''):
+    return {'url': url,
+            'hash': url,
+            'base': base,
+            'root': root,
+            'mountpoint': mountpoint,
+            'lockfile': '/nonexistent/{0}.lk'.format(url)}
+
+
+TREE = [('README', 0o100644, 'a' * 40, 12, None),
+        ('salt', 0o40000, 'b' * 40, 0, None),
+        ('salt/top.sls', 0o100644, 'c' * 40, 30, None),
+        ('salt/web', 0o40000, 'd' * 40, 0, None),
+        ('salt/web/init.sls', 0o100644, 'e' * 40, 120, None),
+        ('salt/web/latest.sls', 0o120000, 'f' * 40, 8, 'init.sls'),
+        ('saltines', 0o100644, '0' * 40, 1, None)]
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GitfsUpdateTestCase(TestCase):
+    '''
+    Test fetching the gitfs remotes
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        gitfs.__opts__ = {'cachedir': self.tmp_dir,
+                          'gitfs_update_workers': 4,
+                          'gitfs_update_timeout': 5,
+                          'gitfs_update_jitter': 0,
+                          'fileserver_events': False}
+        gitfs._FETCH_POOL = None
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_ref_env(self):
+        repo = _remote('foo', base='develop')
+        self.assertEqual(gitfs._ref_env(repo, 'refs/remotes/origin/develop'),
+                         'base')
+        self.assertEqual(gitfs._ref_env(repo, 'refs/remotes/origin/master'),
+                         'master')
+        self.assertEqual(gitfs._ref_env(repo, 'refs/heads/feature/x'),
+                         'feature/x')
+        self.assertEqual(gitfs._ref_env(repo, 'refs/tags/develop'), 'develop')
+        self.assertIsNone(gitfs._ref_env(repo, 'HEAD'))
+        self.assertIsNone(gitfs._ref_env(repo, 'refs/notes/commits'))
+
+    def test_fetch_concurrently(self):
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def _fetch(repo, provider):
+            with lock:
+                running.append(repo['url'])
+                peak.append(len(running))
+            time.sleep(0.2)
+            with lock:
+                running.remove(repo['url'])
+            return set(['refs/remotes/origin/master']) if repo['url'] == 'a' else set()
+
+        repos = [_remote(url) for url in 'abcd']
+        with patch.object(gitfs, '_fetch', _fetch):
+            ret = gitfs._fetch_remotes(repos, 'pygit2')
+        self.assertEqual(ret, {'a': set(['refs/remotes/origin/master']),
+                               'b': set(), 'c': set(), 'd': set()})
+        self.assertGreater(max(peak), 1)
+
+    def test_fetch_timeout(self):
+        gitfs.__opts__['gitfs_update_timeout'] = 0.5
+        release = threading.Event()
+
+        def _fetch(repo, provider):
+            if repo['url'] == 'slow':
+                release.wait(10)
+            return set()
+
+        with patch.object(gitfs, '_fetch', _fetch):
+            start = time.time()
+            ret = gitfs._fetch_remotes([_remote('slow'), _remote('fast')],
+                                       'pygit2')
+            release.set()
+        self.assertEqual(ret, {'fast': set()})
+        self.assertLess(time.time() - start, 5)
+
+    def test_update_shares_remotes(self):
+        list_cachedir = os.path.join(self.tmp_dir, 'file_lists/gitfs')
+        os.makedirs(list_cachedir)
+        for saltenv in ('base', 'dev', 'master'):
+            with open(os.path.join(list_cachedir, saltenv + '.p'), 'w') as fp_:
+                fp_.write('')
+        # The same URL configured twice, once with develop as its base
+        repos = [_remote('foo'), _remote('foo', base='dev'), _remote('bar')]
+        fetched = {'foo': set(['refs/remotes/origin/dev'])}
+        fetch_remotes = MagicMock(return_value=fetched)
+        with patch.object(gitfs, '_get_provider', MagicMock(return_value='pygit2')), \
+                patch.object(gitfs, '_clear_old_remotes', MagicMock(return_value=(False, repos))), \
+                patch.object(gitfs, '_fetch_remotes', fetch_remotes), \
+                patch.object(gitfs, 'envs', MagicMock(return_value=['base'])), \
+                patch('salt.fileserver.reap_fileserver_cache_dir', MagicMock()):
+            gitfs.update()
+        self.assertEqual(sorted(repo['url'] for repo in fetch_remotes.call_args[0][0]),
+                         ['bar', 'foo'])
+        self.assertEqual(sorted(os.listdir(list_cachedir)), ['master.p'])
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class GitfsIndexTestCase(TestCase):
+    '''
+    Test the per-tree index the files are served from
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        gitfs.__opts__ = {'cachedir': self.tmp_dir}
+        gitfs._INDEXES.clear()
+        self.index_path = os.path.join(self.tmp_dir, 'tree.idx')
+        gitfs._write_index(self.index_path, reversed(TREE))
+
+    def tearDown(self):
+        for index in gitfs._INDEXES.values():
+            index.close()
+        gitfs._INDEXES.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_lookup(self):
+        index = gitfs._TreeIndex(self.index_path)
+        self.assertEqual(len(index), len(TREE))
+        for path, mode, sha, size, link_tgt in TREE:
+            self.assertEqual(index.lookup(path), (mode, sha, size, link_tgt))
+        self.assertIsNone(index.lookup('salt/web/missing.sls'))
+        self.assertIsNone(index.lookup('salt/'))
+        self.assertIsNone(index.lookup('zzz'))
+        index.close()
+
+    def test_walk(self):
+        index = gitfs._TreeIndex(self.index_path)
+        self.assertEqual(list(index.walk()), TREE)
+        self.assertEqual([x[0] for x in index.walk('salt/')],
+                         ['salt/top.sls', 'salt/web', 'salt/web/init.sls',
+                          'salt/web/latest.sls'])
+        self.assertEqual(list(index.walk('srv/')), [])
+        index.close()
+
+    def test_invalid_index(self):
+        with open(self.index_path, 'wb') as fp_:
+            fp_.write(b'not an index')
+        self.assertRaises(ValueError, gitfs._TreeIndex, self.index_path)
+
+    def test_get_index_builds_once(self):
+        walk = MagicMock(return_value=iter(TREE))
+        repo = _remote('foo')
+        with patch.object(gitfs, '_get_provider', MagicMock(return_value='pygit2')), \
+                patch.object(gitfs, '_get_tree', MagicMock(return_value=object())), \
+                patch.object(gitfs, '_tree_id', MagicMock(return_value='1' * 40)), \
+                patch.object(gitfs, '_walk_tree_pygit2', walk):
+            index = gitfs._get_index(repo, 'base')
+            self.assertIs(gitfs._get_index(repo, 'base'), index)
+            # Another process maps the index already on disk
+            gitfs._INDEXES.clear()
+            self.assertEqual(gitfs._get_index(repo, 'base').path, index.path)
+            index.close()
+        self.assertEqual(walk.call_count, 1)
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.tmp_dir, 'gitfs/index/foo', '1' * 40 + '.idx')))
+
+    def test_lists(self):
+        index = gitfs._TreeIndex(self.index_path)
+        repos = [_remote('foo', root='salt', mountpoint='mnt'),
+                 _remote('bar')]
+        load = {'saltenv': 'base'}
+        with patch.object(gitfs, 'init', MagicMock(return_value=repos)), \
+                patch.object(gitfs, 'envs', MagicMock(return_value=['base'])), \
+                patch.object(gitfs, '_get_index', MagicMock(return_value=index)):
+            files, symlinks = gitfs._get_file_list(load)
+            dirs = gitfs._get_dir_list(load)
+        index.close()
+        self.assertEqual(files, ['README', 'mnt/top.sls', 'mnt/web/init.sls',
+                                 'mnt/web/latest.sls', 'salt/top.sls',
+                                 'salt/web/init.sls', 'salt/web/latest.sls',
+                                 'saltines'])
+        self.assertEqual(symlinks, {'mnt/web/latest.sls': 'init.sls',
+                                    'salt/web/latest.sls': 'init.sls'})
+        self.assertEqual(dirs, ['mnt', 'mnt/web', 'salt', 'salt/web'])
+
+    def test_find_file(self):
+        index = gitfs._TreeIndex(self.index_path)
+
+        def _write_blob(repo, sha, fp_):
+            fp_.write('x' * 120)
+
+        write_blob = MagicMock(side_effect=_write_blob)
+        with patch.object(gitfs, 'init', MagicMock(return_value=[_remote('foo')])), \
+                patch.object(gitfs, 'envs', MagicMock(return_value=['base'])), \
+                patch.object(gitfs, '_get_index', MagicMock(return_value=index)), \
+                patch.object(gitfs, '_write_blob', write_blob):
+            fnd = gitfs.find_file('salt/web/latest.sls')
+            self.assertEqual(fnd['rel'], 'salt/web/latest.sls')
+            self.assertEqual(write_blob.call_args[0][1], 'e' * 40)
+            # The cached copy is still current
+            gitfs.find_file('salt/web/latest.sls')
+            self.assertEqual(write_blob.call_count, 1)
+            self.assertEqual(gitfs.find_file('salt/web')['path'], '')
+            self.assertEqual(gitfs.find_file('salt/nope.sls')['path'], '')
+        index.close()
+        with open(fnd['path']) as fp_:
+            self.assertEqual(fp_.read(), 'x' * 120)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(GitfsUpdateTestCase, GitfsIndexTestCase, needs_daemon=False)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.fileserver.roots_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+from salt.fileserver import roots
+
+roots.__opts__ = {}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RootsCacheTestCase(TestCase):
+    '''
+    Test the in-memory hash and file list caches of the roots backend
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp_dir, 'root')
+        os.makedirs(self.root)
+        self.path = os.path.join(self.root, 'testfile')
+        self._write('foo')
+        roots.__opts__ = {'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                          'file_roots': {'base': [self.root]},
+                          'hash_type': 'md5',
+                          'fileserver_ignoresymlinks': False,
+                          'fileserver_followsymlinks': False,
+                          'file_ignore_regex': False,
+                          'file_ignore_glob': False}
+        roots._HASHES.clear()
+        roots._FILE_LISTS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, contents, mtime=None):
+        with salt.utils.fopen(self.path, 'w') as fp_:
+            fp_.write(contents)
+        if mtime is not None:
+            os.utime(self.path, (mtime, mtime))
+
+    def _hash(self):
+        return roots.file_hash({'path': 'testfile', 'saltenv': 'base'},
+                               {'path': self.path, 'rel': 'testfile'})
+
+    def test_file_hash_cache(self):
+        get_hash = MagicMock(side_effect=salt.utils.get_hash)
+        with patch('salt.utils.get_hash', get_hash):
+            first = self._hash()
+            self.assertEqual(self._hash(), first)
+            self.assertEqual(get_hash.call_count, 1)
+
+            # A fresh worker warms up from the hashes cached on disk
+            roots._HASHES.clear()
+            self.assertEqual(self._hash(), first)
+            self.assertEqual(get_hash.call_count, 1)
+
+            # A change to the file is picked up
+            self._write('barbaz', mtime=os.path.getmtime(self.path) + 10)
+            changed = self._hash()
+            self.assertNotEqual(changed['hsum'], first['hsum'])
+            self.assertEqual(changed['hsum'],
+                             salt.utils.get_hash(self.path, 'md5'))
+            self.assertEqual(get_hash.call_count, 3)
+
+    def test_file_hash_shadowed(self):
+        # A file with the same mtime and size added to an earlier root
+        mtime = 1445000000
+        os.utime(self.path, (mtime, mtime))
+        first = self._hash()
+        earlier = os.path.join(self.tmp_dir, 'earlier')
+        os.makedirs(earlier)
+        shadow = os.path.join(earlier, 'testfile')
+        with salt.utils.fopen(shadow, 'w') as fp_:
+            fp_.write('bar')
+        os.utime(shadow, (mtime, mtime))
+        fnd = {'path': shadow, 'rel': 'testfile'}
+        expected = salt.utils.get_hash(shadow, 'md5')
+        self.assertNotEqual(expected, first['hsum'])
+        self.assertEqual(
+            roots.file_hash({'path': 'testfile', 'saltenv': 'base'}, fnd)['hsum'],
+            expected)
+        roots._HASHES.clear()
+        self.assertEqual(
+            roots.file_hash({'path': 'testfile', 'saltenv': 'base'}, fnd)['hsum'],
+            expected)
+
+    def test_file_hash_missing(self):
+        self.assertEqual(
+            roots.file_hash({'path': 'missing', 'saltenv': 'base'},
+                            {'path': os.path.join(self.root, 'missing'),
+                             'rel': 'missing'}),
+            {})
+
+    def test_file_list_cache(self):
+        self.assertEqual(roots.file_list({'saltenv': 'base'}), ['testfile'])
+        with patch('os.walk', MagicMock(return_value=[])), \
+                patch('salt.fileserver.check_file_list_cache') as check:
+            self.assertEqual(roots.file_list({'saltenv': 'base'}),
+                             ['testfile'])
+            self.assertEqual(roots.dir_list({'saltenv': 'base'}), ['.'])
+            self.assertFalse(check.called)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(RootsCacheTestCase, needs_daemon=False)
@@ -3,18 +3,23 @@
 # Import Python libs
 from __future__ import absolute_import
 import os
+import copy
+import shutil
 import os.path
 import tempfile
 
 # Import Salt Testing libs
-from salttesting import TestCase
+from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 
 ensure_in_syspath('../')
 
 # Import Salt libs
 import integration
 import salt.config
+import salt.state
+import salt.utils
 from salt.state import HighState
 
 
@@ -67,6 +72,90 @@ class HighStateTestCase(TestCase):
         self.assertEqual(matches, {'env': ['state2', 'state3']})
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class RenderCacheTestCase(TestCase):
+    '''
+    Reuse rendered SLS files while their inputs are unchanged
+    '''
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp(dir=integration.TMP)
+        self.state_tree_dir = os.path.join(self.root_dir, 'state_tree')
+        os.makedirs(os.path.join(self.state_tree_dir, 'foo'))
+        self._write('foo/map.jinja', '{% set name = "bar" %}')
+        self._write('foo/init.sls',
+                    '{% from "foo/map.jinja" import name %}\n'
+                    '{{ name }}-{{ grains["role"] }}:\n'
+                    '  test.succeed_without_changes\n')
+        self.config = salt.config.minion_config(None)
+        self.config['root_dir'] = self.root_dir
+        self.config['state_events'] = False
+        self.config['id'] = 'match'
+        self.config['file_client'] = 'local'
+        self.config['file_roots'] = dict(base=[self.state_tree_dir])
+        self.config['cachedir'] = os.path.join(self.root_dir, 'cachedir')
+        self.config['test'] = False
+        self.config['state_render_cache'] = True
+        self.config['grains'] = {'role': 'web'}
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def _write(self, path, contents):
+        with salt.utils.fopen(os.path.join(self.state_tree_dir, path), 'w') as fp_:
+            fp_.write(contents)
+
+    def _render(self):
+        highstate = HighState(copy.deepcopy(self.config))
+        highstate.push_active()
+        try:
+            high, errors = highstate.render_highstate({'base': ['foo']})
+        finally:
+            highstate.pop_active()
+        self.assertEqual(errors, [])
+        return [name for name in high if not name.startswith('__')]
+
+    def test_render_cache(self):
+        compile_template = MagicMock(side_effect=salt.state.compile_template)
+        with patch('salt.state.compile_template', compile_template):
+            self.assertEqual(self._render(), ['bar-web'])
+            self.assertEqual(self._render(), ['bar-web'])
+            self.assertEqual(compile_template.call_count, 1)
+
+            # A change to an imported template renders the file again
+            self._write('foo/map.jinja', '{% set name = "baz" %}')
+            self.assertEqual(self._render(), ['baz-web'])
+            self.assertEqual(compile_template.call_count, 2)
+
+            # So does a change to the grains
+            self.config['grains'] = {'role': 'db'}
+            self.assertEqual(self._render(), ['baz-db'])
+            self.assertEqual(compile_template.call_count, 3)
+
+    def test_render_cache_grains_replaced(self):
+        highstate = HighState(copy.deepcopy(self.config))
+        highstate.push_active()
+        try:
+            high, errors = highstate.render_highstate({'base': ['foo']})
+            self.assertIn('bar-web', high)
+            # The grains are replaced in the same run, as load_dynamic does
+            highstate.state.opts['grains'] = {'role': 'db'}
+            highstate.state.module_refresh()
+            high, errors = highstate.render_highstate({'base': ['foo']})
+            self.assertIn('bar-db', high)
+        finally:
+            highstate.pop_active()
+
+    def test_render_cache_renderers(self):
+        self._write('foo/init.sls', '#!py\n'
+                                    'def run():\n'
+                                    '    return {"bar": {"test": ["succeed_without_changes"]}}\n')
+        compile_template = MagicMock(side_effect=salt.state.compile_template)
+        with patch('salt.state.compile_template', compile_template):
+            self.assertEqual(self._render(), ['bar'])
+            self.assertEqual(self._render(), ['bar'])
+            self.assertEqual(compile_template.call_count, 2)
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(HighStateTestCase, needs_daemon=False)
+    run_tests([HighStateTestCase, RenderCacheTestCase], needs_daemon=False)
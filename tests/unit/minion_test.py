@@ -6,17 +6,21 @@
 # Import python libs
 from __future__ import absolute_import
 import os
+import time
+import shutil
+import tempfile
 
 # Import Salt Testing libs
 from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
-from salttesting.mock import NO_MOCK, NO_MOCK_REASON, patch
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 
 # Import salt libs
 from salt import minion
 from salt.utils import event
 from salt.exceptions import SaltSystemExit
 import salt.syspaths
+import salt.utils
 
 ensure_in_syspath('../')
 
@@ -53,6 +57,115 @@ class MinionTestCase(TestCase):
         self.assertTrue(result)
 
 
+def _run_job(minion_instance, opts, data):
+    time.sleep(data.get('sleep', 0))
+    context = minion_instance.functions.pack['__context__']
+    with salt.utils.fopen(os.path.join(minion_instance.proc_dir, 'context'), 'a') as fp_:
+        fp_.write('{0}\n'.format(','.join(sorted(context))))
+    context[data['jid']] = True
+    with salt.utils.fopen(os.path.join(minion_instance.proc_dir, 'ran'), 'a') as fp_:
+        fp_.write('{0} {1}\n'.format(data['jid'], os.getpid()))
+
+
+class _PoolMinion(object):
+    def __init__(self, proc_dir, **opts):
+        self.opts = {'multiprocessing': True,
+                     'worker_pool_size': 2,
+                     'worker_pool_max_jobs': 0,
+                     'worker_pool_job_timeout': 0}
+        self.opts.update(opts)
+        self.proc_dir = proc_dir
+        self._return_pub = MagicMock()
+        self.functions = MagicMock(pack={'__context__': {'forked': True}})
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(salt.utils.is_windows(), 'The worker pool is not used on Windows')
+@patch('salt.minion.Minion._thread_return', staticmethod(_run_job))
+class MinionWorkerPoolTestCase(TestCase):
+    def setUp(self):
+        self.proc_dir = tempfile.mkdtemp()
+        self.pool = None
+
+    def tearDown(self):
+        if self.pool is not None:
+            self.pool.stop()
+        shutil.rmtree(self.proc_dir)
+
+    def _pool(self, **opts):
+        self.pool = minion.MinionWorkerPool(_PoolMinion(self.proc_dir, **opts))
+        return self.pool
+
+    def _pids(self):
+        return set(worker['proc'].pid for worker in self.pool.workers.values())
+
+    def _wait(self, cond):
+        for _ in range(100):
+            self.pool.check()
+            if cond():
+                return
+            time.sleep(0.05)
+        self.fail('Timed out waiting for the worker pool')
+
+    def _ran(self):
+        try:
+            with salt.utils.fopen(os.path.join(self.proc_dir, 'ran')) as fp_:
+                return dict(line.split() for line in fp_)
+        except IOError:
+            return {}
+
+    def _idle(self):
+        return all(worker['job'] is None for worker in self.pool.workers.values())
+
+    def test_dispatch(self):
+        pool = self._pool()
+        pids = self._pids()
+        self.assertEqual(len(pids), 2)
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '1', 'sleep': 0.5}))
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '2', 'sleep': 0.5}))
+        # All of the workers are busy
+        self.assertFalse(pool.dispatch('_thread_return', {'jid': '3'}))
+        self._wait(lambda: len(self._ran()) == 2 and self._idle())
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '3'}))
+        self._wait(lambda: len(self._ran()) == 3 and self._idle())
+        ran = self._ran()
+        self.assertEqual(set(int(pid) for pid in ran.values()), pids)
+        self.assertEqual(self._pids(), pids)
+
+    def test_recycle(self):
+        pool = self._pool(worker_pool_max_jobs=1, worker_pool_size=1)
+        pids = self._pids()
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '1'}))
+        self._wait(lambda: self._ran() and self._pids() and self._pids() != pids)
+        pids = self._pids()
+        pool.recycle()
+        self.assertEqual(len(self._pids()), 1)
+        self.assertNotEqual(self._pids(), pids)
+
+    def test_context(self):
+        pool = self._pool(worker_pool_size=1)
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '1'}))
+        self._wait(lambda: len(self._ran()) == 1 and self._idle())
+        self.assertTrue(pool.dispatch('_thread_return', {'jid': '2'}))
+        self._wait(lambda: len(self._ran()) == 2 and self._idle())
+        self.assertEqual(len(set(self._ran().values())), 1)
+        with salt.utils.fopen(os.path.join(self.proc_dir, 'context')) as fp_:
+            self.assertEqual(fp_.read().splitlines(), ['forked', 'forked'])
+
+    def test_job_timeout(self):
+        pool = self._pool(worker_pool_job_timeout=0.5, worker_pool_size=1)
+        pids = self._pids()
+        self.assertTrue(pool.dispatch(
+            '_thread_return',
+            {'jid': '1', 'fun': 'test.sleep', 'arg': [], 'sleep': 30}))
+        self._wait(lambda: self._pids() != pids)
+        self.assertEqual(len(self._pids()), 1)
+        self._wait(lambda: pool.minion._return_pub.called)
+        ret = pool.minion._return_pub.call_args[0][0]
+        self.assertEqual(ret['jid'], '1')
+        self.assertFalse(ret['success'])
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(MinionTestCase, needs_daemon=False)
+    run_tests(MinionTestCase, MinionWorkerPoolTestCase, needs_daemon=False)
@@ -537,6 +537,13 @@ class GrainsModuleTestCase(TestCase):
                                                     {'l24': {'l241': 'val'}}]},
                                                 'c': 8})
 
+    def test_timings(self):
+        with patch.dict('salt.loader.GRAINS_TIMINGS',
+                        {'core.os_data': 1.23456789, 'core.ip4': 0.01},
+                        clear=True):
+            self.assertEqual(grainsmod.timings(),
+                             {'core.os_data': 1.2346, 'core.ip4': 0.01})
+
 
 if __name__ == '__main__':
     from integration import run_tests
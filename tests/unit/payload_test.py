@@ -9,8 +9,10 @@
 
 # Import Salt libs
 from __future__ import absolute_import
+import gc
 import time
 import errno
+import datetime
 import threading
 
 # Import Salt Testing libs
@@ -60,6 +62,40 @@ class PayloadTestCase(TestCase):
             self.assertNoOrderedDict(odata)
             self.assertEqual(idata, odata)
 
+    def test_extended_types(self):
+        payload = salt.payload.Serial('msgpack')
+        stamp = datetime.datetime(2015, 10, 17, 12, 30, 1, 42)
+        idata = {'jid': pow(2, 70),
+                 'stamp': stamp,
+                 'ret': OrderedDict([('b', 1), ('a', 2)])}
+        odata = payload.loads(payload.dumps(idata))
+        self.assertEqual(odata['jid'], str(pow(2, 70)))
+        self.assertEqual(odata['stamp'], '20151017T12:30:01.000042')
+        self.assertEqual(odata['ret'], {'a': 2, 'b': 1})
+
+    def test_loads_buffers(self):
+        payload = salt.payload.Serial('msgpack')
+        idata = {'fun': 'test.ping', 'arg': [1, 'two']}
+        packed = payload.dumps(idata)
+        self.assertEqual(payload.loads(bytearray(packed)), idata)
+        self.assertEqual(payload.loads(memoryview(packed)), idata)
+
+    def test_loads_gc(self):
+        payload = salt.payload.Serial('msgpack')
+        small = payload.dumps([1, 2, 3])
+        large = payload.dumps(['x' * 64] * 2048)
+        with patch('gc.disable') as disable:
+            payload.loads(small)
+            self.assertFalse(disable.called)
+            payload.loads(large)
+            self.assertTrue(disable.called)
+        gc.disable()
+        try:
+            payload.loads(large)
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+
 
 class SREQTestCase(TestCase):
     port = 8845  # TODO: dynamically assign a port?
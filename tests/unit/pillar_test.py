@@ -9,6 +9,9 @@
 
 # Import python libs
 from __future__ import absolute_import
+import os
+import time
+import shutil
 import tempfile
 
 # Import Salt Testing libs
@@ -19,6 +22,7 @@ ensure_in_syspath('../')
 
 # Import salt libs
 import salt.pillar
+import salt.utils
 
 
 @skipIf(NO_MOCK, NO_MOCK_REASON)
@@ -176,6 +180,150 @@ ssh:
         client.get_state.side_effect = get_state
 
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PillarCacheTestCase(TestCase):
+    '''
+    Test the master side cache of compiled pillar data
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.opts = {'cachedir': self.cache_dir,
+                     'pillar_cache': True,
+                     'pillar_cache_ttl': 3600,
+                     'pillar_cache_roots_interval': 0,
+                     'pillar_roots': {'base': [self.tmp_dir]}}
+        self._write('top.sls', 'base: {}')
+        salt.pillar.clear_pillar_cache()
+        for key in salt.pillar._CACHE_STATS:
+            salt.pillar._CACHE_STATS[key] = 0
+        salt.pillar._CACHE_STATS_SINCE[0] = time.time()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def _write(self, name, contents):
+        with salt.utils.fopen(os.path.join(self.tmp_dir, name), 'w') as fp_:
+            fp_.write(contents)
+
+    def _compile(self, grains=None, minion_id='minion', refresh=False):
+        return salt.pillar.compile_cached_pillar(
+            self.opts, grains or {'os': 'Ubuntu'}, minion_id, 'base',
+            refresh=refresh)
+
+    @patch('salt.pillar.Pillar')
+    def test_pillar_cache(self, pillar):
+        compile_pillar = pillar.return_value.compile_pillar
+        compile_pillar.return_value = {'foo': 'bar'}
+        self.assertEqual(self._compile(), {'foo': 'bar'})
+        self.assertEqual(self._compile(), {'foo': 'bar'})
+        self.assertEqual(compile_pillar.call_count, 1)
+        self.assertEqual(salt.pillar.pillar_cache_stats()['hits'], 1)
+        self.assertEqual(salt.pillar.pillar_cache_stats()['misses'], 1)
+
+        # Other minions and changed grains are compiled
+        self._compile(minion_id='other')
+        self._compile(grains={'os': 'CentOS'})
+        self.assertEqual(compile_pillar.call_count, 3)
+
+        # So is everything once pillar_roots changes
+        self._write('foo.sls', 'foo: baz')
+        self._compile()
+        self._compile(minion_id='other')
+        self.assertEqual(compile_pillar.call_count, 5)
+
+    @patch('salt.pillar.Pillar')
+    def test_pillar_cache_roots_interval(self, pillar):
+        compile_pillar = pillar.return_value.compile_pillar
+        compile_pillar.return_value = {'foo': 'bar'}
+        self.opts['pillar_cache_roots_interval'] = 3600
+        self.opts['pillar_cache_ttl'] = 86400
+        self._compile()
+        # pillar_roots are not walked again within the interval
+        with patch('os.walk') as walk:
+            self._compile()
+            self.assertFalse(walk.called)
+        self.assertEqual(compile_pillar.call_count, 1)
+
+        # and a change is picked up once it passed
+        self._write('foo.sls', 'foo: baz')
+        with patch('time.time', return_value=time.time() + 3601):
+            self._compile()
+        self.assertEqual(compile_pillar.call_count, 2)
+
+    @patch('salt.pillar.Pillar')
+    def test_pillar_cache_expiry(self, pillar):
+        compile_pillar = pillar.return_value.compile_pillar
+        compile_pillar.return_value = {'_errors': ['failed']}
+        self._compile()
+        self._compile()
+        self.assertEqual(compile_pillar.call_count, 2)
+
+        compile_pillar.return_value = {'foo': 'bar'}
+        self.opts['ext_pillar'] = [{'cmd_yaml': 'cat /etc/pillar.yaml'}]
+        self.opts['pillar_cache_ext_ttl'] = {'cmd_yaml': 0}
+        self._compile()
+        self._compile()
+        self.assertEqual(compile_pillar.call_count, 4)
+
+    @patch('salt.pillar.Pillar')
+    def test_pillar_cache_refresh(self, pillar):
+        compile_pillar = pillar.return_value.compile_pillar
+        compile_pillar.return_value = {'foo': 'bar'}
+        self._compile()
+        self._compile(minion_id='other')
+        # The cache of another master worker
+        other_worker = dict(salt.pillar._PILLAR_CACHE)
+
+        compile_pillar.return_value = {'foo': 'baz'}
+        self.assertEqual(self._compile(refresh=True), {'foo': 'baz'})
+        self.assertEqual(self._compile(), {'foo': 'baz'})
+        self.assertEqual(compile_pillar.call_count, 3)
+
+        # The other worker drops the data of the refreshed minion only
+        salt.pillar._PILLAR_CACHE.clear()
+        salt.pillar._PILLAR_CACHE.update(other_worker)
+        self.assertEqual(self._compile(), {'foo': 'baz'})
+        self.assertEqual(self._compile(minion_id='other'), {'foo': 'bar'})
+        self.assertEqual(compile_pillar.call_count, 4)
+
+    @patch('salt.pillar.Pillar')
+    def test_pop_pillar_cache_stats(self, pillar):
+        pillar.return_value.compile_pillar.return_value = {'foo': 'bar'}
+        self._compile()
+        self._compile()
+        self.assertIsNone(salt.pillar.pop_pillar_cache_stats(0))
+        self.assertIsNone(salt.pillar.pop_pillar_cache_stats(3600))
+        with patch('time.time', return_value=time.time() + 3600):
+            stats = salt.pillar.pop_pillar_cache_stats(3600)
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertGreaterEqual(stats['interval'], 3600)
+        self.assertEqual(salt.pillar.pillar_cache_stats()['hits'], 0)
+
+    def test_shared_ext_pillar(self):
+        self.opts.update({'pillar_cache_ext_shared': ['shared'],
+                          'id': 'minion'})
+        pillar = salt.pillar.Pillar.__new__(salt.pillar.Pillar)
+        pillar.opts = self.opts
+        pillar.ext_pillars = {'shared': MagicMock(return_value={'a': 1}),
+                              'other': MagicMock(return_value={'b': 2})}
+        for _ in range(2):
+            self.assertEqual(
+                pillar._external_pillar_data({}, 'arg', {}, 'shared'),
+                {'a': 1})
+            self.assertEqual(
+                pillar._external_pillar_data({}, 'arg', {}, 'other'),
+                {'b': 2})
+        self.assertEqual(pillar.ext_pillars['shared'].call_count, 1)
+        self.assertEqual(pillar.ext_pillars['other'].call_count, 2)
+
+        # Clearing the pillar cache of the minion fetches the data again
+        salt.pillar._mark_refresh(self.opts, 'minion')
+        pillar._external_pillar_data({}, 'arg', {}, 'shared')
+        self.assertEqual(pillar.ext_pillars['shared'].call_count, 2)
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(PillarTestCase, needs_daemon=False)
+    run_tests([PillarTestCase, PillarCacheTestCase], needs_daemon=False)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.returners.local_segments_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import Python libs
+from __future__ import absolute_import
+import os
+import time
+import datetime
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+
+ensure_in_syspath('../../')
+
+# Import salt libs
+from salt.returners import local_segments
+
+local_segments.__opts__ = {}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class LocalSegmentsReturnerTestCase(TestCase):
+    '''
+    Test the segmented local job cache
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        local_segments.__opts__ = {'cachedir': self.tmp_dir,
+                                   'keep_jobs': 24,
+                                   'local_segments_hours': 1}
+        local_segments._INDEXES.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _publish(self, jid=None, **kwargs):
+        jid = local_segments.prep_jid(passed_jid=jid, **kwargs)
+        load = {'fun': 'test.ping', 'arg': [], 'tgt': '*',
+                'tgt_type': 'glob', 'user': 'root', 'jid': jid}
+        with patch('salt.utils.minions.CkMinions.check_minions',
+                   MagicMock(return_value=['minion1', 'minion2'])):
+            local_segments.save_load(jid, load)
+        return jid
+
+    def test_job_roundtrip(self):
+        jid = self._publish()
+        self.assertIsNone(local_segments.returner(
+            {'jid': jid, 'id': 'minion1', 'return': True, 'out': 'nested'}))
+        self.assertIsNone(local_segments.returner(
+            {'jid': jid, 'id': 'minion2', 'return': {'foo': 'bar'}}))
+        load = local_segments.get_load(jid)
+        self.assertEqual(load['fun'], 'test.ping')
+        self.assertEqual(load['Minions'], ['minion1', 'minion2'])
+        self.assertEqual(local_segments.get_jid(jid),
+                         {'minion1': {'return': True, 'out': 'nested'},
+                          'minion2': {'return': {'foo': 'bar'}}})
+        jids = local_segments.get_jids()
+        self.assertEqual(list(jids), [jid])
+        self.assertEqual(jids[jid]['Function'], 'test.ping')
+        self.assertEqual(jids[jid]['Target'], '*')
+
+    def test_duplicate_and_unknown_returns(self):
+        jid = self._publish()
+        local_segments.returner({'jid': jid, 'id': 'minion1', 'return': 1})
+        self.assertFalse(local_segments.returner(
+            {'jid': jid, 'id': 'minion1', 'return': 2}))
+        self.assertEqual(local_segments.get_jid(jid)['minion1']['return'], 1)
+        self.assertFalse(local_segments.returner(
+            {'jid': '20000101000000000000', 'id': 'minion1', 'return': 1}))
+
+    def test_returner_batch(self):
+        jid = self._publish()
+        local_segments.returner_batch(
+            [{'jid': jid, 'id': 'minion1', 'return': 1},
+             {'jid': jid, 'id': 'minion2', 'return': 2},
+             {'jid': jid, 'id': 'minion2', 'return': 3}])
+        self.assertEqual(local_segments.get_jid(jid),
+                         {'minion1': {'return': 1},
+                          'minion2': {'return': 2}})
+
+    def test_nocache(self):
+        jid = local_segments.prep_jid(nocache=True)
+        local_segments.returner({'jid': jid, 'id': 'minion1', 'return': 1})
+        self.assertEqual(local_segments.get_jid(jid), {})
+
+    def test_prep_jid_collision(self):
+        jid = local_segments.prep_jid()
+        with patch('salt.utils.jid.gen_jid',
+                   MagicMock(side_effect=[jid, '20150101000000000001'])):
+            self.assertEqual(local_segments.prep_jid(), '20150101000000000001')
+
+    def test_range_and_clean_old_jobs(self):
+        old_jid = '{0:%Y%m%d%H%M%S}000000'.format(
+            datetime.datetime.fromtimestamp(time.time() - 48 * 3600))
+        self._publish(old_jid)
+        new_jid = self._publish()
+        self.assertEqual(sorted(local_segments.get_jids()), [old_jid, new_jid])
+        self.assertEqual(
+            list(local_segments.get_jids_range(start_time=time.time() - 3600)),
+            [new_jid])
+        self.assertEqual(
+            list(local_segments.get_jids_range(end_time=time.time() - 24 * 3600)),
+            [old_jid])
+        local_segments.clean_old_jobs()
+        self.assertEqual(list(local_segments.get_jids()), [new_jid])
+        self.assertEqual(local_segments.get_load(old_jid), {})
+        self.assertEqual(
+            len([name for name in os.listdir(local_segments._segment_dir())
+                 if name.endswith('.seg')]),
+            1)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(LocalSegmentsReturnerTestCase, needs_daemon=False)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.ssh_test
+    ~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.client.ssh
+import salt.client.ssh.shell
+import salt.defaults.exitcodes
+
+
+def _ssh(hosts, max_procs):
+    '''
+    Return an SSH object for the hosts without going through the roster
+    '''
+    ssh = salt.client.ssh.SSH.__new__(salt.client.ssh.SSH)
+    ssh.opts = {'ssh_max_procs': max_procs}
+    ssh.defaults = {'user': 'root'}
+    ssh.targets = dict((host, {'host': host}) for host in hosts)
+    return ssh
+
+
+def _pid_routine(opts, host, target, mine=False):
+    if host == 'bad':
+        # The worker dies halfway through a target
+        os._exit(1)
+    return {'id': host, 'ret': os.getpid()}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class SSHTestCase(TestCase):
+    '''
+    Test running the routines in the worker pool
+    '''
+    def test_handle_ssh(self):
+        hosts = ['host{0}'.format(num) for num in range(10)]
+        ssh = _ssh(hosts, 3)
+        ssh.handle_routine = _pid_routine
+        rets = {}
+        for ret in ssh.handle_ssh():
+            rets.update(ret)
+        self.assertEqual(sorted(rets), hosts)
+        self.assertLessEqual(len(set(rets.values())), 3)
+        self.assertEqual(ssh.targets['host0']['user'], 'root')
+
+    def test_handle_ssh_errors(self):
+        def _routine(opts, host, target, mine=False):
+            if host == 'raises':
+                raise ValueError('oops')
+            return _pid_routine(opts, host, target, mine)
+
+        ssh = _ssh(['bad', 'raises', 'good'], 1)
+        ssh.handle_routine = _routine
+        rets = {}
+        for ret in ssh.handle_ssh():
+            rets.update(ret)
+        self.assertEqual(sorted(rets), ['bad', 'good', 'raises'])
+        self.assertIn('did not return any data', rets['bad'])
+        self.assertIn('did not return any data', rets['raises'])
+        # The worker which died was replaced
+        self.assertIsInstance(rets['good'], int)
+
+    def test_handle_ssh_no_targets(self):
+        ssh = _ssh([], 3)
+        ssh.handle_routine = MagicMock()
+        self.assertRaises(salt.exceptions.SaltClientError,
+                          list, ssh.handle_ssh())
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class SingleTestCase(TestCase):
+    '''
+    Test deploying the thin to a target
+    '''
+    def _single(self):
+        single = salt.client.ssh.Single.__new__(salt.client.ssh.Single)
+        single.opts = {'cachedir': '/var/cache/salt/master'}
+        single.argv = ['test.ping']
+        single.target = {'host': 'web1'}
+        single.thin = '/var/cache/salt/master/thin/thin.tgz'
+        single.thin_dir = '/tmp/.root_salt'
+        single.mods = {}
+        single.tty = False
+        single.delta_deployed = False
+        single.shell = MagicMock()
+        single._cmd_str = MagicMock(return_value='shim')
+        return single
+
+    def test_cmd_block_delta_fallback(self):
+        rstr = salt.client.ssh.RSTR
+        deploy = salt.defaults.exitcodes.EX_THIN_DEPLOY
+        single = self._single()
+        single.shim_cmd = MagicMock(side_effect=[
+            ('{0}\ndeploy_delta 1234\n'.format(rstr), '', deploy),
+            # The delta does not match the manifest on the target
+            ('{0}\ndeploy\n'.format(rstr), 'WARNING: thin delta', deploy),
+            ('{0}\nTrue\n'.format(rstr), '{0}\n'.format(rstr), 0),
+        ])
+        with patch('salt.utils.thin.gen_thin_delta',
+                   MagicMock(return_value='/tmp/delta.tgz')):
+            stdout, stderr, retcode = single.cmd_block()
+        self.assertEqual((stdout, stderr, retcode), ('True', '', 0))
+        sent = [call[0] for call in single.shell.send.call_args_list]
+        self.assertEqual(sent, [
+            ('/tmp/delta.tgz', '/tmp/.root_salt/salt-thin-delta.tgz'),
+            (single.thin, '/tmp/.root_salt/salt-thin.tgz'),
+        ])
+        self.assertFalse(single.delta_deployed)
+
+
+class ShellTestCase(TestCase):
+    '''
+    Test the options the ssh commands are run with
+    '''
+    def _shell(self, **opts):
+        opts.setdefault('_ssh_version', '6.6.1')
+        return salt.client.ssh.shell.Shell(opts,
+                                           'web1',
+                                           user='root',
+                                           port='22',
+                                           priv='/etc/salt/pki/ssh.rsa',
+                                           timeout=60)
+
+    def test_control_opts(self):
+        shell = self._shell(_ssh_control_path='/var/cache/salt/ssh_control',
+                            ssh_control_persist=60)
+        opts = shell._key_opts()
+        self.assertIn('-o ControlMaster=auto ', opts)
+        self.assertIn(
+            '-o ControlPath=/var/cache/salt/ssh_control/root@web1:22 ', opts)
+        self.assertIn('-o ControlPersist=60 ', opts)
+
+    def test_control_opts_disabled(self):
+        self.assertNotIn('ControlPath', self._shell()._key_opts())
+        shell = self._shell(_ssh_control_path='/x' * 60,
+                            ssh_control_persist=60)
+        self.assertNotIn('ControlPath', shell._key_opts())
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(SSHTestCase, SingleTestCase, ShellTestCase, needs_daemon=False)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.state_test
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Test the parallel execution of state chunks
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../')
+
+# Import salt libs
+import salt.utils
+import salt.state
+
+
+def _run(name, result=True, delay=0):
+    started = time.time()
+    time.sleep(delay)
+    return {'name': name,
+            'result': result,
+            'changes': {'name': name},
+            'comment': str(os.getpid()),
+            'started': started,
+            'finished': time.time()}
+
+
+def _chunk(name, fun='run', **kwargs):
+    low = {'state': 'test', 'fun': fun, 'name': name, '__id__': name,
+           '__sls__': 'parallel', '__env__': 'base'}
+    low.update(kwargs)
+    return low
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+@skipIf(salt.utils.is_windows(), 'Parallel states are not run on Windows')
+class ParallelStateTestCase(TestCase):
+    '''
+    Compare running chunks in parallel to running them in sequence
+    '''
+    def _state(self, parallel):
+        opts = {'grains': {},
+                'id': 'minion',
+                'environment': None,
+                'failhard': False,
+                'local': True,
+                'state_parallel': parallel,
+                'state_parallel_workers': 2}
+        with patch.object(salt.state.State, '_gather_pillar',
+                          MagicMock(return_value={})), \
+                patch.object(salt.state.State, 'load_modules', MagicMock()):
+            state = salt.state.State(opts)
+        state.states = {'test.run': _run}
+        state.functions = {'config.option': MagicMock(return_value=False)}
+        return state
+
+    def _call(self, parallel, chunks):
+        ret = self._state(parallel).call_chunks(chunks)
+        return dict(
+            (tag.split('_|-')[1], item) for tag, item in ret.items()
+        )
+
+    def test_matches_sequence(self):
+        chunks = [_chunk('a', delay=0.5),
+                  _chunk('b', delay=0.5),
+                  _chunk('c', require=[{'test': 'a'}]),
+                  _chunk('d', result=False),
+                  _chunk('e', require=[{'test': 'd'}]),
+                  _chunk('f', onchanges=[{'test': 'c'}]),
+                  _chunk('g', require=[{'test': 'missing'}])]
+        parallel = self._call(True, [dict(low) for low in chunks])
+        serial = self._call(False, [dict(low) for low in chunks])
+        self.assertEqual(sorted(parallel), sorted(serial))
+        for name in serial:
+            for key in ('result', 'changes'):
+                self.assertEqual(parallel[name][key], serial[name][key], name)
+        self.assertEqual(parallel['e']['comment'], serial['e']['comment'])
+        self.assertEqual(parallel['g']['comment'], serial['g']['comment'])
+        self.assertEqual(sorted(item['__run_num__'] for item in parallel.values()),
+                         list(range(len(chunks))))
+        # a and b ran at the same time in separate processes
+        self.assertNotEqual(parallel['a']['comment'], str(os.getpid()))
+        self.assertNotEqual(parallel['a']['comment'], parallel['b']['comment'])
+        self.assertLess(parallel['a']['started'], parallel['b']['finished'])
+        self.assertLess(parallel['b']['started'], parallel['a']['finished'])
+        self.assertLess(parallel['a']['__run_num__'], parallel['c']['__run_num__'])
+
+    def test_serial_chunks(self):
+        ret = self._call(True, [_chunk('a', parallel=False),
+                                _chunk('b', parallel=True)])
+        self.assertEqual(ret['a']['comment'], str(os.getpid()))
+        self.assertNotEqual(ret['b']['comment'], str(os.getpid()))
+
+    def test_failhard(self):
+        ret = self._call(True, [_chunk('a', result=False, failhard=True),
+                                _chunk('b', delay=0.2),
+                                _chunk('c')])
+        self.assertFalse(ret['a']['result'])
+        self.assertNotIn('c', ret)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ParallelStateTestCase, needs_daemon=False)
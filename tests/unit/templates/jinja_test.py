@@ -4,6 +4,7 @@
 from __future__ import absolute_import
 import os
 import copy
+import shutil
 import tempfile
 import json
 import datetime
@@ -13,11 +14,14 @@ import pprint
 from salttesting.unit import skipIf, TestCase
 from salttesting.case import ModuleCase
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import MagicMock, patch
 ensure_in_syspath('../../')
 
 # Import salt libs
+import salt.config
 import salt.loader
 import salt.utils
+import salt.utils.templates
 from salt.exceptions import SaltRenderError
 from salt.ext.six.moves import builtins
 from salt.utils import get_context
@@ -447,6 +451,91 @@ class TestGetTemplate(TestCase):
         )
 
 
+class TestJinjaEnvCache(TestCase):
+    '''
+    Share Jinja environments and compiled templates between renders
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmp_dir, 'root')
+        os.makedirs(self.root)
+        self._write('macro', "{% macro mymacro(greetee) -%}Hey {{ greetee }}{%- endmacro %}")
+        self.opts = copy.deepcopy(salt.config.DEFAULT_MINION_OPTS)
+        self.opts.update({
+            'cachedir': os.path.join(self.tmp_dir, 'cache'),
+            'file_client': 'local',
+            'file_roots': {'test': [self.root]},
+            'pillar_roots': {'test': [self.root]},
+            'extension_modules': os.path.join(self.tmp_dir, 'extmods'),
+            'jinja_env_cache': True,
+        })
+        salt.utils.templates._JINJA_ENVS.clear()
+
+    def tearDown(self):
+        salt.utils.templates._JINJA_ENVS.clear()
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, contents, mtime=None):
+        path = os.path.join(self.root, name)
+        with salt.utils.fopen(path, 'w') as fp_:
+            fp_.write(contents)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _render(self, greetee):
+        return render_jinja_tmpl(
+            "{% from 'macro' import mymacro %}{{ mymacro(greetee) }}",
+            dict(opts=self.opts, saltenv='test', greetee=greetee))
+
+    def test_env_cache(self):
+        compile_ = MagicMock(side_effect=Environment.compile)
+        with patch.object(Environment, 'compile',
+                          lambda env, *args, **kwargs: compile_(env, *args, **kwargs)):
+            self.assertEqual(self._render('world'), 'Hey world')
+            self.assertEqual(compile_.call_count, 2)
+            self.assertEqual(self._render('salt'), 'Hey salt')
+            self.assertEqual(compile_.call_count, 2)
+
+            # Changed templates are compiled again
+            self._write('macro',
+                        "{% macro mymacro(greetee) -%}Hi {{ greetee }}{%- endmacro %}",
+                        mtime=os.path.getmtime(os.path.join(self.root, 'macro')) + 10)
+            self.assertEqual(self._render('salt'), 'Hi salt')
+            self.assertEqual(compile_.call_count, 3)
+
+        # A new process loads the compiled macro from the bytecode cache
+        self.assertTrue(os.listdir(os.path.join(self.opts['cachedir'], 'jinja')))
+        salt.utils.templates._JINJA_ENVS.clear()
+        with patch.object(Environment, 'compile',
+                          lambda env, *args, **kwargs: compile_(env, *args, **kwargs)):
+            self.assertEqual(self._render('world'), 'Hi world')
+            self.assertEqual(compile_.call_count, 4)
+
+    def test_env_cache_context(self):
+        # Nothing of a render is left for the next one, neither in the
+        # imported templates nor in the globals of the environment
+        self._write('map.jinja',
+                    "{% set role = grains['role'] %}"
+                    "{% macro show() -%}{{ role }}-{{ grains['role'] }}{%- endmacro %}")
+        tmpl = "{% from 'map.jinja' import role, show %}{{ role }} {{ show() }}"
+        for role in ('db', 'web'):
+            self.assertEqual(
+                render_jinja_tmpl(tmpl, dict(opts=self.opts,
+                                             saltenv='test',
+                                             grains={'role': role})),
+                '{0} {0}-{0}'.format(role))
+        self.assertEqual(self._render('world'), 'Hey world')
+        self.assertEqual(self._render('salt'), 'Hey salt')
+        jinja_env = list(salt.utils.templates._JINJA_ENVS.values())[0]
+        self.assertNotIn('grains', jinja_env.globals)
+        self.assertNotIn('greetee', jinja_env.globals)
+
+    def test_env_cache_disabled(self):
+        self.opts['jinja_env_cache'] = False
+        self.assertEqual(self._render('world'), 'Hey world')
+        self.assertEqual(salt.utils.templates._JINJA_ENVS, {})
+
+
 class TestCustomExtensions(TestCase):
     def test_serialize_json(self):
         dataset = {
@@ -719,6 +808,6 @@ class TestDotNotationLookup(ModuleCase):
 
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(TestSaltCacheLoader, TestGetTemplate, TestCustomExtensions,
-            TestDotNotationLookup,
+    run_tests(TestSaltCacheLoader, TestGetTemplate, TestJinjaEnvCache,
+              TestCustomExtensions, TestDotNotationLookup,
               needs_daemon=False)
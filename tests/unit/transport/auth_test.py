@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.transport.auth_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import time
+import subprocess
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch, NO_MOCK, NO_MOCK_REASON, MagicMock
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+import salt.transport.mixins.auth as auth
+
+# Import third party libs
+from Crypto.PublicKey import RSA
+
+
+class FakeReqServer(auth.AESReqServerMixin):
+    def __init__(self, opts):
+        self.opts = opts
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class AESReqServerMixinTestCase(TestCase):
+    '''
+    Test the master side of the minion authentication
+    '''
+    def setUp(self):
+        self.pki_dir = tempfile.mkdtemp()
+        self.server = FakeReqServer({'pki_dir': self.pki_dir,
+                                     'auth_max_workers': 0,
+                                     'auth_key_cache_size': 2,
+                                     'auth_stats_interval': 0})
+        self.server.pre_fork(None)
+        self.server.event = MagicMock()
+        self.server.pub_keys = auth.OrderedDict()
+        self.server.aes_sig = (None, None)
+
+    def tearDown(self):
+        shutil.rmtree(self.pki_dir)
+
+    def _write_key(self, id_):
+        pubfn = os.path.join(self.pki_dir, id_)
+        with salt.utils.fopen(pubfn, 'w') as fp_:
+            fp_.write(RSA.generate(1024).publickey().exportKey())
+        return pubfn
+
+    def test_busy(self):
+        self.server.opts['auth_max_workers'] = 1
+        # another MWorker is authenticating
+        self.server.auth_workers[0] = os.getppid()
+        with patch.object(self.server, '_authenticate', MagicMock()) as authenticate:
+            self.assertEqual(self.server._auth({'id': 'minion'}),
+                             {'enc': 'clear', 'load': {'ret': 'busy'}})
+            self.assertFalse(authenticate.called)
+        self.assertEqual(self.server.auth_stats[auth.AUTH_RESULTS.index('busy')], 1)
+
+    def test_auth_stats(self):
+        self.server.opts['auth_max_workers'] = 1
+        self.server.opts['auth_stats_interval'] = 60
+        accepted = {'enc': 'pub', 'aes': 'x'}
+        with patch.object(self.server, '_authenticate', MagicMock(return_value=accepted)):
+            self.assertEqual(self.server._auth({'id': 'minion'}), accepted)
+            # The MWorker is free for the next auth
+            self.assertEqual(self.server.auth_workers[:], [0])
+            self.assertFalse(self.server.event.fire_event.called)
+            self.server.auth_stats[auth.AUTH_SINCE] = time.time() - 60
+            self.server._auth({'id': 'minion'})
+        data, tag = self.server.event.fire_event.call_args[0]
+        self.assertEqual(tag, 'salt/auth/stats')
+        self.assertEqual(data['accepted'], 2)
+        self.assertEqual(data['busy'], 0)
+        self.assertTrue(data['auths_per_second'] > 0)
+        # The counters start over for the next interval
+        self.assertEqual(self.server.auth_stats[auth.AUTH_RESULTS.index('accepted')], 0)
+
+    def test_busy_worker_died(self):
+        self.server.opts['auth_max_workers'] = 1
+        # an MWorker was killed while authenticating
+        proc = subprocess.Popen(['true'])
+        proc.wait()
+        self.server.auth_workers[0] = proc.pid
+        accepted = {'enc': 'pub', 'aes': 'x'}
+        with patch.object(self.server, '_authenticate', MagicMock(return_value=accepted)):
+            self.assertEqual(self.server._auth({'id': 'minion'}), accepted)
+        self.assertEqual(self.server.auth_workers[:], [0])
+        # or its pid was given to the MWorker which replaced it
+        self.server.auth_workers[0] = os.getpid()
+        with patch('salt.utils.event.get_master_event'), \
+                patch('salt.daemons.masterapi.AutoKey', create=True), \
+                patch('salt.crypt.MasterKeys'), \
+                patch.dict(self.server.opts, {'con_cache': False,
+                                              'sock_dir': self.pki_dir}):
+            self.server.post_fork(None, None)
+        self.assertEqual(self.server.auth_workers[:], [0])
+
+    def test_get_pub_key(self):
+        pubfn = self._write_key('minion')
+        key = self.server._get_pub_key('minion', pubfn)
+        self.assertIs(self.server._get_pub_key('minion', pubfn), key)
+        # A changed key file is parsed again
+        self._write_key('minion')
+        self.assertIsNot(self.server._get_pub_key('minion', pubfn), key)
+        # The least recently used keys are dropped
+        for id_ in ('other1', 'other2'):
+            self.server._get_pub_key(id_, self._write_key(id_))
+        self.assertEqual(list(self.server.pub_keys), ['other1', 'other2'])
+
+    def test_sign_aes(self):
+        self.server.master_key = MagicMock()
+        with patch('salt.crypt.private_encrypt', MagicMock(side_effect=['sig1', 'sig2'])) as encrypt:
+            self.assertEqual(self.server._sign_aes('aes1'), 'sig1')
+            self.assertEqual(self.server._sign_aes('aes1'), 'sig1')
+            self.assertEqual(encrypt.call_count, 1)
+            # A new AES key is signed again
+            self.assertEqual(self.server._sign_aes('aes2'), 'sig2')
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(AESReqServerMixinTestCase, needs_daemon=False)
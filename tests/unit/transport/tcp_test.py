@@ -14,13 +14,16 @@ from tornado.testing import AsyncTestCase
 
 import salt.config
 import salt.utils
+import salt.payload
 import salt.transport.server
 import salt.transport.client
+import salt.transport.tcp
 import salt.exceptions
 
 # Import Salt Testing libs
-from salttesting import TestCase
+from salttesting import TestCase, skipIf
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock
 ensure_in_syspath('../')
 import integration
 
@@ -182,7 +185,75 @@ class AsyncPubChannelTest(BaseTCPPubCase, PubChannelMixin):
     Tests around the publish system
     '''
 
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class PubServerTest(TestCase):
+    '''
+    Test delivering publishes to the targeted minions
+    '''
+    def _package(self, topic_lst=None):
+        package = {'payload': 'job'}
+        if topic_lst is not None:
+            package['topic_lst'] = topic_lst
+        return [salt.payload.Serial({}).dumps(package)]
+
+    def test_pub_topics(self):
+        channel = salt.transport.tcp.TCPPubServerChannel(
+            {'targeted_publish_max': 2})
+        load = {'tgt': 'web*', 'tgt_type': 'glob'}
+        self.assertEqual(channel.pub_topics(load, ['web1', 'web2']),
+                         ['web1', 'web2'])
+        self.assertIsNone(channel.pub_topics(load, ['web1', 'web2', 'web3']))
+        self.assertIsNone(channel.pub_topics(load))
+        self.assertEqual(
+            channel.pub_topics({'tgt': ['db1'], 'tgt_type': 'list'}), ['db1'])
+        channel.opts['order_masters'] = True
+        self.assertIsNone(channel.pub_topics(load, ['web1']))
+
+    def test_pub_topics_minion_data(self):
+        channel = salt.transport.tcp.TCPPubServerChannel(
+            {'targeted_publish_max': 2,
+             'nodegroups': {'web': 'L@web1,web2 or E@web\\d',
+                            'debian': 'G@os:Debian and N@web'}})
+        for load in ({'tgt': 'web\\d', 'tgt_type': 'pcre'},
+                     {'tgt': 'L@web1,web2 or web*', 'tgt_type': 'compound'},
+                     {'tgt': 'web', 'tgt_type': 'nodegroup'}):
+            self.assertEqual(channel.pub_topics(load, ['web1']), ['web1'])
+        for load in ({'tgt': 'os:Debian', 'tgt_type': 'grain'},
+                     {'tgt': 'role:web', 'tgt_type': 'pillar'},
+                     {'tgt': 'web* and G@os:Debian', 'tgt_type': 'compound'},
+                     {'tgt': 'debian', 'tgt_type': 'nodegroup'}):
+            self.assertIsNone(channel.pub_topics(load, ['web1']))
+            channel.opts['targeted_publish_minion_data'] = True
+            self.assertEqual(channel.pub_topics(load, ['web1']), ['web1'])
+            channel.opts['targeted_publish_minion_data'] = False
+
+    def test_publish_payload(self):
+        server = salt.transport.tcp.PubServer(io_loop=MagicMock())
+        streams = {}
+        for id_ in ('web1', 'web2', None):
+            item = (MagicMock(), (id_, 4505))
+            streams[id_] = item[0]
+            server.clients.append(item)
+            server.anonymous.add(item)
+            if id_ is not None:
+                server._add_id(item, id_)
+
+        server.publish_payload(self._package(['web1', 'db1']))
+        self.assertTrue(streams['web1'].write.called)
+        self.assertFalse(streams['web2'].write.called)
+        # minions which didn't tell their id get everything
+        self.assertTrue(streams[None].write.called)
+
+        server.publish_payload(self._package())
+        self.assertTrue(streams['web2'].write.called)
+
+        server._remove_client(server.clients[0])
+        self.assertEqual(sorted(server.present), ['web2'])
+
+
 if __name__ == '__main__':
     from integration import run_tests
     run_tests(ClearReqTestCases, needs_daemon=False)
     run_tests(AESReqTestCases, needs_daemon=False)
+    run_tests(PubServerTest, needs_daemon=False)
@@ -10,8 +10,11 @@
 # Import python libs
 from __future__ import absolute_import
 import os
+import errno
 import hashlib
 import time
+import shutil
+import tempfile
 from tornado.testing import AsyncTestCase
 import zmq
 import zmq.eventloop.ioloop
@@ -25,11 +28,13 @@ from multiprocessing import Process
 from salttesting import (expectedFailure, skipIf)
 from salttesting import TestCase
 from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
 ensure_in_syspath('../../')
 
 # Import salt libs
 import integration
 from salt.utils.process import clean_proc
+import salt.utils
 from salt.utils import event
 
 # Import 3rd-+arty libs
@@ -267,6 +272,40 @@ class TestSaltEvent(TestCase):
             self.assertGotEvent(evt2, {'data': 'foo4'})
             self.assertGotEvent(evt1, {'data': 'foo3'})
 
+    def test_event_subscribed_kept(self):
+        '''Test events of the subscribed tags are kept while waiting for another'''
+        with eventpublisher_process():
+            me = event.MasterEvent(SOCK_DIR)
+            me.subscribe('salt/job/', 'startswith')
+            me.subscribe('/progress', 'endswith')
+            me.fire_event({'data': 'foo1'}, 'salt/job/1234/ret/m1')
+            me.fire_event({'data': 'foo2'}, 'salt/run/1/progress')
+            me.fire_event({'data': 'foo3'}, 'salt/auth')
+            me.fire_event({'data': 'foo4'}, 'evt4')
+            evt4 = me.get_event(tag='evt4')
+            self.assertGotEvent(evt4, {'data': 'foo4'})
+            self.assertEqual([evt['tag'] for evt in me.pending_events],
+                             ['salt/job/1234/ret/m1', 'salt/run/1/progress'])
+            evt1 = me.get_event(tag='salt/job/1234')
+            self.assertGotEvent(evt1, {'data': 'foo1'})
+            # Unsubscribing drops the pending events of the tag
+            me.unsubscribe('/progress', 'endswith')
+            self.assertEqual(me.pending_events, [])
+
+    def test_event_tag_filters(self):
+        '''Test the publisher leaves out the events not in the tag filters'''
+        with eventpublisher_process():
+            me = event.MasterEvent(SOCK_DIR)
+            me.set_tag_filters(['salt/job/', 'evt1'])
+            me.fire_event({'data': 'foo2'}, 'evt2')
+            me.fire_event({'data': 'foo1'}, 'evt1')
+            evt1 = me.get_event(tag='')
+            self.assertGotEvent(evt1, {'data': 'foo1'})
+            me.set_tag_filters()
+            me.fire_event({'data': 'foo2'}, 'evt2')
+            evt2 = me.get_event(tag='')
+            self.assertGotEvent(evt2, {'data': 'foo2'})
+
     @expectedFailure
     def test_event_nested_sub_all(self):
         '''Test nested event subscriptions do not drop events, get event for all tags'''
@@ -317,6 +356,91 @@ class TestSaltEvent(TestCase):
             self.assertGotEvent(evt, {'data': data, 'tag': 'test_master', 'events': None, 'pretag': None})
 
 
+class TestTagSubscriptions(TestCase):
+    def test_startswith(self):
+        subs = event.TagSubscriptions()
+        subs.add('salt/job/')
+        subs.add('salt/job/1234/')
+        subs.add('salt/key')
+        self.assertTrue(subs.match('salt/job/1234/ret/m1'))
+        self.assertTrue(subs.match('salt/key'))
+        self.assertFalse(subs.match('salt/ke'))
+        self.assertFalse(subs.match('salt/auth'))
+        self.assertEqual(sorted(subs.matches('salt/job/1234/ret/m1')),
+                         [('salt/job/', 'startswith'),
+                          ('salt/job/1234/', 'startswith')])
+        subs.remove('salt/job/')
+        self.assertEqual(subs.matches('salt/job/1234/ret/m1'),
+                         [('salt/job/1234/', 'startswith')])
+        self.assertFalse(subs.match('salt/job/5678/ret/m1'))
+        subs.remove('salt/job/1234/')
+        subs.remove('salt/key')
+        self.assertEqual(subs._prefixes.root, {})
+        self.assertFalse(subs.remove('salt/key'))
+
+    def test_refcount(self):
+        subs = event.TagSubscriptions()
+        subs.add('salt/job/')
+        subs.add('salt/job/')
+        self.assertTrue(subs.remove('salt/job/'))
+        self.assertTrue(subs.match('salt/job/1234/new'))
+        self.assertTrue(subs.remove('salt/job/'))
+        self.assertFalse(subs.match('salt/job/1234/new'))
+        self.assertEqual(len(subs), 0)
+
+    def test_other_match_types(self):
+        subs = event.TagSubscriptions()
+        subs.add('/ret/m1', 'endswith')
+        subs.add('/ret/', 'find')
+        subs.add(r'salt/job/\d+/new', 'regex')
+        subs.add(r'salt/(?P<kind>run)/\d+/(?P=kind)', 'regex')
+        self.assertTrue(subs.match('salt/job/5678/ret/m1'))
+        self.assertTrue(subs.match('salt/job/5678/new'))
+        self.assertTrue(subs.match('salt/run/1/run'))
+        self.assertFalse(subs.match('salt/run/1/ret'))
+        # regex matches at the start of the tag, as get_event does
+        self.assertFalse(subs.match('x/salt/job/5678/new'))
+        self.assertEqual(sorted(subs.matches('salt/job/5678/ret/m1')),
+                         [('/ret/', 'find'), ('/ret/m1', 'endswith')])
+        subs.remove('/ret/', 'find')
+        self.assertFalse(subs.match('salt/job/5678/ret/m2'))
+        self.assertRaises(ValueError, subs.add, 'salt', 'glob')
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class TestEventPublisher(TestCase):
+    def setUp(self):
+        self.publisher = event.EventPublisher({'sock_dir': SOCK_DIR})
+        self.publisher.epub_sock = MagicMock()
+
+    def test_publish(self):
+        self.publisher.handle_subscription(b'\x01salt/job/')
+        self.publisher.handle_subscription(b'\x01salt/job/1234/')
+        self.publisher.handle_subscription(b'\x01salt/auth')
+        self.publisher.handle_subscription(b'\x00salt/auth')
+        self.publisher.publish(b'salt/job/1234/ret/m1\n\n\x80')
+        self.publisher.publish(b'salt/job/5678/new\n\n\x80')
+        self.publisher.publish(b'salt/auth\n\n\x80')
+        self.assertEqual(self.publisher.epub_sock.send.call_count, 2)
+        self.assertEqual(self.publisher.get_stats(),
+                         {'received': 3, 'sent': 2, 'filtered': 1,
+                          'dropped': 0,
+                          'subscriptions': {'salt/job/': 2,
+                                            'salt/job/1234/': 1}})
+
+    def test_publish_dropped(self):
+        self.publisher.nodrop = True
+        self.publisher.handle_subscription(b'\x01')
+        send = self.publisher.epub_sock.send
+        send.side_effect = [zmq.ZMQError(errno.EAGAIN), None]
+        self.publisher.publish(b'evt1\n\n\x80')
+        # Sent again for the listeners which kept up
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(self.publisher.epub_sock.setsockopt.call_args_list,
+                         [((zmq.XPUB_NODROP, 0),), ((zmq.XPUB_NODROP, 1),)])
+        self.assertEqual(self.publisher.get_stats()['dropped'], 1)
+
+
 class TestAsyncEventPublisher(AsyncTestCase):
     def get_new_ioloop(self):
         return zmq.eventloop.ioloop.ZMQIOLoop()
@@ -343,6 +467,151 @@ class TestAsyncEventPublisher(AsyncTestCase):
         self.data.pop('_stamp')  # drop the stamp
         self.assertEqual(self.data, {'data': 'foo1'})
 
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class TestEventReturn(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.returned = []
+        self.opts = {'cachedir': self.tmp_dir,
+                     'event_return': 'mock',
+                     'event_return_queue': 3,
+                     'event_return_queue_bytes': 0,
+                     'event_return_flush_interval': 5,
+                     'event_return_spool_max_size': 1048576,
+                     'event_return_whitelist': [],
+                     'event_return_blacklist': ['salt/auth'],
+                     'serial': 'msgpack'}
+        minion = MagicMock()
+        minion.returners = {'mock.event_return': self._event_return}
+        with patch('salt.minion.MasterMinion', MagicMock(return_value=minion)):
+            self.evr = event.EventReturn(self.opts)
+        self.fail_returns = False
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _event_return(self, events):
+        if self.fail_returns:
+            raise IOError('returner is down')
+        self.returned.append(list(events))
+
+    def _queue(self, *tags):
+        for tag in tags:
+            evt = {'tag': tag, 'data': {}}
+            if self.evr._filter(evt):
+                if not self.evr.event_queue:
+                    self.evr.queued_at = time.time()
+                self.evr.event_queue.append(evt)
+
+    def test_flush_due(self):
+        self.assertFalse(self.evr._flush_due())
+        self._queue('a', 'salt/auth', 'b')
+        self.assertEqual(len(self.evr.event_queue), 2)
+        self.assertFalse(self.evr._flush_due())
+        # The oldest event waited long enough
+        self.evr.queued_at -= 6
+        self.assertTrue(self.evr._flush_due())
+        self.evr.queued_at += 6
+        self._queue('c')
+        self.assertTrue(self.evr._flush_due())
+        self.evr.flush_events()
+        self.assertEqual([[evt['tag'] for evt in batch] for batch in self.returned],
+                         [['a', 'b', 'c']])
+        self.assertEqual(self.evr.event_queue, [])
+
+    def test_spool(self):
+        self.fail_returns = True
+        self._queue('a')
+        self.evr.flush_events()
+        self.assertTrue(self.evr.retry_at)
+        # Events go to the spool behind the failed ones
+        self._queue('b')
+        self.evr.flush_events()
+        self.assertEqual(len(self.evr._spool_segments()), 1)
+
+        # Back off while the returner keeps failing
+        self.evr._return_spool()
+        self.assertEqual(self.evr.retry_wait, 2)
+
+        self.fail_returns = False
+        self.evr._return_spool()
+        self.assertEqual([[evt['tag'] for evt in batch] for batch in self.returned],
+                         [['a'], ['b']])
+        self.assertEqual(self.evr.retry_at, 0)
+        self.assertEqual(self.evr._spool_segments(), [])
+
+    def test_spool_restart(self):
+        self.fail_returns = True
+        for tag in ('a', 'b', 'c'):
+            self._queue(tag)
+            self.evr.flush_events()
+
+        # The returner takes the first batch and fails on the second
+        def _event_return(events):
+            if self.returned:
+                raise IOError('returner is down')
+            self.returned.append(list(events))
+        self.evr.minion.returners['mock.event_return'] = _event_return
+        self.evr._return_spool()
+        self.assertEqual(len(self.returned), 1)
+
+        # A restarted EventReturn picks up behind the returned batch
+        minion = MagicMock()
+        minion.returners = {'mock.event_return': self._event_return}
+        with patch('salt.minion.MasterMinion', MagicMock(return_value=minion)):
+            evr = event.EventReturn(self.opts)
+        self.fail_returns = False
+        evr._return_spool()
+        self.assertEqual([[evt['tag'] for evt in batch] for batch in self.returned],
+                         [['a'], ['b'], ['c']])
+
+    def test_spool_write_error(self):
+        self.fail_returns = True
+        self._queue('a')
+        self.evr.flush_events()
+        size = os.path.getsize(os.path.join(self.evr.spool_dir,
+                                            self.evr._spool_segments()[0]))
+
+        # A full disk drops the batch instead of the EventReturn process
+        real_fopen = salt.utils.fopen
+
+        def _fopen(path, mode='r', *args, **kwargs):
+            if mode == 'ab':
+                fp_ = real_fopen(path, mode, *args, **kwargs)
+                fp_.write(b'\0\0')
+                fp_.close()
+                raise IOError(errno.ENOSPC, 'No space left on device')
+            return real_fopen(path, mode, *args, **kwargs)
+
+        self._queue('b')
+        with patch('salt.utils.fopen', _fopen):
+            self.evr.flush_events()
+        self.assertEqual(self.evr.event_queue, [])
+        self.assertEqual(
+            os.path.getsize(os.path.join(self.evr.spool_dir,
+                                         self.evr._spool_segments()[0])),
+            size)
+
+        self._queue('c')
+        self.evr.flush_events()
+        self.fail_returns = False
+        self.evr._return_spool()
+        self.assertEqual([[evt['tag'] for evt in batch] for batch in self.returned],
+                         [['a'], ['c']])
+
+    def test_spool_max_size(self):
+        self.fail_returns = True
+        self.opts['event_return_spool_max_size'] = 0
+        with patch('salt.minion.MasterMinion', MagicMock()):
+            evr = event.EventReturn(self.opts)
+        evr.minion.returners = {'mock.event_return': self._event_return}
+        evr.event_queue.append({'tag': 'a', 'data': {}})
+        evr.flush_events()
+        self.assertEqual(evr._spool_segments(), [])
+        self.assertEqual(evr.retry_at, 0)
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(TestSaltEvent, needs_daemon=False)
+    run_tests(TestSaltEvent, TestTagSubscriptions, TestEventPublisher,
+              TestEventReturn, needs_daemon=False)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.job_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import multiprocessing
+
+# Import Salt Testing libs
+from salttesting import TestCase, skipIf
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import NO_MOCK, NO_MOCK_REASON, MagicMock, patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils.job
+
+
+class Returners(dict):
+    '''
+    Mimic the returners loader of a MasterMinion
+    '''
+    def __init__(self, batch=False):
+        super(Returners, self).__init__()
+        self.calls = []
+        for fun in ('prep_jid', 'save_load', 'returner'):
+            self['local_cache.{0}'.format(fun)] = self._recorder(fun)
+        if batch:
+            self['local_cache.returner_batch'] = self._recorder('returner_batch')
+        self['local_cache.get_load'] = self._get_load
+
+    def _recorder(self, fun):
+        def _call(*args, **kwargs):
+            self.calls.append((fun, args))
+        return _call
+
+    def _get_load(self, jid):
+        self.calls.append(('get_load', (jid,)))
+        return {}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class StoreJobTestCase(TestCase):
+    '''
+    Test handing returns over to the job cache writer
+    '''
+    opts = {'pki_dir': '/etc/salt/pki/master',
+            'master_job_cache': 'local_cache',
+            'job_cache': True,
+            'ext_job_cache': '',
+            'job_cache_writer_timeout': 0.1}
+
+    def setUp(self):
+        self.mminion = MagicMock()
+        self.mminion.returners = Returners()
+
+    def _load(self, minion, jid='20151017123001000042'):
+        return {'jid': jid, 'id': minion, 'fun': 'test.ping', 'return': True}
+
+    def test_store_job(self):
+        event = MagicMock()
+        salt.utils.job.store_job(self.opts, self._load('minion1'),
+                                 event=event, mminion=self.mminion)
+        self.assertEqual([call[0] for call in self.mminion.returners.calls],
+                         ['prep_jid', 'returner'])
+        self.assertEqual(event.fire_event.call_count, 1)
+
+    def test_store_job_queued(self):
+        event = MagicMock()
+        job_queue = multiprocessing.Queue(1)
+        load = self._load('minion1')
+        salt.utils.job.store_job(self.opts, load, event=event,
+                                 mminion=self.mminion, job_queue=job_queue)
+        # The event is fired right away but nothing is written
+        self.assertEqual(event.fire_event.call_count, 1)
+        self.assertEqual(self.mminion.returners.calls, [])
+        self.assertEqual(job_queue.get(timeout=5), (load, True))
+
+    def test_store_job_queue_full(self):
+        job_queue = multiprocessing.Queue(1)
+        job_queue.put('busy')
+        with patch('salt.utils.job.log') as log:
+            salt.utils.job.store_job(self.opts, self._load('minion1'),
+                                     mminion=self.mminion,
+                                     job_queue=job_queue)
+            self.assertEqual(log.warning.call_count, 1)
+        self.assertEqual([call[0] for call in self.mminion.returners.calls],
+                         ['prep_jid', 'returner'])
+
+    def test_writer_flush(self):
+        writer = salt.utils.job.JobCacheWriter(self.opts, None)
+        writer.mminion = self.mminion
+        batch = [(self._load('minion{0}'.format(num)), True)
+                 for num in range(3)]
+        writer.flush(batch)
+        self.assertEqual(batch, [])
+        calls = [call[0] for call in self.mminion.returners.calls]
+        self.assertEqual(calls, ['prep_jid'] + ['returner'] * 3)
+
+        # Returners with a batch function get the whole batch at once
+        self.mminion.returners = Returners(batch=True)
+        writer.flush([(self._load('minion{0}'.format(num)), True)
+                      for num in range(3)])
+        self.assertEqual(self.mminion.returners.calls[-1][0], 'returner_batch')
+        self.assertEqual(len(self.mminion.returners.calls[-1][1][0]), 3)
+
+    def test_writer_drains_on_stop(self):
+        job_queue = multiprocessing.Queue()
+        for num in range(5):
+            job_queue.put((self._load('minion{0}'.format(num)), True))
+        writer = salt.utils.job.JobCacheWriter(
+            dict(self.opts, job_cache_writer_batch=2), job_queue)
+        writer.stop = True
+        with patch('salt.minion.MasterMinion',
+                   MagicMock(return_value=self.mminion)):
+            with patch('signal.signal'):
+                writer.run()
+        calls = [call[0] for call in self.mminion.returners.calls]
+        # Three batches, the jid is prepared once per batch
+        self.assertEqual(calls.count('prep_jid'), 3)
+        self.assertEqual(calls.count('returner'), 5)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(StoreJobTestCase, needs_daemon=False)
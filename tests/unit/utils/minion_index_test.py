@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.minion_index_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Test the minion data index against the minion data cache walk
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tempfile
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.payload
+import salt.utils
+import salt.utils.minions
+import salt.utils.minion_index
+
+MINIONS = {
+    'web1': {
+        'grains': {'os': 'Ubuntu', 'roles': ['web', 'lb'], 'num_cpus': 4,
+                   'ip_interfaces': {'eth0': ['10.0.0.1']}},
+        'pillar': {'app': {'role': 'frontend', 'port': 80},
+                   'users': [{'name': 'fred'}]},
+    },
+    'web2': {
+        'grains': {'os': 'Ubuntu', 'roles': ['web'], 'num_cpus': 2,
+                   'ip_interfaces': {'eth0': ['10.0.0.2']}},
+        'pillar': {'app': {'role': 'frontend', 'port': 8080}},
+    },
+    'db1': {
+        'grains': {'os': 'CentOS', 'roles': ['db'], 'num_cpus': 16,
+                   'ip_interfaces': {'eth0': ['10.0.1.1']}},
+        'pillar': {'app': {'role': 'backend'},
+                   'users': [{'name': 'barney'}]},
+    },
+}
+
+EXPRESSIONS = (
+    ('grain', 'os:Ubuntu'),
+    ('grain', 'os:ubu*'),
+    ('grain', 'roles:web'),
+    ('grain', 'roles:0:db'),
+    ('grain', 'num_cpus:16'),
+    ('grain', 'ip_interfaces:eth0:10.0.0.*'),
+    ('grain', 'ip_interfaces:eth0'),
+    ('grain', 'ip_interfaces:*'),
+    ('grain', 'missing:foo'),
+    ('grain_pcre', 'os:(Ubuntu|CentOS)'),
+    ('grain_pcre', 'roles:w.b'),
+    ('pillar', 'app:role:frontend'),
+    ('pillar', 'app:frontend'),
+    ('pillar', 'app:port:80*'),
+    ('pillar', 'users:name:fred'),
+    ('pillar_pcre', 'app:role:back.*'),
+    ('pillar_exact', 'app:port:80'),
+    ('compound', 'G@os:Ubuntu and I@app:port:8080'),
+    ('compound', 'G@roles:db or not P@os:ubuntu'),
+)
+
+
+class MinionIndexTestCase(TestCase):
+    '''
+    Compare the targets resolved with the minion data index to the targets
+    resolved by reading the cached data of every minion
+    '''
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.opts = {'cachedir': os.path.join(self.tmp_dir, 'cache'),
+                     'pki_dir': os.path.join(self.tmp_dir, 'pki'),
+                     'minion_data_cache': True,
+                     'minion_data_index': True,
+                     'transport': 'zeromq'}
+        os.makedirs(os.path.join(self.opts['pki_dir'], 'minions'))
+        self.serial = salt.payload.Serial(self.opts)
+        for minion_id, data in MINIONS.items():
+            self._write(minion_id, data)
+        # A minion with an accepted key and nothing in the cache yet
+        self._accept('new1')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _accept(self, minion_id):
+        with salt.utils.fopen(
+                os.path.join(self.opts['pki_dir'], 'minions', minion_id),
+                'w+') as fp_:
+            fp_.write('')
+
+    def _write(self, minion_id, data):
+        self._accept(minion_id)
+        cdir = os.path.join(self.opts['cachedir'], 'minions', minion_id)
+        if not os.path.isdir(cdir):
+            os.makedirs(cdir)
+        with salt.utils.fopen(os.path.join(cdir, 'data.p'), 'w+b') as fp_:
+            fp_.write(self.serial.dumps(data))
+        salt.utils.minion_index.MinionIndex(self.opts).update(minion_id, data)
+
+    def _check(self, expr_form, expr, greedy=True):
+        indexed = salt.utils.minions.CkMinions(self.opts)
+        walk = salt.utils.minions.CkMinions(
+            dict(self.opts, minion_data_index=False))
+        return (
+            sorted(indexed.check_minions(expr, expr_form, greedy=greedy)),
+            sorted(walk.check_minions(expr, expr_form, greedy=greedy))
+        )
+
+    def test_matches_cache_walk(self):
+        for expr_form, expr in EXPRESSIONS:
+            for greedy in (True, False):
+                indexed, walk = self._check(expr_form, expr, greedy)
+                self.assertEqual(
+                    indexed, walk,
+                    '{0} {1!r} (greedy={2})'.format(expr_form, expr, greedy))
+
+    def test_build_from_existing_cache(self):
+        index = salt.utils.minion_index.MinionIndex(self.opts)
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.ids(), set(MINIONS))
+        matched, verify = index.match('grains', 'os:Ubuntu', ':')
+        self.assertEqual(matched, set(['web1', 'web2']))
+        self.assertEqual(verify, set())
+
+    def test_incremental_update(self):
+        ckminions = salt.utils.minions.CkMinions(self.opts)
+        self.assertEqual(
+            sorted(ckminions.check_minions('os:CentOS', 'grain')),
+            ['db1', 'new1'])
+        self._write('new1', {'grains': {'os': 'CentOS'}, 'pillar': {}})
+        self._write('db1', {'grains': {'os': 'Debian'}, 'pillar': {}})
+        self.assertEqual(
+            ckminions.check_minions('os:CentOS', 'grain'), ['new1'])
+
+    def test_forget(self):
+        ckminions = salt.utils.minions.CkMinions(self.opts)
+        self.assertEqual(
+            sorted(ckminions.check_minions('os:Ubuntu', 'grain', greedy=False)),
+            ['web1', 'web2'])
+        shutil.rmtree(os.path.join(self.opts['cachedir'], 'minions', 'web2'))
+        salt.utils.minion_index.MinionIndex(self.opts).forget('web2')
+        self.assertEqual(
+            ckminions.check_minions('os:Ubuntu', 'grain', greedy=False),
+            ['web1'])
+
+    def test_compact(self):
+        index = salt.utils.minion_index.MinionIndex(self.opts)
+        index.refresh()
+        self._write('db1', {'grains': {'os': 'Debian'}, 'pillar': {}})
+        self.assertFalse(index.compact(max_size=1024 * 1024))
+        self.assertTrue(index.compact())
+        fresh = salt.utils.minion_index.MinionIndex(self.opts)
+        self.assertTrue(fresh.refresh())
+        self.assertEqual(fresh.generation, 1)
+        self.assertEqual(fresh.match('grains', 'os:Debian', ':')[0],
+                         set(['db1']))
+        # A reader that loaded the previous generation picks up the new one
+        self._write('web1', {'grains': {'os': 'Debian'}, 'pillar': {}})
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.match('grains', 'os:Debian', ':')[0],
+                         set(['db1', 'web1']))
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(MinionIndexTestCase, needs_daemon=False)
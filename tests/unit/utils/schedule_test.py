@@ -6,6 +6,10 @@
 # Import python libs
 from __future__ import absolute_import
 import os
+import copy
+import time
+import random
+import datetime
 
 # Import Salt Libs
 from salt.utils.schedule import Schedule
@@ -235,6 +239,159 @@ class ScheduleTestCase(TestCase):
         self.assertRaises(ValueError, Schedule.eval, self.schedule)
 
 
+# The start of the fake clock
+T0 = 1445000000
+DATE_FMT = '%Y-%m-%dT%H:%M:%S'
+
+
+def _date(seconds):
+    return time.strftime(DATE_FMT, time.localtime(T0 + seconds))
+
+
+class FakeClock(object):
+    '''
+    The clock of the scheduler, with stand-ins for the date parsing and cron
+    libraries reading it
+    '''
+    def __init__(self):
+        self.now = T0
+        self.parsed = 0
+        clock = self
+
+        class FakeDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.datetime.fromtimestamp(clock.now)
+
+        class FakeCroniter(object):
+            # A cron string is the period of the job in seconds here
+            def __init__(self, cron, start):
+                self.period = int(cron)
+                self.start = int(start)
+
+            def get_next(self):
+                return (self.start // self.period + 1) * self.period
+
+        self.datetime = MagicMock(datetime=FakeDatetime)
+        self.croniter = MagicMock(croniter=FakeCroniter)
+        self.dateutil_parser = MagicMock(parse=self.parse)
+
+    def time(self):
+        return float(self.now)
+
+    def parse(self, date_str):
+        self.parsed += 1
+        return datetime.datetime.strptime(date_str, DATE_FMT)
+
+    def patch(self):
+        return [patch('time.time', self.time),
+                patch('salt.utils.schedule.datetime', self.datetime),
+                patch('salt.utils.schedule.croniter', self.croniter, create=True),
+                patch('salt.utils.schedule.dateutil_parser', self.dateutil_parser, create=True),
+                patch('salt.utils.schedule._WHEN_SUPPORTED', True),
+                patch('salt.utils.schedule._RANGE_SUPPORTED', True),
+                patch('salt.utils.schedule._CRON_SUPPORTED', True),
+                patch('salt.utils.event.get_event', MagicMock())]
+
+
+JOBS = {
+    'interval': {'function': 'test.ping', 'seconds': 7},
+    'no_start': {'function': 'test.ping', 'minutes': 1, 'run_on_start': False},
+    'splay': {'function': 'test.ping', 'seconds': 10, 'splay': 5},
+    'once': {'function': 'test.ping', 'once': _date(30)},
+    'when': {'function': 'test.ping', 'when': _date(45)},
+    'whens': {'function': 'test.ping', 'when': [_date(20), 'lunch', _date(200)]},
+    'cron': {'function': 'test.ping', 'cron': '60'},
+    'after': {'function': 'test.ping', 'seconds': 5, 'after': _date(50)},
+    'until': {'function': 'test.ping', 'seconds': 5, 'until': _date(50)},
+    'range': {'function': 'test.ping', 'seconds': 3,
+              'range': {'start': _date(100), 'end': _date(150)}},
+    'disabled': {'function': 'test.ping', 'seconds': 1, 'enabled': False},
+    # eval runs it every second, the time options win over cron
+    'cron_seconds': {'function': 'test.ping', 'seconds': 1, 'cron': '60'},
+    'invalid': {'function': 'test.ping', 'when': _date(10), 'cron': '60'},
+    'missing': {'function': 'no.such', 'seconds': 1},
+}
+
+
+@skipIf(NO_MOCK, NO_MOCK_REASON)
+class ScheduleEvalTestCase(TestCase):
+    '''
+    Test that evaluating only the jobs which came due runs the jobs at the
+    same times as evaluating all of the jobs every time
+    '''
+    def _run(self, every_job, ticks):
+        '''
+        Evaluate the schedule at the ticks of a fake clock, return the jobs
+        run at every tick and the dates parsed
+        '''
+        clock = FakeClock()
+        patches = clock.patch()
+        if every_job:
+            patches.append(patch.object(Schedule, '_due_jobs',
+                                        lambda self, schedule, now: sorted(schedule)))
+        for patcher in patches:
+            patcher.start()
+        try:
+            random.seed(0)
+            opts = {'schedule': copy.deepcopy(JOBS),
+                    'pillar': {'whens': {'lunch': _date(100)}},
+                    'grains': {}}
+            with patch('salt.utils.schedule.clean_proc_dir', MagicMock()):
+                schedule = Schedule(opts, {'test.ping': None}, returners={})
+            runs = []
+            schedule.worker_pool = MagicMock()
+
+            def dispatch(kind, job):
+                runs.append((clock.now - T0, job[1]['name']))
+                return True
+            schedule.worker_pool.dispatch.side_effect = dispatch
+            for tick in ticks:
+                clock.now = T0 + tick
+                if tick == 120:
+                    schedule.modify_job('interval',
+                                        {'function': 'test.ping', 'seconds': 11},
+                                        persist=False)
+                elif tick == 150:
+                    schedule.add_job({'new': {'function': 'test.ping', 'seconds': 4}},
+                                     persist=False)
+                elif tick == 250:
+                    schedule.disable_job('splay', persist=False)
+                elif tick == 300:
+                    # Not through the Schedule, the way the minion adds jobs
+                    opts['schedule']['direct'] = {'function': 'test.ping', 'seconds': 9}
+                schedule.eval()
+            return runs, clock.parsed
+        finally:
+            for patcher in patches:
+                patcher.stop()
+
+    def _assert_same_runs(self, ticks):
+        runs, parsed = self._run(False, ticks)
+        every_runs, every_parsed = self._run(True, ticks)
+        self.assertEqual(runs, every_runs)
+        # Far fewer dates are parsed
+        self.assertTrue(parsed * 5 < every_parsed)
+        return runs
+
+    def test_every_second(self):
+        runs = self._assert_same_runs(range(400))
+        ran = set(name for _, name in runs)
+        self.assertEqual(
+            ran,
+            set(['interval', 'no_start', 'splay', 'once', 'when', 'whens',
+                 'cron', 'cron_seconds', 'after', 'until', 'range', 'new',
+                 'direct']))
+        self.assertEqual([tick for tick, name in runs if name == 'whens'],
+                         [20, 100, 200])
+        self.assertEqual([tick for tick, name in runs if name == 'cron'],
+                         [39, 99, 159, 219, 279, 339, 399])
+
+    def test_missed_ticks(self):
+        # An eval late by a second or more, the way a busy loop drifts
+        self._assert_same_runs([tick for tick in range(400) if tick % 7 and tick % 11])
+
+
 if __name__ == '__main__':
     from integration import run_tests
-    run_tests(ScheduleTestCase, needs_daemon=False)
+    run_tests(ScheduleTestCase, ScheduleEvalTestCase, needs_daemon=False)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+'''
+    tests.unit.utils.thin_test
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+'''
+
+# Import python libs
+from __future__ import absolute_import
+import os
+import shutil
+import tarfile
+import hashlib
+import tempfile
+import importlib
+
+# Import Salt Testing libs
+from salttesting import TestCase
+from salttesting.helpers import ensure_in_syspath
+from salttesting.mock import patch
+ensure_in_syspath('../../')
+
+# Import salt libs
+import salt.utils
+import salt.utils.thin
+# salt.client.ssh shadows the shim module with the file object it reads
+ssh_py_shim = importlib.import_module('salt.client.ssh.ssh_py_shim')
+
+
+def _make_thin(cachedir, files):
+    '''
+    Build a thin tarball and manifest holding the given files the way
+    gen_thin() does, return the tarball path and manifest id
+    '''
+    thindir = os.path.join(cachedir, 'thin', 'test')
+    if os.path.isdir(thindir):
+        shutil.rmtree(thindir)
+    os.makedirs(os.path.join(thindir, 'salt'))
+    thintar = os.path.join(thindir, 'thin.tgz')
+    tfp = tarfile.open(thintar, 'w:gz')
+    with salt.utils.fopen(os.path.join(thindir, 'thin_manifest'), 'w') as man:
+        for name in sorted(files):
+            with salt.utils.fopen(os.path.join(thindir, name), 'w') as fp_:
+                fp_.write(files[name])
+            tfp.add(os.path.join(thindir, name), arcname=name)
+            man.write('{0} {1}\n'.format(
+                hashlib.sha1(files[name].encode()).hexdigest(), name))
+    tfp.add(os.path.join(thindir, 'thin_manifest'), arcname='thin_manifest')
+    tfp.close()
+    manifest_id = salt.utils.thin.thin_manifest_id(thintar)
+    manifests = os.path.join(cachedir, 'thin', 'manifests')
+    if not os.path.isdir(manifests):
+        os.makedirs(manifests)
+    shutil.copyfile(os.path.join(thindir, 'thin_manifest'),
+                    os.path.join(manifests, manifest_id))
+    return thintar, manifest_id
+
+
+class ThinDeltaTestCase(TestCase):
+    '''
+    Test deploying only the files of the thin which changed
+    '''
+    def setUp(self):
+        self.cachedir = tempfile.mkdtemp()
+        self.saltdir = tempfile.mkdtemp()
+        self.old_thin, self.old_id = _make_thin(
+            self.cachedir,
+            {'version': '2015.8.0', 'salt/a.py': 'a', 'salt/b.py': 'b'})
+        # Deploy the old thin to the target
+        tfp = tarfile.open(self.old_thin, 'r:gz')
+        tfp.extractall(self.saltdir)
+        tfp.close()
+        self.new_thin, self.new_id = _make_thin(
+            self.cachedir,
+            {'version': '2015.8.1', 'salt/a.py': 'a', 'salt/c.py': 'c'})
+        ssh_py_shim.OPTIONS = ssh_py_shim.OBJ()
+        ssh_py_shim.OPTIONS.saltdir = self.saltdir
+        ssh_py_shim.OPTIONS.manifest = self.new_id
+        ssh_py_shim.OPTIONS.delimiter = 'RSTR'
+
+    def tearDown(self):
+        shutil.rmtree(self.cachedir)
+        shutil.rmtree(self.saltdir)
+
+    def _delta(self):
+        delta = salt.utils.thin.gen_thin_delta(self.cachedir,
+                                               self.new_thin,
+                                               self.old_id)
+        delta_path = os.path.join(self.saltdir, 'salt-thin-delta.tgz')
+        shutil.copyfile(delta, delta_path)
+        return delta_path
+
+    def test_gen_thin_delta(self):
+        delta = salt.utils.thin.gen_thin_delta(self.cachedir,
+                                               self.new_thin,
+                                               self.old_id)
+        tfp = tarfile.open(delta, 'r:gz')
+        self.assertEqual(sorted(tfp.getnames()),
+                         ['salt/c.py', 'thin_manifest', 'version'])
+        tfp.close()
+        self.assertEqual(
+            salt.utils.thin.gen_thin_delta(self.cachedir,
+                                           self.new_thin,
+                                           self.old_id),
+            delta)
+        self.assertIsNone(
+            salt.utils.thin.gen_thin_delta(self.cachedir,
+                                           self.new_thin,
+                                           '0' * 40))
+        self.assertIsNone(
+            salt.utils.thin.gen_thin_delta(self.cachedir,
+                                           self.new_thin,
+                                           '../../etc/passwd'))
+
+    def test_unpack_thin_delta(self):
+        ssh_py_shim.unpack_thin_delta(self._delta())
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.saltdir, 'salt'))),
+            ['a.py', 'c.py'])
+        with salt.utils.fopen(os.path.join(self.saltdir, 'version')) as fp_:
+            self.assertEqual(fp_.read(), '2015.8.1')
+        self.assertFalse(
+            os.path.exists(os.path.join(self.saltdir, 'salt-thin-delta.tgz')))
+
+    def test_unpack_thin_delta_mismatch(self):
+        # A file of the deployed thin was changed on the target
+        with salt.utils.fopen(os.path.join(self.saltdir, 'salt/a.py'), 'w') as fp_:
+            fp_.write('changed')
+        delta_path = self._delta()
+        with patch('sys.stdout'), patch('sys.stderr'), \
+                self.assertRaises(SystemExit) as exc:
+            ssh_py_shim.unpack_thin_delta(delta_path)
+        self.assertEqual(exc.exception.code, ssh_py_shim.EX_THIN_DEPLOY)
+
+
+if __name__ == '__main__':
+    from integration import run_tests
+    run_tests(ThinDeltaTestCase, needs_daemon=False)